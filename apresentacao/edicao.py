@@ -0,0 +1,71 @@
+# apresentacao/edicao.py
+#
+# Gravação do editor de painel (formsets aninhados de Tópicos e Cards).
+# Os formulários já validados só são percorridos para SEPARAR as alterações;
+# a gravação é feita em lote dentro de uma transação:
+#   1. uma exclusão por modelo (tópicos excluídos levam os cards junto, em cascata);
+#   2. um bulk_update por modelo para os registros editados;
+#   3. um bulk_create para os tópicos novos e outro para os cards novos.
+# O nº de consultas não depende do tamanho do painel.
+
+from django.db import transaction
+
+from .models import Card, Topico
+
+CAMPOS_TOPICO = ['titulo', 'ordem']
+CAMPOS_CARD = ['titulo', 'metrica', 'valor_formatado', 'cor', 'ordem', 'valor']
+
+
+def _separar(formset):
+    """Divide os formulários de um formset em (novos, alterados, ids_excluidos)."""
+    novos, alterados, excluidos = [], [], []
+    for form in formset.forms:
+        if form in formset.deleted_forms:
+            if form.instance.pk:
+                excluidos.append(form.instance.pk)
+        elif not form.has_changed():
+            continue  # Extra vazio ou registro sem alteração
+        elif form.instance.pk:
+            alterados.append(form.instance)
+        else:
+            novos.append(form.instance)
+    return novos, alterados, excluidos
+
+
+@transaction.atomic
+def salvar_painel(apresentacao, topico_formset, card_formsets):
+    """
+    Grava as alterações do editor. 'card_formsets' tem um CardFormSet por formulário
+    de tópico (mesma ordem de topico_formset.forms), todos já validados.
+    """
+    topicos_novos, topicos_alterados, topicos_excluidos = _separar(topico_formset)
+
+    cards_novos, cards_alterados, cards_excluidos = [], [], []
+    for topico_form, card_formset in zip(topico_formset.forms, card_formsets):
+        if topico_form in topico_formset.deleted_forms:
+            continue  # Os cards saem junto com o tópico
+        novos, alterados, excluidos = _separar(card_formset)
+        for card in novos:
+            card.topico = topico_form.instance  # Tópico novo: o PK só existe após o bulk_create
+        cards_novos += novos
+        cards_alterados += alterados
+        cards_excluidos += excluidos
+
+    # Exclusões primeiro: liberam a 'ordem' (unique por tópico) para os cards novos/editados
+    if cards_excluidos:
+        Card.objects.filter(pk__in=cards_excluidos).delete()
+    if topicos_excluidos:
+        Topico.objects.filter(pk__in=topicos_excluidos, apresentacao=apresentacao).delete()
+
+    if topicos_alterados:
+        Topico.objects.bulk_update(topicos_alterados, CAMPOS_TOPICO)
+    if cards_alterados:
+        Card.objects.bulk_update(cards_alterados, CAMPOS_CARD)
+
+    for topico in topicos_novos:
+        topico.apresentacao = apresentacao
+    Topico.objects.bulk_create(topicos_novos)
+
+    # Tópico novo que não entrou no lote (formulário vazio) não leva cards
+    cards_novos = [card for card in cards_novos if card.topico.pk]
+    Card.objects.bulk_create(cards_novos)
@@ -1,10 +1,21 @@
 # apresentacao/forms.py
 from django import forms
-from django.forms.models import inlineformset_factory
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet, inlineformset_factory
 from .models import Apresentacao, Topico, Card
+from .metricas import opcoes_metricas
 
 # 1. Formulário principal (para a data)
 class ApresentacaoForm(forms.ModelForm):
+    # Opcional: cria o novo painel com os tópicos/cards de um painel anterior
+    copiar_de = forms.ModelChoiceField(
+        queryset=Apresentacao.objects.all(),
+        required=False,
+        empty_label='Painel em branco',
+        label='Copiar estrutura de',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
     class Meta:
         model = Apresentacao
         fields = ['data_apresentacao']
@@ -12,17 +23,32 @@ class ApresentacaoForm(forms.ModelForm):
             'data_apresentacao': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
         }
 
+# Base dos formulários do editor (Tópicos e Cards)
+class EdicaoForm(forms.ModelForm):
+    def validate_unique(self):
+        # A unicidade (ex.: tópico + ordem) é conferida pelo formset, em memória, entre todos os
+        # registros do pai (já carregados), e não por um SELECT por formulário
+        pass
+
+
 # 2. Formulário para cada Card (a métrica individual)
-class CardForm(forms.ModelForm):
+class CardForm(EdicaoForm):
     # Definir 'valor' como HiddenInput se você usar 'valor_formatado' como o campo principal
     valor = forms.DecimalField(
         required=False, 
         widget=forms.HiddenInput(),
     ) 
 
+    # Métrica vinculada: o valor é preenchido na publicação do painel
+    metrica = forms.ChoiceField(
+        required=False,
+        choices=opcoes_metricas,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
+    )
+
     class Meta:
         model = Card
-        fields = ['titulo', 'valor_formatado', 'cor', 'ordem', 'valor', 'id']
+        fields = ['titulo', 'metrica', 'valor_formatado', 'cor', 'ordem', 'valor', 'id']
         widgets = {
             'titulo': forms.TextInput(attrs={'class': 'form-control form-control-sm'}),
             'valor_formatado': forms.TextInput(attrs={'class': 'form-control form-control-sm', 'placeholder': 'Ex: R$ 50k ou 98.5%'}),
@@ -32,19 +58,79 @@ class CardForm(forms.ModelForm):
             'id': forms.HiddenInput(),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Card vinculado a métrica não precisa de valor digitado
+        self.fields['valor_formatado'].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('metrica') and not cleaned_data.get('valor_formatado') and not cleaned_data.get('DELETE'):
+            self.add_error('valor_formatado', 'Informe o valor ou vincule uma métrica.')
+        return cleaned_data
+
+# Campo 'id' dos formsets: resolve o registro entre os já carregados pelo formset,
+# em vez de um SELECT por formulário (o padrão do ModelChoiceField)
+class IdCarregadoField(forms.ModelChoiceField):
+    def __init__(self, *args, objetos=None, **kwargs):
+        self.objetos = objetos
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objetos[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
+class BaseEdicaoFormSet(BaseInlineFormSet):
+    """
+    Formset do editor de painel: as consultas saem do registro pai já carregado.
+    - get_queryset(): usa os filhos pré-carregados (prefetch_related) quando existirem;
+    - add_fields(): troca o campo 'id' por IdCarregadoField.
+    """
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            cache = getattr(self.instance, '_prefetched_objects_cache', {})
+            relacao = self.fk.remote_field.get_accessor_name()
+            if self.instance.pk and relacao in cache:
+                self._queryset = cache[relacao]
+            elif self.instance.pk:
+                self._queryset = super().get_queryset()
+            else:
+                self._queryset = self.model._default_manager.none()
+        return self._queryset
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if not hasattr(self, '_objetos_carregados'):
+            self._objetos_carregados = {obj.pk: obj for obj in self.get_queryset()}
+        campo = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = IdCarregadoField(
+            campo.queryset,
+            objetos=self._objetos_carregados,
+            initial=campo.initial,
+            required=False,
+            widget=campo.widget,
+        )
+
+
 # 3. Formset de Cards (Permite múltiplos cards dentro de um tópico)
 CardFormSet = inlineformset_factory(
     Topico, # Modelo Pai
     Card,   # Modelo Filho
     form=CardForm,
-    fields=['titulo', 'valor_formatado', 'cor', 'ordem', 'valor'],
+    formset=BaseEdicaoFormSet,
+    fields=['titulo', 'metrica', 'valor_formatado', 'cor', 'ordem', 'valor'],
     extra=1, # Adiciona 1 formulário vazio por padrão
     can_delete=True # Permite excluir cards
 )
 
 
 # 4. Formulário para cada Tópico
-class TopicoForm(forms.ModelForm):
+class TopicoForm(EdicaoForm):
     class Meta:
         model = Topico
         fields = ['titulo', 'ordem', 'id']
@@ -59,6 +145,7 @@ TopicoFormSet = inlineformset_factory(
     Apresentacao, # Modelo Pai
     Topico,       # Modelo Filho
     form=TopicoForm,
+    formset=BaseEdicaoFormSet,
     fields=['titulo', 'ordem', 'id'],
     extra=1,
     can_delete=True,
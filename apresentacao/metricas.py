@@ -0,0 +1,129 @@
+# apresentacao/metricas.py
+#
+# Registro das métricas que um Card da apresentação pode vincular.
+# Cada métrica pertence a uma FONTE; a fonte calcula TODAS as suas métricas para
+# a data da apresentação numa única consulta agregada. Ao publicar um painel,
+# cada fonte usada pelos cards é avaliada uma vez só (avaliar_metricas).
+
+from django.db.models import Count, Q
+
+from collection_pool.models import Pool
+from logistica.models import DadosDiariosLogistica
+from logistica.series import METRICAS as METRICAS_LOGISTICA
+from onhold.models import OnHold
+from parcel_lost.models import ParcelLost
+from parcel_sweeper.kpis import calcular_kpis, filtrar_parcelas
+from parcel_sweeper.models import Parcel
+
+
+def _fonte_onhold(data):
+    totais = OnHold.objects.filter(data_envio=data).aggregate(
+        total=Count('id'),
+        rastreios_unicos=Count('sls_tracking_number', distinct=True),
+        a_devolver=Count('id', filter=Q(status='OnHold')),
+        devolvidos=Count('id', filter=Q(status='LMHub_Received')),
+        volumosos=Count('id', filter=Q(onhold_reason='Insufficient Vehicle Capacity', status='LMHub_Received')),
+        perdidos=Count('id', filter=Q(onhold_reason='Parcel lost', status='OnHold')),
+        wrongly_assigned=Count('id', filter=Q(onhold_reason='Wrongly assigned', status='OnHold')),
+    )
+    totais['taxa_devolucao'] = totais['devolvidos'] * 100 / totais['total'] if totais['total'] else 0
+    return totais
+
+
+def _fonte_parcel(data):
+    return calcular_kpis(filtrar_parcelas(Parcel.objects.all(), data, data))
+
+
+def _fonte_pool(data):
+    return Pool.objects.filter(data_envio_arquivo=data).aggregate(
+        total=Count('id'),
+        recebidos=Count('id', filter=Q(status='LMHub_Received')),
+    )
+
+
+def _fonte_lost(data):
+    return ParcelLost.objects.filter(data_registro=data).aggregate(
+        total=Count('id'),
+        **{
+            status.lower(): Count('id', filter=Q(final_status_avaria=status))
+            for status, _ in ParcelLost.STATUS_CHOICES
+        },
+    )
+
+
+def _fonte_logistica(data):
+    return DadosDiariosLogistica.objects.filter(data_envio=data).values(*METRICAS_LOGISTICA).first() or {}
+
+
+# fonte -> rótulo e função (data -> dict com os valores das métricas da fonte)
+FONTES = {
+    'onhold': {'nome': 'OnHold', 'calcular': _fonte_onhold},
+    'parcel': {'nome': 'Parcel Sweeper', 'calcular': _fonte_parcel},
+    'pool': {'nome': 'Collection Pool', 'calcular': _fonte_pool},
+    'lost': {'nome': 'Lost/Damage', 'calcular': _fonte_lost},
+    'logistica': {'nome': 'Logística', 'calcular': _fonte_logistica},
+}
+
+# slug -> nome, fonte, chave no dict da fonte e formato de exibição ('inteiro' ou 'percentual')
+METRICAS = {
+    'onhold.total': {'nome': 'Total OnHold', 'fonte': 'onhold', 'chave': 'total'},
+    'onhold.rastreios_unicos': {'nome': 'Rastreios Únicos OnHold', 'fonte': 'onhold', 'chave': 'rastreios_unicos'},
+    'onhold.a_devolver': {'nome': 'OnHold a Devolver', 'fonte': 'onhold', 'chave': 'a_devolver'},
+    'onhold.devolvidos': {'nome': 'OnHold Devolvidos', 'fonte': 'onhold', 'chave': 'devolvidos'},
+    'onhold.taxa_devolucao': {'nome': 'Taxa de Devolução OnHold', 'fonte': 'onhold', 'chave': 'taxa_devolucao', 'formato': 'percentual'},
+    'onhold.volumosos': {'nome': 'Volumosos no HUB', 'fonte': 'onhold', 'chave': 'volumosos'},
+    'onhold.perdidos': {'nome': 'OnHold Perdidos (PNR)', 'fonte': 'onhold', 'chave': 'perdidos'},
+    'onhold.wrongly_assigned': {'nome': 'OnHold Atribuição Errada', 'fonte': 'onhold', 'chave': 'wrongly_assigned'},
+
+    'parcel.total': {'nome': 'Total Parcel Sweeper', 'fonte': 'parcel', 'chave': 'total_registros'},
+    'parcel.backlog_total': {'nome': 'Backlog Total', 'fonte': 'parcel', 'chave': 'backlog_total'},
+    'parcel.backlog_pronto': {'nome': 'Backlog Pronto para Entrega', 'fonte': 'parcel', 'chave': 'backlog_green_count'},
+    'parcel.backlog_agarrado': {'nome': 'Backlog Agarrado no HUB', 'fonte': 'parcel', 'chave': 'backlog_red_count'},
+    'parcel.missing_hub': {'nome': 'Missing no HUB', 'fonte': 'parcel', 'chave': 'kpi_missing_hub'},
+    'parcel.missing_nao_hub': {'nome': 'Missing Não Recebidos no HUB', 'fonte': 'parcel', 'chave': 'missing_nao_hub_count'},
+    'parcel.lost_damage': {'nome': 'Lost/Damage no Sweeper', 'fonte': 'parcel', 'chave': 'lost_parcels_count'},
+
+    'pool.total': {'nome': 'Total Collection Pool', 'fonte': 'pool', 'chave': 'total'},
+    'pool.recebidos': {'nome': 'Pool Recebidos no HUB', 'fonte': 'pool', 'chave': 'recebidos'},
+
+    'lost.total': {'nome': 'Perdas e Avarias Registradas', 'fonte': 'lost', 'chave': 'total'},
+    'lost.soc_lost': {'nome': 'SOC - Lost', 'fonte': 'lost', 'chave': 'soc_lost'},
+    'lost.soc_damage': {'nome': 'SOC - Damage', 'fonte': 'lost', 'chave': 'soc_damage'},
+    'lost.hub_lost': {'nome': 'HUB - Lost', 'fonte': 'lost', 'chave': 'hub_lost'},
+    'lost.hub_damage': {'nome': 'HUB - Damage', 'fonte': 'lost', 'chave': 'hub_damage'},
+}
+
+# Logística: todas as métricas diárias de DadosDiariosLogistica
+METRICAS.update({
+    f'logistica.{campo}': {'nome': rotulo, 'fonte': 'logistica', 'chave': campo}
+    for campo, rotulo in METRICAS_LOGISTICA.items()
+})
+
+
+def opcoes_metricas():
+    """Choices agrupados por fonte para o <select> do card (vazio = valor manual)."""
+    grupos = {fonte: [] for fonte in FONTES}
+    for slug, metrica in METRICAS.items():
+        grupos[metrica['fonte']].append((slug, metrica['nome']))
+    return [('', 'Valor manual')] + [(FONTES[fonte]['nome'], opcoes) for fonte, opcoes in grupos.items()]
+
+
+def formatar(valor, formato='inteiro'):
+    """Valor de exibição no padrão brasileiro: 1.234 / 98,50%."""
+    if valor is None:
+        return '-'
+    if formato == 'percentual':
+        return f"{valor:,.2f}%".replace(',', 'X').replace('.', ',').replace('X', '.')
+    return f"{valor:,.0f}".replace(',', '.')
+
+
+def avaliar_metricas(slugs, data):
+    """
+    Valores das métricas para a data: {slug: valor}.
+    Cada fonte necessária é calculada UMA vez, por mais cards que a usem.
+    """
+    slugs = [slug for slug in set(slugs) if slug in METRICAS]
+    resultados = {}
+    for fonte in {METRICAS[slug]['fonte'] for slug in slugs}:
+        resultados[fonte] = FONTES[fonte]['calcular'](data)
+    return {slug: resultados[METRICAS[slug]['fonte']].get(METRICAS[slug]['chave']) for slug in slugs}
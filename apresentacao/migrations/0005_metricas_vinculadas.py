@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apresentacao', '0004_delete_dadosdiarios_alter_apresentacao_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apresentacao',
+            name='publicado_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Publicado em'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='metrica',
+            field=models.CharField(blank=True, default='', max_length=60, verbose_name='Métrica Vinculada'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.db import models
 class Apresentacao(models.Model):
     data_apresentacao = models.DateField(unique=True, verbose_name="Data da Apresentação")
     data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação do Registro") # <--- CAMPO ADICIONADO
+    # Quando os cards vinculados a métricas tiveram o valor gravado (apresentacao/publicacao.py)
+    publicado_em = models.DateTimeField(null=True, blank=True, verbose_name="Publicado em")
     
     class Meta:
         verbose_name = "Apresentação"
@@ -48,6 +50,9 @@ class Card(models.Model):
     titulo = models.CharField(max_length=100, verbose_name="Título do Card")
     valor = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True, verbose_name="Valor Numérico Real")
     valor_formatado = models.CharField(max_length=50, verbose_name="Valor para Exibição (Ex: R$ 50k / 98.5%)")
+    # Métrica vinculada (slug de apresentacao/metricas.py). Vazio = valor digitado à mão.
+    # Na publicação, valor e valor_formatado recebem o valor da métrica na data da apresentação.
+    metrica = models.CharField(max_length=60, blank=True, default='', verbose_name="Métrica Vinculada")
     cor = models.CharField(max_length=10, choices=TIPO_CORES, default='primary', verbose_name="Cor de Destaque")
     ordem = models.IntegerField(default=1, verbose_name="Ordem de Exibição")
 
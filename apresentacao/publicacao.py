@@ -0,0 +1,61 @@
+# apresentacao/publicacao.py
+#
+# Publicação e cópia de painéis.
+# - publicar(): avalia as métricas vinculadas aos cards (uma passada por fonte) e
+#   grava o resultado em valor/valor_formatado. A visualização (detalhe_apresentacao)
+#   só lê esse retrato: nenhuma métrica é recalculada ao exibir o painel.
+# - copiar_estrutura(): replica tópicos e cards de outro painel (sem digitação manual).
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .metricas import METRICAS, avaliar_metricas, formatar
+from .models import Card, Topico
+
+
+def publicar(apresentacao):
+    """Grava o valor atual das métricas vinculadas nos cards do painel. Retorna o nº de cards atualizados."""
+    cards = list(Card.objects.filter(topico__apresentacao=apresentacao).exclude(metrica=''))
+    valores = avaliar_metricas([card.metrica for card in cards], apresentacao.data_apresentacao)
+
+    atualizados = []
+    for card in cards:
+        if card.metrica not in METRICAS:
+            continue  # Métrica removida do registro: mantém o último retrato
+        valor = valores.get(card.metrica)
+        card.valor = Decimal(str(round(valor, 2))) if valor is not None else None
+        card.valor_formatado = formatar(valor, METRICAS[card.metrica].get('formato', 'inteiro'))
+        atualizados.append(card)
+
+    with transaction.atomic():
+        Card.objects.bulk_update(atualizados, ['valor', 'valor_formatado'])
+        apresentacao.publicado_em = timezone.now()
+        apresentacao.save(update_fields=['publicado_em'])
+    return len(atualizados)
+
+
+@transaction.atomic
+def copiar_estrutura(origem, destino):
+    """Copia os tópicos e cards (com as métricas vinculadas) de 'origem' para 'destino'."""
+    topicos_origem = list(origem.topicos.prefetch_related('cards'))
+    novos_topicos = Topico.objects.bulk_create([
+        Topico(apresentacao=destino, titulo=topico.titulo, ordem=topico.ordem)
+        for topico in topicos_origem
+    ])
+    Card.objects.bulk_create([
+        Card(
+            topico=novo,
+            titulo=card.titulo,
+            metrica=card.metrica,
+            # Cards manuais levam o último valor digitado; os vinculados são recalculados na publicação
+            valor=card.valor,
+            valor_formatado=card.valor_formatado,
+            cor=card.cor,
+            ordem=card.ordem,
+        )
+        for topico, novo in zip(topicos_origem, novos_topicos)
+        for card in topico.cards.all()
+    ])
+    return len(novos_topicos)
@@ -0,0 +1,184 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from collection_pool.models import Pool
+from core.testing import orcamento_consultas
+from onhold.models import OnHold
+
+from .models import Apresentacao, Card, Topico
+from .publicacao import publicar
+
+
+def _gestao(prefixo, total, iniciais):
+    return {
+        f'{prefixo}-TOTAL_FORMS': str(total),
+        f'{prefixo}-INITIAL_FORMS': str(iniciais),
+        f'{prefixo}-MIN_NUM_FORMS': '0',
+        f'{prefixo}-MAX_NUM_FORMS': '1000',
+    }
+
+
+def _card(prefixo, i, card=None, **campos):
+    dados = {
+        'id': card.pk if card else '',
+        'titulo': card.titulo if card else '',
+        'metrica': card.metrica if card else '',
+        'valor_formatado': card.valor_formatado if card else '',
+        'cor': card.cor if card else 'primary',
+        'ordem': card.ordem if card else i + 1,
+        'valor': '',
+    }
+    dados.update(campos)
+    return {f'{prefixo}-{i}-{campo}': valor for campo, valor in dados.items()}
+
+
+class EdicaoPainelTest(TestCase):
+    """O editor grava o painel em lote: o nº de consultas não depende do tamanho do painel."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('editor', password='editor'))
+
+    def _painel(self, dia, topicos, cards):
+        apresentacao = Apresentacao.objects.create(data_apresentacao=dia)
+        criados = Topico.objects.bulk_create(
+            [Topico(apresentacao=apresentacao, titulo=f'Tópico {t}', ordem=t + 1) for t in range(topicos)]
+        )
+        Card.objects.bulk_create([
+            Card(topico=topico, titulo=f'Card {c}', valor_formatado=str(c), ordem=c + 1)
+            for topico in criados for c in range(cards)
+        ])
+        return apresentacao
+
+    def _dados(self, apresentacao, sufixo='', excluir_topicos=(), excluir_cards=()):
+        """POST do editor com todos os tópicos e cards do painel (títulos + sufixo)."""
+        topicos = list(apresentacao.topicos.prefetch_related('cards'))
+        dados = _gestao('topico', len(topicos), len(topicos))
+        for t, topico in enumerate(topicos):
+            dados.update({
+                f'topico-{t}-id': topico.pk,
+                f'topico-{t}-titulo': topico.titulo + sufixo,
+                f'topico-{t}-ordem': topico.ordem,
+            })
+            if topico.pk in excluir_topicos:
+                dados[f'topico-{t}-DELETE'] = 'on'
+            cards = list(topico.cards.all())
+            prefixo = f'card-{topico.pk}'
+            dados.update(_gestao(prefixo, len(cards), len(cards)))
+            for c, card in enumerate(cards):
+                dados.update(_card(prefixo, c, card, titulo=card.titulo + sufixo))
+                if card.pk in excluir_cards:
+                    dados[f'{prefixo}-{c}-DELETE'] = 'on'
+        return dados
+
+    def _salvar(self, apresentacao, dados):
+        with orcamento_consultas(50, ignorar_autenticacao=True) as orcamento:
+            resposta = self.client.post(reverse('apresentacao:editar_apresentacao', args=[apresentacao.pk]), dados)
+        self.assertRedirects(
+            resposta, reverse('apresentacao:detalhe_apresentacao', args=[apresentacao.pk]), fetch_redirect_response=False
+        )
+        return len(orcamento.consultas)
+
+    def test_consultas_nao_dependem_do_tamanho(self):
+        pequeno = self._painel(date(2031, 1, 1), topicos=1, cards=1)
+        grande = self._painel(date(2031, 1, 2), topicos=6, cards=8)
+
+        consultas_pequeno = self._salvar(pequeno, self._dados(pequeno, ' (editado)'))
+        consultas_grande = self._salvar(grande, self._dados(grande, ' (editado)'))
+        self.assertEqual(consultas_pequeno, consultas_grande)
+        self.assertEqual(Card.objects.filter(topico__apresentacao=grande, titulo__endswith='(editado)').count(), 48)
+
+    def test_topico_novo_com_cards(self):
+        apresentacao = self._painel(date(2031, 1, 1), topicos=1, cards=1)
+        dados = self._dados(apresentacao)
+        # Tópico novo no índice 1: os cards vêm com o prefixo do formulário ('card-topico-1')
+        dados.update(_gestao('topico', 2, 1))
+        dados.update({'topico-1-id': '', 'topico-1-titulo': 'Novo', 'topico-1-ordem': 2})
+        dados.update(_gestao('card-topico-1', 2, 0))
+        dados.update(_card('card-topico-1', 0, titulo='A', valor_formatado='1'))
+        dados.update(_card('card-topico-1', 1, titulo='B', valor_formatado='2'))
+
+        self._salvar(apresentacao, dados)
+        novo = Topico.objects.get(apresentacao=apresentacao, titulo='Novo')
+        self.assertEqual(list(novo.cards.values_list('titulo', flat=True)), ['A', 'B'])
+
+    def test_exclusoes(self):
+        apresentacao = self._painel(date(2031, 1, 1), topicos=2, cards=2)
+        fica, sai = apresentacao.topicos.all()
+        card_excluido = fica.cards.get(ordem=1)
+
+        dados = self._dados(apresentacao, excluir_topicos=[sai.pk], excluir_cards=[card_excluido.pk])
+        # Card novo com a 'ordem' do excluído: a exclusão vem antes da inclusão
+        prefixo = f'card-{fica.pk}'
+        dados.update(_gestao(prefixo, 3, 2))
+        dados.update(_card(prefixo, 2, titulo='Substituto', valor_formatado='9', ordem=1))
+
+        self._salvar(apresentacao, dados)
+        self.assertEqual(list(apresentacao.topicos.values_list('pk', flat=True)), [fica.pk])
+        self.assertFalse(Card.objects.filter(topico_id=sai.pk).exists())
+        self.assertEqual(
+            list(fica.cards.values_list('titulo', 'ordem')), [('Substituto', 1), ('Card 1', 2)]
+        )
+
+
+class PublicacaoTest(TestCase):
+    """A publicação avalia cada fonte uma vez; a visualização só lê o retrato gravado."""
+
+    DIA = date(2031, 1, 1)
+    TABELAS_FONTES = (OnHold._meta.db_table, Pool._meta.db_table)
+
+    def setUp(self):
+        OnHold.objects.bulk_create([
+            OnHold(data_envio=self.DIA, status='OnHold'),
+            OnHold(data_envio=self.DIA, status='LMHub_Received'),
+            OnHold(data_envio=self.DIA, status='LMHub_Received'),
+        ])
+        Pool.objects.create(shipment_id='BR1', data_envio_arquivo=self.DIA, status='LMHub_Received')
+        self.apresentacao = Apresentacao.objects.create(data_apresentacao=self.DIA)
+        topico = Topico.objects.create(apresentacao=self.apresentacao, titulo='KPIs')
+        metricas = ['onhold.total', 'onhold.devolvidos', 'onhold.taxa_devolucao', 'pool.total', 'pool.recebidos']
+        Card.objects.bulk_create([
+            Card(topico=topico, titulo=metrica, metrica=metrica, valor_formatado='', ordem=i + 1)
+            for i, metrica in enumerate(metricas)
+        ])
+
+    def _consultas_fontes(self, orcamento):
+        return {
+            tabela: sum(f'"{tabela}"' in sql for sql in orcamento.consultas)
+            for tabela in self.TABELAS_FONTES
+        }
+
+    def _valores(self):
+        return dict(Card.objects.filter(topico__apresentacao=self.apresentacao).values_list('metrica', 'valor_formatado'))
+
+    def test_um_agregado_por_fonte(self):
+        with orcamento_consultas(10) as orcamento:
+            self.assertEqual(publicar(self.apresentacao), 5)
+        self.assertEqual(self._consultas_fontes(orcamento), {tabela: 1 for tabela in self.TABELAS_FONTES})
+        self.assertEqual(self._valores(), {
+            'onhold.total': '3', 'onhold.devolvidos': '2', 'onhold.taxa_devolucao': '66,67%',
+            'pool.total': '1', 'pool.recebidos': '1',
+        })
+
+    def test_detalhe_le_o_retrato_gravado(self):
+        publicar(self.apresentacao)
+        OnHold.objects.create(data_envio=self.DIA, status='OnHold')  # Depois da publicação: não aparece
+        self.client.force_login(get_user_model().objects.create_user('painel', password='painel'))
+
+        with orcamento_consultas(10, ignorar_autenticacao=True) as orcamento:
+            resposta = self.client.get(reverse('apresentacao:detalhe_apresentacao', args=[self.apresentacao.pk]))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(self._consultas_fontes(orcamento), {tabela: 0 for tabela in self.TABELAS_FONTES})
+        self.assertContains(resposta, '66,67%')
+
+    def test_metrica_removida_mantem_o_ultimo_retrato(self):
+        publicar(self.apresentacao)
+        Card.objects.filter(metrica='pool.total').update(metrica='pool.descontinuada')
+
+        with orcamento_consultas(10) as orcamento:
+            self.assertEqual(publicar(self.apresentacao), 4)
+        self.assertEqual(self._valores()['pool.descontinuada'], '1')
+        # A fonte do Pool continua avaliada uma vez, pelo card que ainda a usa
+        self.assertEqual(self._consultas_fontes(orcamento)[Pool._meta.db_table], 1)
@@ -13,4 +13,7 @@ urlpatterns = [
     
     # Tela de Edição Dinâmica (com Formsets Aninhados)
     path('editar/<int:pk>/', views.editar_apresentacao, name='editar_apresentacao'),
+
+    # Publicação: grava o valor das métricas vinculadas nos cards
+    path('publicar/<int:pk>/', views.publicar_apresentacao, name='publicar_apresentacao'),
 ]
\ No newline at end of file
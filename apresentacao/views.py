@@ -1,8 +1,13 @@
 # apresentacao/views.py
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.db import IntegrityError
+from django.views.decorators.http import require_POST
 from .models import Apresentacao, Topico
 from .forms import ApresentacaoForm, TopicoFormSet, CardFormSet # Importa os Formsets
+from .publicacao import publicar, copiar_estrutura
+from .edicao import salvar_painel
 
 @login_required
 def selecionar_apresentacao(request):
@@ -14,6 +19,13 @@ def selecionar_apresentacao(request):
         form = ApresentacaoForm(request.POST)
         if form.is_valid():
             apresentacao = form.save()
+            origem = form.cleaned_data.get('copiar_de')
+            if origem:
+                # Painel copiado: mesma estrutura, métricas recalculadas para a nova data
+                copiar_estrutura(origem, apresentacao)
+                publicar(apresentacao)
+                messages.success(request, f'Painel criado a partir de {origem} e publicado.')
+                return redirect('apresentacao:detalhe_apresentacao', pk=apresentacao.pk)
             # Redireciona para a página de EDIÇÃO após a criação
             return redirect('apresentacao:editar_apresentacao', pk=apresentacao.pk) 
     else:
@@ -32,6 +44,7 @@ def detalhe_apresentacao(request, pk):
     apresentacao = get_object_or_404(Apresentacao, pk=pk)
     
     # Busca os tópicos e, por meio do 'related_name', os cards de cada um
+    # 💡 Os cards vinculados a métricas exibem o retrato gravado na publicação (nada é recalculado aqui)
     topicos = apresentacao.topicos.prefetch_related('cards').all()
     
     context = {
@@ -42,81 +55,63 @@ def detalhe_apresentacao(request, pk):
     return render(request, 'apresentacao/detalhe_apresentacao.html', context)
 
 
+@login_required
+@require_POST
+def publicar_apresentacao(request, pk):
+    """Grava nos cards o valor atual das métricas vinculadas (retrato exibido no painel)."""
+    apresentacao = get_object_or_404(Apresentacao, pk=pk)
+    total = publicar(apresentacao)
+    messages.success(request, f'Painel publicado: {total} card(s) vinculados a métricas atualizados.')
+    return redirect('apresentacao:detalhe_apresentacao', pk=apresentacao.pk)
+
+
+def _prefixo_cards(topico_form):
+    # Tópico existente: prefixo pelo PK. Tópico novo: pelo prefixo do formulário (o mesmo gerado pelo JavaScript)
+    return f'card-{topico_form.instance.pk}' if topico_form.instance.pk else f'card-{topico_form.prefix}'
+
+
 @login_required
 def editar_apresentacao(request, pk):
     """
     Página de edição customizada (Frontend) para Tópicos e Cards
     usando Inline Formsets aninhados.
     """
-    apresentacao = get_object_or_404(Apresentacao, pk=pk)
+    # 💡 Tópicos e cards carregados de uma vez: os formsets não consultam o banco por tópico
+    apresentacao = get_object_or_404(
+        Apresentacao.objects.prefetch_related('topicos__cards'), pk=pk
+    )
     
     # 1. Cria o Formset de Tópicos (Pai)
     topico_formset = TopicoFormSet(request.POST or None, instance=apresentacao, prefix='topico')
     
+    # 2. Um Formset de Cards (Filho) por formulário de tópico
     card_formsets = []
-    has_error = False
+    for topico_form in topico_formset:
+        card_formset = CardFormSet(request.POST or None, instance=topico_form.instance, prefix=_prefixo_cards(topico_form))
+        topico_form.card_formset = card_formset  # Usado pelo template para renderizar os cards do tópico
+        card_formsets.append(card_formset)
 
     if request.method == 'POST':
-        if topico_formset.is_valid():
-            
-            # Processa Tópicos (salva com commit=False para ter as instâncias)
-            topico_instances = topico_formset.save(commit=False)
-            
-            # 2. Loop para processar e validar os Formsets de Cards (Filho)
-            for i, topico_form in enumerate(topico_formset):
-                
-                # Apenas processa se for um formulário válido e não marcado para exclusão
-                if topico_form.is_valid() and not topico_form.cleaned_data.get('DELETE'):
-                    
-                    # Salva o tópico temporariamente para obter uma instância (PK) se for novo
-                    topico_instance = topico_form.save() 
-                    
-                    # Recria o CardFormSet para o tópico atual
-                    # Usa o PK do tópico (ou o índice 'i' se for um formulário extra novo) como parte do prefixo
-                    prefix_key = topico_instance.pk if topico_instance.pk else i
-                    current_card_formset = CardFormSet(
-                        request.POST, 
-                        instance=topico_instance, 
-                        prefix=f'card-{prefix_key}'
-                    )
-                    card_formsets.append(current_card_formset)
-                    
-                    if current_card_formset.is_valid():
-                        # Salva Cards, atribuindo a instância do Tópico
-                        for card_form in current_card_formset.save(commit=False):
-                            card_form.topico = topico_instance
-                            card_form.save()
-                        current_card_formset.save_m2m()
-                        
-                        # Processa exclusões
-                        for obj in current_card_formset.deleted_objects:
-                            obj.delete()
-
-                    else:
-                        # Se houver erro, setar a flag de erro e interromper
-                        has_error = True
-                        break 
-                elif topico_form.cleaned_data.get('DELETE'):
-                    # Tópico marcado para exclusão (será excluído abaixo)
-                    continue
-
-
-            # 3. Salva ou Deleta Tópicos (apenas se não houver erro nos Cards)
-            if not has_error:
-                topico_formset.save() # Salva tópicos novos/editados e deleta os marcados
+        # Cards de tópicos excluídos não são validados (saem junto com o tópico)
+        # (lista completa, e não um gerador, para que os erros de todos os tópicos apareçam)
+        cards_validos = all([
+            card_formset.is_valid()
+            for topico_form, card_formset in zip(topico_formset.forms, card_formsets)
+            if not (topico_form.is_valid() and topico_form.cleaned_data.get('DELETE'))
+        ])
+        if topico_formset.is_valid() and cards_validos:
+            # 3. Grava tudo em lote, numa única transação
+            try:
+                salvar_painel(apresentacao, topico_formset, card_formsets)
                 return redirect('apresentacao:detalhe_apresentacao', pk=apresentacao.pk)
-            # Se houver erro, o código continua para a renderização com erros
+            except IntegrityError:
+                # Ex.: troca de 'ordem' entre dois cards (a unicidade é conferida linha a linha no UPDATE)
+                messages.error(request, 'Não foi possível salvar: ordem de exibição repetida. Nada foi alterado.')
+        # Se houver erro, o código continua para a renderização com erros
 
-    # 4. GET ou POST com erro: Configura Formsets para renderizar
-    else:
-        # Para GET, ou se houve erro no POST, preenche a lista de CardFormSets
-        for topico in apresentacao.topicos.all():
-            card_formsets.append(
-                CardFormSet(instance=topico, prefix=f'card-{topico.pk}')
-            )
-            
     # O formulário vazio de Card para o template vazio de Tópico (para o JavaScript clonar)
-    empty_card_formset_instance = CardFormSet(instance=Topico(), prefix='card-__prefix__')
+    # Nomes 'card-__topico_prefix__-__prefix__-<campo>': o JavaScript troca pelo prefixo do tópico e pelo índice do card
+    empty_card_formset_instance = CardFormSet(instance=Topico(), prefix='card-__topico_prefix__')
 
     context = {
         'titulo': f'Editar Painel: {apresentacao.data_apresentacao.strftime("%d/%m/%Y")}',
@@ -126,4 +121,4 @@ def editar_apresentacao(request, pk):
         # O formulário de card vazio para o JavaScript
         'empty_card_form': empty_card_formset_instance.empty_form, 
     }
-    return render(request, 'apresentacao/editar_apresentacao.html', context)
\ No newline at end of file
+    return render(request, 'apresentacao/editar_apresentacao.html', context)
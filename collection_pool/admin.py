@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CidadeCEP
+
+
+@admin.register(CidadeCEP)
+class CidadeCEPAdmin(admin.ModelAdmin):
+    list_display = ('cep', 'cidade', 'origem', 'ocorrencias', 'atualizado_em')
+    list_filter = ('origem',)
+    search_fields = ('cep', 'cidade')
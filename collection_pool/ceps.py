@@ -0,0 +1,122 @@
+# collection_pool/ceps.py
+#
+# Tabela CEP -> cidade (CidadeCEP), lida pelas views no lugar de uma API externa:
+# - o upload do Pool recalcula as cidades a partir da própria base (atualizar_do_pool);
+# - o comando atualizar_ceps --viacep busca no ViaCEP só os CEPs que ainda faltam
+#   (fora da requisição, com pausa entre as chamadas);
+# - as views leem apenas os CEPs que vão exibir (cidades_dos_ceps), sem HTTP.
+
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.db.models import Count
+
+from .models import CidadeCEP, Pool
+
+logger = logging.getLogger(__name__)
+
+URL_VIACEP = 'https://viacep.com.br/ws/{cep}/json/'
+TAMANHO_CIDADE = CidadeCEP._meta.get_field('cidade').max_length
+
+
+def digitos_cep(cep):
+    """Só os dígitos do CEP ('36880-000' -> '36880000')."""
+    return ''.join(filter(str.isdigit, cep or ''))
+
+
+def escolher_cidade(contagens):
+    """
+    Cidade de um CEP a partir de {cidade: linhas}: a mais frequente; no empate, a
+    primeira em ordem alfabética (o resultado não depende da ordem de leitura).
+    """
+    return min(contagens.items(), key=lambda item: (-item[1], item[0]))
+
+
+def atualizar_do_pool():
+    """
+    Recalcula as cidades dos CEPs a partir do Pool: uma consulta agrupada por
+    (CEP, cidade) e um upsert. As linhas vindas do ViaCEP não são tocadas, e os CEPs
+    que saíram do Pool continuam na tabela (a cidade de um CEP não muda).
+    Retorna quantos CEPs foram gravados.
+    """
+    contagens = defaultdict(Counter)
+    pares = (
+        Pool.objects.exclude(city__isnull=True).exclude(zipcode__isnull=True)
+        .values_list('zipcode', 'city').annotate(linhas=Count('id')).order_by()
+    )
+    for zipcode, city, linhas in pares:
+        cep, cidade = digitos_cep(zipcode), city.strip()[:TAMANHO_CIDADE]
+        if len(cep) == 8 and cidade:
+            contagens[cep][cidade] += linhas
+
+    do_viacep = set(
+        CidadeCEP.objects.filter(origem=CidadeCEP.ORIGEM_VIACEP, cep__in=list(contagens))
+        .values_list('cep', flat=True)
+    )
+    linhas = [
+        CidadeCEP(cep=cep, cidade=cidade, origem=CidadeCEP.ORIGEM_POOL, ocorrencias=ocorrencias)
+        for cep, cidades in contagens.items() if cep not in do_viacep
+        for cidade, ocorrencias in [escolher_cidade(cidades)]
+    ]
+    CidadeCEP.objects.bulk_create(
+        linhas, batch_size=1000, update_conflicts=True, unique_fields=['cep'],
+        update_fields=['cidade', 'origem', 'ocorrencias', 'atualizado_em'],
+    )
+    return len(linhas)
+
+
+def consultar_viacep(cep, timeout=3):
+    """Cidade do CEP no ViaCEP, ou None (CEP inexistente ou falha da API)."""
+    try:
+        with urlopen(URL_VIACEP.format(cep=cep), timeout=timeout) as resposta:
+            dados = json.load(resposta)
+    except (URLError, OSError, ValueError) as erro:
+        logger.warning("ViaCEP falhou para o CEP %s: %s", cep, erro)
+        return None
+    if dados.get('erro'):
+        return None
+    return (dados.get('localidade') or '').strip()[:TAMANHO_CIDADE] or None
+
+
+def preencher_pelo_viacep(ceps, limite=None, pausa_s=0.2):
+    """
+    Busca no ViaCEP os CEPs de `ceps` (valores brutos) que ainda não estão na tabela e
+    grava os encontrados. Para comandos, nunca para views. Retorna (consultados, gravados).
+    """
+    validos = {cep for cep in map(digitos_cep, ceps) if len(cep) == 8}
+    faltam = sorted(validos - set(CidadeCEP.objects.filter(cep__in=validos).values_list('cep', flat=True)))
+    if limite is not None:
+        faltam = faltam[:limite]
+    gravados = 0
+    for i, cep in enumerate(faltam):
+        if i and pausa_s:
+            time.sleep(pausa_s)
+        cidade = consultar_viacep(cep)
+        if cidade:
+            _, criado = CidadeCEP.objects.get_or_create(
+                cep=cep, defaults={'cidade': cidade, 'origem': CidadeCEP.ORIGEM_VIACEP}
+            )
+            gravados += criado
+    return len(faltam), gravados
+
+
+def cidades_dos_ceps(ceps):
+    """{CEP só dígitos: cidade} dos CEPs informados (valores brutos): uma consulta pela chave única."""
+    validos = {cep for cep in map(digitos_cep, ceps) if len(cep) == 8}
+    if not validos:
+        return {}
+    return dict(CidadeCEP.objects.filter(cep__in=validos).values_list('cep', 'cidade'))
+
+
+def cidade_do_cep(cep, cidades):
+    """Cidade do CEP no mapa de cidades_dos_ceps() (ou o motivo de não haver uma)."""
+    if not cep:
+        return "CEP Não Informado"
+    cep_limpo = digitos_cep(cep)
+    if len(cep_limpo) != 8:
+        return "CEP Inválido"
+    return cidades.get(cep_limpo, "Cidade Não Encontrada")
@@ -2,6 +2,7 @@
 
 from django import forms
 from .models import Pool # Importar o modelo Pool
+from core.dicionario import valores_dos_campos
 
 # Se você já tem o UploadPoolForm, mantenha-o. Caso contrário, crie-o.
 class UploadPoolForm(forms.Form):
@@ -35,10 +36,11 @@ class PoolFilterForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Populando choices com dados únicos do banco de dados
-        status_choices = [('', 'Todos')] + list(set((s, s) for s in Pool.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')))
-        city_choices = [('', 'Todas')] + list(set((c, c) for c in Pool.objects.values_list('city', flat=True).distinct().exclude(city__isnull=True).exclude(city='')))
-        hub_choices = [('', 'Todos')] + list(set((dh, dh) for dh in Pool.objects.values_list('destination_hub', flat=True).distinct().exclude(destination_hub__isnull=True).exclude(destination_hub='')))
+        # Populando choices com o dicionário de valores (sem DISTINCT na tabela Pool), numa consulta só
+        opcoes = valores_dos_campos(Pool, ['status', 'city', 'destination_hub'])
+        status_choices = [('', 'Todos')] + [(s, s) for s in opcoes['status']]
+        city_choices = [('', 'Todas')] + [(c, c) for c in opcoes['city']]
+        hub_choices = [('', 'Todos')] + [(dh, dh) for dh in opcoes['destination_hub']]
 
         self.fields['status'] = forms.ChoiceField(
             label="Status",
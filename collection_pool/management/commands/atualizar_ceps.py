@@ -0,0 +1,28 @@
+# collection_pool/management/commands/atualizar_ceps.py
+
+from django.core.management.base import BaseCommand
+
+from collection_pool.ceps import atualizar_do_pool, preencher_pelo_viacep
+from onhold.models import OnHold
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza a tabela CEP -> cidade (CidadeCEP) a partir da base do Collection Pool "
+        "(cidade mais frequente de cada CEP). Com --viacep, busca no ViaCEP os CEPs dos "
+        "pacotes OnHold que o Pool não conhece."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--viacep', action='store_true', help="Consulta o ViaCEP para os CEPs que faltam.")
+        parser.add_argument('--limite', type=int, help="Máximo de CEPs consultados no ViaCEP nesta execução.")
+        parser.add_argument('--pausa', type=float, default=0.2, help="Segundos entre as chamadas ao ViaCEP (padrão: 0.2).")
+
+    def handle(self, *args, **options):
+        gravados = atualizar_do_pool()
+        self.stdout.write(self.style.SUCCESS(f"Collection Pool: {gravados} CEPs gravados."))
+
+        if options['viacep']:
+            ceps = OnHold.objects.exclude(postal_code__isnull=True).values_list('postal_code', flat=True).distinct()
+            consultados, gravados = preencher_pelo_viacep(ceps, limite=options['limite'], pausa_s=options['pausa'])
+            self.stdout.write(self.style.SUCCESS(f"ViaCEP: {consultados} CEPs consultados, {gravados} gravados."))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection_pool', '0002_alter_pool_unique_together'),
+        ('core', '0008_diaarquivado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pool',
+            name='city_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (City)'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='destination_hub_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Destination Hub)'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='status_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Status)'),
+        ),
+    ]
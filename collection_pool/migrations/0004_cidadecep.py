@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection_pool', '0003_pool_city_cod_pool_destination_hub_cod_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CidadeCEP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cep', models.CharField(max_length=8, unique=True, verbose_name='CEP')),
+                ('cidade', models.CharField(max_length=100, verbose_name='Cidade')),
+                ('origem', models.CharField(choices=[('pool', 'Collection Pool'), ('viacep', 'ViaCEP')], default='pool', max_length=10, verbose_name='Origem')),
+                ('ocorrencias', models.PositiveIntegerField(default=0, verbose_name='Ocorrências no Pool')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Cidade do CEP',
+                'verbose_name_plural': 'Cidades dos CEPs',
+                'ordering': ['cep'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Preenche a tabela CEP -> cidade a partir da base atual do Collection Pool
+# (mesma regra de collection_pool.ceps.atualizar_do_pool: a cidade mais frequente de
+# cada CEP; no empate, a primeira em ordem alfabética).
+
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def popular_ceps(apps, schema_editor):
+    Pool = apps.get_model('collection_pool', 'Pool')
+    CidadeCEP = apps.get_model('collection_pool', 'CidadeCEP')
+
+    contagens = defaultdict(Counter)
+    pares = (
+        Pool.objects.exclude(city__isnull=True).exclude(zipcode__isnull=True)
+        .values_list('zipcode', 'city').annotate(linhas=Count('id')).order_by()
+    )
+    for zipcode, city, linhas in pares:
+        cep, cidade = ''.join(filter(str.isdigit, zipcode)), city.strip()[:100]
+        if len(cep) == 8 and cidade:
+            contagens[cep][cidade] += linhas
+
+    escolhidas = {
+        cep: min(cidades.items(), key=lambda item: (-item[1], item[0]))
+        for cep, cidades in contagens.items()
+    }
+    CidadeCEP.objects.bulk_create([
+        CidadeCEP(cep=cep, cidade=cidade, origem='pool', ocorrencias=ocorrencias)
+        for cep, (cidade, ocorrencias) in escolhidas.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection_pool', '0004_cidadecep'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_ceps, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.conf import settings # Para importar o User
+from core.models import ValorCategorico
 
 class Pool(models.Model):
     # Campos de controle
@@ -39,6 +40,21 @@ class Pool(models.Model):
     dimension_source_type = models.CharField(max_length=50, verbose_name="Dimension Source Type", null=True, blank=True)
     to_id = models.CharField(max_length=50, verbose_name="TO ID", null=True, blank=True)
 
+    # --- Códigos inteiros das colunas categóricas (core.dicionario: gravados no upload,
+    #     usados nos GROUP BY dos dashboards) ---
+    status_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Status)"
+    )
+    city_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (City)"
+    )
+    destination_hub_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Destination Hub)"
+    )
+
     class Meta:
         verbose_name = "Item do Collection Pool"
         verbose_name_plural = "Itens do Collection Pool"
@@ -47,4 +63,31 @@ class Pool(models.Model):
         # Duplicatas agora serão controladas apenas pelo id primário do Django. 
 
     def __str__(self):
-        return self.shipment_id
\ No newline at end of file
+        return self.shipment_id
+
+
+class CidadeCEP(models.Model):
+    """
+    Cidade de cada CEP (só dígitos), para as views que mostram ou filtram a cidade de um
+    pacote sem chamar API externa na requisição (ver collection_pool/ceps.py).
+    Recalculada a partir da base do Pool a cada upload; os CEPs que o Pool não conhece
+    vêm do ViaCEP pelo comando atualizar_ceps --viacep.
+    """
+    ORIGEM_POOL = 'pool'
+    ORIGEM_VIACEP = 'viacep'
+    ORIGEM_CHOICES = [(ORIGEM_POOL, 'Collection Pool'), (ORIGEM_VIACEP, 'ViaCEP')]
+
+    cep = models.CharField(max_length=8, unique=True, verbose_name="CEP")
+    cidade = models.CharField(max_length=100, verbose_name="Cidade")
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, default=ORIGEM_POOL, verbose_name="Origem")
+    # Linhas do Pool com este CEP e esta cidade (0 para o ViaCEP)
+    ocorrencias = models.PositiveIntegerField(default=0, verbose_name="Ocorrências no Pool")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Cidade do CEP"
+        verbose_name_plural = "Cidades dos CEPs"
+        ordering = ['cep']
+
+    def __str__(self):
+        return f"{self.cep} - {self.cidade}"
@@ -1,3 +1,86 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from core.dicionario import reconstruir_dicionario, valores_do_slug
+from core.testing import CasoOrcamento
+
+from .ceps import atualizar_do_pool, cidades_dos_ceps, preencher_pelo_viacep
+from .models import CidadeCEP, Pool
+
+
+class OrcamentoViewsPoolTest(CasoOrcamento):
+    """Consultas por view do Collection Pool (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        # Dropdowns (1) + versão (1) + totais num agregado (1) + status e cidade (2 cada: GROUP BY + rótulos)
+        'dashboard_pool': {'url': 'dashboard_pool', 'consultas': 7, 'tempo_sql_s': 0.5},
+        'pool_detail_list': {'url': 'pool_detail_list', 'args': ['lmhub_received'], 'consultas': 4},
+        'pool_detail_list_by_city': {'url': 'pool_detail_list_by_city', 'args': ['muriae'], 'consultas': 4},
+    }
+
+
+class SlugDetalheTest(TestCase):
+    """Slugs das URLs de detalhe resolvidos só pelo dicionário; slug desconhecido é 404."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('slug', password='slug'))
+
+    def test_slug_resolvido_pelo_dicionario(self):
+        Pool.objects.create(shipment_id='BR1', data_envio_arquivo=date(2031, 1, 1), city='Muriaé')
+        self.assertEqual(valores_do_slug(Pool, 'city', 'muriae'), ['Muriaé'])
+
+    def test_slug_desconhecido_nao_varre_a_tabela(self):
+        # bulk_create não passa pelo pre_save: o valor fica fora do dicionário
+        Pool.objects.bulk_create([Pool(shipment_id='BR1', data_envio_arquivo=date(2031, 1, 1), city='Muriaé')])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(valores_do_slug(Pool, 'city', 'muriae'), [])
+        resposta = self.client.get(reverse('pool_detail_list_by_city', args=['muriae']))
+        self.assertEqual(resposta.status_code, 404)
+
+        # A reconstrução (fora da requisição) traz o valor de volta
+        reconstruir_dicionario(Pool)
+        self.assertEqual(valores_do_slug(Pool, 'city', 'muriae'), ['Muriaé'])
+
+
+class CidadeCEPTest(TestCase):
+    """Tabela CEP -> cidade: recalculada do Pool de forma determinística; o ViaCEP só preenche o que falta."""
+
+    def _pool(self, *linhas):
+        Pool.objects.bulk_create([
+            Pool(shipment_id=f'BR{i}', data_envio_arquivo=date(2031, 1, 1), zipcode=zipcode, city=city)
+            for i, (zipcode, city) in enumerate(linhas)
+        ])
+
+    def test_cidade_mais_frequente_e_empate_alfabetico(self):
+        CidadeCEP.objects.create(cep='36880002', cidade='Eugenópolis', origem=CidadeCEP.ORIGEM_VIACEP)
+        self._pool(
+            ('36880-000', 'Muriaé'), ('36880000', 'Muriaé '), ('36880-000', 'Muriae'),
+            ('36880-001', 'Rosário da Limeira'), ('36880-001', 'Muriaé'),
+            ('36880-002', 'Muriaé'), ('123', 'Inválido'),
+        )
+
+        self.assertEqual(atualizar_do_pool(), 2)
+        self.assertEqual(
+            set(CidadeCEP.objects.values_list('cep', 'cidade', 'origem', 'ocorrencias')),
+            {
+                ('36880000', 'Muriaé', 'pool', 2),
+                ('36880001', 'Muriaé', 'pool', 1),
+                ('36880002', 'Eugenópolis', 'viacep', 0),
+            },
+        )
 
-# Create your tests here.
+    def test_viacep_so_para_ceps_que_faltam(self):
+        CidadeCEP.objects.create(cep='36880000', cidade='Muriaé')
+        with mock.patch('collection_pool.ceps.consultar_viacep', side_effect=['São Paulo', None]) as consultar:
+            self.assertEqual(
+                preencher_pelo_viacep(['36880-000', '01001-000', '99999999', 'abc'], pausa_s=0), (2, 1)
+            )
+        self.assertEqual([chamada.args for chamada in consultar.call_args_list], [('01001000',), ('99999999',)])
+        self.assertEqual(cidades_dos_ceps(['01001-000', '36880000', '99999999']), {
+            '01001000': 'São Paulo', '36880000': 'Muriaé',
+        })
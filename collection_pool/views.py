@@ -1,5 +1,6 @@
 # collection_pool/views.py
 
+from django.http import Http404
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -7,13 +8,14 @@ import csv
 import io
 from datetime import datetime
 from django.db import IntegrityError
-import pandas as pd
-from django.contrib.postgres.aggregates import ArrayAgg
-from django.template.defaultfilters import slugify
 from django.contrib import messages
 
 from .forms import UploadPoolForm, PoolFilterForm
 from .models import Pool
+from .ceps import atualizar_do_pool
+from core.dicionario import agrupar, aplicar_codigos, podando, podar_tabela, valores_do_slug
+from core.cache import resultado_em_cache, registrar_alteracao
+from logistica.consolidacao import consolidar_datas
 from django.db.models import Count, Q
 from django.core.paginator import Paginator
 
@@ -40,6 +42,8 @@ COLUNA_MODELO_MAP_POOL = {
 
 @login_required
 def upload_pool_csv(request):
+    import pandas as pd
+
     if request.method == 'POST':
         form = UploadPoolForm(request.POST, request.FILES)
         if form.is_valid():
@@ -115,6 +119,8 @@ def upload_pool_csv(request):
                     except Exception:
                         erros_linha += 1
                         
+                aplicar_codigos(Pool, novos_itens) # Códigos inteiros das colunas categóricas
+
                 # 🚀 Lógica de UPSERT
                 # Define os campos a serem atualizados em caso de conflito (shipment_id duplicado)
                 update_fields = [
@@ -122,9 +128,20 @@ def upload_pool_csv(request):
                     'address_type', 'lh_trip', 'destination_hub', 'status', 
                     'length_cm', 'width_cm', 'height_cm', 'weight_kg', 'dimension_source_type', 'to_id',
                     # Campos de controle que devem refletir os dados mais recentes:
-                    'data_envio_arquivo', 'usuario_upload' 
+                    'data_envio_arquivo', 'usuario_upload',
+                    'status_cod', 'city_cod', 'destination_hub_cod',
                 ]
                 
+                # Datas atuais dos shipment_ids que o upsert vai mover para a data enviada
+                shipment_ids = [item.shipment_id for item in novos_itens]
+                datas_anteriores = set()
+                for i in range(0, len(shipment_ids), 900):
+                    datas_anteriores.update(
+                        Pool.objects.filter(shipment_id__in=shipment_ids[i:i + 900])
+                        .exclude(data_envio_arquivo=data_envio_arquivo)
+                        .order_by().values_list('data_envio_arquivo', flat=True).distinct()
+                    )
+
                 # Executa o bulk_create com upsert: Insere novos, atualiza existentes
                 Pool.objects.bulk_create(
                     novos_itens, 
@@ -132,6 +149,10 @@ def upload_pool_csv(request):
                     unique_fields=['shipment_id'], # A chave de unicidade
                     update_fields=update_fields    # Os campos que devem ser atualizados
                 )
+                podar_tabela(Pool) # Valores sobrescritos pelo upsert que sumiram saem do dicionário
+                atualizar_do_pool() # Tabela CEP -> cidade lida pelas views do OnHold
+                registrar_alteracao(Pool) # Invalida o cache dos dashboards que leem a Pool
+                consolidar_datas([*datas_anteriores, data_envio_arquivo]) # Dados Diários da data enviada e das que perderam linhas
 
                 # Mensagem de sucesso ajustada para refletir o comportamento de UPSERT:
                 itens_processados = len(df) - erros_linha
@@ -211,32 +232,35 @@ def dashboard_pool(request):
             queryset = queryset.filter(destination_hub=destination_hub)
 
     # 3. Calcular KPIs (Usando Aggregation no queryset filtrado)
-    kpis = {}
-    
-    # KPI 1: Total de Registros
-    total_registros = queryset.count()
-    kpis['total_registros'] = total_registros
-
-    # NOVO KPI: Total para cada Status diferente (Dinâmico)
-    # Exclui valores nulos ou vazios de 'status'
-    kpis['total_por_status_dinamico'] = queryset.exclude(Q(status__isnull=True) | Q(status='')).values('status').annotate(
-        count=Count('status')
-    ).order_by('-count')
-
-    # KPI 2: Total para cada City diferente (Top 5 para exibição)
-    kpis['total_por_cidade'] = queryset.exclude(Q(city__isnull=True) | Q(city='')).values('city').annotate(
-        count=Count('city')
-    ).order_by('-count')
-
-    # KPI 3: Total por Status (LMHub_Received vs Outros)
-    LMHUB_RECEIVED_STATUS = 'LMHub_Received'
-    kpis['status_received'] = queryset.filter(status=LMHUB_RECEIVED_STATUS).count()
-    kpis['status_outros'] = queryset.exclude(status=LMHUB_RECEIVED_STATUS).count()
-
-    # KPI 4: Total por Destination Hub (LM Hub_MG_Muriaé vs Outros)
-    MURIAE_HUB = 'LM Hub_MG_Muriaé'
-    kpis['hub_muriae'] = queryset.filter(destination_hub=MURIAE_HUB).count()
-    kpis['hub_outros'] = queryset.exclude(destination_hub=MURIAE_HUB).count()
+    # 💡 Em cache: a chave leva os filtros e a versão da tabela Pool (incrementada no upload/exclusão)
+    def calcular():
+        LMHUB_RECEIVED_STATUS = 'LMHub_Received'
+        MURIAE_HUB = 'LM Hub_MG_Muriaé'
+
+        # KPI 1, 3 e 4: os totais numa única varredura (COUNT ... FILTER)
+        kpis = queryset.aggregate(
+            # KPI 1: Total de Registros
+            total_registros=Count('id'),
+            # KPI 3: Total por Status (LMHub_Received vs Outros)
+            status_received=Count('id', filter=Q(status=LMHUB_RECEIVED_STATUS)),
+            status_outros=Count('id', filter=~Q(status=LMHUB_RECEIVED_STATUS)),
+            # KPI 4: Total por Destination Hub (LM Hub_MG_Muriaé vs Outros)
+            hub_muriae=Count('id', filter=Q(destination_hub=MURIAE_HUB)),
+            hub_outros=Count('id', filter=~Q(destination_hub=MURIAE_HUB)),
+        )
+
+        # NOVO KPI: Total para cada Status diferente (Dinâmico)
+        # Exclui valores nulos ou vazios de 'status'
+        kpis['total_por_status_dinamico'] = agrupar(queryset.exclude(status_cod__isnull=True), 'status', total='count')
+
+        # KPI 2: Total para cada City diferente (Top 5 para exibição)
+        kpis['total_por_cidade'] = agrupar(queryset.exclude(city_cod__isnull=True), 'city', total='count')
+
+        return kpis
+
+    filtros_cache = form.cleaned_data if form.is_valid() else {}
+    kpis = resultado_em_cache('dashboard_pool', filtros_cache, [Pool], calcular)
+    total_registros = kpis['total_registros']
 
     # 4. Contexto para o template
     context = {
@@ -257,27 +281,16 @@ def pool_detail_list(request, status_slug):
     """
     
     # 1. Lógica de Decodificação e Busca do Status Original
-    
-    # Busca todos os status distintos (válidos) no banco de dados
-    distinct_statuses = Pool.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')
-    
-    # Tenta encontrar o status original (Case-Sensitive) que gerou o slug da URL
-    original_status = None
-    for s in distinct_statuses:
-        # Compara o slug da URL com o slug gerado a partir do status do DB
-        if slugify(s) == status_slug:
-            original_status = s
-            break
-
-    if original_status:
-        status_filtrado = original_status
-        # Filtra usando o status original (case-sensitive, para ser exato)
-        queryset = Pool.objects.filter(status=status_filtrado)
-    else:
-        # Se não encontrou, o status_slug é inválido ou não há dados.
-        # Usamos uma string limpa para o título e um Queryset vazio.
-        status_filtrado = status_slug.replace('-', ' ').title()
-        queryset = Pool.objects.none() # Queryset vazio
+    # 💡 O slug é resolvido no índice slug -> valor do dicionário (consulta indexada,
+    #    sem DISTINCT na tabela Pool nem slugify() de todos os valores a cada requisição)
+    statuses_originais = valores_do_slug(Pool, 'status', status_slug)
+    if not statuses_originais:
+        # Slug inválido ou sem dados: nada de procurar na tabela Pool
+        raise Http404(f"Status '{status_slug}' não encontrado.")
+
+    status_filtrado = statuses_originais[0]
+    # Filtra usando o status original (case-sensitive, para ser exato)
+    queryset = Pool.objects.filter(status__in=statuses_originais)
 
     # ----------------------------------------------------------------------------------
     # 💡 CORREÇÃO APLICADA: Aplica os filtros adicionais (data, city, hub) passados via URL
@@ -333,7 +346,7 @@ def pool_detail_list(request, status_slug):
         'page_obj': page_obj,
         'status_filtrado': status_filtrado,
         'search_query': search_query,
-        'total_registros': queryset.count(),
+        'total_registros': paginator.count,  # Mesma contagem da paginação (sem um segundo COUNT)
         'filter_query_string': filter_query_string # Adiciona para o link Voltar
     }
     
@@ -356,7 +369,12 @@ def delete_pool_records(request):
         
         # Conta e executa a exclusão
         count = registros_para_deletar.count()
-        registros_para_deletar.delete()
+        datas_afetadas = list(registros_para_deletar.order_by().values_list('data_envio_arquivo', flat=True).distinct())
+        # Remove do dicionário valores que deixaram de existir
+        with podando(registros_para_deletar):
+            registros_para_deletar.delete()
+        registrar_alteracao(Pool)
+        consolidar_datas(datas_afetadas) # Recalcula os Dados Diários de Logística das datas afetadas
         
         if count > 0:
             messages.success(request, f'{count} registro(s) removido(s) permanentemente da Pool com sucesso.')
@@ -375,28 +393,16 @@ def pool_detail_list_by_city(request, city_slug):
     Exibe uma lista paginada dos itens da Collection Pool filtrados por Cidade.
     """
     
-    # 1. Lógica de Decodificação e Busca da Cidade Original (Robustez)
-    
-    # Busca todas as cidades distintas (válidas) no banco de dados
-    distinct_cities = Pool.objects.values_list('city', flat=True).distinct().exclude(city__isnull=True).exclude(city='')
-    
-    # Tenta encontrar a cidade original (Case-Sensitive) que gerou o slug da URL
-    original_city = None
-    for c in distinct_cities:
-        # 💡 Esta é a lógica robusta que valida o slug
-        if slugify(c) == city_slug:
-            original_city = c
-            break
-
-    if original_city:
-        city_filtrada = original_city
-        # Filtra usando a cidade original (case-sensitive)
-        queryset = Pool.objects.filter(city=city_filtrada)
-    else:
-        # Se não encontrou, usa um queryset vazio para evitar erros e 
-        # define um nome formatado apenas para exibição no título.
-        city_filtrada = city_slug.replace('-', ' ').title()
-        queryset = Pool.objects.none() 
+    # 1. Lógica de Decodificação e Busca da Cidade Original
+    # 💡 Slug resolvido no índice slug -> valor do dicionário (sem DISTINCT na tabela Pool)
+    cidades_originais = valores_do_slug(Pool, 'city', city_slug)
+    if not cidades_originais:
+        # Slug inválido ou sem dados: nada de procurar na tabela Pool
+        raise Http404(f"Cidade '{city_slug}' não encontrada.")
+
+    city_filtrada = cidades_originais[0]
+    # Filtra usando a cidade original (case-sensitive)
+    queryset = Pool.objects.filter(city__in=cidades_originais)
 
     # ----------------------------------------------------------------------------------
     # 💡 CORREÇÃO APLICADA: Aplica os filtros adicionais (data, status, hub) passados via URL
@@ -450,7 +456,7 @@ def pool_detail_list_by_city(request, city_slug):
         # Mantendo 'status_filtrado' para compatibilidade com o template pool_detail_list.html genérico
         'status_filtrado': city_filtrada, 
         'search_query': search_query,
-        'total_registros': queryset.count(),
+        'total_registros': paginator.count,  # Mesma contagem da paginação (sem um segundo COUNT)
         'filter_query_string': filter_query_string # Adiciona para o link Voltar
     }
     
@@ -1,3 +1,9 @@
-from django.test import TestCase
+from core.testing import CasoOrcamento
 
-# Create your tests here.
+
+class OrcamentoViewsConferenciaTest(CasoOrcamento):
+    """Consultas por view da Conferência (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        'listagem_resultados': {'url': 'conferencia:listagem_resultados', 'consultas': 7},
+    }
@@ -7,7 +7,6 @@ from django.http import HttpResponse
 # IMPORTAÇÃO AJUSTADA para incluir o novo formulário
 from .forms import UploadArquivoForm, ChecagemRapidaForm 
 from .models import RegistroConferencia, UploadConferencia
-import pandas as pd
 import csv
 import io
 import logging
@@ -53,7 +52,8 @@ def upload_arquivos(request):
 # Função auxiliar FINALMENTE AJUSTADA para processar e carregar os dados
 def processar_e_carregar_lista(arquivo_uploaded, tipo_lista):
     """Lê o arquivo de upload (CSV, TXT, XLSX) e insere os códigos no banco de dados."""
-    
+    import pandas as pd
+
     # 1. Salva o metadado do upload
     upload = UploadConferencia.objects.create(
         tipo_lista=tipo_lista, 
@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import HUB, Usuario
+from .models import HUB, DiaArquivado, Usuario, ValorCategorico, VersaoTabela
 
 # 1. Registrar o Modelo HUB (Empresa)
 @admin.register(HUB)
@@ -21,4 +21,24 @@ class CustomUserAdmin(UserAdmin):
     )
     # Adiciona 'hub' e 'cargo' à lista de colunas na tabela de usuários
     list_display = UserAdmin.list_display + ('hub', 'cargo',)
-    list_filter = UserAdmin.list_filter + ('hub', 'cargo',)
\ No newline at end of file
+    list_filter = UserAdmin.list_filter + ('hub', 'cargo',)
+
+# 3. Dicionário de valores categóricos
+@admin.register(ValorCategorico)
+class ValorCategoricoAdmin(admin.ModelAdmin):
+    list_display = ('tabela', 'campo', 'valor')
+    list_filter = ('tabela', 'campo')
+    search_fields = ('valor',)
+
+# 4. Versões das tabelas (invalidação do cache dos dashboards)
+@admin.register(VersaoTabela)
+class VersaoTabelaAdmin(admin.ModelAdmin):
+    list_display = ('tabela', 'versao', 'atualizado_em')
+    readonly_fields = ('tabela', 'versao', 'atualizado_em')
+
+# 5. Dias arquivados (retenção das tabelas de fatos)
+@admin.register(DiaArquivado)
+class DiaArquivadoAdmin(admin.ModelAdmin):
+    list_display = ('tabela', 'dia', 'linhas', 'tamanho', 'arquivado_em')
+    list_filter = ('tabela',)
+    readonly_fields = ('tabela', 'dia', 'linhas', 'contagens', 'arquivo', 'tamanho', 'arquivado_em')
@@ -0,0 +1,366 @@
+# core/arquivamento.py
+#
+# Retenção das tabelas de fatos que crescem sem limite (Rastreio, OnholdInicial, Parcel).
+# Cada modelo tem uma política (settings.ARQUIVAMENTO['politicas']): os dias mais
+# antigos que 'dias' saem da tabela quente, um arquivo por dia:
+# - as linhas vão para <pasta>/<app.Modelo>/<AAAA-MM-DD>.csv.gz (CSV com cabeçalho; todo
+#   valor vai entre aspas e NULL é o \N sem aspas, então um texto '\N' continua texto e o
+#   arquivo carrega direto num COPY ... (FORMAT csv, HEADER, NULL '\N'));
+# - o total de linhas e as contagens dos campos de 'resumo' ficam em DiaArquivado,
+#   o que basta para os totais históricos sem abrir os arquivos;
+# - o dia sai da tabela com particoes.descartar_dia() (DROP da partição no PostgreSQL).
+# Consultas históricas (raras) usam historico(): o mesmo Q na tabela quente e, nos dias
+# arquivados do período, nos arquivos. restaurar_dia() devolve um dia à tabela quente.
+# Comando: arquivar_historico.
+
+import gzip
+import operator
+import os
+import re
+import shutil
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import registrar_alteracao
+from .dicionario import aplicar_codigos, codigos_presentes, podar_codigos
+from .models import DiaArquivado
+from .particoes import PARTICIONADAS, copiar, descartar_dia
+
+PADRAO = {
+    'pasta': None,
+    # app.Modelo -> {'dias': dias mantidos na tabela quente, 'resumo': campos contados em DiaArquivado}
+    'politicas': {
+        'rastreio.Rastreio': {'dias': 180, 'resumo': ['status', 'destination_hub']},
+        'onhold.OnholdInicial': {'dias': 180, 'resumo': ['status', 'onhold_reason']},
+        'parcel_sweeper.Parcel': {'dias': 180, 'resumo': ['final_status', 'count_type']},
+    },
+    # Linhas lidas por vez do banco ao gravar um dia
+    'lote': 5000,
+}
+
+NULO = '\\N'
+# Um campo do CSV: entre aspas (com "" dentro) ou cru até a próxima vírgula
+_CAMPO = re.compile(r'"((?:[^"]|"")*)"|([^,]*)')
+
+# Lookups que historico() sabe avaliar também nas linhas dos arquivos
+_COMPARACOES = {
+    'exact': operator.eq, 'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le,
+}
+_TEXTO = {
+    'iexact': lambda valor, alvo: valor.casefold() == alvo.casefold(),
+    'icontains': lambda valor, alvo: alvo.casefold() in valor.casefold(),
+    'contains': lambda valor, alvo: alvo in valor,
+    'startswith': lambda valor, alvo: valor.startswith(alvo),
+}
+
+
+def configuracao():
+    """PADRAO com as substituições de settings.ARQUIVAMENTO."""
+    return {**PADRAO, **getattr(settings, 'ARQUIVAMENTO', {})}
+
+
+def politicas():
+    return configuracao()['politicas']
+
+
+def _pasta():
+    pasta = configuracao()['pasta']
+    if not pasta:
+        raise ImproperlyConfigured("Defina settings.ARQUIVAMENTO['pasta'] para arquivar ou ler o histórico.")
+    return str(pasta)
+
+
+def _campo_data(modelo):
+    return modelo._meta.get_field(PARTICIONADAS[modelo._meta.label])
+
+
+def _campos(modelo):
+    return list(modelo._meta.concrete_fields)
+
+
+def caminho(modelo, dia):
+    """Arquivo do dia, relativo à pasta do arquivo."""
+    return os.path.join(modelo._meta.label, f'{dia:%Y-%m-%d}.csv.gz')
+
+
+def _texto(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _linha_csv(valores):
+    """Linha do arquivo: valores entre aspas, NULL como \\N sem aspas (o mesmo que o COPY do PostgreSQL lê)."""
+    return ','.join(
+        NULO if valor is None else '"' + _texto(valor).replace('"', '""') + '"' for valor in valores
+    ) + '\n'
+
+
+def _campos_linha(texto):
+    """Valores de uma linha do arquivo; só o \\N SEM aspas vira None."""
+    valores = []
+    posicao = 0
+    while True:
+        achado = _CAMPO.match(texto, posicao)
+        citado, cru = achado.groups()
+        if citado is not None:
+            valores.append(citado.replace('""', '"'))
+        else:
+            valores.append(None if cru == NULO else cru)
+        posicao = achado.end() + 1  # Pula a vírgula
+        if posicao > len(texto):
+            return valores
+
+
+def _registros(entrada):
+    """Registros (listas de valores) de um arquivo aberto; um valor entre aspas pode ter quebras de linha."""
+    pendente = ''
+    for linha in entrada:
+        pendente += linha
+        if pendente.count('"') % 2:
+            continue  # Aspas abertas: o registro continua na próxima linha
+        if pendente.endswith('\n'):
+            pendente = pendente[:-1]
+        if pendente.endswith('\r'):
+            pendente = pendente[:-1]
+        yield _campos_linha(pendente)
+        pendente = ''
+
+
+def ler_dia(modelo, dia):
+    """Linhas arquivadas do dia (dicts attname -> valor já convertido), sem tocar no banco."""
+    arquivo = os.path.join(_pasta(), caminho(modelo, dia))
+    if not os.path.exists(arquivo):
+        return
+    campos = {campo.attname: campo for campo in _campos(modelo)}
+    with gzip.open(arquivo, 'rt', encoding='utf-8', newline='') as entrada:
+        registros = _registros(entrada)
+        cabecalho = next(registros, [])
+        for valores in registros:
+            yield {
+                nome: None if valor is None else campos[nome].to_python(valor)
+                for nome, valor in zip(cabecalho, valores) if nome in campos
+            }
+
+
+# --- Arquivamento ---
+
+def dias_a_arquivar(modelo, hoje=None, dias=None):
+    """Dias com linhas na tabela quente mais antigos que a política (ou 'dias') permite."""
+    dias = politicas()[modelo._meta.label]['dias'] if dias is None else dias
+    corte = (hoje or timezone.localdate()) - timedelta(days=dias)
+    campo = _campo_data(modelo).name
+    return list(
+        modelo._default_manager.filter(**{f'{campo}__lt': corte})
+        .order_by(campo).values_list(campo, flat=True).distinct()
+    )
+
+
+def _concluir_troca(modelo, dia):
+    """
+    Termina a troca de um arquivamento interrompido entre o COMMIT e o on_commit: o
+    .parcial com o tamanho gravado no DiaArquivado é o arquivo confirmado do dia.
+    Outro .parcial (transação desfeita) é só sobra e será sobrescrito.
+    """
+    destino = os.path.join(_pasta(), caminho(modelo, dia))
+    temporario = f'{destino}.parcial'
+    if not os.path.exists(temporario):
+        return
+    tamanho = DiaArquivado.objects.filter(tabela=modelo._meta.label, dia=dia).values_list('tamanho', flat=True).first()
+    if tamanho == os.path.getsize(temporario):
+        os.replace(temporario, destino)
+
+
+def arquivar_dia(modelo, dia):
+    """
+    Move as linhas do dia para o arquivo (somando às já arquivadas, se houver) e
+    atualiza o DiaArquivado. Devolve quantas linhas saíram da tabela quente.
+    O arquivo novo só substitui o anterior depois do COMMIT (transaction.on_commit).
+    """
+    label = modelo._meta.label
+    config = configuracao()
+    resumo_campos = politicas().get(label, {}).get('resumo', [])
+    campos = [campo.attname for campo in _campos(modelo)]
+    posicoes = {campo: campos.index(modelo._meta.get_field(campo).attname) for campo in resumo_campos}
+    campo_data = _campo_data(modelo).name
+
+    relativo = caminho(modelo, dia)
+    destino = os.path.join(_pasta(), relativo)
+    temporario = f'{destino}.parcial'
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    _concluir_troca(modelo, dia)
+
+    # 1. Arquivo novo = linhas já arquivadas do dia + linhas da tabela quente
+    linhas = 0
+    contagens = {campo: Counter() for campo in resumo_campos}
+    with gzip.open(temporario, 'wt', encoding='utf-8', newline='') as saida:
+        saida.write(_linha_csv(campos))
+        if os.path.exists(destino):
+            # Linhas já arquivadas: copiadas como estão (o cabeçalho não tem quebra de linha)
+            with gzip.open(destino, 'rt', encoding='utf-8', newline='') as anterior:
+                anterior.readline()
+                shutil.copyfileobj(anterior, saida)
+        consulta = modelo._default_manager.filter(**{campo_data: dia}).order_by('pk').values_list(*campos)
+        for valores in consulta.iterator(chunk_size=config['lote']):
+            saida.write(_linha_csv(valores))
+            linhas += 1
+            for campo, posicao in posicoes.items():
+                valor = valores[posicao]
+                contagens[campo]['' if valor is None else str(valor)] += 1
+
+    # 2. Tira o dia da tabela quente e atualiza o resumo na mesma transação: se outra
+    #    gravação mexeu no dia enquanto o arquivo era escrito, nada muda
+    # Valores do dia: os que só existiam nele saem do dicionário (e dos filtros)
+    candidatos = codigos_presentes(modelo._default_manager.filter(**{campo_data: dia}))
+    confirmado = False
+    try:
+        with transaction.atomic():
+            removidas = descartar_dia(modelo, dia)
+            podar_codigos(modelo, candidatos)
+            if removidas != linhas:
+                raise RuntimeError(
+                    f"{label} {dia:%d/%m/%Y}: {linhas} linhas arquivadas, mas {removidas} na tabela; tente de novo."
+                )
+            resumo, _ = DiaArquivado.objects.select_for_update().get_or_create(tabela=label, dia=dia)
+            resumo.linhas += linhas
+            for campo, contagem in contagens.items():
+                total = Counter(resumo.contagens.get(campo, {}))
+                total.update(contagem)
+                resumo.contagens[campo] = dict(total)
+            resumo.arquivo = relativo
+            resumo.tamanho = os.path.getsize(temporario)
+            resumo.save()
+            # O arquivo só é trocado depois do COMMIT: se a transação for desfeita, o
+            # arquivo anterior continua valendo e as linhas continuam só na tabela
+            transaction.on_commit(lambda: os.replace(temporario, destino))
+        confirmado = True
+    finally:
+        if not confirmado and os.path.exists(temporario):
+            os.remove(temporario)
+    registrar_alteracao(modelo)
+    return linhas
+
+
+def arquivar(modelos=None, hoje=None, dias=None, simular=False):
+    """
+    Aplica as políticas: arquiva os dias antigos de cada modelo (rótulos 'app.Modelo';
+    padrão: todos os das políticas). Com simular, só conta. Devolve
+    [{'tabela', 'dia', 'linhas'}] por dia.
+    """
+    resultado = []
+    for label in modelos or list(politicas()):
+        modelo = apps.get_model(label)
+        campo = _campo_data(modelo).name
+        for dia in dias_a_arquivar(modelo, hoje, dias):
+            if simular:
+                linhas = modelo._default_manager.filter(**{campo: dia}).count()
+            else:
+                linhas = arquivar_dia(modelo, dia)
+            resultado.append({'tabela': label, 'dia': dia, 'linhas': linhas})
+    return resultado
+
+
+def restaurar_dia(modelo, dia):
+    """
+    Devolve um dia arquivado à tabela quente e apaga o arquivo. As linhas ganham ids
+    novos, e campos auto_now_add (data do upload) ficam com a data da restauração.
+    """
+    label = modelo._meta.label
+    resumo = DiaArquivado.objects.filter(tabela=label, dia=dia).first()
+    if resumo is None:
+        return 0
+    campos = {campo.attname for campo in _campos(modelo) if not campo.primary_key}
+    objetos = [modelo(**{nome: valor for nome, valor in linha.items() if nome in campos}) for linha in ler_dia(modelo, dia)]
+    # Os códigos do arquivo podem ter saído do dicionário: são refeitos a partir do texto
+    aplicar_codigos(modelo, objetos)
+    arquivo = os.path.join(_pasta(), resumo.arquivo)
+    with transaction.atomic():
+        copiar(modelo, objetos)
+        resumo.delete()
+        transaction.on_commit(lambda: os.path.exists(arquivo) and os.remove(arquivo))
+    registrar_alteracao(modelo)
+    return len(objetos)
+
+
+# --- Consulta com o arquivo ("incluir arquivo") ---
+
+def _condicao(modelo, chave, alvo):
+    """(attname, função linha_valor -> bool) para um filtro 'campo__lookup' de um Q."""
+    partes = chave.split('__')
+    if len(partes) > 2 or (len(partes) == 2 and partes[1] not in {*_COMPARACOES, *_TEXTO, 'in', 'isnull'}):
+        raise ValueError(f"Filtro sem suporte na consulta ao arquivo: {chave}")
+    campo = modelo._meta.get_field(partes[0])
+    lookup = partes[1] if len(partes) == 2 else 'exact'
+    if lookup == 'isnull':
+        return campo.attname, lambda valor: (valor is None) == bool(alvo)
+    if lookup in _TEXTO:
+        teste = _TEXTO[lookup]
+        return campo.attname, lambda valor: valor is not None and teste(str(valor), str(alvo))
+    destino = campo.target_field if campo.is_relation else campo
+    if lookup == 'in':
+        alvos = {destino.to_python(getattr(item, 'pk', item)) for item in alvo}
+        return campo.attname, lambda valor: valor in alvos
+    alvo = destino.to_python(getattr(alvo, 'pk', alvo))
+    comparar = _COMPARACOES[lookup]
+    return campo.attname, lambda valor: valor is not None and comparar(valor, alvo)
+
+
+def _avaliar(modelo, q, linha):
+    """Avalia um Q do Django numa linha (dict attname -> valor), como o filter() faria."""
+    resultados = (
+        _avaliar(modelo, filho, linha) if isinstance(filho, Q) else _testar(modelo, filho, linha)
+        for filho in q.children
+    )
+    casou = any(resultados) if q.connector == Q.OR else all(resultados)
+    return not casou if q.negated else casou
+
+
+def _testar(modelo, filho, linha):
+    nome, teste = _condicao(modelo, *filho)
+    return teste(linha[nome])
+
+
+def _validar(modelo, q):
+    for filho in q.children:
+        if isinstance(filho, Q):
+            _validar(modelo, filho)
+        else:
+            _condicao(modelo, *filho)
+
+
+def historico(modelo, filtro=None, campos=None, inicio=None, fim=None):
+    """
+    Linhas (dicts) que casam com 'filtro' (um Q) na tabela quente e nos dias arquivados
+    entre 'inicio' e 'fim' (datas do campo da partição; sem elas, todos os arquivados).
+    'campos' são attnames (ex.: 'usuario_upload_id'); padrão: todos.
+    Nos arquivos o Q é avaliado em Python: valem só campos do próprio modelo com os
+    lookups exact, iexact, contains, icontains, startswith, in, isnull, gt, gte, lt e lte.
+    """
+    filtro = filtro or Q()
+    _validar(modelo, filtro)  # Filtro sem suporte falha antes de ler a tabela quente
+    campos = campos or [campo.attname for campo in _campos(modelo)]
+    campo_data = _campo_data(modelo).name
+    periodo = Q()
+    if inicio:
+        periodo &= Q(**{f'{campo_data}__gte': inicio})
+    if fim:
+        periodo &= Q(**{f'{campo_data}__lte': fim})
+
+    yield from modelo._default_manager.filter(periodo & filtro).values(*campos).iterator(chunk_size=configuracao()['lote'])
+
+    dias = DiaArquivado.objects.filter(tabela=modelo._meta.label)
+    if inicio:
+        dias = dias.filter(dia__gte=inicio)
+    if fim:
+        dias = dias.filter(dia__lte=fim)
+    for dia in dias.order_by('dia').values_list('dia', flat=True):
+        for linha in ler_dia(modelo, dia):
+            if _avaliar(modelo, filtro, linha):
+                yield {campo: linha[campo] for campo in campos}
@@ -0,0 +1,125 @@
+# core/cache.py
+#
+# Cache de resultados dos dashboards.
+# A chave combina o nome do dashboard, os filtros normalizados e a versão de cada
+# tabela lida (core.models.VersaoTabela). Toda gravação chama registrar_alteracao(),
+# que incrementa a versão: a próxima consulta gera outra chave, então a invalidação
+# é exata (sem adivinhar TTL). As entradas antigas nunca mais são lidas e saem pelo
+# descarte LRU do LocMemCache (MAX_ENTRIES em settings.CACHES['dashboards']).
+# As tabelas de cadastro (VERSIONADAS_POR_SINAL), gravadas linha a linha pelo admin
+# e por formulários, sobem a versão sozinhas pelos sinais post_save/post_delete.
+
+import hashlib
+from datetime import date, datetime
+
+from django.core.cache import caches
+from django.db import connections, router
+from django.db.models import F
+
+from .models import VersaoTabela
+
+ALIAS_CACHE = 'dashboards'
+
+# Sentinela para diferenciar "não está no cache" de um resultado None
+_AUSENTE = object()
+
+# Tabelas lidas pelos dashboards e gravadas fora dos uploads (admin, formulários).
+# As tabelas de fatos ficam de fora: um receptor de post_delete desliga o DELETE em
+# massa do Django (as linhas passariam a ser carregadas uma a uma), e quem grava
+# nelas já chama registrar_alteracao().
+VERSIONADAS_POR_SINAL = ['core.HUB', 'logistica.DadosDiariosLogistica']
+
+
+def _rotulo(modelo):
+    """Aceita a classe do modelo ou o rótulo 'app.Modelo'."""
+    return modelo if isinstance(modelo, str) else modelo._meta.label
+
+
+def registrar_alteracao(*modelos):
+    """Incrementa a versão das tabelas alteradas. Chamar depois de toda gravação."""
+    for tabela in {_rotulo(modelo) for modelo in modelos}:
+        atualizados = VersaoTabela.objects.filter(tabela=tabela).update(versao=F('versao') + 1)
+        if not atualizados:
+            _, criado = VersaoTabela.objects.get_or_create(tabela=tabela, defaults={'versao': 1})
+            if not criado:
+                # Outra requisição criou a linha entre o update e o get_or_create
+                VersaoTabela.objects.filter(tabela=tabela).update(versao=F('versao') + 1)
+
+
+def _versionar_gravacao(sender, raw=False, **kwargs):
+    """post_save/post_delete: gravação avulsa numa tabela de VERSIONADAS_POR_SINAL."""
+    if not raw:  # loaddata
+        registrar_alteracao(sender)
+
+
+def conectar_sinais():
+    """Liga os sinais das tabelas de VERSIONADAS_POR_SINAL (CoreConfig.ready)."""
+    from django.apps import apps
+    from django.db.models.signals import post_delete, post_save
+
+    for tabela in VERSIONADAS_POR_SINAL:
+        modelo = apps.get_model(tabela)
+        post_save.connect(_versionar_gravacao, sender=modelo, dispatch_uid=f'cache:save:{tabela}')
+        post_delete.connect(_versionar_gravacao, sender=modelo, dispatch_uid=f'cache:delete:{tabela}')
+
+
+def versoes_tabelas(modelos):
+    """
+    Versão atual de cada tabela, em ordem estável. Uma consulta pela chave única.
+    Cursor direto: é a única consulta de um acerto de cache, e montar o SQL pelo
+    ORM custaria mais que executá-lo. Lida na mesma conexão que os dados (numa
+    réplica atrasada, versão e dados atrasam juntos e a chave continua coerente).
+    """
+    connection = connections[router.db_for_read(VersaoTabela)]
+    tabelas = sorted({_rotulo(modelo) for modelo in modelos})
+    sql = 'SELECT tabela, versao FROM {} WHERE tabela IN ({})'.format(
+        connection.ops.quote_name(VersaoTabela._meta.db_table),
+        ', '.join(['%s'] * len(tabelas)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, tabelas)
+        atuais = dict(cursor.fetchall())
+    return tuple((tabela, atuais.get(tabela, 0)) for tabela in tabelas)
+
+
+def _normalizar_valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor).strip()
+
+
+def normalizar_parametros(parametros, ignorar=('page',)):
+    """
+    Converte os filtros (dict, cleaned_data ou QueryDict) numa tupla ordenada,
+    sem valores vazios: '?b=2&a=1' e '?a=1&b=2&c=' geram a mesma chave.
+    """
+    itens = parametros.lists() if hasattr(parametros, 'lists') else parametros.items()
+    normalizados = []
+    for chave, valor in itens:
+        if chave in ignorar:
+            continue
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        valores = sorted({_normalizar_valor(v) for v in valores if v is not None} - {''})
+        if valores:
+            normalizados.append((chave, tuple(valores)))
+    return tuple(sorted(normalizados))
+
+
+def chave_cache(nome, parametros, modelos):
+    assinatura = repr((normalizar_parametros(parametros), versoes_tabelas(modelos)))
+    return f"dashboard:{nome}:{hashlib.sha1(assinatura.encode()).hexdigest()}"
+
+
+def resultado_em_cache(nome, parametros, modelos, calcular):
+    """
+    Devolve o resultado de calcular() para estes filtros e versões de tabela,
+    executando-o só na primeira vez. calcular() deve devolver dados simples
+    (dicts, listas, números) — nada de QuerySet, que seria reavaliado.
+    """
+    cache = caches[ALIAS_CACHE]
+    chave = chave_cache(nome, parametros, modelos)
+    resultado = cache.get(chave, _AUSENTE)
+    if resultado is _AUSENTE:
+        resultado = calcular()
+        cache.set(chave, resultado)
+    return resultado
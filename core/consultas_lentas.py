@@ -0,0 +1,268 @@
+# core/consultas_lentas.py
+#
+# Registro de consultas lentas agrupadas por "impressão digital" (fingerprint).
+# A SQL é normalizada antes de agrupar:
+# - literais (strings, números) e placeholders viram '?';
+# - listas '(?, ?, ?, ...)' viram '(...)' (IN com 10 ou 10 mil ids é a mesma consulta),
+#   e várias tuplas seguidas também ('VALUES (...), (...)' -> 'VALUES (...)').
+# Por impressão: nº de execuções lentas, tempo total/médio/máximo, p95 (sobre as
+# últimas N durações) e um exemplo com a view e a linha do código que a disparou.
+# Tudo fica em memória, limitado (as impressões menos recentes saem primeiro), e é
+# gravado de tempos em tempos em um JSON por processo; resumo() junta os arquivos
+# recentes e apaga os de processos que pararam de gravar há mais de 'validade_arquivos_s'.
+# O execute_wrapper de core.instrumentacao chama registrar() para as consultas
+# acima de INSTRUMENTACAO['consulta_lenta_s']. registrar() roda dentro da consulta do
+# usuário: qualquer falha aqui (disco cheio, pasta sem permissão) só vai para o log.
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.utils import timezone
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r'%s|\$\d+')
+_NUMEROS = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_TUPLAS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_ESPACOS = re.compile(r'\s+')
+
+logger = logging.getLogger(__name__)
+
+_trava = threading.Lock()
+_trava_gravacao = threading.Lock()  # Uma gravação por vez (a verificação do prazo fica dentro dela)
+_impressoes = OrderedDict()  # impressão -> dados (ordem = uso mais recente por último)
+_estado = {'ultima_gravacao': time.monotonic(), 'arquivo': None}
+
+
+def normalizar(sql):
+    """SQL sem literais e com as listas colapsadas."""
+    sql = _STRINGS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _NUMEROS.sub('?', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    sql = _TUPLAS.sub('(...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+def impressao_digital(sql_normalizada):
+    return hashlib.sha1(sql_normalizada.encode('utf-8')).hexdigest()[:12]
+
+
+def _origem():
+    """Linha do código do projeto mais próxima da consulta (fora do Django e desta instrumentação)."""
+    base = str(settings.BASE_DIR)
+    ignorar = tuple(os.path.join('core', nome) for nome in ('consultas_lentas.py', 'instrumentacao.py', 'middleware.py'))
+    for quadro in reversed(traceback.extract_stack()):
+        arquivo = quadro.filename
+        if arquivo.startswith(base) and 'site-packages' not in arquivo and not arquivo.endswith(ignorar):
+            return f"{os.path.relpath(arquivo, base)}:{quadro.lineno} em {quadro.name}"
+    return None
+
+
+def registrar(sql, duracao, request=None, many=False):
+    """
+    Soma uma execução lenta à impressão da SQL (chamado pelo execute_wrapper da instrumentação).
+    Nunca levanta exceção: um erro aqui falharia a consulta do usuário.
+    """
+    try:
+        _registrar(sql, duracao, request, many)
+    except Exception:
+        logger.exception("Falha ao registrar consulta lenta")
+
+
+def _registrar(sql, duracao, request, many):
+    from .instrumentacao import configuracao
+
+    config = configuracao()
+    normalizada = normalizar(sql)
+    chave = impressao_digital(normalizada)
+    match = getattr(request, 'resolver_match', None) if request is not None else None
+
+    with _trava:
+        dados = _impressoes.get(chave)
+        if dados is None:
+            dados = _impressoes[chave] = {
+                'sql': normalizada[:2000], 'execucoes': 0, 'tempo_total': 0.0, 'tempo_max': 0.0,
+                'duracoes': deque(maxlen=config['amostras_por_impressao']), 'exemplo': None,
+            }
+            while len(_impressoes) > config['max_impressoes']:
+                _impressoes.popitem(last=False)
+        else:
+            _impressoes.move_to_end(chave)
+        dados['execucoes'] += 1
+        dados['tempo_total'] += duracao
+        dados['duracoes'].append(duracao)
+        novo_maximo = duracao > dados['tempo_max']
+        dados['tempo_max'] = max(dados['tempo_max'], duracao)
+
+    # Exemplo: a execução mais lenta (a pilha só é lida quando o exemplo muda)
+    if novo_maximo:
+        exemplo = {
+            'sql': sql[:2000],
+            'em_lote': many,
+            'tempo': duracao,
+            'view': match.view_name if match else None,
+            'caminho': request.get_full_path()[:300] if request is not None else None,
+            'origem': _origem(),
+            'em': timezone.now().isoformat(),
+        }
+        with _trava:
+            dados['exemplo'] = exemplo
+
+    if time.monotonic() - _estado['ultima_gravacao'] >= config['gravar_a_cada_s']:
+        # Só uma thread grava; as outras seguem sem esperar
+        if _trava_gravacao.acquire(blocking=False):
+            try:
+                if time.monotonic() - _estado['ultima_gravacao'] >= config['gravar_a_cada_s']:
+                    _gravar()
+            finally:
+                _trava_gravacao.release()
+
+
+# --- Persistência (um JSON por processo) ---
+
+def _pasta():
+    from .instrumentacao import configuracao
+
+    return configuracao()['pasta_consultas_lentas']
+
+
+def _arquivo_processo():
+    if _estado['arquivo'] is None:
+        nome = f"{socket.gethostname()}-{os.getpid()}-{int(time.time())}.json"
+        _estado['arquivo'] = os.path.join(_pasta(), nome)
+    return _estado['arquivo']
+
+
+def _instantaneo():
+    with _trava:
+        return {
+            chave: {**dados, 'duracoes': list(dados['duracoes'])}
+            for chave, dados in _impressoes.items()
+        }
+
+
+def gravar():
+    """
+    Grava as impressões deste processo no seu arquivo (troca atômica). Sem pasta configurada,
+    não faz nada. Erros de disco vão para o log e não são propagados.
+    """
+    with _trava_gravacao:
+        _gravar()
+
+
+def _gravar():
+    _estado['ultima_gravacao'] = time.monotonic()
+    if not _pasta() or not _impressoes:
+        return
+    temporario = None
+    try:
+        os.makedirs(_pasta(), exist_ok=True)
+        arquivo = _arquivo_processo()
+        # Temporário com nome único: duas gravações nunca disputam o mesmo .tmp
+        descritor, temporario = tempfile.mkstemp(dir=_pasta(), prefix=f'.{os.path.basename(arquivo)}.', suffix='.tmp')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as saida:
+            json.dump(_instantaneo(), saida, ensure_ascii=False)
+        os.replace(temporario, arquivo)
+        temporario = None
+    except OSError:
+        logger.warning("Não foi possível gravar as consultas lentas em %s", _pasta(), exc_info=True)
+    finally:
+        if temporario is not None:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+
+
+atexit.register(gravar)
+
+
+def _juntar(total, chave, dados, amostras):
+    atual = total.get(chave)
+    if atual is None:
+        total[chave] = {**dados, 'duracoes': list(dados['duracoes'])[-amostras:]}
+        return
+    atual['execucoes'] += dados['execucoes']
+    atual['tempo_total'] += dados['tempo_total']
+    atual['duracoes'] = (atual['duracoes'] + list(dados['duracoes']))[-amostras:]
+    if dados['tempo_max'] > atual['tempo_max']:
+        atual['tempo_max'] = dados['tempo_max']
+        atual['exemplo'] = dados['exemplo']
+
+
+def _p95(duracoes):
+    if not duracoes:
+        return None
+    ordenadas = sorted(duracoes)
+    return ordenadas[int(0.95 * (len(ordenadas) - 1))]
+
+
+def resumo(limite=50):
+    """
+    Impressões de todos os processos (arquivos da pasta + memória deste processo),
+    da que mais somou tempo para a que menos somou. Arquivos sem gravação há mais de
+    'validade_arquivos_s' são de processos encerrados: são apagados, não somados.
+    """
+    from .instrumentacao import configuracao
+
+    config = configuracao()
+    amostras = config['amostras_por_impressao']
+    corte = time.time() - config['validade_arquivos_s']
+    total = {}
+    pasta = _pasta()
+    proprio = _arquivo_processo() if pasta else None
+    if pasta and os.path.isdir(pasta):
+        for nome in os.listdir(pasta):
+            caminho = os.path.join(pasta, nome)
+            if not nome.endswith('.json') or caminho == proprio:
+                continue
+            try:
+                if os.path.getmtime(caminho) < corte:
+                    os.remove(caminho)
+                    continue
+                with open(caminho, encoding='utf-8') as entrada:
+                    impressoes = json.load(entrada)
+            except (OSError, ValueError):
+                continue  # Arquivo sendo trocado ou corrompido: fica para a próxima leitura
+            for chave, dados in impressoes.items():
+                _juntar(total, chave, dados, amostras)
+    for chave, dados in _instantaneo().items():
+        _juntar(total, chave, dados, amostras)
+
+    linhas = [
+        {
+            'impressao': chave,
+            'sql': dados['sql'],
+            'execucoes': dados['execucoes'],
+            'tempo_total': dados['tempo_total'],
+            'tempo_medio': dados['tempo_total'] / dados['execucoes'],
+            'tempo_max': dados['tempo_max'],
+            'p95': _p95(dados['duracoes']),
+            'exemplo': dados['exemplo'],
+        }
+        for chave, dados in total.items()
+    ]
+    return sorted(linhas, key=lambda linha: -linha['tempo_total'])[:limite]
+
+
+def zerar():
+    """Descarta as impressões em memória e os arquivos gravados."""
+    with _trava:
+        _impressoes.clear()
+    pasta = _pasta()
+    if pasta and os.path.isdir(pasta):
+        for nome in os.listdir(pasta):
+            if nome.endswith('.json'):
+                os.remove(os.path.join(pasta, nome))
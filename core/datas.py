@@ -0,0 +1,83 @@
+# core/datas.py
+#
+# Conversão vetorizada (pandas) das colunas de data/hora que chegam como texto nos CSVs.
+# Os campos de texto originais são mantidos; cada um ganha um DateTimeField "tipado"
+# (sufixo _at) preenchido no upload ou pelo comando `preencher_datas_tipadas`.
+
+from django.utils import timezone
+
+
+# Campo texto -> campo DateTimeField, por modelo (rótulo 'app.Modelo')
+CAMPOS_DATAHORA = {
+    'rastreio.Rastreio': {
+        'lm_hub_receive_time': 'lm_hub_receive_at',
+        'current_station_received_time': 'current_station_received_at',
+        'delivering_time': 'delivering_at',
+        'delivered_time': 'delivered_at',
+        'onhold_time': 'onhold_at',
+        'sla_target_date': 'sla_target_at',
+    },
+    'onhold.OnholdInicial': {
+        'pick_up_time': 'pick_up_at',
+        'soc_received_time': 'soc_received_at',
+        'delivered_time': 'delivered_at',
+        'onhold_time': 'onhold_at',
+        'reschedule_time': 'reschedule_at',
+        'sla_target_date': 'sla_target_at',
+    },
+}
+
+# Formatos tentados em ordem; cada passada só processa o que ainda não converteu
+FORMATOS_DATAHORA = [
+    '%d-%m-%Y %H:%M',
+    '%d-%m-%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%Y-%m-%d',
+    '%d-%m-%Y',
+    '%d/%m/%Y',
+]
+
+
+def converter_datahoras(valores):
+    """
+    Converte uma sequência de strings em datetimes aware (fuso atual), de forma vetorizada.
+    Valores vazios ou em formato desconhecido viram None. Retorna uma lista do mesmo tamanho.
+    """
+    import pandas as pd
+
+    serie = pd.Series(list(valores), dtype='object').astype('string').str.strip()
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    pendentes = serie.notna() & (serie != '')
+
+    for formato in FORMATOS_DATAHORA:
+        if not pendentes.any():
+            break
+        convertidos = pd.to_datetime(serie[pendentes], format=formato, errors='coerce')
+        ok = convertidos.notna()
+        resultado[ok[ok].index] = convertidos[ok]
+        pendentes[ok[ok].index] = False
+
+    # Localiza no fuso do projeto e devolve objetos Python (None no lugar de NaT)
+    resultado = resultado.dt.tz_localize(timezone.get_current_timezone(), ambiguous='NaT', nonexistent='NaT')
+    return [None if pd.isna(v) else v.to_pydatetime() for v in resultado]
+
+
+def preencher_datahoras(modelo, objetos):
+    """
+    Preenche os campos DateTimeField tipados de uma lista de instâncias a partir
+    dos campos texto correspondentes (uma conversão vetorizada por coluna).
+    Retorna a lista de campos tipados (útil para bulk_update).
+    """
+    mapa = CAMPOS_DATAHORA.get(modelo._meta.label, {})
+    if not objetos:
+        return list(mapa.values())
+
+    for campo_texto, campo_tipado in mapa.items():
+        convertidos = converter_datahoras(getattr(obj, campo_texto) for obj in objetos)
+        for obj, valor in zip(objetos, convertidos):
+            setattr(obj, campo_tipado, valor)
+
+    return list(mapa.values())
@@ -0,0 +1,289 @@
+# core/desempenho.py
+#
+# Medição dos caminhos críticos (uploads, dashboards e exportações CSV).
+# Cada cenário é uma requisição de verdade pelo test Client (middleware, view e
+# template inclusos) e registra:
+# - tempo total (s), nº de consultas e tempo gasto no SQL (execute_wrapper);
+# - pico de memória (RSS) durante a requisição.
+# Um cenário só vale se deu certo: leitura com HTTP 200 e upload sem erro HTTP e com
+# linhas gravadas na data enviada ('ok'); os que falham não entram na linha de base.
+# comparar() confronta um resultado com a linha de base e aponta as regressões.
+# Os dados vêm de core.sinteticos (comando medir_desempenho monta o banco de teste).
+
+import os
+import platform
+import sys
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+
+import django
+from django.db import connection, connections
+from django.urls import reverse
+
+from collection_pool.models import Pool
+from expedicao.models import ExpedicaoArquivo
+from onhold.models import OnHold, OnholdInicial
+from parcel_sweeper.models import Parcel
+from rastreio.models import Rastreio
+from sla_analysis.calculo import FONTES as FONTES_SLA, garantir_resumos
+
+from .dicionario import podando
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage (o pico de memória fica em branco)
+    resource = None
+
+# Leitura: nome -> URL (nome da rota), args da rota e parâmetros GET além do período
+CENARIOS_LEITURA = {
+    'dashboard_onhold': {'url': 'dashboard_onhold'},
+    'dashboard_rastreio': {'url': 'dashboard_rastreio'},
+    'dashboard_pool': {'url': 'dashboard_pool'},
+    'dashboard_parcel': {'url': 'parcel_sweeper:dashboard'},
+    'analysis_dashboard': {'url': 'inventory_analysis:analysis_dashboard'},
+    'exportar_onhold_motivo': {'url': 'export_por_motivo_csv', 'args': ['Buyer not at home']},
+    'exportar_onhold_motorista': {'url': 'exportar_onhold_motorista_csv'},
+    'exportar_rastreio': {'url': 'exportar_csv_rastreio'},
+    'exportar_parcel': {'url': 'parcel_sweeper:export_csv'},
+    'exportar_sla': {'url': 'sla_analysis:exportar_csv'},
+    'exportar_inventario': {'url': 'inventory_analysis:export_csv', 'args': [1]},
+}
+
+# Upload: nome -> rota, fonte de core.sinteticos (arquivo gerado), campo da data,
+# campo(s) do arquivo e o (modelo, campo de data) a limpar depois de cada repetição.
+# A Conferência substitui as listas inteiras a cada upload: não precisa de limpeza.
+CENARIOS_UPLOAD = {
+    'upload_onhold': {
+        'url': 'upload_onhold', 'fonte': 'onhold', 'data': 'data_referencia',
+        'arquivos': ['csv_file'], 'limpar': (OnHold, 'data_envio'),
+    },
+    'upload_onhold_inicial': {
+        'url': 'upload_onhold_inicial', 'fonte': 'onhold_inicial', 'data': 'data_referencia',
+        'arquivos': ['csv_file'], 'limpar': (OnholdInicial, 'data_envio'),
+    },
+    'upload_rastreio': {
+        'url': 'upload_csv_rastreio', 'fonte': 'rastreio', 'data': 'data_envio_arquivo',
+        'arquivos': ['arquivo_csv'], 'limpar': (Rastreio, 'data_envio_arquivo'),
+    },
+    'upload_pool': {
+        'url': 'upload_pool_csv', 'fonte': 'pool', 'data': 'data_envio_arquivo',
+        'arquivos': ['arquivo_csv'], 'limpar': (Pool, 'data_envio_arquivo'),
+    },
+    'upload_parcel': {
+        'url': 'parcel_sweeper:upload_parcel', 'fonte': 'parcel', 'data': 'data_referencia',
+        'arquivos': ['arquivo_csv'], 'limpar': (Parcel, 'data_referencia'),
+    },
+    'upload_expedicao': {
+        'url': 'expedicao:upload', 'fonte': 'expedicao', 'data': 'data_referencia',
+        'arquivos': ['arquivo'], 'limpar': (ExpedicaoArquivo, 'data_referencia'),
+    },
+    'upload_conferencia': {
+        'url': 'conferencia:upload_arquivos', 'fonte': 'conferencia', 'data': None,
+        'arquivos': ['lista_a', 'lista_b'], 'limpar': None,
+    },
+}
+
+# Regressão: métrica -> folga absoluta abaixo da qual a diferença é ruído de medição.
+# Acima dela, vale a tolerância relativa (--tolerancia). Consultas: qualquer aumento conta.
+METRICAS_COMPARADAS = {
+    'tempo_s': 0.05,
+    'tempo_sql_s': 0.05,
+    'pico_rss_mb': 5,
+    'consultas': 0,
+}
+
+
+# --- Memória ---
+
+def _ler_status_processo(chave):
+    """Valor (MB) de uma linha de /proc/self/status (Linux), ou None."""
+    try:
+        with open('/proc/self/status') as status:
+            for linha in status:
+                if linha.startswith(chave + ':'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _zerar_pico_rss():
+    """Reinicia o pico de RSS do processo (Linux 4+). Retorna False se não for possível."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss_mb():
+    """Pico de RSS (MB): VmHWM no Linux; fora dele, o pico do processo inteiro (getrusage)."""
+    pico = _ler_status_processo('VmHWM')
+    if pico is not None or resource is None:
+        return pico
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 1024 / 1024 if sys.platform == 'darwin' else maximo / 1024  # bytes no macOS, KB no Linux
+
+
+# --- Medição ---
+
+def medir(executar):
+    """
+    Executa 'executar()' (que devolve a resposta HTTP) medindo tempo, consultas e memória.
+    O corpo das respostas em streaming é consumido dentro da medição.
+    """
+    sql = {'consultas': 0, 'tempo': 0.0}
+
+    def contar(execute, sql_texto, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql_texto, params, many, context)
+        finally:
+            sql['consultas'] += 1
+            sql['tempo'] += time.perf_counter() - inicio
+
+    pico_zerado = _zerar_pico_rss()
+    rss_inicial = _ler_status_processo('VmRSS')
+    inicio = time.perf_counter()
+    with ExitStack() as pilha:
+        for conexao in connections.all():  # Inclui a conexão 'leitura' dos dashboards
+            pilha.enter_context(conexao.execute_wrapper(contar))
+        resposta = executar()
+        tamanho = (
+            sum(len(parte) for parte in resposta.streaming_content) if resposta.streaming
+            else len(resposta.content)
+        )
+    tempo = time.perf_counter() - inicio
+    pico = _pico_rss_mb()
+
+    return {
+        'status': resposta.status_code,
+        'bytes': tamanho,
+        'tempo_s': round(tempo, 4),
+        'consultas': sql['consultas'],
+        'tempo_sql_s': round(sql['tempo'], 4),
+        'pico_rss_mb': round(pico, 1) if pico is not None else None,
+        # Acréscimo sobre o RSS de antes da requisição (só quando o pico pôde ser zerado)
+        'acrescimo_rss_mb': round(pico - rss_inicial, 1) if pico_zerado and rss_inicial is not None else None,
+    }
+
+
+def resumir(medicoes):
+    """
+    Mediana de cada métrica entre as repetições (mais o tempo de cada uma).
+    O cenário só é 'ok' se todas as repetições foram; o status é o da primeira que falhou.
+    """
+    resumo = {}
+    for metrica in medicoes[0]:
+        if metrica == 'ok':
+            continue
+        valores = sorted(m[metrica] for m in medicoes if m[metrica] is not None)
+        resumo[metrica] = valores[len(valores) // 2] if valores else None
+    falhas = [m for m in medicoes if not m['ok']]
+    resumo['ok'] = not falhas
+    if falhas:
+        resumo['status'] = falhas[0]['status']
+    resumo['tempos_s'] = [m['tempo_s'] for m in medicoes]
+    return resumo
+
+
+def medir_leitura(client, nome, data_inicio, data_fim, repeticoes=3, limpar_cache=None):
+    """Mede um cenário de CENARIOS_LEITURA no período do conjunto de dados."""
+    cenario = CENARIOS_LEITURA[nome]
+    url = reverse(cenario['url'], args=cenario.get('args', []))
+    parametros = {'data_inicio': data_inicio.isoformat(), 'data_fim': data_fim.isoformat(), **cenario.get('parametros', {})}
+    medicoes = []
+    for _ in range(repeticoes):
+        if limpar_cache:
+            limpar_cache()  # Mede o cálculo, não o acerto no cache dos dashboards
+        medicao = medir(lambda: client.get(url, parametros))
+        medicao['ok'] = medicao['status'] == 200
+        medicoes.append(medicao)
+    return resumir(medicoes)
+
+
+def medir_upload(client, nome, caminhos, data, repeticoes=3):
+    """
+    Mede um cenário de CENARIOS_UPLOAD enviando 'caminhos' (um por campo de arquivo).
+    As views de upload respondem com redirect mesmo quando rejeitam o arquivo: a
+    repetição só é 'ok' se, além do HTTP sem erro, houver linhas gravadas na data.
+    """
+    cenario = CENARIOS_UPLOAD[nome]
+    url = reverse(cenario['url'])
+    medicoes = []
+    for _ in range(repeticoes):
+        arquivos = [open(caminho, 'rb') for caminho in caminhos]
+        try:
+            dados = dict(zip(cenario['arquivos'], arquivos))
+            if cenario['data']:
+                dados[cenario['data']] = data.isoformat()
+            medicao = medir(lambda: client.post(url, dados))
+        finally:
+            for arquivo in arquivos:
+                arquivo.close()
+        medicao['ok'] = medicao['status'] < 400
+        medicoes.append(medicao)
+        if cenario['limpar']:
+            modelo, campo = cenario['limpar']
+            medicao['linhas_gravadas'] = modelo.objects.filter(**{campo: data}).count()
+            medicao['ok'] = medicao['ok'] and medicao['linhas_gravadas'] > 0
+            with podando(modelo.objects.filter(**{campo: data})):
+                modelo.objects.filter(**{campo: data}).delete()
+            for fonte, config in FONTES_SLA.items():
+                if config['modelo'] is modelo:
+                    garantir_resumos(fonte, data, data) # Descarta o resumo de SLA do upload medido
+    return resumir(medicoes)
+
+
+def dia_upload(datas):
+    """Data dos arquivos de upload: o dia seguinte ao período, para não misturar com o conjunto de dados."""
+    return datas[-1] + timedelta(days=1)
+
+
+# --- Resultado e comparação ---
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'banco': connection.vendor,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(resultado, linha_base, tolerancia=0.2):
+    """
+    Regressões do 'resultado' em relação à 'linha_base' (mesmo formato: tamanho -> cenário -> métricas).
+    Retorna uma lista de dicts (tamanho, cenário, métrica, base, atual, variação %).
+    Mudança de status HTTP, ou cenário que passou a falhar, também é regressão.
+    """
+    regressoes = []
+    for tamanho, cenarios in resultado.items():
+        for nome, atual in cenarios.items():
+            base = linha_base.get(tamanho, {}).get(nome)
+            if not base:
+                continue  # Cenário/tamanho novo: sem referência
+            for metrica in ('status', 'ok'):
+                if metrica in base and base[metrica] != atual.get(metrica):
+                    regressoes.append({
+                        'tamanho': tamanho, 'cenario': nome, 'metrica': metrica,
+                        'base': base[metrica], 'atual': atual.get(metrica), 'variacao_pct': None,
+                    })
+            for metrica, folga in METRICAS_COMPARADAS.items():
+                valor_base, valor_atual = base.get(metrica), atual.get(metrica)
+                if valor_base is None or valor_atual is None:
+                    continue
+                limite = valor_base if metrica == 'consultas' else max(valor_base * (1 + tolerancia), valor_base + folga)
+                if valor_atual > limite:
+                    regressoes.append({
+                        'tamanho': tamanho,
+                        'cenario': nome,
+                        'metrica': metrica,
+                        'base': valor_base,
+                        'atual': valor_atual,
+                        'variacao_pct': round((valor_atual - valor_base) * 100 / valor_base, 1) if valor_base else None,
+                    })
+    return regressoes
@@ -0,0 +1,380 @@
+# core/dicionario.py
+#
+# Dicionário de valores categóricos (ver core.models.ValorCategorico).
+# As colunas de baixa cardinalidade (status, motivo, motorista, sort code, hub, cidade...)
+# ganham uma coluna de código inteiro ao lado do texto (<campo>_cod, FK para o dicionário):
+# - o upload "interna" os valores distintos do lote e grava o código de cada linha
+#   (aplicar_codigos antes da carga, ou atualizar_codigos depois de um UPDATE em massa);
+# - os dashboards agrupam pelo código inteiro (agrupar) e só traduzem os poucos
+#   códigos do resultado de volta para o texto;
+# - os dropdowns e filtros leem o dicionário em vez de varrer as tabelas grandes.
+# O texto continua na tabela (filtros, exports e o arquivo histórico o usam).
+# Os códigos já conhecidos ficam num cache por processo, válido enquanto a versão do
+# dicionário (VersaoTabela de 'core.ValorCategorico') não muda: quem apaga valores
+# (podar_codigos, reconstruir_dicionario) sobe a versão, e cada processo descarta o
+# cache na próxima consulta. Um acerto custa só a leitura da versão.
+
+import threading
+from contextlib import contextmanager
+
+from django.db import router, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils.text import slugify
+
+from .cache import registrar_alteracao
+from .models import ValorCategorico, VersaoTabela
+
+
+# Colunas categóricas por modelo (rótulo 'app.Modelo' -> campos)
+CAMPOS_CATEGORICOS = {
+    'onhold.OnHold': ['status', 'onhold_reason', 'driver_name', 'sort_code_name'],
+    'onhold.OnholdInicial': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'current_station'],
+    'rastreio.Rastreio': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'destination_hub', 'current_station'],
+    'collection_pool.Pool': ['status', 'city', 'destination_hub'],
+    'parcel_sweeper.Parcel': ['final_status', 'count_type', 'sort_code'],
+}
+
+
+def campo_codigo(campo):
+    """Nome do campo de código de uma coluna categórica (ex.: 'status' -> 'status_cod')."""
+    return f'{campo}_cod'
+
+
+def _campos(modelo):
+    return CAMPOS_CATEGORICOS.get(modelo._meta.label, [])
+
+
+def _valor_do_objeto(obj, campo):
+    """Lê o campo de uma instância de modelo ou de um dict (linha do CSV)."""
+    if isinstance(obj, dict):
+        valor = obj.get(campo)
+    else:
+        valor = getattr(obj, campo, None)
+    if valor is None:
+        return None
+    valor = str(valor)
+    # Guarda o valor como está no banco (os filtros usam igualdade exata)
+    return valor[:255] if valor.strip() else None
+
+
+# Cache por processo: {(tabela, campo, valor): código}, da versão 'versao' do dicionário
+_cache = {'versao': None, 'codigos': {}}
+_trava_cache = threading.Lock()
+
+
+def _versao_dicionario():
+    """Versão atual do dicionário, lida no banco de escrita (uma réplica atrasada não serve)."""
+    return (
+        VersaoTabela.objects.using(router.db_for_write(ValorCategorico))
+        .filter(tabela=ValorCategorico._meta.label)
+        .values_list('versao', flat=True)
+        .first()
+    ) or 0
+
+
+def _guardar_no_cache(versao, tabela, codigos):
+    """on_commit: guarda os códigos gravados, se o dicionário ainda está na mesma versão."""
+    with _trava_cache:
+        if _cache['versao'] == versao:
+            _cache['codigos'].update(
+                ((tabela, campo, valor), codigo) for campo, mapa in codigos.items() for valor, codigo in mapa.items()
+            )
+
+
+def limpar_cache():
+    """Esquece os códigos guardados neste processo (testes)."""
+    with _trava_cache:
+        _cache['versao'] = None
+        _cache['codigos'] = {}
+
+
+def internar_valores(modelo, objetos):
+    """
+    Registra no dicionário os valores distintos dos campos categóricos de `objetos`
+    (instâncias ou dicts) e devolve {campo: {valor: código}}.
+    Os valores já vistos por este processo saem do cache (só a leitura da versão);
+    os demais custam um INSERT ... ON CONFLICT DO NOTHING e um SELECT por campo, e
+    entram no cache depois do COMMIT (um rollback não deixa código inexistente nele).
+    """
+    tabela = modelo._meta.label
+    campos = _campos(modelo)
+    if not campos:
+        return {}
+
+    # 1. Valores distintos do lote, por campo
+    distintos = {campo: set() for campo in campos}
+    for obj in objetos:
+        for campo in campos:
+            valor = _valor_do_objeto(obj, campo)
+            if valor is not None:
+                distintos[campo].add(valor)
+    if not any(distintos.values()):
+        return {campo: {} for campo in campos}
+
+    # 2. Códigos conhecidos na versão atual do dicionário
+    versao = _versao_dicionario()
+    codigos = {campo: {} for campo in campos}
+    faltam = {campo: set() for campo in campos}
+    with _trava_cache:
+        if _cache['versao'] != versao:
+            _cache['versao'] = versao
+            _cache['codigos'] = {}
+        conhecidos = _cache['codigos']
+        for campo, valores in distintos.items():
+            for valor in valores:
+                codigo = conhecidos.get((tabela, campo, valor))
+                if codigo is None:
+                    faltam[campo].add(valor)
+                else:
+                    codigos[campo][valor] = codigo
+    if not any(faltam.values()):
+        return codigos
+
+    # 3. Um único INSERT para os que faltam e os códigos de volta
+    with transaction.atomic():
+        ValorCategorico.objects.bulk_create(
+            [
+                ValorCategorico(tabela=tabela, campo=campo, valor=v, slug=slugify(v)[:255])
+                for campo, valores in faltam.items() for v in valores
+            ],
+            ignore_conflicts=True,
+        )
+        gravados = {
+            campo: dict(
+                ValorCategorico.objects
+                .filter(tabela=tabela, campo=campo, valor__in=valores)
+                .values_list('valor', 'id')
+            )
+            for campo, valores in faltam.items() if valores
+        }
+        transaction.on_commit(lambda: _guardar_no_cache(versao, tabela, gravados))
+    for campo, mapa in gravados.items():
+        codigos[campo].update(mapa)
+    return codigos
+
+
+def aplicar_codigos(modelo, objetos):
+    """
+    Interna os valores de `objetos` e preenche o código de cada campo categórico
+    (<campo>_cod_id) nas instâncias ou dicts, antes da carga (copiar, bulk_create...).
+    """
+    codigos = internar_valores(modelo, objetos)
+    for obj in objetos:
+        for campo, mapa in codigos.items():
+            valor = _valor_do_objeto(obj, campo)
+            codigo = mapa.get(valor) if valor is not None else None
+            if isinstance(obj, dict):
+                obj[f'{campo_codigo(campo)}_id'] = codigo
+            else:
+                setattr(obj, f'{campo_codigo(campo)}_id', codigo)
+    return objetos
+
+
+def atualizar_codigos(queryset, campos=None):
+    """
+    Recalcula o código das linhas de `queryset` a partir do texto, no banco: interna os
+    valores distintos e faz um UPDATE com Subquery por campo. Para depois de gravações
+    que mudam o texto sem passar por aplicar_codigos (update(), update_or_create em laço).
+    """
+    modelo = queryset.model
+    tabela = modelo._meta.label
+    campos = campos or _campos(modelo)
+    for campo in campos:
+        valores = queryset.order_by().exclude(**{f'{campo}__isnull': True}).values_list(campo, flat=True).distinct()
+        internar_valores(modelo, [{campo: v} for v in valores])
+        queryset.update(**{
+            campo_codigo(campo): Subquery(
+                ValorCategorico.objects
+                .filter(tabela=tabela, campo=campo, valor=OuterRef(campo))
+                .values('id')[:1]
+            )
+        })
+
+
+def codigos_presentes(queryset):
+    """
+    {campo: códigos distintos} das linhas de `queryset` (ex.: as linhas de um dia,
+    antes de uma recarga ou exclusão; ver podar_codigos e podando).
+    """
+    return {
+        campo: set(
+            queryset.order_by().exclude(**{f'{campo_codigo(campo)}__isnull': True})
+            .values_list(f'{campo_codigo(campo)}_id', flat=True).distinct()
+        )
+        for campo in _campos(queryset.model)
+    }
+
+
+def podar_codigos(modelo, candidatos):
+    """
+    Remove do dicionário os códigos de `candidatos` ({campo: códigos}) que nenhuma linha
+    da tabela usa mais. Uma consulta pelo índice do código por campo, sem DISTINCT na
+    tabela inteira. Se removeu algo, sobe a versão do dicionário (os caches dos processos
+    caem). Retorna quantos valores foram removidos.
+    """
+    tabela = modelo._meta.label
+    removidos = 0
+    for campo, codigos in candidatos.items():
+        if not codigos:
+            continue
+        coluna = f'{campo_codigo(campo)}_id'
+        em_uso = set(
+            modelo._default_manager.filter(**{f'{coluna}__in': codigos})
+            .order_by().values_list(coluna, flat=True).distinct()
+        )
+        sumiram = set(codigos) - em_uso
+        if sumiram:
+            removidos += ValorCategorico.objects.filter(tabela=tabela, campo=campo, pk__in=sumiram).delete()[0]
+    if removidos:
+        registrar_alteracao(ValorCategorico)
+    return removidos
+
+
+def podar_tabela(modelo):
+    """
+    Confere todos os valores do dicionário do modelo contra os códigos em uso. Para
+    gravações que trocam valores de linhas que não dá para delimitar antes (upsert por chave).
+    """
+    codigos = {campo: set() for campo in _campos(modelo)}
+    for campo, codigo in ValorCategorico.objects.filter(tabela=modelo._meta.label).values_list('campo', 'id'):
+        if campo in codigos:
+            codigos[campo].add(codigo)
+    return podar_codigos(modelo, codigos)
+
+
+@contextmanager
+def podando(queryset):
+    """
+    Envolve uma exclusão ou recarga das linhas de `queryset`: ao sair, os valores que
+    elas usavam e que deixaram de existir na tabela saem do dicionário (e dos filtros).
+    """
+    candidatos = codigos_presentes(queryset)
+    yield
+    podar_codigos(queryset.model, candidatos)
+
+
+def rotulos(codigos):
+    """{código: valor} dos códigos informados (uma consulta pela PK)."""
+    codigos = {codigo for codigo in codigos if codigo is not None}
+    if not codigos:
+        return {}
+    return dict(ValorCategorico.objects.filter(pk__in=codigos).values_list('id', 'valor'))
+
+
+def agrupar(queryset, campo, total='total', limite=None):
+    """
+    Contagem das linhas de `queryset` por valor de `campo`, em ordem decrescente:
+    [{campo: valor, total: n}]. O GROUP BY é feito no código inteiro e só os códigos
+    do resultado são traduzidos. Como Count(campo), as linhas sem valor formam um
+    grupo com total 0.
+    """
+    coluna = campo_codigo(campo)
+    grupos = list(
+        queryset.order_by().values(coluna)
+        .annotate(**{total: Count(coluna)})
+        .order_by(f'-{total}')[:limite]
+    )
+    nomes = rotulos(grupo[coluna] for grupo in grupos)
+    return [{campo: nomes.get(grupo[coluna]), total: grupo[total]} for grupo in grupos]
+
+
+def valores_distintos(modelo, campo):
+    """
+    Lista ordenada dos valores conhecidos de `campo` (substitui o DISTINCT na tabela grande).
+    Lê sempre do banco: a tabela é pequena e assim enxerga uploads de outros processos.
+    """
+    return list(
+        ValorCategorico.objects
+        .filter(tabela=modelo._meta.label, campo=campo)
+        .order_by('valor')
+        .values_list('valor', flat=True)
+    )
+
+
+def valores_dos_campos(modelo, campos):
+    """
+    {campo: lista ordenada de valores} de vários campos do modelo numa única consulta
+    (formulários com mais de um dropdown). Mesma leitura de valores_distintos.
+    """
+    valores = {campo: [] for campo in campos}
+    for campo, valor in (
+        ValorCategorico.objects
+        .filter(tabela=modelo._meta.label, campo__in=campos)
+        .order_by('valor')
+        .values_list('campo', 'valor')
+    ):
+        valores[campo].append(valor)
+    return valores
+
+
+def valores_do_slug(modelo, campo, slug):
+    """
+    Valores originais de `campo` cujo slugify() é `slug` (URLs de detalhe).
+    Consulta indexada no dicionário, sem DISTINCT na tabela grande.
+    Normalmente é um único valor; grafias que geram o mesmo slug
+    (ex.: 'São Paulo' e 'Sao Paulo') voltam todas.
+    Slug desconhecido devolve lista vazia (a view responde 404), sem varrer a tabela:
+    valores que faltem no dicionário voltam com o comando reconstruir_dicionario.
+    """
+    return list(
+        ValorCategorico.objects
+        .filter(tabela=modelo._meta.label, campo=campo, slug=slug)
+        .order_by('valor')
+        .values_list('valor', flat=True)
+    )
+
+
+def reconstruir_dicionario(modelo):
+    """
+    Acerta o dicionário e os códigos de um modelo a partir dos dados atuais
+    (usado após exclusões ou UPDATEs em massa, ou na carga inicial).
+    Os valores em uso mantêm o código: só entram os que faltam, saem os que
+    nenhuma linha usa, e as linhas têm o código recalculado a partir do texto.
+    """
+    tabela = modelo._meta.label
+    todas = modelo._default_manager.all()
+    with transaction.atomic():
+        atualizar_codigos(todas)
+        removidos = 0
+        for campo in _campos(modelo):
+            em_uso = todas.order_by().exclude(**{f'{campo_codigo(campo)}__isnull': True}).values(
+                f'{campo_codigo(campo)}_id'
+            )
+            removidos += ValorCategorico.objects.filter(tabela=tabela, campo=campo).exclude(pk__in=em_uso).delete()[0]
+        if removidos:
+            registrar_alteracao(ValorCategorico)
+
+
+def _codificar_instancia(sender, instance, raw=False, **kwargs):
+    """pre_save: código dos campos categóricos de uma gravação avulsa (admin, formulários, create())."""
+    if raw or getattr(_adiamento, 'ativo', False):
+        return
+    aplicar_codigos(sender, [instance])
+
+
+# Por thread: o adiamento de um upload não vale para as outras requisições do processo
+_adiamento = threading.local()
+
+
+@contextmanager
+def codigos_adiados():
+    """
+    Desliga a codificação por linha do pre_save dentro do bloco (uploads que gravam
+    linha a linha, como o update_or_create da Parcel). Quem usa chama
+    atualizar_codigos() nas linhas gravadas ao final.
+    """
+    anterior = getattr(_adiamento, 'ativo', False)
+    _adiamento.ativo = True
+    try:
+        yield
+    finally:
+        _adiamento.ativo = anterior
+
+
+def conectar_sinais():
+    """Liga o pre_save dos modelos com campos categóricos (CoreConfig.ready)."""
+    from django.apps import apps
+    from django.db.models.signals import pre_save
+
+    for tabela in CAMPOS_CATEGORICOS:
+        pre_save.connect(_codificar_instancia, sender=apps.get_model(tabela), dispatch_uid=f'dicionario:{tabela}')
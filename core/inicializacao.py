@@ -0,0 +1,163 @@
+# core/inicializacao.py
+#
+# Perfil do tempo de inicialização (subida de worker, autoreload, comandos).
+# medir() roda um Python novo com -X importtime fazendo o que um worker faz ao subir:
+# django.setup() (apps e modelos) e a carga do URLConf (todas as views). A saída do
+# importtime vira uma árvore de imports, e dela saem:
+# - o tempo de cada fase;
+# - o custo por pacote (tempo próprio somado) e por app do projeto;
+# - os imports mais caros (tempo acumulado);
+# - as dependências pesadas carregadas na subida e a cadeia de quem as importou.
+# As dependências de ingestão (pandas, numpy, openpyxl...) devem ser importadas
+# dentro das funções de upload/cálculo que as usam, e não no topo dos módulos.
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Módulos que não deveriam carregar só para subir o servidor
+PESADAS = ('pandas', 'numpy', 'openpyxl', 'requests', 'django.contrib.postgres', 'psycopg2', 'psycopg')
+
+# Drivers de banco: o backend do Django os importa na subida, então só contam como
+# pesados quando nenhum banco configurado usa o PostgreSQL
+DRIVERS = {'django.db.backends.postgresql': ('psycopg2', 'psycopg')}
+
+FASES = ('interpretador', 'setup', 'urls')
+
+# Executado no processo medido: marca as fases no stderr, junto do importtime
+SCRIPT = """
+import json, sys, time
+sys.stderr.write('#fase setup\\n')
+inicio = time.perf_counter()
+import django
+django.setup()
+apps = time.perf_counter()
+sys.stderr.write('#fase urls\\n')
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+print(json.dumps({'setup': apps - inicio, 'urls': urls - apps}))
+"""
+
+
+def _ler_importtime(texto):
+    """
+    Linhas do importtime -> lista de imports com nome, tempo próprio e acumulado (s),
+    profundidade, fase e índice do pai (o módulo que fez o import).
+    O importtime imprime os filhos antes do pai, com 2 espaços a mais de recuo.
+    """
+    imports = []
+    pendentes = []  # índices ainda sem pai
+    fase = FASES[0]
+    for linha in texto.splitlines():
+        if linha.startswith('#fase '):
+            fase = linha.split()[1]
+            continue
+        if not linha.startswith('import time:') or 'imported package' in linha:
+            continue
+        cabecalho, acumulado, nome = linha.split('|', 2)
+        proprio = cabecalho.split(':', 1)[1]
+        nome = nome[1:]  # Um espaço separa a coluna; o resto é o recuo da profundidade
+        profundidade = (len(nome) - len(nome.lstrip(' '))) // 2
+        indice = len(imports)
+        imports.append({
+            'nome': nome.strip(),
+            'proprio': int(proprio) / 1e6,
+            'acumulado': int(acumulado) / 1e6,
+            'profundidade': profundidade,
+            'fase': fase,
+            'pai': None,
+        })
+        while pendentes and imports[pendentes[-1]]['profundidade'] > profundidade:
+            imports[pendentes.pop()]['pai'] = indice
+        pendentes.append(indice)
+    return imports
+
+
+def _apps_do_projeto():
+    base = str(settings.BASE_DIR)
+    return {
+        app.split('.')[0] for app in settings.INSTALLED_APPS
+        if os.path.isdir(os.path.join(base, app.split('.')[0]))
+    }
+
+
+def _cadeia(imports, indice):
+    """Nome do módulo seguido de quem o importou, até o topo (ex.: pandas <- core.datas <- rastreio.views)."""
+    nomes = []
+    while indice is not None:
+        nomes.append(imports[indice]['nome'])
+        indice = imports[indice]['pai']
+    return nomes
+
+
+def _pesadas():
+    """PESADAS sem os drivers dos bancos configurados."""
+    necessarios = {
+        driver for banco in settings.DATABASES.values() for driver in DRIVERS.get(banco['ENGINE'], ())
+    }
+    return tuple(nome for nome in PESADAS if nome not in necessarios)
+
+
+def _executar():
+    ambiente = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        cwd=settings.BASE_DIR, env=ambiente, capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else 'falha ao medir')
+    return json.loads(processo.stdout.strip().splitlines()[-1]), _ler_importtime(processo.stderr)
+
+
+def medir(repeticoes=3, limite=15):
+    """
+    Mede a subida 'repeticoes' vezes (a primeira paga a compilação dos .pyc e o
+    cache de disco) e resume a mais rápida.
+    """
+    execucoes = [_executar() for _ in range(repeticoes)]
+    fases, imports = min(execucoes, key=lambda execucao: execucao[0]['setup'] + execucao[0]['urls'])
+    apps = _apps_do_projeto()
+
+    por_pacote = {}
+    for item in imports:
+        pacote = item['nome'].split('.')[0]
+        dados = por_pacote.setdefault(pacote, {'pacote': pacote, 'proprio': 0.0, 'modulos': 0, 'projeto': pacote in apps})
+        dados['proprio'] += item['proprio']
+        dados['modulos'] += 1
+
+    # Por fase: soma dos imports de primeiro nível de cada uma (o que a fase de fato importou)
+    por_fase = {fase: 0.0 for fase in FASES}
+    for item in imports:
+        if item['pai'] is None:
+            por_fase[item['fase']] += item['acumulado']
+
+    pesadas = []
+    for nome in _pesadas():
+        indice = next((i for i, item in enumerate(imports) if item['nome'] == nome), None)
+        if indice is not None:
+            pesadas.append({
+                'modulo': nome,
+                'acumulado': imports[indice]['acumulado'],
+                'fase': imports[indice]['fase'],
+                'cadeia': _cadeia(imports, indice),
+            })
+
+    mais_caros = sorted(imports, key=lambda item: -item['acumulado'])[:limite]
+    return {
+        'fases': {**fases, 'total': fases['setup'] + fases['urls']},
+        'imports_por_fase': por_fase,
+        'modulos': len(imports),
+        'pacotes': sorted(por_pacote.values(), key=lambda dados: -dados['proprio'])[:limite],
+        'apps': sorted((dados for dados in por_pacote.values() if dados['projeto']), key=lambda dados: -dados['proprio']),
+        'mais_caros': [
+            {**{chave: item[chave] for chave in ('nome', 'proprio', 'acumulado', 'fase')},
+             'importado_por': imports[item['pai']]['nome'] if item['pai'] is not None else None}
+            for item in mais_caros
+        ],
+        'pesadas': pesadas,
+        'verificadas': list(_pesadas()),
+    }
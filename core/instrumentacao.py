@@ -0,0 +1,283 @@
+# core/instrumentacao.py
+#
+# Medição por requisição (usada pelo core.middleware.InstrumentacaoMiddleware).
+# Para cada requisição amostrada:
+# - consultas e tempo de SQL, via connection.execute_wrapper em todas as conexões;
+# - tempo de renderização de template (Template.render do backend Django, medido
+#   só no template mais externo: includes e extends já estão dentro dele);
+# - tempo total e tamanho da resposta.
+# Os totais são acumulados POR VIEW (nome da rota) neste processo, junto com as
+# últimas requisições lentas e os padrões N+1 (a mesma SQL repetida muitas vezes
+# na mesma requisição). O painel (core:painel_instrumentacao) e o /metrics
+# (formato Prometheus) leem daqui. Cada processo do servidor tem os seus números.
+# As consultas acima de 'consulta_lenta_s' vão para core.consultas_lentas em TODAS as
+# requisições (não só nas amostradas): o wrapper leve só cronometra e compara.
+
+import hmac
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import consultas_lentas
+
+PADRAO = {
+    'ativa': True,
+    'amostragem': 1.0,  # Fração das requisições medidas (0 a 1)
+    'lenta_s': 1.0,  # Requisição lenta: tempo total a partir deste valor
+    'limite_n_mais_um': 10,  # A mesma SQL N vezes na requisição = suspeita de N+1
+    'max_registros': 200,  # Tamanho das listas de lentas e N+1 (as mais antigas saem)
+    # Acesso ao /metrics sem login de staff:
+    # - 'metricas_token': o coletor manda 'Authorization: Bearer <token>';
+    # - 'metricas_ips': opt-in por REMOTE_ADDR. Só use sem proxy reverso na frente: atrás
+    #   de um proxy local, TODOS os clientes chegam como 127.0.0.1.
+    'metricas_token': None,
+    'metricas_ips': [],
+    # Consultas lentas (core.consultas_lentas); None desliga
+    'consulta_lenta_s': 0.1,
+    'max_impressoes': 500,  # Impressões distintas guardadas (as usadas há mais tempo saem)
+    'amostras_por_impressao': 200,  # Últimas durações de cada impressão (base do p95)
+    'gravar_a_cada_s': 60,
+    'validade_arquivos_s': 24 * 3600,  # Arquivos de processos sem gravar há mais que isto saem do resumo
+    'pasta_consultas_lentas': None,  # Sem pasta: só em memória
+}
+
+# Faixas (s) do histograma de duração exportado no /metrics
+FAIXAS_DURACAO = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_medicao_atual = ContextVar('medicao_atual', default=None)
+_trava = threading.Lock()
+_estado = {'views': {}, 'lentas': None, 'n_mais_um': None, 'desde': None}
+_templates_instalados = False
+
+
+def configuracao():
+    """PADRAO com as substituições de settings.INSTRUMENTACAO."""
+    return {**PADRAO, **getattr(settings, 'INSTRUMENTACAO', {})}
+
+
+def acesso_metricas(request):
+    """Pode ler o /metrics: staff, o token de 'metricas_token' ou um IP de 'metricas_ips' (opt-in)."""
+    if request.user.is_staff:
+        return True
+    config = configuracao()
+    token = config['metricas_token']
+    cabecalho = request.headers.get('Authorization', '')
+    if token and cabecalho.startswith('Bearer ') and hmac.compare_digest(cabecalho[len('Bearer '):], token):
+        return True
+    return request.META.get('REMOTE_ADDR') in config['metricas_ips']
+
+
+def zerar():
+    """Descarta os números acumulados neste processo."""
+    maximo = configuracao()['max_registros']
+    with _trava:
+        _estado['views'] = {}
+        _estado['lentas'] = deque(maxlen=maximo)
+        _estado['n_mais_um'] = deque(maxlen=maximo)
+        _estado['desde'] = timezone.now()
+
+
+zerar()
+
+
+# --- Medição de uma requisição ---
+
+def nova_medicao():
+    return {
+        'consultas': 0,
+        'sql': 0.0,
+        'render': 0.0,
+        'sql_render': 0.0,  # SQL disparada durante a renderização (querysets preguiçosos)
+        'renderizando': False,
+        'repeticoes': Counter(),  # SQL (com %s, sem os parâmetros) -> vezes
+    }
+
+
+def _contar_sql(medicao, request, limite_lenta):
+    def contar(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            if medicao is not None:
+                medicao['consultas'] += 1
+                medicao['sql'] += duracao
+                if medicao['renderizando']:
+                    medicao['sql_render'] += duracao
+                medicao['repeticoes'][sql] += 1
+            if limite_lenta is not None and duracao >= limite_lenta:
+                consultas_lentas.registrar(sql, duracao, request, many)
+    return contar
+
+
+def medindo(medicao, request=None):
+    """
+    Context manager: mede o SQL de todas as conexões e marca 'medicao' como a atual.
+    Com medicao=None, só procura consultas lentas (requisição fora da amostragem).
+    """
+    pilha = ExitStack()
+    contar = _contar_sql(medicao, request, configuracao()['consulta_lenta_s'])
+    for conexao in connections.all():
+        pilha.enter_context(conexao.execute_wrapper(contar))
+    token = _medicao_atual.set(medicao)
+    pilha.callback(_medicao_atual.reset, token)
+    return pilha
+
+
+def instalar_medicao_templates():
+    """Envolve o render dos templates Django (uma vez por processo) para somar o tempo de renderização."""
+    global _templates_instalados
+    if _templates_instalados:
+        return
+    from django.template.backends.django import Template
+
+    render_original = Template.render
+
+    def render(self, context=None, request=None):
+        medicao = _medicao_atual.get()
+        if medicao is None or medicao['renderizando']:
+            return render_original(self, context, request)
+        medicao['renderizando'] = True
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, context, request)
+        finally:
+            medicao['renderizando'] = False
+            medicao['render'] += time.perf_counter() - inicio
+
+    Template.render = render
+    _templates_instalados = True
+
+
+def registrar(request, response, medicao, total):
+    """Acumula a requisição medida nos totais da view e nas listas de lentas / N+1."""
+    config = configuracao()
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'sem_rota'
+    tamanho = None if response.streaming else len(response.content)
+    render = medicao['render'] - medicao['sql_render']  # Só o Python do template
+    python = max(total - medicao['sql'] - render, 0)
+
+    repetidas = [
+        (sql, vezes) for sql, vezes in medicao['repeticoes'].most_common(3)
+        if vezes >= config['limite_n_mais_um']
+    ]
+    lenta = total >= config['lenta_s']
+    agora = timezone.now()
+
+    with _trava:
+        dados = _estado['views'].setdefault(view, {
+            'requisicoes': 0, 'tempo': 0.0, 'tempo_max': 0.0, 'consultas': 0, 'sql': 0.0,
+            'render': 0.0, 'python': 0.0, 'bytes': 0, 'lentas': 0, 'n_mais_um': 0,
+            'faixas': [0] * len(FAIXAS_DURACAO),
+        })
+        dados['requisicoes'] += 1
+        dados['tempo'] += total
+        dados['tempo_max'] = max(dados['tempo_max'], total)
+        dados['consultas'] += medicao['consultas']
+        dados['sql'] += medicao['sql']
+        dados['render'] += render
+        dados['python'] += python
+        dados['bytes'] += tamanho or 0
+        for i, limite in enumerate(FAIXAS_DURACAO):
+            if total <= limite:
+                dados['faixas'][i] += 1
+
+        if lenta:
+            dados['lentas'] += 1
+            _estado['lentas'].append({
+                'em': agora, 'view': view, 'caminho': request.get_full_path()[:300], 'metodo': request.method,
+                'status': response.status_code, 'tempo': total, 'consultas': medicao['consultas'],
+                'sql': medicao['sql'], 'render': render, 'bytes': tamanho,
+            })
+        if repetidas:
+            dados['n_mais_um'] += 1
+            for sql, vezes in repetidas:
+                _estado['n_mais_um'].append({
+                    'em': agora, 'view': view, 'caminho': request.get_full_path()[:300], 'sql': sql[:500],
+                    'vezes': vezes,
+                })
+
+
+# --- Leitura ---
+
+def resumo_views():
+    """Totais e médias por view, da que mais consome tempo para a que menos consome."""
+    with _trava:
+        views = {view: dict(dados) for view, dados in _estado['views'].items()}
+    linhas = []
+    for view, dados in views.items():
+        n = dados['requisicoes']
+        linhas.append({
+            'view': view,
+            **dados,
+            'tempo_medio': dados['tempo'] / n,
+            'consultas_media': dados['consultas'] / n,
+            'sql_medio': dados['sql'] / n,
+            'render_medio': dados['render'] / n,
+            'python_medio': dados['python'] / n,
+            'bytes_medio': dados['bytes'] / n,
+        })
+    return sorted(linhas, key=lambda linha: -linha['tempo'])
+
+
+def requisicoes_lentas():
+    with _trava:
+        return list(reversed(_estado['lentas']))
+
+
+def padroes_n_mais_um():
+    with _trava:
+        return list(reversed(_estado['n_mais_um']))
+
+
+def _rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def metricas_prometheus():
+    """Texto no formato de exposição do Prometheus (contadores desde o início do processo ou o último zerar)."""
+    with _trava:
+        views = {view: dict(dados, faixas=list(dados['faixas'])) for view, dados in _estado['views'].items()}
+
+    prefixo = 'sistema_logistica'
+    contadores = [
+        ('requisicoes_total', 'requisicoes', 'Requisições medidas (amostradas).'),
+        ('sql_consultas_total', 'consultas', 'Consultas SQL das requisições medidas.'),
+        ('sql_segundos_total', 'sql', 'Tempo em SQL (s).'),
+        ('renderizacao_segundos_total', 'render', 'Tempo renderizando templates, sem o SQL disparado por eles (s).'),
+        ('python_segundos_total', 'python', 'Tempo restante em Python: view, middleware etc. (s).'),
+        ('resposta_bytes_total', 'bytes', 'Bytes das respostas (exceto streaming).'),
+        ('requisicoes_lentas_total', 'lentas', 'Requisições acima do limite de lentidão.'),
+        ('n_mais_um_total', 'n_mais_um', 'Requisições com a mesma SQL repetida acima do limite (N+1).'),
+    ]
+    linhas = [
+        f'# HELP {prefixo}_amostragem Fração das requisições medidas.',
+        f'# TYPE {prefixo}_amostragem gauge',
+        f'{prefixo}_amostragem {configuracao()["amostragem"]}',
+    ]
+    for nome, chave, ajuda in contadores:
+        linhas += [f'# HELP {prefixo}_{nome} {ajuda}', f'# TYPE {prefixo}_{nome} counter']
+        linhas += [f'{prefixo}_{nome}{{view="{_rotulo(view)}"}} {dados[chave]}' for view, dados in sorted(views.items())]
+
+    nome = f'{prefixo}_requisicao_segundos'
+    linhas += [f'# HELP {nome} Duração das requisições medidas (s).', f'# TYPE {nome} histogram']
+    for view, dados in sorted(views.items()):
+        rotulo = _rotulo(view)
+        for limite, quantidade in zip(FAIXAS_DURACAO, dados['faixas']):
+            linhas.append(f'{nome}_bucket{{view="{rotulo}",le="{limite}"}} {quantidade}')
+        linhas.append(f'{nome}_bucket{{view="{rotulo}",le="+Inf"}} {dados["requisicoes"]}')
+        linhas.append(f'{nome}_sum{{view="{rotulo}"}} {dados["tempo"]}')
+        linhas.append(f'{nome}_count{{view="{rotulo}"}} {dados["requisicoes"]}')
+    return '\n'.join(linhas) + '\n'
+
+
+def desde():
+    return _estado['desde']
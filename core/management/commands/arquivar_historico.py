@@ -0,0 +1,54 @@
+# core/management/commands/arquivar_historico.py
+
+from datetime import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core import arquivamento
+from sla_analysis.calculo import FONTES, garantir_resumos
+
+
+def _data(texto):
+    return datetime.strptime(texto, '%Y-%m-%d').date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica as políticas de retenção (settings.ARQUIVAMENTO): os dias mais antigos que a política "
+        "saem de Rastreio, OnholdInicial e Parcel para CSVs compactados, com o resumo em DiaArquivado. "
+        "Com --restaurar, devolve um dia arquivado à tabela quente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', action='append', choices=list(arquivamento.politicas()),
+                            help="Modelo a arquivar (pode repetir; padrão: todos os das políticas).")
+        parser.add_argument('--dias', type=int, help="Mantém só estes dias na tabela quente (no lugar da política).")
+        parser.add_argument('--hoje', type=_data, help="Data de referência do corte, AAAA-MM-DD (padrão: hoje).")
+        parser.add_argument('--simular', action='store_true', help="Só lista os dias e linhas que seriam arquivados.")
+        parser.add_argument('--restaurar', type=_data, metavar='AAAA-MM-DD',
+                            help="Devolve este dia arquivado à tabela quente (exige um --modelo).")
+
+    def handle(self, *args, **options):
+        if options['restaurar']:
+            if not options['modelo'] or len(options['modelo']) != 1:
+                raise CommandError("--restaurar exige exatamente um --modelo.")
+            modelo = apps.get_model(options['modelo'][0])
+            linhas = arquivamento.restaurar_dia(modelo, options['restaurar'])
+            if not linhas:
+                raise CommandError(f"{modelo._meta.label} não tem o dia {options['restaurar']:%d/%m/%Y} arquivado.")
+            # As linhas voltam com ids novos: o resumo de SLA do dia é refeito sobre elas
+            for fonte, config in FONTES.items():
+                if config['modelo'] is modelo:
+                    garantir_resumos(fonte, options['restaurar'], options['restaurar'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{modelo._meta.label} {options['restaurar']:%d/%m/%Y}: {linhas} linhas de volta à tabela."
+            ))
+            return
+
+        resultado = arquivamento.arquivar(options['modelo'], options['hoje'], options['dias'], options['simular'])
+        verbo = "seriam arquivadas" if options['simular'] else "arquivadas"
+        for item in resultado:
+            self.stdout.write(f"  {item['tabela']:<24} {item['dia']:%d/%m/%Y}  {item['linhas']:>9} linhas")
+        total = sum(item['linhas'] for item in resultado)
+        self.stdout.write(self.style.SUCCESS(f"{total} linhas {verbo} em {len(resultado)} dia(s)."))
@@ -0,0 +1,165 @@
+# core/management/commands/gerar_dados_sinteticos.py
+
+import time
+from datetime import date
+
+import numpy as np
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from collection_pool.ceps import atualizar_do_pool
+from core import sinteticos
+from core.cache import registrar_alteracao
+from core.dicionario import CAMPOS_CATEGORICOS, reconstruir_dicionario
+from expedicao.models import ExpedicaoArquivo
+from expedicao.resumos import gerar_resumos
+from logistica.consolidacao import consolidar_datas
+from onhold.motoristas import atualizar_desempenho_motoristas
+from parcel_sweeper.sincronizacao import sincronizar_lost_damage
+from sla_analysis.calculo import recalcular_resumo
+
+
+def _chave_valor(texto, conversao=str):
+    """'chave=valor' -> (chave, valor convertido)."""
+    chave, separador, valor = texto.partition('=')
+    if not separador:
+        raise CommandError(f"Use o formato chave=valor: '{texto}'.")
+    return chave.strip(), conversao(valor.strip())
+
+
+def _distribuicao(texto):
+    """'onhold.status=OnHold:60,LMHub_Received:40' -> ('onhold.status', {'OnHold': 60.0, ...})."""
+    chave, valores = _chave_valor(texto)
+    if chave not in sinteticos.DISTRIBUICOES:
+        raise CommandError(f"Distribuição desconhecida: '{chave}'. Opções: {', '.join(sinteticos.DISTRIBUICOES)}.")
+    pesos = {}
+    for item in valores.split(','):
+        valor, _, peso = item.rpartition(':')
+        try:
+            pesos[valor] = float(peso)
+        except ValueError:
+            raise CommandError(f"Peso inválido em '{item}' (use valor:peso).")
+    return chave, pesos
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera dados sintéticos em volume de produção para OnHold, OnHold Inicial, Rastreio, Pool, "
+        "Parcel Sweeper, Lost/Damage, Expedição, Conferência e ações manuais do inventário, "
+        "com rastreios em comum entre as tabelas, e opcionalmente os arquivos de upload "
+        "correspondentes. Use APENAS em um banco descartável."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100_000,
+                            help="Linhas por fonte (padrão: 100000; Lost/Damage, Expedição e ações manuais usam uma fração).")
+        parser.add_argument('--linhas-por-modelo', action='append', default=[], metavar='FONTE=N',
+                            help="Total de uma fonte específica (ex.: onhold=1000000). Pode repetir.")
+        parser.add_argument('--modelos', nargs='+', choices=list(sinteticos.FONTES),
+                            help="Fontes a gerar (padrão: todas).")
+        parser.add_argument('--dias', type=int, default=30, help="Dias do período (padrão: 30).")
+        parser.add_argument('--inicio', type=date.fromisoformat,
+                            help="Primeiro dia (AAAA-MM-DD; padrão: período terminando hoje).")
+        parser.add_argument('--hubs', type=int, default=3, help=f"Hubs atendidos (1 a {len(sinteticos.CIDADES)}; padrão: 3).")
+        parser.add_argument('--sobreposicao', type=float, default=0.6,
+                            help="Fração dos rastreios de cada fonte tirada do conjunto comum (padrão: 0.6).")
+        parser.add_argument('--distribuicao', action='append', default=[], metavar='CHAVE=VALOR:PESO,...',
+                            help="Substitui uma distribuição (ex.: onhold.status=OnHold:70,LMHub_Received:30).")
+        parser.add_argument('--semente', type=int, default=42, help="Semente aleatória (padrão: 42).")
+        parser.add_argument('--arquivos', metavar='PASTA',
+                            help="Também grava os CSVs de upload (um por fonte e dia) nesta pasta.")
+        parser.add_argument('--xlsx', action='store_true',
+                            help="Com --arquivos, grava também .xlsx das fontes que aceitam Excel (Pool e Conferência).")
+        parser.add_argument('--somente-arquivos', action='store_true',
+                            help="Só grava os arquivos de upload, sem inserir no banco.")
+        parser.add_argument('--sem-derivados', action='store_true',
+                            help="Não recalcula as tabelas derivadas (resumos, dicionário, consolidação).")
+
+    def handle(self, *args, **options):
+        if options['somente_arquivos'] and not options['arquivos']:
+            raise CommandError("--somente-arquivos exige --arquivos PASTA.")
+        if options['dias'] < 1:
+            raise CommandError("--dias deve ser pelo menos 1.")
+
+        fontes = options['modelos'] or list(sinteticos.FONTES)
+        totais = dict(_chave_valor(texto, int) for texto in options['linhas_por_modelo'])
+        desconhecidas = set(totais) - set(sinteticos.FONTES)
+        if desconhecidas:
+            raise CommandError(f"Fonte desconhecida em --linhas-por-modelo: {', '.join(sorted(desconhecidas))}.")
+        for fonte in fontes:
+            totais.setdefault(fonte, max(1, int(options['linhas'] * sinteticos.FONTES[fonte]['fator'])))
+
+        datas = sinteticos.periodo(options['dias'], options['inicio'])
+        gerador = sinteticos.GeradorSintetico(
+            datas,
+            hubs=options['hubs'],
+            universo=max(totais[fonte] for fonte in fontes),
+            sobreposicao=options['sobreposicao'],
+            distribuicoes=dict(_distribuicao(texto) for texto in options['distribuicao']),
+            semente=options['semente'],
+        )
+        gravar_banco = not options['somente_arquivos']
+        if gravar_banco:
+            sinteticos.preparar_banco(gerador)
+
+        self.stdout.write(f"Período: {datas[0]} a {datas[-1]} | hubs: {', '.join(gerador.hubs)}")
+
+        # 1. Gera (NumPy), insere em lote e grava os arquivos, fonte a fonte
+        for fonte in fontes:
+            n = totais[fonte]
+            inicio = time.perf_counter()
+            if fonte == 'expedicao':
+                ids_arquivos = (
+                    sinteticos.criar_arquivos_expedicao(gerador) if gravar_banco
+                    else np.full(len(datas), None, dtype=object)
+                )
+                tabela, planilha = gerador.expedicao(n, ids_arquivos)
+            else:
+                tabela, planilha = getattr(gerador, fonte)(n)
+            gerado = time.perf_counter()
+
+            if gravar_banco:
+                sinteticos.inserir(sinteticos.FONTES[fonte]['modelo'], tabela)
+                if fonte == 'expedicao':
+                    contagem = tabela.groupby('arquivo_origem_id').size()
+                    for arquivo_id, num_registros in contagem.items():
+                        ExpedicaoArquivo.objects.filter(pk=arquivo_id).update(num_registros=int(num_registros))
+            inserido = time.perf_counter()
+
+            caminhos = []
+            if options['arquivos']:
+                caminhos = sinteticos.gravar_arquivos(fonte, tabela, planilha, options['arquivos'], options['xlsx'])
+            fim = time.perf_counter()
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{fonte}: {n:,} linhas | geração {gerado - inicio:.1f}s"
+                + (f" | inserção {inserido - gerado:.1f}s ({n / max(inserido - gerado, 1e-9):,.0f} linhas/s)" if gravar_banco else '')
+                + (f" | {len(caminhos)} arquivo(s) em {fim - inserido:.1f}s" if caminhos else '')
+            ).replace(',', '.'))
+
+        if not gravar_banco or options['sem_derivados']:
+            return
+
+        # 2. Tabelas derivadas, como depois de um upload de verdade
+        inicio = time.perf_counter()
+        modelos = {sinteticos.FONTES[fonte]['modelo'] for fonte in fontes}
+        for rotulo in CAMPOS_CATEGORICOS:
+            if apps.get_model(rotulo) in modelos:
+                reconstruir_dicionario(apps.get_model(rotulo))
+        for data in datas:
+            if 'onhold' in fontes:
+                atualizar_desempenho_motoristas(data)
+            for fonte in ('rastreio', 'onhold_inicial'):
+                if fonte in fontes:
+                    recalcular_resumo(fonte, data)
+        if {'parcel', 'parcel_lost'} & set(fontes):
+            sincronizar_lost_damage(consolidar=False) # Todas as datas são consolidadas abaixo
+        if 'pool' in fontes:
+            atualizar_do_pool()
+        if 'expedicao' in fontes:
+            for arquivo in ExpedicaoArquivo.objects.filter(data_referencia__in=datas):
+                gerar_resumos(arquivo)
+        for inicio_lote in range(0, len(datas), 100):
+            consolidar_datas(datas[inicio_lote:inicio_lote + 100])
+        registrar_alteracao(*modelos)
+        self.stdout.write(self.style.SUCCESS(f"Tabelas derivadas recalculadas em {time.perf_counter() - inicio:.1f}s"))
@@ -0,0 +1,187 @@
+# core/management/commands/medir_desempenho.py
+
+import io
+import json
+import os
+import tempfile
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core import desempenho, roteamento, sinteticos
+from core.models import Usuario
+from onhold.models import OnHold
+
+PASTA_PADRAO = os.path.join(settings.BASE_DIR, 'benchmarks')
+INICIO_PADRAO = date(2031, 1, 1)  # Período fixo: resultados comparáveis entre execuções
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo, pico de memória (RSS), nº de consultas e tempo de SQL dos uploads, dashboards "
+        "e exportações CSV em bancos de teste com 10 mil / 100 mil / 1 milhão de linhas "
+        "(core.sinteticos), grava o resultado em JSON e compara com a linha de base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanhos', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                            help="Linhas por fonte de cada conjunto de dados (padrão: 10000 100000 1000000).")
+        parser.add_argument('--cenarios', nargs='+',
+                            choices=list(desempenho.CENARIOS_LEITURA) + list(desempenho.CENARIOS_UPLOAD),
+                            help="Cenários a medir (padrão: todos).")
+        parser.add_argument('--sem-uploads', action='store_true', help="Mede só os dashboards e exportações.")
+        parser.add_argument('--linhas-upload', type=int,
+                            help="Linhas de cada arquivo de upload (padrão: o tamanho do conjunto de dados).")
+        parser.add_argument('--dias', type=int, default=30, help="Dias do período gerado (padrão: 30).")
+        parser.add_argument('--repeticoes', type=int, default=3,
+                            help="Repetições por cenário; o resultado é a mediana (padrão: 3).")
+        parser.add_argument('--saida', default=os.path.join(PASTA_PADRAO, 'resultado.json'),
+                            help="Arquivo JSON do resultado (padrão: benchmarks/resultado.json).")
+        parser.add_argument('--linha-base', default=os.path.join(PASTA_PADRAO, 'linha_base.json'),
+                            help="JSON de referência para a comparação (padrão: benchmarks/linha_base.json).")
+        parser.add_argument('--salvar-linha-base', action='store_true',
+                            help="Grava este resultado como a nova linha de base.")
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help="Piora relativa aceita antes de acusar regressão (padrão: 0.2 = 20%%).")
+        parser.add_argument('--manter-banco', action='store_true',
+                            help="Reaproveita/mantém os bancos de teste gerados (evita gerar os dados de novo).")
+
+    def handle(self, *args, **options):
+        nomes_leitura = [n for n in desempenho.CENARIOS_LEITURA if not options['cenarios'] or n in options['cenarios']]
+        nomes_upload = [] if options['sem_uploads'] else [
+            n for n in desempenho.CENARIOS_UPLOAD if not options['cenarios'] or n in options['cenarios']
+        ]
+        if options['repeticoes'] < 1:
+            raise CommandError("--repeticoes deve ser pelo menos 1.")
+
+        datas = sinteticos.periodo(options['dias'], INICIO_PADRAO)
+        resultado = {}
+
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as pasta_temporaria, \
+                    override_settings(MEDIA_ROOT=os.path.join(pasta_temporaria, 'media')):
+                for tamanho in options['tamanhos']:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"Conjunto de {tamanho:,} linhas".replace(',', '.')))
+                    resultado[str(tamanho)] = self._medir_tamanho(
+                        tamanho, datas, nomes_leitura, nomes_upload, pasta_temporaria, options
+                    )
+        finally:
+            teardown_test_environment()
+
+        # Resultado + comparação com a linha de base
+        documento = {
+            'gerado_em': timezone.now().isoformat(),
+            'ambiente': desempenho.ambiente(),
+            'repeticoes': options['repeticoes'],
+            'resultados': resultado,
+        }
+        self._gravar_json(options['saida'], documento)
+        self.stdout.write(f"Resultado gravado em {options['saida']}")
+
+        falhas = [
+            f"{tamanho} / {nome} (HTTP {medicao['status']})"
+            for tamanho, medicoes in resultado.items() for nome, medicao in medicoes.items() if not medicao['ok']
+        ]
+        if falhas:
+            # Medição de um cenário que falhou não é referência de nada
+            raise CommandError(f"{len(falhas)} cenário(s) falharam: {', '.join(falhas)}.")
+
+        regressoes = []
+        if os.path.exists(options['linha_base']):
+            with open(options['linha_base'], encoding='utf-8') as arquivo:
+                linha_base = json.load(arquivo)
+            regressoes = desempenho.comparar(resultado, linha_base.get('resultados', {}), options['tolerancia'])
+            if linha_base.get('ambiente', {}).get('plataforma') != documento['ambiente']['plataforma']:
+                self.stdout.write(self.style.WARNING("A linha de base foi medida em outra máquina: compare com cautela."))
+            for r in regressoes:
+                variacao = f" ({r['variacao_pct']:+.1f}%)" if r['variacao_pct'] is not None else ''
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESSÃO {r['tamanho']} / {r['cenario']} / {r['metrica']}: {r['base']} -> {r['atual']}{variacao}"
+                ))
+            if not regressoes:
+                self.stdout.write(self.style.SUCCESS("Nenhuma regressão em relação à linha de base."))
+        else:
+            self.stdout.write(self.style.WARNING(f"Sem linha de base em {options['linha_base']}: nada a comparar."))
+
+        if options['salvar_linha_base']:
+            self._gravar_json(options['linha_base'], documento)
+            self.stdout.write(self.style.SUCCESS(f"Linha de base atualizada: {options['linha_base']}"))
+        elif regressoes:
+            raise CommandError(f"{len(regressoes)} regressão(ões) de desempenho.")
+
+    def _medir_tamanho(self, tamanho, datas, nomes_leitura, nomes_upload, pasta_temporaria, options):
+        """Cria o banco de teste do tamanho, gera os dados e mede os cenários."""
+        nome_original = connection.settings_dict['NAME']
+        nome_teste = (
+            os.path.join(tempfile.gettempdir(), f'medir_desempenho_{tamanho}.sqlite3')
+            if connection.vendor == 'sqlite' else f'test_medir_desempenho_{tamanho}'
+        )
+        connection.settings_dict['TEST']['NAME'] = nome_teste
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['manter_banco'])
+        leitura_original = roteamento.espelhar_leitura()  # Dashboards leem o banco de teste, como em produção
+        try:
+            # 1. Dados (reaproveitados com --manter-banco se o banco já estiver populado)
+            if not OnHold.objects.exists():
+                call_command(
+                    'gerar_dados_sinteticos', linhas=tamanho, dias=len(datas), inicio=datas[0],
+                    stdout=io.StringIO(),
+                )
+            usuario, _ = Usuario.objects.get_or_create(
+                username='medir_desempenho', defaults={'is_staff': True, 'is_superuser': True},
+            )
+            client = Client()
+            client.force_login(usuario)
+
+            medicoes = {}
+
+            # 2. Leitura (cache dos dashboards limpo antes de cada requisição)
+            for nome in nomes_leitura:
+                medicoes[nome] = desempenho.medir_leitura(
+                    client, nome, datas[0], datas[-1], options['repeticoes'],
+                    limpar_cache=lambda: [cache.clear() for cache in caches.all()],
+                )
+                self._relatar(nome, medicoes[nome])
+
+            # 3. Uploads: arquivos de um dia, com rastreios próprios (prefixo BU), enviados e removidos
+            if nomes_upload:
+                dia = desempenho.dia_upload(datas)
+                gerador = sinteticos.GeradorSintetico([dia], universo=tamanho, semente=7, prefixo='BU')
+                pasta = os.path.join(pasta_temporaria, f'uploads_{tamanho}')
+                linhas = options['linhas_upload'] or tamanho
+                for nome in nomes_upload:
+                    fonte = desempenho.CENARIOS_UPLOAD[nome]['fonte']
+                    if fonte == 'expedicao':
+                        tabela, planilha = gerador.expedicao(linhas, np.array([None], dtype=object))
+                    else:
+                        tabela, planilha = getattr(gerador, fonte)(linhas)
+                    caminhos = sinteticos.gravar_arquivos(fonte, tabela, planilha, pasta)
+                    medicoes[nome] = desempenho.medir_upload(client, nome, caminhos, dia, options['repeticoes'])
+                    self._relatar(nome, medicoes[nome])
+            return medicoes
+        finally:
+            roteamento.restaurar_leitura(leitura_original)
+            connection.creation.destroy_test_db(nome_original, verbosity=0, keepdb=options['manter_banco'])
+
+    def _relatar(self, nome, medicao):
+        rss = f"{medicao['pico_rss_mb']} MB" if medicao['pico_rss_mb'] is not None else '-'
+        estilo = self.style.SUCCESS if medicao['ok'] else self.style.ERROR
+        linhas = f" | {medicao['linhas_gravadas']} linhas" if 'linhas_gravadas' in medicao else ''
+        self.stdout.write(estilo(
+            f"  {nome}: {medicao['tempo_s']:.3f}s | {medicao['consultas']} consultas "
+            f"({medicao['tempo_sql_s']:.3f}s SQL) | pico RSS {rss} | HTTP {medicao['status']}{linhas}"
+            + ('' if medicao['ok'] else ' | FALHOU')
+        ))
+
+    def _gravar_json(self, caminho, documento):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(documento, arquivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,71 @@
+# core/management/commands/perfil_inicializacao.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import inicializacao
+
+
+def _ms(segundos):
+    return f"{segundos * 1000:8.1f} ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Perfil da subida do projeto (estilo python -X importtime): tempo do django.setup() e do URLConf, "
+        "custo de import por pacote e por app, imports mais caros e dependências pesadas carregadas na subida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=3,
+                            help="Subidas medidas; o relatório usa a mais rápida (padrão: 3).")
+        parser.add_argument('--limite', type=int, default=15, help="Linhas das listas de pacotes e imports (padrão: 15).")
+        parser.add_argument('--json', metavar='ARQUIVO', help="Grava o perfil completo neste arquivo JSON.")
+        parser.add_argument('--verificar', action='store_true',
+                            help="Falha se alguma dependência pesada (pandas, numpy...) carregar na subida.")
+
+    def handle(self, *args, **options):
+        if options['repeticoes'] < 1:
+            raise CommandError("--repeticoes deve ser pelo menos 1.")
+        try:
+            perfil = inicializacao.medir(options['repeticoes'], options['limite'])
+        except RuntimeError as erro:
+            raise CommandError(f"Não foi possível medir a subida: {erro}")
+
+        fases = perfil['fases']
+        self.stdout.write(self.style.MIGRATE_HEADING("Fases (relógio)"))
+        self.stdout.write(f"  django.setup() (apps e modelos) {_ms(fases['setup'])}")
+        self.stdout.write(f"  URLConf (views)                 {_ms(fases['urls'])}")
+        self.stdout.write(f"  Total                           {_ms(fases['total'])}  ({perfil['modulos']} módulos)")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Apps do projeto (tempo próprio de import)"))
+        for dados in perfil['apps']:
+            self.stdout.write(f"  {dados['pacote']:<28} {_ms(dados['proprio'])}  {dados['modulos']:4d} módulos")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Pacotes mais caros (tempo próprio somado)"))
+        for dados in perfil['pacotes']:
+            self.stdout.write(f"  {dados['pacote']:<28} {_ms(dados['proprio'])}  {dados['modulos']:4d} módulos")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Imports mais caros (tempo acumulado)"))
+        for item in perfil['mais_caros']:
+            origem = f"  <- {item['importado_por']}" if item['importado_por'] else ''
+            self.stdout.write(f"  {item['nome']:<40} {_ms(item['acumulado'])}  [{item['fase']}]{origem}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Dependências pesadas na subida"))
+        for item in perfil['pesadas']:
+            self.stdout.write(self.style.WARNING(
+                f"  {item['modulo']:<28} {_ms(item['acumulado'])}  [{item['fase']}]  {' <- '.join(item['cadeia'])}"
+            ))
+        if not perfil['pesadas']:
+            self.stdout.write(self.style.SUCCESS("  Nenhuma: " + ', '.join(perfil['verificadas']) + " ficam para quando forem usadas."))
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as arquivo:
+                json.dump(perfil, arquivo, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Perfil gravado em {options['json']}")
+
+        if options['verificar'] and perfil['pesadas']:
+            raise CommandError(
+                "Dependências pesadas carregadas na subida: " + ', '.join(item['modulo'] for item in perfil['pesadas'])
+            )
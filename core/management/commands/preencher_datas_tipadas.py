@@ -0,0 +1,60 @@
+# core/management/commands/preencher_datas_tipadas.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from core.datas import CAMPOS_DATAHORA, preencher_datahoras
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche os campos DateTimeField tipados (sufixo _at) dos registros já existentes, "
+        "convertendo os campos texto em lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tabelas', nargs='*',
+            help="Rótulos 'app.Modelo' a processar (padrão: todos os de core.datas.CAMPOS_DATAHORA).",
+        )
+        parser.add_argument('--tamanho-lote', type=int, default=5000, help="Registros por lote (padrão: 5000).")
+
+    def handle(self, *args, **options):
+        tabelas = options['tabelas'] or list(CAMPOS_DATAHORA)
+        tamanho_lote = options['tamanho_lote']
+
+        for tabela in tabelas:
+            modelo = apps.get_model(tabela)
+            mapa = CAMPOS_DATAHORA[tabela]
+
+            # 1. Só linhas com algum texto preenchido e o campo tipado ainda vazio
+            pendentes = Q()
+            for campo_texto, campo_tipado in mapa.items():
+                pendentes |= Q(**{f'{campo_texto}__isnull': False, f'{campo_tipado}__isnull': True})
+
+            queryset = (
+                modelo.objects.filter(pendentes)
+                .only('pk', *mapa.keys(), *mapa.values())
+                .order_by('pk')
+            )
+
+            # 2. Paginação por chave (pk > último): cada linha é lida uma única vez,
+            #    mesmo as que não convertem (texto em formato desconhecido)
+            ultimo_pk = 0
+            total = 0
+            while True:
+                lote = list(queryset.filter(pk__gt=ultimo_pk)[:tamanho_lote])
+                if not lote:
+                    break
+
+                campos = preencher_datahoras(modelo, lote)
+                with transaction.atomic():
+                    modelo.objects.bulk_update(lote, campos, batch_size=tamanho_lote)
+
+                ultimo_pk = lote[-1].pk
+                total += len(lote)
+                self.stdout.write(f"  {tabela}: {total} registros processados...")
+
+            self.stdout.write(self.style.SUCCESS(f"{tabela}: {total} registros atualizados."))
@@ -0,0 +1,23 @@
+# core/management/commands/reconstruir_dicionario.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.dicionario import CAMPOS_CATEGORICOS, reconstruir_dicionario
+
+
+class Command(BaseCommand):
+    help = "Refaz o dicionário de valores categóricos a partir dos dados atuais das tabelas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tabelas', nargs='*',
+            help="Rótulos 'app.Modelo' a reconstruir (padrão: todos).",
+        )
+
+    def handle(self, *args, **options):
+        tabelas = options['tabelas'] or list(CAMPOS_CATEGORICOS)
+        for tabela in tabelas:
+            modelo = apps.get_model(tabela)
+            reconstruir_dicionario(modelo)
+            self.stdout.write(self.style.SUCCESS(f"Dicionário reconstruído: {tabela}"))
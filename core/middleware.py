@@ -0,0 +1,75 @@
+# core/middleware.py
+
+import random
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentacao, roteamento
+
+
+class InstrumentacaoMiddleware:
+    """
+    Mede as requisições (SQL, renderização, tempo total e tamanho) e acumula por view
+    em core.instrumentacao. Configuração em settings.INSTRUMENTACAO:
+    - 'ativa': False tira o middleware da cadeia (custo zero);
+    - 'amostragem': fração das requisições medidas. As não sorteadas só passam pelo
+      wrapper leve das consultas lentas ('consulta_lenta_s'), ou direto se ele estiver
+      desligado (em produção, uma fração pequena basta).
+    Respostas em streaming: o SQL executado enquanto o corpo é enviado não entra na conta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = instrumentacao.configuracao()
+        if not config['ativa']:
+            raise MiddlewareNotUsed
+        self.amostragem = config['amostragem']
+        self.consultas_lentas = config['consulta_lenta_s'] is not None
+        instrumentacao.instalar_medicao_templates()
+
+    def __call__(self, request):
+        if self.amostragem < 1 and random.random() >= self.amostragem:
+            if not self.consultas_lentas:
+                return self.get_response(request)
+            with instrumentacao.medindo(None, request):
+                return self.get_response(request)
+
+        medicao = instrumentacao.nova_medicao()
+        inicio = time.perf_counter()
+        with instrumentacao.medindo(medicao, request):
+            response = self.get_response(request)
+        instrumentacao.registrar(request, response, medicao, time.perf_counter() - inicio)
+        return response
+
+
+class LeituraSeparadaMiddleware:
+    """
+    Marca as requisições das views só de leitura (settings.BANCO_LEITURA['views'] e
+    ['metodos']) para que o core.roteamento.RoteadorLeitura mande as leituras delas
+    para a conexão 'leitura'. Sem o alias 'leitura' configurado, sai da cadeia.
+    Respostas em streaming (exportações CSV) continuam marcadas enquanto o corpo é gerado.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not roteamento.leitura_configurada():
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        token = getattr(request, '_token_leitura', None)
+        if token is not None:
+            roteamento.desativar_leitura(token)
+            if response.streaming:
+                response.streaming_content = self._gerar_lendo(response.streaming_content)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if roteamento.view_somente_leitura(request.resolver_match.view_name, request.method):
+            request._token_leitura = roteamento.ativar_leitura()
+
+    @staticmethod
+    def _gerar_lendo(conteudo):
+        with roteamento.somente_leitura():
+            yield from conteudo
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValorCategorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=100, verbose_name='Tabela (app.Modelo)')),
+                ('campo', models.CharField(max_length=100, verbose_name='Campo')),
+                ('valor', models.CharField(max_length=255, verbose_name='Valor')),
+            ],
+            options={
+                'verbose_name': 'Valor Categórico',
+                'verbose_name_plural': 'Valores Categóricos',
+                'ordering': ['tabela', 'campo', 'valor'],
+                'constraints': [models.UniqueConstraint(fields=('tabela', 'campo', 'valor'), name='unique_valor_categorico')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Carga inicial do dicionário de valores categóricos a partir dos dados existentes.
+
+from django.db import migrations
+
+CAMPOS_CATEGORICOS = {
+    'onhold.OnHold': ['status', 'onhold_reason', 'driver_name', 'sort_code_name'],
+    'onhold.OnholdInicial': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'current_station'],
+    'rastreio.Rastreio': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'destination_hub', 'current_station'],
+    'collection_pool.Pool': ['status', 'city', 'destination_hub'],
+    'parcel_sweeper.Parcel': ['final_status', 'count_type', 'sort_code'],
+}
+
+
+def popular_dicionario(apps, schema_editor):
+    ValorCategorico = apps.get_model('core', 'ValorCategorico')
+    for tabela, campos in CAMPOS_CATEGORICOS.items():
+        modelo = apps.get_model(tabela)
+        for campo in campos:
+            valores = modelo.objects.values_list(campo, flat=True).distinct()
+            novos = {str(v)[:255] for v in valores if v and str(v).strip()}
+            ValorCategorico.objects.bulk_create(
+                [ValorCategorico(tabela=tabela, campo=campo, valor=v) for v in novos],
+                ignore_conflicts=True,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_valorcategorico'),
+        ('onhold', '0006_onholdinicial'),
+        ('rastreio', '0001_initial'),
+        ('collection_pool', '0002_alter_pool_unique_together'),
+        ('parcel_sweeper', '0003_alter_parcel_spx_tracking_number_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_dicionario, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_versaotabela'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='valorcategorico',
+            name='slug',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Slug'),
+        ),
+        migrations.AddIndex(
+            model_name='valorcategorico',
+            index=models.Index(fields=['tabela', 'campo', 'slug'], name='valor_categorico_slug_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Preenche o slug dos valores já internados no dicionário.
+
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def popular_slugs(apps, schema_editor):
+    ValorCategorico = apps.get_model('core', 'ValorCategorico')
+    valores = list(ValorCategorico.objects.filter(slug=''))
+    for item in valores:
+        item.slug = slugify(item.valor)[:255]
+    ValorCategorico.objects.bulk_update(valores, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_valorcategorico_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,137 @@
+# Perfil PostgreSQL: transforma Rastreio, OnHold, OnholdInicial e Parcel em tabelas
+# particionadas por dia (ver core/particoes.py). No SQLite não faz nada.
+# O DDL fica aqui (e não importado de core.particoes): a migração não pode mudar
+# junto com o código da aplicação.
+
+from datetime import timedelta
+
+from django.db import migrations
+
+# Modelo (app.Modelo) -> campo de data que define a partição (= core.particoes.PARTICIONADAS)
+PARTICIONADAS = {
+    'rastreio.Rastreio': 'data_envio_arquivo',
+    'onhold.OnHold': 'data_envio',
+    'onhold.OnholdInicial': 'data_envio',
+    'parcel_sweeper.Parcel': 'data_referencia',
+}
+
+SUFIXO_PADRAO = '_padrao'
+
+
+def _recriar_indices(modelo, schema_editor):
+    """Índices, FKs e restrições do modelo na tabela nova (como o CreateModel faria, menos a PK)."""
+    for sql in schema_editor._model_indexes_sql(modelo):
+        schema_editor.execute(sql)
+    for campo in modelo._meta.local_fields:
+        if campo.remote_field and campo.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(modelo, campo, '_fk_%(to_table)s_%(to_column)s'))
+    for restricao in modelo._meta.constraints:
+        schema_editor.add_constraint(modelo, restricao)
+
+
+def _trocar_tabela(modelo, schema_editor, criar, ajustar_id):
+    """Renomeia a tabela atual, cria a nova com criar(tabela, antiga), copia os dados e refaz índices."""
+    tabela = modelo._meta.db_table
+    antiga = f'{tabela}__antiga'
+    q = schema_editor.quote_name
+    pk = modelo._meta.pk.column
+    schema_editor.execute(f"ALTER TABLE {q(tabela)} RENAME TO {q(antiga)}")
+    criar(tabela, antiga)
+    schema_editor.execute(f"INSERT INTO {q(tabela)} SELECT * FROM {q(antiga)}")
+    # A tabela antiga leva junto os nomes de índices, FKs e da sequência do id
+    schema_editor.execute(f"DROP TABLE {q(antiga)}")
+    ajustar_id(tabela)
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX({q(pk)}) FROM {q(tabela)}), 0) + 1, false)",
+        [tabela, pk],
+    )
+    _recriar_indices(modelo, schema_editor)
+
+
+def particionar(modelo, schema_editor):
+    q = schema_editor.quote_name
+    pk = modelo._meta.pk.column
+    coluna = modelo._meta.get_field(PARTICIONADAS[modelo._meta.label]).column
+
+    def criar(tabela, antiga):
+        with schema_editor.connection.cursor() as cursor:
+            # A chave primária inclui a data, e coluna de chave primária não aceita nulo
+            cursor.execute(f"SELECT COUNT(*) FROM {q(antiga)} WHERE {q(coluna)} IS NULL")
+            sem_data = cursor.fetchone()[0]
+            if sem_data:
+                raise RuntimeError(
+                    f"{modelo._meta.label}: {sem_data} linha(s) sem {coluna}. "
+                    "Preencha ou remova essas linhas antes de particionar."
+                )
+            cursor.execute(f"SELECT DISTINCT {q(coluna)} FROM {q(antiga)}")
+            dias = sorted(dia for (dia,) in cursor.fetchall())
+        schema_editor.execute(
+            f"CREATE TABLE {q(tabela)} (LIKE {q(antiga)} INCLUDING DEFAULTS, PRIMARY KEY ({q(pk)}, {q(coluna)})) "
+            f"PARTITION BY RANGE ({q(coluna)})"
+        )
+        schema_editor.execute(f"CREATE TABLE {q(tabela + SUFIXO_PADRAO)} PARTITION OF {q(tabela)} DEFAULT")
+        # A tabela nova está vazia: as partições dos dias existentes nascem antes da cópia
+        for dia in dias:
+            schema_editor.execute(
+                f"CREATE TABLE {q(f'{tabela}_p{dia:%Y%m%d}')} PARTITION OF {q(tabela)} FOR VALUES FROM (%s) TO (%s)",
+                [dia, dia + timedelta(days=1)],
+            )
+
+    def ajustar_id(tabela):
+        # Coluna IDENTITY não é aceita em tabela particionada antes do PostgreSQL 17.
+        # As buscas só pelo id (admin, FKs) usam o índice da chave primária (id, data)
+        sequencia = q(f'{tabela}_{pk}_seq')
+        schema_editor.execute(f"CREATE SEQUENCE {sequencia} OWNED BY {q(tabela)}.{q(pk)}")
+        schema_editor.execute(f"ALTER TABLE {q(tabela)} ALTER COLUMN {q(pk)} SET DEFAULT nextval('{sequencia}')")
+
+    _trocar_tabela(modelo, schema_editor, criar, ajustar_id)
+
+
+def desparticionar(modelo, schema_editor):
+    q = schema_editor.quote_name
+    pk = modelo._meta.pk.column
+    coluna = modelo._meta.get_field(PARTICIONADAS[modelo._meta.label]).column
+
+    def criar(tabela, antiga):
+        schema_editor.execute(f"CREATE TABLE {q(tabela)} (LIKE {q(antiga)})")
+        if modelo._meta.get_field(PARTICIONADAS[modelo._meta.label]).null:
+            # O NOT NULL veio da chave primária (id, data), não do modelo
+            schema_editor.execute(f"ALTER TABLE {q(tabela)} ALTER COLUMN {q(coluna)} DROP NOT NULL")
+
+    def ajustar_id(tabela):
+        schema_editor.execute(f"ALTER TABLE {q(tabela)} ADD PRIMARY KEY ({q(pk)})")
+        schema_editor.execute(f"ALTER TABLE {q(tabela)} ALTER COLUMN {q(pk)} ADD GENERATED BY DEFAULT AS IDENTITY")
+
+    _trocar_tabela(modelo, schema_editor, criar, ajustar_id)
+
+
+def _modelos(apps):
+    return [apps.get_model(label) for label in PARTICIONADAS]
+
+
+def particionar_tabelas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for modelo in _modelos(apps):
+        particionar(modelo, schema_editor)
+
+
+def desparticionar_tabelas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for modelo in _modelos(apps):
+        desparticionar(modelo, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_popular_slug_valorcategorico'),
+        ('onhold', '0009_desempenhomotoristadiario'),
+        ('parcel_sweeper', '0003_alter_parcel_spx_tracking_number_and_more'),
+        ('rastreio', '0003_alter_rastreio_data_envio_arquivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar_tabelas, desparticionar_tabelas),
+    ]
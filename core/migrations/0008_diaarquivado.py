@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_particionar_tabelas_fatos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=100, verbose_name='Tabela (app.Modelo)')),
+                ('dia', models.DateField(verbose_name='Dia')),
+                ('linhas', models.PositiveIntegerField(default=0, verbose_name='Linhas')),
+                ('contagens', models.JSONField(blank=True, default=dict, verbose_name='Contagens por campo')),
+                ('arquivo', models.CharField(blank=True, default='', max_length=255, verbose_name='Arquivo (relativo à pasta)')),
+                ('tamanho', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('arquivado_em', models.DateTimeField(auto_now=True, verbose_name='Arquivado em')),
+            ],
+            options={
+                'verbose_name': 'Dia Arquivado',
+                'verbose_name_plural': 'Dias Arquivados',
+                'ordering': ['tabela', '-dia'],
+                'constraints': [models.UniqueConstraint(fields=('tabela', 'dia'), name='unique_dia_arquivado')],
+            },
+        ),
+    ]
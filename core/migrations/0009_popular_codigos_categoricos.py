@@ -0,0 +1,49 @@
+# Preenche os códigos inteiros (<campo>_cod) das colunas categóricas das linhas existentes,
+# a partir do texto, e completa o dicionário com os valores que faltarem.
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.utils.text import slugify
+
+CAMPOS_CATEGORICOS = {
+    'onhold.OnHold': ['status', 'onhold_reason', 'driver_name', 'sort_code_name'],
+    'onhold.OnholdInicial': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'current_station'],
+    'rastreio.Rastreio': ['status', 'onhold_reason', 'driver_name', 'sort_code_name', 'destination_hub', 'current_station'],
+    'collection_pool.Pool': ['status', 'city', 'destination_hub'],
+    'parcel_sweeper.Parcel': ['final_status', 'count_type', 'sort_code'],
+}
+
+
+def popular_codigos(apps, schema_editor):
+    ValorCategorico = apps.get_model('core', 'ValorCategorico')
+    for tabela, campos in CAMPOS_CATEGORICOS.items():
+        modelo = apps.get_model(tabela)
+        for campo in campos:
+            valores = modelo.objects.exclude(**{f'{campo}__isnull': True}).values_list(campo, flat=True).distinct()
+            novos = {str(v)[:255] for v in valores if v and str(v).strip()}
+            ValorCategorico.objects.bulk_create(
+                [ValorCategorico(tabela=tabela, campo=campo, valor=v, slug=slugify(v)[:255]) for v in novos],
+                ignore_conflicts=True,
+            )
+            modelo.objects.update(**{
+                f'{campo}_cod': Subquery(
+                    ValorCategorico.objects
+                    .filter(tabela=tabela, campo=campo, valor=OuterRef(campo))
+                    .values('id')[:1]
+                )
+            })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_diaarquivado'),
+        ('onhold', '0010_onhold_driver_name_cod_onhold_onhold_reason_cod_and_more'),
+        ('rastreio', '0004_rastreio_current_station_cod_and_more'),
+        ('collection_pool', '0003_pool_city_cod_pool_destination_hub_cod_and_more'),
+        ('parcel_sweeper', '0004_parcel_count_type_cod_parcel_final_status_cod_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_codigos, migrations.RunPython.noop),
+    ]
@@ -44,3 +44,79 @@ class Usuario(AbstractUser):
         # Retorna o nome de usuário e o nome do HUB, se houver
         hub_nome = self.hub.nome if self.hub else "Nenhum HUB"
         return f"{self.username} - {hub_nome}"
+
+
+class ValorCategorico(models.Model):
+    """
+    Dicionário dos valores distintos das colunas categóricas (status, motivo,
+    motorista, sort code, hub, cidade...). Os valores são 'internados' no upload,
+    então os filtros e dropdowns leem esta tabela pequena em vez de fazer
+    DISTINCT nas tabelas grandes.
+    """
+    # Rótulo do modelo de origem (ex.: 'onhold.OnHold')
+    tabela = models.CharField(max_length=100, verbose_name="Tabela (app.Modelo)")
+    campo = models.CharField(max_length=100, verbose_name="Campo")
+    valor = models.CharField(max_length=255, verbose_name="Valor")
+    # slugify(valor): resolve o slug das URLs de detalhe (ex.: /pool/detalhes/cidade/<slug>/)
+    slug = models.CharField(max_length=255, blank=True, default='', verbose_name="Slug")
+
+    class Meta:
+        verbose_name = "Valor Categórico"
+        verbose_name_plural = "Valores Categóricos"
+        ordering = ['tabela', 'campo', 'valor']
+        constraints = [
+            models.UniqueConstraint(fields=['tabela', 'campo', 'valor'], name='unique_valor_categorico')
+        ]
+        indexes = [
+            models.Index(fields=['tabela', 'campo', 'slug'], name='valor_categorico_slug_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tabela}.{self.campo} = {self.valor}"
+
+
+class VersaoTabela(models.Model):
+    """
+    Contador de versão dos dados de cada tabela (rótulo 'app.Modelo').
+    Toda gravação (upload, exclusão, edição) incrementa o contador; o cache
+    dos dashboards usa as versões na chave, então uma gravação invalida
+    exatamente os resultados que dependem daquela tabela.
+    """
+    tabela = models.CharField(max_length=100, unique=True, verbose_name="Tabela (app.Modelo)")
+    versao = models.PositiveBigIntegerField(default=0, verbose_name="Versão")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Versão de Tabela"
+        verbose_name_plural = "Versões de Tabelas"
+        ordering = ['tabela']
+
+    def __str__(self):
+        return f"{self.tabela} (v{self.versao})"
+
+
+class DiaArquivado(models.Model):
+    """
+    Resumo de um dia que saiu da tabela quente para o arquivo (core/arquivamento.py):
+    as linhas estão num CSV compactado na pasta do arquivo; aqui ficam o total e as
+    contagens por campo, que bastam para os totais históricos sem abrir o arquivo.
+    """
+    tabela = models.CharField(max_length=100, verbose_name="Tabela (app.Modelo)")
+    dia = models.DateField(verbose_name="Dia")
+    linhas = models.PositiveIntegerField(default=0, verbose_name="Linhas")
+    # {campo: {valor: linhas}} dos campos de 'resumo' da política
+    contagens = models.JSONField(default=dict, blank=True, verbose_name="Contagens por campo")
+    arquivo = models.CharField(max_length=255, blank=True, default='', verbose_name="Arquivo (relativo à pasta)")
+    tamanho = models.PositiveBigIntegerField(default=0, verbose_name="Tamanho (bytes)")
+    arquivado_em = models.DateTimeField(auto_now=True, verbose_name="Arquivado em")
+
+    class Meta:
+        verbose_name = "Dia Arquivado"
+        verbose_name_plural = "Dias Arquivados"
+        ordering = ['tabela', '-dia']
+        constraints = [
+            models.UniqueConstraint(fields=['tabela', 'dia'], name='unique_dia_arquivado')
+        ]
+
+    def __str__(self):
+        return f"{self.tabela} {self.dia} ({self.linhas} linhas)"
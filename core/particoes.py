@@ -0,0 +1,338 @@
+# core/particoes.py
+#
+# Tabelas de fatos particionadas por dia no perfil PostgreSQL (BANCO=postgresql).
+# Rastreio, OnHold, OnholdInicial e Parcel são particionadas por faixa (RANGE) na
+# data de upload/referência (PARTICIONADAS): uma partição por dia
+# (<tabela>_pAAAAMMDD) e uma partição DEFAULT (<tabela>_padrao) para as linhas de
+# dias que ainda não têm partição.
+# - descartar_dia(): a recarga de um dia vira DETACH + DROP da partição (instantâneo,
+#   sem DELETE em massa nem VACUUM depois), em vez de apagar linha por linha;
+# - copiar(): os uploads carregam com COPY ... FROM STDIN em vez de INSERTs em lote;
+# - garantir_particao(): cria a partição do dia antes da carga;
+# - recarregar_dia(): recarga completa de um dia via tabela de staging. A carga e a
+#   validação acontecem fora da tabela viva e só a troca final é transacional (no
+#   PostgreSQL particionado a staging vira a partição do dia).
+# No SQLite (e num PostgreSQL ainda sem a migração core.0007) tudo cai no caminho do
+# ORM: DELETE filtrado pela data e bulk_create.
+# Limitações do particionamento no PostgreSQL:
+# - a chave primária precisa incluir a data: é (id, data), e a data passa a ser
+#   obrigatória nessas tabelas (o id continua vindo de uma sequência);
+# - restrições UNIQUE precisam incluir a coluna da partição (unique_parcel_day já inclui).
+
+import io
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+# Modelo (app.Modelo) -> campo de data que define a partição
+PARTICIONADAS = {
+    'rastreio.Rastreio': 'data_envio_arquivo',
+    'onhold.OnHold': 'data_envio',
+    'onhold.OnholdInicial': 'data_envio',
+    'parcel_sweeper.Parcel': 'data_referencia',
+}
+
+SUFIXO_PADRAO = '_padrao'
+
+
+def _campo(modelo):
+    return modelo._meta.get_field(PARTICIONADAS[modelo._meta.label])
+
+
+def nome_particao(modelo, dia):
+    return f'{modelo._meta.db_table}_p{dia:%Y%m%d}'
+
+
+def particionada(modelo, conexao=None):
+    """True se a tabela do modelo já é particionada (PostgreSQL com a migração aplicada)."""
+    conexao = conexao or connection
+    if conexao.vendor != 'postgresql' or modelo._meta.label not in PARTICIONADAS:
+        return False
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [modelo._meta.db_table])
+        linha = cursor.fetchone()
+    return linha is not None and linha[0] == 'p'
+
+
+def particoes(modelo, conexao=None):
+    """Nomes das partições diárias do modelo (sem a DEFAULT), em ordem."""
+    conexao = conexao or connection
+    if not particionada(modelo, conexao):
+        return []
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            "SELECT filho.relname FROM pg_inherits "
+            "JOIN pg_class filho ON filho.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY filho.relname",
+            [modelo._meta.db_table],
+        )
+        padrao = modelo._meta.db_table + SUFIXO_PADRAO
+        return [nome for (nome,) in cursor.fetchall() if nome != padrao]
+
+
+def _existe(cursor, tabela):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [tabela])
+    return cursor.fetchone()[0]
+
+
+def garantir_particao(modelo, dia, conexao=None):
+    """
+    Cria a partição do dia, se ainda não existe. Linhas do dia que tenham caído na
+    DEFAULT (inseridas antes da partição existir) são movidas para ela.
+    Devolve True se criou. Fora do PostgreSQL particionado, não faz nada.
+    """
+    conexao = conexao or connection
+    if dia is None or not particionada(modelo, conexao):
+        return False
+    tabela = modelo._meta.db_table
+    nome = nome_particao(modelo, dia)
+    coluna = conexao.ops.quote_name(_campo(modelo).column)
+    q = conexao.ops.quote_name
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        if _existe(cursor, nome):
+            return False
+        # CREATE + ATTACH (e não PARTITION OF): dá para mover as linhas da DEFAULT antes,
+        # senão o PostgreSQL recusa a partição nova por conflitar com a DEFAULT
+        cursor.execute(f"CREATE TABLE {q(nome)} (LIKE {q(tabela)} INCLUDING DEFAULTS)")
+        faixa = [dia, dia + timedelta(days=1)]
+        padrao = tabela + SUFIXO_PADRAO
+        if _existe(cursor, padrao):
+            cursor.execute(
+                f"WITH movidas AS (DELETE FROM {q(padrao)} WHERE {coluna} >= %s AND {coluna} < %s RETURNING *) "
+                f"INSERT INTO {q(nome)} SELECT * FROM movidas",
+                faixa,
+            )
+        cursor.execute(f"ALTER TABLE {q(tabela)} ATTACH PARTITION {q(nome)} FOR VALUES FROM (%s) TO (%s)", faixa)
+    return True
+
+
+def descartar_dia(modelo, dia, conexao=None):
+    """
+    Remove todas as linhas do dia e devolve quantas eram.
+    PostgreSQL particionado: DETACH + DROP da partição (e DELETE só do que estiver na
+    DEFAULT); senão, DELETE filtrado pela data.
+    """
+    conexao = conexao or connection
+    campo = _campo(modelo)
+    if dia is None or not particionada(modelo, conexao):
+        removidas, _ = modelo._default_manager.using(conexao.alias).filter(**{campo.name: dia}).delete()
+        return removidas
+
+    tabela = modelo._meta.db_table
+    nome = nome_particao(modelo, dia)
+    q = conexao.ops.quote_name
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        return _descartar_particao(cursor, tabela, nome, q(campo.column), dia, q)
+
+
+def _descartar_particao(cursor, tabela, nome, coluna, dia, q):
+    """DETACH + DROP da partição do dia (se existe) e DELETE do que houver do dia na DEFAULT."""
+    removidas = 0
+    if _existe(cursor, nome):
+        cursor.execute(f"SELECT COUNT(*) FROM {q(nome)}")
+        removidas = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {q(tabela)} DETACH PARTITION {q(nome)}")
+        # As FKs do Django são DEFERRABLE: linhas gravadas na mesma transação deixam
+        # verificações pendentes, e o DROP recusa a tabela enquanto elas existirem
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"DROP TABLE {q(nome)}")
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+    cursor.execute(f"DELETE FROM {q(tabela)} WHERE {coluna} = %s", [dia])
+    return removidas + cursor.rowcount
+
+
+# --- Carga com COPY ---
+
+def _celula(valor):
+    # CSV do COPY: vazio sem aspas = NULL; todo o resto vai entre aspas ('' continua '')
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        valor = 'true' if valor else 'false'
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+def _campos_carga(modelo):
+    # O id fica com o banco (sequência/autoincremento)
+    return [campo for campo in modelo._meta.concrete_fields if not campo.primary_key]
+
+
+def _valores(campos, obj, conexao):
+    return [campo.get_db_prep_save(campo.pre_save(obj, True), conexao) for campo in campos]
+
+
+def _csv(campos, objetos, conexao):
+    return ''.join(','.join(_celula(valor) for valor in _valores(campos, obj, conexao)) + '\n' for obj in objetos)
+
+
+def _copy(cursor, sql, texto):
+    bruto = cursor.cursor  # cursor do driver, por baixo do CursorWrapper do Django
+    if hasattr(bruto, 'copy_expert'):  # psycopg2
+        bruto.copy_expert(sql, io.StringIO(texto))
+    else:  # psycopg 3
+        with bruto.copy(sql) as copia:
+            copia.write(texto)
+
+
+def copiar(modelo, objetos, ignore_conflicts=False, conexao=None):
+    """
+    Grava as instâncias (ainda sem id) de uma vez. No PostgreSQL usa COPY, depois de
+    garantir as partições dos dias do lote; com ignore_conflicts, o COPY vai para uma
+    tabela temporária e segue com INSERT ... ON CONFLICT DO NOTHING.
+    Nos outros bancos, bulk_create. Os ids gerados não voltam para as instâncias.
+    """
+    conexao = conexao or connection
+    if not objetos:
+        return 0
+    if conexao.vendor != 'postgresql':
+        modelo._default_manager.using(conexao.alias).bulk_create(objetos, ignore_conflicts=ignore_conflicts)
+        return len(objetos)
+
+    if modelo._meta.label in PARTICIONADAS:
+        nome_campo = _campo(modelo).attname
+        for dia in sorted({getattr(obj, nome_campo) for obj in objetos if getattr(obj, nome_campo) is not None}):
+            garantir_particao(modelo, dia, conexao)
+
+    campos = _campos_carga(modelo)
+    q = conexao.ops.quote_name
+    colunas = ', '.join(q(campo.column) for campo in campos)
+    texto = _csv(campos, objetos, conexao)
+    tabela = modelo._meta.db_table
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        if not ignore_conflicts:
+            _copy(cursor, f"COPY {q(tabela)} ({colunas}) FROM STDIN WITH (FORMAT csv)", texto)
+            return len(objetos)
+        temporaria = q(f'{tabela}_carga')
+        # Só as colunas carregadas (sem o id nem o seu nextval: a sequência só anda no INSERT)
+        cursor.execute(f"CREATE TEMPORARY TABLE {temporaria} AS SELECT {colunas} FROM {q(tabela)} WITH NO DATA")
+        _copy(cursor, f"COPY {temporaria} ({colunas}) FROM STDIN WITH (FORMAT csv)", texto)
+        cursor.execute(
+            f"INSERT INTO {q(tabela)} ({colunas}) SELECT {colunas} FROM {temporaria} ON CONFLICT DO NOTHING"
+        )
+        inseridas = cursor.rowcount
+        cursor.execute(f"DROP TABLE {temporaria}")
+        return inseridas
+
+
+# --- Recarga do dia via tabela de staging ---
+
+class CargaInvalida(ValueError):
+    """A carga na staging não passou na validação; a tabela viva não foi alterada."""
+
+
+def recarregar_dia(modelo, dia, objetos, permitir_vazio=False, conexao=None):
+    """
+    Troca todas as linhas do dia pelas de 'objetos' sem prender a tabela viva durante a carga:
+    1. carrega os objetos numa tabela de staging sem índices nem restrições (COPY no PostgreSQL);
+    2. valida a staging: toda linha é do dia e, sem permitir_vazio, há pelo menos uma
+       (um arquivo vazio não apaga o dia). Se falhar, CargaInvalida e nada muda;
+    3. troca numa transação curta: no PostgreSQL particionado a staging vira a partição
+       do dia (DETACH/DROP da antiga + ATTACH); nos outros casos, DELETE do dia +
+       INSERT ... SELECT da staging.
+    Os leitores continuam vendo o dia antigo até a troca. Chame fora de um
+    transaction.atomic(): dentro de uma transação aberta, a carga passa a fazer parte dela.
+    Devolve {'removidas': n, 'carregadas': n}.
+    """
+    conexao = conexao or connection
+    if particionada(modelo, conexao):
+        return _recarregar_particao(modelo, dia, objetos, permitir_vazio, conexao)
+    return _recarregar_tabela(modelo, dia, objetos, permitir_vazio, conexao)
+
+
+def _validar_staging(cursor, staging, coluna, dia, permitir_vazio, conexao):
+    cursor.execute(
+        f"SELECT COUNT(*), COUNT(CASE WHEN {coluna} IS NULL OR {coluna} <> %s THEN 1 END) FROM {staging}",
+        [conexao.ops.adapt_datefield_value(dia)],
+    )
+    carregadas, fora_do_dia = cursor.fetchone()
+    if fora_do_dia:
+        raise CargaInvalida(f"{fora_do_dia} linha(s) da carga não são do dia {dia:%d/%m/%Y}.")
+    if not carregadas and not permitir_vazio:
+        raise CargaInvalida(f"A carga do dia {dia:%d/%m/%Y} está vazia; os dados atuais foram mantidos.")
+    return carregadas
+
+
+def _carregar_staging(cursor, staging, colunas, campos, objetos, conexao):
+    if conexao.vendor == 'postgresql':
+        _copy(cursor, f"COPY {staging} ({colunas}) FROM STDIN WITH (FORMAT csv)", _csv(campos, objetos, conexao))
+        return
+    marcadores = ', '.join(['%s'] * len(campos))
+    cursor.executemany(
+        f"INSERT INTO {staging} ({colunas}) VALUES ({marcadores})",
+        [_valores(campos, obj, conexao) for obj in objetos],
+    )
+
+
+def _recarregar_tabela(modelo, dia, objetos, permitir_vazio, conexao):
+    # Staging temporária (só desta conexão). No SQLite ela fica no banco temp: a
+    # carga não pega o lock de gravação do arquivo principal
+    campos = _campos_carga(modelo)
+    q = conexao.ops.quote_name
+    tabela = q(modelo._meta.db_table)
+    staging = q(f'{modelo._meta.db_table}_recarga')
+    colunas = ', '.join(q(campo.column) for campo in campos)
+    coluna = q(_campo(modelo).column)
+    with conexao.cursor() as cursor:
+        # Carga e validação: se falharem, a transação leva a staging junto
+        with transaction.atomic(using=conexao.alias):
+            cursor.execute(f"CREATE TEMPORARY TABLE {staging} AS SELECT {colunas} FROM {tabela} LIMIT 0")
+            _carregar_staging(cursor, staging, colunas, campos, objetos, conexao)
+            carregadas = _validar_staging(cursor, staging, coluna, dia, permitir_vazio, conexao)
+        try:
+            with transaction.atomic(using=conexao.alias):
+                cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} = %s", [conexao.ops.adapt_datefield_value(dia)])
+                removidas = cursor.rowcount
+                cursor.execute(f"INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM {staging}")
+        finally:
+            cursor.execute(f"DROP TABLE {staging}")
+    return {'removidas': removidas, 'carregadas': carregadas}
+
+
+def _recarregar_particao(modelo, dia, objetos, permitir_vazio, conexao):
+    campos = _campos_carga(modelo)
+    q = conexao.ops.quote_name
+    tabela = modelo._meta.db_table
+    nome = nome_particao(modelo, dia)
+    staging = f'{nome}_nova'
+    restricao = q(f'{staging}_faixa')
+    colunas = ', '.join(q(campo.column) for campo in campos)
+    coluna = q(_campo(modelo).column)
+    faixa = [dia, dia + timedelta(days=1)]
+    with conexao.cursor() as cursor:
+        # Carga, validação e preparo: nada disso toca a tabela viva
+        with transaction.atomic(using=conexao.alias):
+            cursor.execute(f"DROP TABLE IF EXISTS {q(staging)}")  # Sobra de uma recarga interrompida
+            # Mesmas colunas e defaults da tabela viva: o id já sai da sequência dela
+            cursor.execute(f"CREATE TABLE {q(staging)} (LIKE {q(tabela)} INCLUDING DEFAULTS)")
+            _carregar_staging(cursor, q(staging), colunas, campos, objetos, conexao)
+            carregadas = _validar_staging(cursor, q(staging), coluna, dia, permitir_vazio, conexao)
+            # O CHECK com a faixa do dia poupa o ATTACH de varrer a tabela, e os
+            # índices já prontos são adotados pelos índices da tabela viva
+            cursor.execute(
+                f"ALTER TABLE {q(staging)} ADD CONSTRAINT {restricao} "
+                f"CHECK ({coluna} IS NOT NULL AND {coluna} >= %s AND {coluna} < %s)",
+                faixa,
+            )
+            cursor.execute(
+                "SELECT indisprimary, indisunique, pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = to_regclass(%s)",
+                [tabela],
+            )
+            for primaria, unico, definicao in cursor.fetchall():
+                metodo = definicao.split(' USING ', 1)[1]  # ex.: 'btree (driver_name)'
+                if primaria:
+                    # O ATTACH só adota o índice da PK se ele vier de uma PRIMARY KEY
+                    cursor.execute(f"ALTER TABLE {q(staging)} ADD PRIMARY KEY {metodo.split(' ', 1)[1]}")
+                else:
+                    cursor.execute(f"CREATE {'UNIQUE ' if unico else ''}INDEX ON {q(staging)} USING {metodo}")
+        try:
+            with transaction.atomic(using=conexao.alias):
+                removidas = _descartar_particao(cursor, tabela, nome, coluna, dia, q)
+                cursor.execute(f"ALTER TABLE {q(staging)} RENAME TO {q(nome)}")
+                cursor.execute(
+                    f"ALTER TABLE {q(tabela)} ATTACH PARTITION {q(nome)} FOR VALUES FROM (%s) TO (%s)", faixa
+                )
+                cursor.execute(f"ALTER TABLE {q(nome)} DROP CONSTRAINT {restricao}")
+        except Exception:
+            cursor.execute(f"DROP TABLE IF EXISTS {q(staging)}")
+            raise
+    return {'removidas': removidas, 'carregadas': carregadas}
@@ -0,0 +1,123 @@
+# core/roteamento.py
+#
+# Leitura analítica numa conexão separada (alias 'leitura' em settings.DATABASES).
+# Dashboards, listas de detalhe, consultas e exportações só leem: o
+# LeituraSeparadaMiddleware marca essas requisições (pelo nome da rota, em
+# settings.BANCO_LEITURA['views']) e o RoteadorLeitura manda as leituras delas
+# para 'leitura'. As gravações continuam sempre no 'default'.
+# - SQLite: 'leitura' abre o mesmo arquivo só para leitura (URI mode=ro) e o
+#   'default' fica em WAL: leitor nenhum espera pelo lock de gravação dos uploads.
+# - PostgreSQL: 'leitura' aponta para uma réplica.
+# Dentro de um transaction.atomic() no 'default' a leitura fica no 'default', para
+# enxergar o que a própria transação gravou (e nos testes, que rodam dentro de uma).
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS_LEITURA = 'leitura'
+
+PADRAO = {
+    'ativa': True,
+    # Nomes de rota (com namespace, ex.: 'parcel_sweeper:dashboard') das views só de leitura
+    'views': [
+        '*dashboard*', '*detalhe*', '*detail_list', '*consulta*', '*export*',
+        '*ranking*', '*listagem*', '*listar*', 'expedicao:analise', 'expedicao:produtividade',
+    ],
+    'metodos': ['GET', 'HEAD'],
+}
+
+_somente_leitura = ContextVar('somente_leitura', default=False)
+
+
+def configuracao():
+    """PADRAO com as substituições de settings.BANCO_LEITURA."""
+    return {**PADRAO, **getattr(settings, 'BANCO_LEITURA', {})}
+
+
+def leitura_configurada():
+    return ALIAS_LEITURA in settings.DATABASES and configuracao()['ativa']
+
+
+def ativar_leitura():
+    """Marca o contexto atual como só leitura; devolve o token para desativar_leitura()."""
+    return _somente_leitura.set(True)
+
+
+def desativar_leitura(token):
+    _somente_leitura.reset(token)
+
+
+@contextmanager
+def somente_leitura():
+    """Envia as leituras do bloco para o alias 'leitura' (se configurado)."""
+    token = ativar_leitura()
+    try:
+        yield
+    finally:
+        desativar_leitura(token)
+
+
+def uri_somente_leitura(caminho):
+    """NAME do SQLite que abre o arquivo só para leitura (o backend do Django conecta com uri=True)."""
+    return f'{Path(caminho).resolve().as_uri()}?mode=ro'
+
+
+def view_somente_leitura(nome_view, metodo):
+    config = configuracao()
+    return metodo in config['metodos'] and any(fnmatchcase(nome_view or '', padrao) for padrao in config['views'])
+
+
+class RoteadorLeitura:
+    """Leituras marcadas com somente_leitura() vão para 'leitura'; o resto, para o 'default'."""
+
+    def db_for_read(self, model, **hints):
+        if not _somente_leitura.get() or not leitura_configurada():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return ALIAS_LEITURA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # As duas conexões enxergam os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_LEITURA
+
+
+def espelhar_leitura():
+    """
+    Aponta 'leitura' para o banco atual do 'default' (ex.: o banco de teste criado
+    por medir_desempenho), ainda só para leitura no SQLite. Devolve os settings
+    anteriores, para restaurar_leitura().
+    """
+    if ALIAS_LEITURA not in settings.DATABASES:
+        return None
+    anterior = dict(connections[ALIAS_LEITURA].settings_dict)
+    padrao = connections[DEFAULT_DB_ALIAS].settings_dict
+    nome = padrao['NAME']
+    if padrao['ENGINE'] == 'django.db.backends.sqlite3' and not str(nome).startswith('file:'):
+        nome = uri_somente_leitura(nome)
+    # OPTIONS e TEST continuam os da 'leitura' (o init_command do 'default' grava no banco)
+    _trocar_leitura({**padrao, 'NAME': nome, 'OPTIONS': anterior['OPTIONS'], 'TEST': anterior['TEST']})
+    return anterior
+
+
+def restaurar_leitura(anterior):
+    if anterior is not None:
+        _trocar_leitura(anterior)
+
+
+def _trocar_leitura(settings_dict):
+    conexao = connections[ALIAS_LEITURA]
+    conexao.close()
+    conexao.settings_dict.clear()
+    conexao.settings_dict.update(settings_dict)
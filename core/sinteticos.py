@@ -0,0 +1,719 @@
+# core/sinteticos.py
+#
+# Dados sintéticos em volume de produção (testes de carga e benchmarks).
+# - Cada modelo é gerado como um DataFrame com os nomes dos campos do modelo,
+#   coluna a coluna com NumPy (nada de laço por linha).
+# - Os rastreios vêm de um "universo" comum: uma fração de cada tabela
+#   (--sobreposicao) reaproveita os mesmos códigos, como acontece entre OnHold,
+#   Rastreio, Pool, Parcel Sweeper e Lost/Damage na operação real.
+# - inserir() grava em lote (executemany direto, sem instanciar um Model por linha).
+# - gravar_arquivos() escreve, por data, os CSV/XLSX no leiaute exato que as
+#   telas de upload leem (mesmos cabeçalhos/índices de coluna).
+# Use SEMPRE um banco descartável: nada aqui apaga ou identifica os dados gerados.
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from collection_pool.models import Pool
+from collection_pool.views import COLUNA_MODELO_MAP_POOL
+from conferencia.models import RegistroConferencia
+from core.models import HUB, Usuario
+from expedicao.models import ExpedicaoArquivo, RegistroExpedicao
+from inventory_analysis.models import ManualActionLog
+from onhold.models import OnHold, OnholdInicial
+from parcel_lost.models import ParcelLost
+from parcel_sweeper.models import Parcel
+from parcel_sweeper.views import COLUNA_MODELO_MAP as COLUNA_MODELO_MAP_PARCEL
+from rastreio.models import Rastreio
+from rastreio.views import COLUNA_MODELO_MAP as COLUNA_MODELO_MAP_RASTREIO
+
+TAMANHO_LOTE = 5000
+USUARIO_SINTETICO = 'sintetico'
+
+# Fontes na ordem de geração. 'fator' = linhas relativas a --linhas quando a fonte
+# não recebe um total próprio (perdas e ações manuais são bem menos frequentes).
+FONTES = {
+    'onhold': {'modelo': OnHold, 'fator': 1},
+    'onhold_inicial': {'modelo': OnholdInicial, 'fator': 1},
+    'rastreio': {'modelo': Rastreio, 'fator': 1},
+    'pool': {'modelo': Pool, 'fator': 1},
+    'parcel': {'modelo': Parcel, 'fator': 1},
+    'parcel_lost': {'modelo': ParcelLost, 'fator': 0.02},
+    'expedicao': {'modelo': RegistroExpedicao, 'fator': 0.05},
+    'conferencia': {'modelo': RegistroConferencia, 'fator': 1},
+    'acoes_manuais': {'modelo': ManualActionLog, 'fator': 0.01},
+}
+
+# Distribuições padrão (valor -> peso). Sobrescritas por --distribuicao.
+DISTRIBUICOES = {
+    'onhold.status': {'OnHold': 55, 'LMHub_Received': 35, 'Delivered': 10},
+    'onhold.onhold_reason': {
+        'Buyer not at home': 24, 'Insufficient Vehicle Capacity': 18, 'Reschedule requested': 12,
+        'Wrong address': 12, 'Buyer rejected': 10, 'Area not accessible': 9,
+        'Wrongly assigned': 8, 'Parcel lost': 4, 'Parcel damaged': 3,
+    },
+    'rastreio.status': {
+        'Delivered': 48, 'Delivering': 15, 'LMHub_Received': 12, 'OnHold': 8,
+        'SOC_LHTransporting': 6, 'SOC_LHTransported': 5, 'Return_LMHub_Received': 3,
+        'Return_SOC_LHTransporting': 2, 'Return_SOC_LHTransported': 1,
+    },
+    'pool.status': {'LMHub_Received': 60, 'SOC_LHTransported': 25, 'SOC_LHTransporting': 15},
+    'parcel.final_status': {
+        'LMHub_Received': 58, 'Return_LMHub_Received': 10, 'Delivering': 14, 'OnHold': 12, 'Delivered': 6,
+    },
+    'parcel.count_type': {'Backlog': 50, 'Normal': 32, 'Missing': 12, 'Extra': 6},
+    'parcel.next_step_action': {'Process for delivery': 70, 'Reschedule': 18, 'Return to seller': 12},
+    'parcel_lost.final_status_avaria': {'SOC_LOST': 30, 'SOC_DAMAGE': 20, 'HUB_LOST': 30, 'HUB_DAMAGE': 20},
+    'expedicao.at_to_validation_status': {'Validated': 84, 'Revalidated': 11, 'Pending': 5},
+    'acoes_manuais.action_type': {'ADD': 50, 'REMOVE': 35, 'ROUTED': 15},
+}
+
+# Cidades atendidas: (cidade, UF, prefixo do CEP, peso). A cidade i é atendida pelo hub i % hubs.
+CIDADES = [
+    ('Muriaé', 'MG', '36880', 30), ('Cataguases', 'MG', '36770', 12), ('Ubá', 'MG', '36500', 12),
+    ('Leopoldina', 'MG', '36700', 8), ('Carangola', 'MG', '36800', 6), ('Juiz de Fora', 'MG', '36010', 25),
+    ('Viçosa', 'MG', '36570', 8), ('Manhuaçu', 'MG', '36900', 8), ('Além Paraíba', 'MG', '36660', 5),
+    ('Itaperuna', 'RJ', '28300', 9), ('Campos dos Goytacazes', 'RJ', '28010', 14), ('Petrópolis', 'RJ', '25600', 12),
+    ('Volta Redonda', 'RJ', '27200', 10), ('Guarulhos', 'SP', '07010', 20), ('Campinas', 'SP', '13010', 22),
+    ('Vitória', 'ES', '29010', 14), ('Cachoeiro de Itapemirim', 'ES', '29300', 7), ('Belo Horizonte', 'MG', '30110', 30),
+]
+
+NOMES = np.array(['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+                  'João', 'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Otávio', 'Paula', 'Rafael', 'Sabrina',
+                  'Thiago', 'Vanessa', 'William', 'Yasmin'], dtype=object)
+SOBRENOMES = np.array(['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Carvalho', 'Ferreira',
+                       'Rodrigues', 'Almeida', 'Costa', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Ribeiro'], dtype=object)
+RUAS = np.array(['Rua das Flores', 'Av. Brasil', 'Rua São José', 'Rua Sete de Setembro', 'Av. Getúlio Vargas',
+                 'Rua Tiradentes', 'Rua Santos Dumont', 'Rua da Saudade', 'Av. Rio Branco'], dtype=object)
+BAIRROS = np.array(['Centro', 'São Cristóvão', 'Barra', 'Santa Terezinha', 'Planalto', 'Vila Nova',
+                    'Jardim América', 'Boa Vista', 'Santo Antônio'], dtype=object)
+
+# Leiaute posicional do CSV de OnHold / OnHold Inicial (47 colunas; a 2 não é lida)
+COLUNAS_ONHOLD = [
+    ('Order ID', 'order_id'), ('SLS Tracking Number', 'sls_tracking_number'), ('3PL Tracking Number', None),
+    ('Shopee Order SN', 'shopee_order_sn'), ('Sort Code Name', 'sort_code_name'), ('Buyer Name', 'buyer_name'),
+    ('Buyer Phone', 'buyer_phone'), ('Buyer Address', 'buyer_address'), ('Location Type', 'location_type'),
+    ('Postal Code', 'postal_code'), ('Driver ID', 'driver_id'), ('Driver Name', 'driver_name'),
+    ('Driver Phone', 'driver_phone'), ('Pick Up Time', 'pick_up_time'), ('SOC Received Time', 'soc_received_time'),
+    ('Delivered Time', 'delivered_time'), ('OnHold Time', 'onhold_time'), ('OnHold Reason', 'onhold_reason'),
+    ('Reschedule Time', 'reschedule_time'), ('Status', 'status'), ('Reject Remark', 'reject_remark'),
+    ('Manifest Number', 'manifest_number'), ('Order Account', 'order_account'), ('Parcel Weight', 'parcel_weight'),
+    ('SLS Weight', 'sls_weight'), ('Length', 'length'), ('Width', 'width'), ('Height', 'height'),
+    ('Original ASF', 'original_asf'), ('Rounding ASF', 'rounding_asf'), ('COD Fee', 'cod_fee'),
+    ('Delivery Attempts', 'delivery_attempts'), ('Bulky Type', 'bulky_type'), ('SLA Target Date', 'sla_target_date'),
+    ('Time to SLA', 'time_to_sla'), ('Payment Method', 'payment_method'), ('Pickup Station', 'pickup_station'),
+    ('Destination Station', 'destination_station'), ('Next Station', 'next_station'),
+    ('Current Station', 'current_station'), ('Channel', 'channel'), ('Previous 3PL', 'previous_3pl'),
+    ('Next 3PL', 'next_3pl'), ('Shop ID', 'shop_id'), ('Shop Category', 'shop_category'),
+    ('Inbound 3PL', 'inbound_3pl'), ('Outbound 3PL', 'outbound_3pl'),
+]
+
+# Leiaute posicional do CSV de expedição (14 colunas)
+COLUNAS_EXPEDICAO = [
+    ('AT/TO', 'at_to'), ('Corridor/Cage', 'corridor_cage'), ('Total Initial Orders', 'total_initial_orders'),
+    ('Total Final Orders', 'total_final_orders'), ('Total Scanned Orders', 'total_scanned_orders'),
+    ('Missorted Orders', 'missorted_orders'), ('Missing Orders', 'missing_orders'),
+    ('Validation Start Time', 'validation_start_time'), ('Validation End Time', 'validation_end_time'),
+    ('Validation Operator', 'validation_operator'), ('Revalidation Operator', 'revalidation_operator'),
+    ('Revalidated Count', 'revalidated_count'), ('AT/TO Validation Status', 'at_to_validation_status'),
+    ('Remark', 'remark'),
+]
+
+FORMATO_TEXTO = '%d-%m-%Y %H:%M'  # Datas texto dos exports (OnHold, Rastreio)
+FORMATO_ISO = '%Y-%m-%d %H:%M:%S'  # Parcel Sweeper (Scanned Time) e Expedição
+
+
+# formato -> (unidade, posições do texto ISO 'AAAA-MM-DDTHH:MM[:SS]' na ordem do formato).
+# A posição 10 (o 'T' do ISO) vira o espaço entre data e hora nos dois formatos.
+_LEIAUTES_DATAHORA = {
+    FORMATO_TEXTO: ('m', [8, 9, 4, 5, 6, 7, 0, 1, 2, 3, 10, 11, 12, 13, 14, 15]),
+    FORMATO_ISO: ('s', list(range(19))),
+}
+
+
+def _texto_datahora(instantes, formato=FORMATO_TEXTO):
+    """
+    datetime64 -> texto no formato do export; NaT vira vazio.
+    Reordena os caracteres do ISO do NumPy (strftime linha a linha é ~20x mais lento).
+    """
+    unidade, posicoes = _LEIAUTES_DATAHORA[formato]
+    instantes = np.asarray(instantes).astype(f'datetime64[{unidade}]')
+    iso = np.datetime_as_string(instantes, unit=unidade).astype(f'U{len(posicoes)}')
+    caracteres = iso.view('U1').reshape(len(iso), len(posicoes))[:, posicoes]
+    caracteres[:, 10] = ' '
+    texto = np.ascontiguousarray(caracteres).view(f'U{len(posicoes)}').ravel().astype(object)
+    texto[np.isnat(instantes)] = ''
+    return texto
+
+
+def _codigos(prefixo, numeros, digitos):
+    """Códigos com prefixo e zeros à esquerda (ex.: BR0000001234567), vetorizado."""
+    texto = np.char.zfill(np.asarray(numeros, dtype=np.int64).astype(f'U{digitos}'), digitos)
+    return np.char.add(prefixo, texto).astype(object)
+
+
+class GeradorSintetico:
+    """
+    Gera os DataFrames de cada fonte. Parâmetros:
+    - datas: lista de dias (cada linha cai em um deles);
+    - hubs: quantos hubs atendem as CIDADES;
+    - universo: tamanho do conjunto de rastreios compartilhado entre as fontes;
+    - sobreposicao: fração das linhas de cada fonte que usa o universo compartilhado;
+    - distribuicoes: DISTRIBUICOES com as substituições do usuário;
+    - prefixo: início dos rastreios (outro prefixo = códigos que não colidem com os já gerados).
+    """
+
+    def __init__(self, datas, hubs=3, universo=100_000, sobreposicao=0.6, distribuicoes=None, semente=42,
+                 prefixo='BR'):
+        self.rng = np.random.default_rng(semente)
+        self.prefixo = prefixo
+        self.datas = np.array(datas, dtype='datetime64[D]')
+        self.universo = max(int(universo), 1)
+        self.sobreposicao = sobreposicao
+        self.distribuicoes = {**DISTRIBUICOES, **(distribuicoes or {})}
+
+        # Cidades, hubs e motoristas (20 por hub)
+        self.cidades = np.array([c[0] for c in CIDADES], dtype=object)
+        self.ufs = np.array([c[1] for c in CIDADES], dtype=object)
+        self.ceps = np.array([c[2] for c in CIDADES], dtype=object)
+        pesos = np.array([c[3] for c in CIDADES], dtype=float)
+        self.pesos_cidades = pesos / pesos.sum()
+        self.total_hubs = max(1, min(hubs, len(CIDADES)))
+        self.hub_da_cidade = np.arange(len(CIDADES)) % self.total_hubs
+        self.hubs = np.array(
+            [f'LM Hub_{self.ufs[i]}_{self.cidades[i]}' for i in range(self.total_hubs)], dtype=object
+        )
+        self.motoristas_por_hub = 20
+        total_motoristas = self.total_hubs * self.motoristas_por_hub
+        self.motoristas = np.char.add(
+            np.char.add(NOMES[np.arange(total_motoristas) % len(NOMES)].astype(str), ' '),
+            SOBRENOMES[(np.arange(total_motoristas) // len(NOMES)) % len(SOBRENOMES)].astype(str),
+        ).astype(object)
+        # Nomes repetidos ganham o nº do motorista para continuar distintos
+        repetidos = np.arange(total_motoristas) >= len(NOMES) * len(SOBRENOMES)
+        self.motoristas[repetidos] = self.motoristas[repetidos] + ' ' + np.arange(total_motoristas)[repetidos].astype(str)
+
+        self.ids_hubs = None  # Preenchido por preparar_banco() (FK de OnHold)
+        self.id_usuario = None
+
+    # --- Blocos comuns ---
+
+    def escolher(self, nome, n):
+        """Amostra n valores da distribuição 'nome'."""
+        pesos = self.distribuicoes[nome]
+        valores = np.array(list(pesos), dtype=object)
+        p = np.array(list(pesos.values()), dtype=float)
+        return valores[self.rng.choice(len(valores), size=n, p=p / p.sum())]
+
+    def rastreios(self, fonte, n, unicos=False, faixa=0):
+        """
+        Rastreios da fonte: ~sobreposicao das linhas vêm do universo compartilhado
+        (sem repetição quando 'unicos'); o resto é exclusivo da fonte ('faixa'
+        separa chamadas da mesma fonte que não podem repetir os exclusivos).
+        """
+        compartilhados = self.rng.random(n) < self.sobreposicao
+        k = int(compartilhados.sum())
+        if unicos:
+            k = min(k, self.universo)
+            compartilhados[np.flatnonzero(compartilhados)[k:]] = False
+        numeros = np.empty(n, dtype=np.int64)
+        numeros[compartilhados] = (
+            self.rng.choice(self.universo, size=k, replace=False) if unicos
+            else self.rng.integers(0, self.universo, k)
+        )
+        numeros[~compartilhados] = (list(FONTES).index(fonte) + 1) * 10**11 + faixa * 10**10 + np.arange(n - k)
+        return _codigos(self.prefixo, numeros, 13)
+
+    def dias(self, n):
+        """Índice do dia de cada linha (uniforme no período)."""
+        return self.rng.integers(0, len(self.datas), n)
+
+    def instantes(self, dias, hora_inicio=6, hora_fim=22, minutos=False):
+        """
+        datetime64[s] (hora local) dentro do dia de cada linha. 'minutos' zera os segundos,
+        para o campo tipado bater com o texto dos exports (que só vai até o minuto).
+        """
+        segundos = self.rng.integers(hora_inicio * 3600, hora_fim * 3600, len(dias))
+        if minutos:
+            segundos -= segundos % 60
+        return self.datas[dias].astype('datetime64[s]') + segundos.astype('timedelta64[s]')
+
+    def destinos(self, n):
+        """Cidade (índice), CEP, hub e sort code de cada linha."""
+        cidade = self.rng.choice(len(CIDADES), size=n, p=self.pesos_cidades)
+        cep = np.char.add(
+            np.char.add(self.ceps[cidade].astype(str), '-'),
+            np.char.zfill(self.rng.integers(0, 1000, n).astype('U3'), 3),
+        ).astype(object)
+        hub = self.hub_da_cidade[cidade]
+        rota = self.rng.integers(1, 13, n)
+        sort_code = np.char.add(
+            np.char.add(self.ufs[cidade].astype(str), '-'),
+            np.char.add(np.char.add(np.char.upper(self.cidades[cidade].astype(str)).astype('U3'), '-'),
+                        np.char.zfill(rota.astype('U2'), 2)),
+        ).astype(object)
+        return cidade, cep, hub, sort_code
+
+    def motorista(self, hub):
+        """Índice do motorista (sempre um dos motoristas do hub da linha)."""
+        return hub * self.motoristas_por_hub + self.rng.integers(0, self.motoristas_por_hub, len(hub))
+
+    def pessoas(self, n):
+        return (
+            NOMES[self.rng.integers(0, len(NOMES), n)] + ' ' + SOBRENOMES[self.rng.integers(0, len(SOBRENOMES), n)]
+        )
+
+    def telefones(self, n):
+        return _codigos('55329', self.rng.integers(0, 10**8, n), 8)
+
+    def enderecos(self, n):
+        return (
+            RUAS[self.rng.integers(0, len(RUAS), n)] + ', '
+            + self.rng.integers(1, 2000, n).astype(str).astype(object) + ' - '
+            + BAIRROS[self.rng.integers(0, len(BAIRROS), n)]
+        )
+
+    def medidas(self, n, volumoso):
+        """Peso (kg) e dimensões (cm); 'volumoso' marca as linhas de carga grande."""
+        escala = np.where(volumoso, 4.0, 1.0)
+        peso = np.round(self.rng.gamma(2.0, 0.6, n) * escala ** 2, 2)
+        dimensoes = [np.round(self.rng.uniform(8, 45, n) * escala, 1) for _ in range(3)]
+        return peso, dimensoes
+
+    # --- Fontes ---
+
+    def planilha_onhold(self, fonte, n):
+        """Linhas no formato do export de OnHold (campos de OnholdInicial + data_envio)."""
+        dia = self.dias(n)
+        cidade, cep, hub, sort_code = self.destinos(n)
+        motorista = self.motorista(hub)
+        status = self.escolher('onhold.status', n)
+        motivo = self.escolher('onhold.onhold_reason', n)
+        volumoso = motivo == 'Insufficient Vehicle Capacity'
+        peso, (comprimento, largura, altura) = self.medidas(n, volumoso)
+
+        onhold_at = self.instantes(dia, 8, 21, minutos=True)
+        pick_up_at = onhold_at - (self.rng.integers(20, 60, n) * 3600).astype('timedelta64[s]')
+        soc_received_at = pick_up_at + (self.rng.integers(4, 16, n) * 3600).astype('timedelta64[s]')
+        sla_target_at = (pick_up_at.astype('datetime64[D]') + 3).astype('datetime64[s]') + np.timedelta64(86340, 's')  # 23:59
+        entregue = status == 'Delivered'
+        delivered_at = np.where(
+            entregue, onhold_at + (self.rng.integers(1, 30, n) * 3600).astype('timedelta64[s]'), np.datetime64('NaT')
+        )
+        reagendado = motivo == 'Reschedule requested'
+        reschedule_at = np.where(reagendado, onhold_at + np.timedelta64(1, 'D'), np.datetime64('NaT'))
+        vazio = np.full(n, '', dtype=object)
+
+        return pd.DataFrame({
+            'data_envio': self.datas[dia],
+            'hub_upload_id': self.ids_hubs[hub] if self.ids_hubs is not None else None,
+            'usuario_upload_id': self.id_usuario,
+            'order_id': _codigos('', self.rng.integers(0, 10**15, n), 15),
+            'sls_tracking_number': self.rastreios(fonte, n),
+            'shopee_order_sn': _codigos('25', self.rng.integers(0, 10**12, n), 12),
+            'sort_code_name': sort_code,
+            'buyer_name': self.pessoas(n),
+            'buyer_phone': self.telefones(n),
+            'buyer_address': self.enderecos(n),
+            'location_type': np.where(self.rng.random(n) < 0.8, 'Residential', 'Commercial').astype(object),
+            'postal_code': cep,
+            'driver_id': _codigos('DRV', motorista, 5),
+            'driver_name': self.motoristas[motorista],
+            'driver_phone': self.telefones(n),
+            'pick_up_time': _texto_datahora(pick_up_at),
+            'soc_received_time': _texto_datahora(soc_received_at),
+            'delivered_time': _texto_datahora(delivered_at),
+            'onhold_time': _texto_datahora(onhold_at),
+            'onhold_reason': motivo,
+            'reschedule_time': _texto_datahora(reschedule_at),
+            'status': status,
+            'reject_remark': np.where(motivo == 'Buyer rejected', 'Comprador recusou o pacote', '').astype(object),
+            'manifest_number': _codigos('MF', self.rng.integers(0, 10**8, n), 8),
+            'order_account': vazio,
+            'parcel_weight': peso,
+            'sls_weight': np.round(peso * self.rng.uniform(0.9, 1.1, n), 2),
+            'length': comprimento,
+            'width': largura,
+            'height': altura,
+            'original_asf': np.round(self.rng.uniform(5, 25, n), 2),
+            'rounding_asf': np.round(self.rng.uniform(5, 25, n), 0),
+            'cod_fee': np.round(self.rng.uniform(0, 3, n), 2),
+            'delivery_attempts': self.rng.integers(1, 4, n),
+            'bulky_type': np.where(volumoso, 'Bulky', 'Normal').astype(object),
+            'sla_target_date': _texto_datahora(sla_target_at),
+            'time_to_sla': vazio,
+            'payment_method': np.where(self.rng.random(n) < 0.15, 'COD', 'Online').astype(object),
+            'pickup_station': 'SOC_SP_Cajamar',
+            'destination_station': self.hubs[hub],
+            'next_station': self.hubs[hub],
+            'current_station': self.hubs[hub],
+            'channel': 'Shopee',
+            'previous_3pl': vazio,
+            'next_3pl': vazio,
+            'shop_id': _codigos('', self.rng.integers(0, 10**9, n), 9),
+            'shop_category': vazio,
+            'inbound_3pl': vazio,
+            'outbound_3pl': vazio,
+            # Datas tipadas: preenchidas no upload a partir das colunas texto
+            'pick_up_at': pick_up_at,
+            'soc_received_at': soc_received_at,
+            'delivered_at': delivered_at,
+            'onhold_at': onhold_at,
+            'reschedule_at': reschedule_at,
+            'sla_target_at': sla_target_at,
+        })
+
+    def onhold(self, n):
+        planilha = self.planilha_onhold('onhold', n)
+        tabela = planilha[[
+            'data_envio', 'hub_upload_id', 'usuario_upload_id', 'order_id', 'sls_tracking_number',
+            'shopee_order_sn', 'driver_name', 'sort_code_name', 'buyer_name', 'buyer_phone', 'postal_code',
+            'onhold_reason', 'status', 'manifest_number', 'payment_method', 'parcel_weight', 'length', 'width', 'height',
+        ]].copy()
+        tabela['onhold_time'] = planilha['onhold_at'].to_numpy().astype('datetime64[D]')
+        return tabela, planilha
+
+    def onhold_inicial(self, n):
+        planilha = self.planilha_onhold('onhold_inicial', n)
+        return planilha, planilha
+
+    def rastreio(self, n):
+        dia = self.dias(n)
+        cidade, cep, hub, sort_code = self.destinos(n)
+        motorista = self.motorista(hub)
+        status = self.escolher('rastreio.status', n)
+
+        lm_hub_receive_at = self.instantes(dia, 4, 12, minutos=True)
+        current_station_received_at = lm_hub_receive_at
+        em_rota = np.isin(status, ['Delivering', 'Delivered', 'OnHold'])
+        delivering_at = np.where(
+            em_rota, lm_hub_receive_at + (self.rng.integers(1, 5, n) * 3600).astype('timedelta64[s]'), np.datetime64('NaT')
+        )
+        delivered_at = np.where(
+            status == 'Delivered', delivering_at + (self.rng.integers(1, 9, n) * 3600).astype('timedelta64[s]'),
+            np.datetime64('NaT'),
+        )
+        onhold_at = np.where(
+            status == 'OnHold', delivering_at + (self.rng.integers(1, 9, n) * 3600).astype('timedelta64[s]'),
+            np.datetime64('NaT'),
+        )
+        sla_target_at = (self.datas[dia] + self.rng.integers(0, 3, n)).astype('datetime64[s]') + np.timedelta64(86340, 's')  # 23:59
+
+        return pd.DataFrame({
+            'data_envio_arquivo': self.datas[dia],
+            'data_upload': self.instantes(dia, 22, 24),
+            'usuario_upload_id': self.id_usuario,
+            'order_id': _codigos('', self.rng.integers(0, 10**15, n), 15),
+            'sls_tracking_number': self.rastreios('rastreio', n),
+            'shopee_order_sn': _codigos('25', self.rng.integers(0, 10**12, n), 12),
+            'longitude': np.round(self.rng.uniform(-43.5, -42.0, n), 6).astype(str).astype(object),
+            'latitude': np.round(self.rng.uniform(-21.5, -20.5, n), 6).astype(str).astype(object),
+            'sort_code_name': sort_code,
+            'zipcode_name': self.cidades[cidade],
+            'buyer_name': self.pessoas(n),
+            'buyer_phone': self.telefones(n),
+            'buyer_address': self.enderecos(n),
+            'location_type': np.where(self.rng.random(n) < 0.8, 'Residential', 'Commercial').astype(object),
+            'postal_code': cep,
+            'driver_id': _codigos('DRV', motorista, 5),
+            'driver_name': self.motoristas[motorista],
+            'driver_phone': self.telefones(n),
+            'lm_hub_receive_time': _texto_datahora(lm_hub_receive_at),
+            'current_station_received_time': _texto_datahora(current_station_received_at),
+            'delivering_time': _texto_datahora(delivering_at),
+            'delivered_time': _texto_datahora(delivered_at),
+            'onhold_time': _texto_datahora(onhold_at),
+            'sla_target_date': _texto_datahora(sla_target_at),
+            'time_to_sla': '',
+            'current_station': self.hubs[hub],
+            'status': status,
+            'return_destination': '',
+            'shop_id': _codigos('', self.rng.integers(0, 10**9, n), 9),
+            'shop_category': '',
+            'inbound_3pl': '',
+            'outbound_3pl': '',
+            'channel': 'Shopee',
+            '_3pl_tn': '',
+            'destination_hub': self.hubs[hub],
+            'zone': self.ufs[cidade],
+            'calculation_status': 'Calculated',
+            'specical_dg_type': '',
+            'lm_hub_receive_at': lm_hub_receive_at,
+            'current_station_received_at': current_station_received_at,
+            'delivering_at': delivering_at,
+            'delivered_at': delivered_at,
+            'onhold_at': onhold_at,
+            'sla_target_at': sla_target_at,
+        }), None
+
+    def pool(self, n):
+        dia = self.dias(n)
+        cidade, cep, hub, _ = self.destinos(n)
+        volumoso = self.rng.random(n) < 0.05
+        peso, (comprimento, largura, altura) = self.medidas(n, volumoso)
+        tabela = pd.DataFrame({
+            'data_envio_arquivo': self.datas[dia],
+            'usuario_upload_id': self.id_usuario,
+            'data_upload': self.instantes(dia, 22, 24),
+            'shipment_id': self.rastreios('pool', n, unicos=True),
+            'zipcode': cep,
+            'destination_address': self.enderecos(n),
+            'neighborhood': BAIRROS[self.rng.integers(0, len(BAIRROS), n)],
+            'city': self.cidades[cidade],
+            'region': self.ufs[cidade],
+            'cluster': np.char.add('Cluster ', (hub + 1).astype(str)).astype(object),
+            'address_type': np.where(self.rng.random(n) < 0.8, 'Residential', 'Commercial').astype(object),
+            'lh_trip': _codigos('LT', self.rng.integers(0, 10**6, n), 6),
+            'destination_hub': self.hubs[hub],
+            'status': self.escolher('pool.status', n),
+            'length_cm': comprimento,
+            'width_cm': largura,
+            'height_cm': altura,
+            'weight_kg': peso,
+            'dimension_source_type': np.where(self.rng.random(n) < 0.7, 'Seller', 'Measured').astype(object),
+            'to_id': _codigos('TO', self.rng.integers(0, 10**7, n), 7),
+        })
+        return tabela, None
+
+    def parcel(self, n):
+        dia = self.dias(n)
+        _, _, hub, sort_code = self.destinos(n)
+        escaneado = self.rng.random(n) < 0.85
+        scanned_time = np.where(escaneado, self.instantes(dia, 5, 11), np.datetime64('NaT'))
+        aging = self.rng.integers(0, 120, n)
+        return pd.DataFrame({
+            'data_referencia': self.datas[dia],
+            'usuario_upload_id': self.id_usuario,
+            'data_upload_sistema': self.instantes(dia, 11, 13),
+            'spx_tracking_number': self.rastreios('parcel', n, unicos=True),
+            'scanned_status': np.where(escaneado, 'Scanned', 'Not Scanned').astype(object),
+            'expedite_tag': np.where(self.rng.random(n) < 0.1, 'Expedite', '').astype(object),
+            'final_status': self.escolher('parcel.final_status', n),
+            'sort_code': sort_code,
+            'next_step_action': self.escolher('parcel.next_step_action', n),
+            'on_hold_times': self.rng.poisson(0.8, n),
+            'count_type': self.escolher('parcel.count_type', n),
+            'expected': np.where(self.rng.random(n) < 0.9, 'Yes', 'No').astype(object),
+            'operator': self.motoristas[self.motorista(hub)],
+            'aging_time': np.char.add(aging.astype(str), 'h').astype(object),
+            'scanned_time': scanned_time,
+        }), None
+
+    def parcel_lost(self, n):
+        dia = self.dias(n)
+        ocorrencia = self.datas[dia] - self.rng.integers(0, 5, n)
+        return pd.DataFrame({
+            'data_registro': self.datas[dia],
+            'spx_tracking_number': self.rastreios('parcel_lost', n, unicos=True),
+            'final_status_avaria': self.escolher('parcel_lost.final_status_avaria', n),
+            'data_ocorrencia_spx': np.where(self.rng.random(n) < 0.8, ocorrencia, np.datetime64('NaT')),
+            'usuario_registro_id': self.id_usuario,
+            'data_registro_sistema': self.instantes(dia, 8, 20),
+        }), None
+
+    def expedicao(self, n, ids_arquivos):
+        """Rotas (AT/TO) validadas; 'ids_arquivos' = id do ExpedicaoArquivo de cada dia."""
+        dia = self.dias(n)
+        operadores = self.motoristas[: max(5, self.total_hubs * 4)]
+        iniciais = self.rng.integers(20, 180, n)
+        missing = self.rng.binomial(iniciais, 0.01)
+        missorted = self.rng.binomial(iniciais, 0.005)
+        escaneados = iniciais - missing
+        inicio = self.instantes(dia, 5, 11)
+        fim = inicio + (iniciais * self.rng.uniform(4, 12, n)).astype('timedelta64[s]')
+        status = self.escolher('expedicao.at_to_validation_status', n)
+        revalidado = status == 'Revalidated'
+        tabela = pd.DataFrame({
+            'arquivo_origem_id': ids_arquivos[dia],
+            'at_to': _codigos('AT', self.rng.integers(0, 10**9, n), 9),
+            'corridor_cage': np.char.add('C-', np.char.zfill(self.rng.integers(1, 31, n).astype('U2'), 2)).astype(object),
+            'total_initial_orders': iniciais,
+            'total_final_orders': escaneados,
+            'total_scanned_orders': escaneados,
+            'missorted_orders': missorted,
+            'missing_orders': missing,
+            'validation_start_time': inicio,
+            'validation_end_time': fim,
+            'validation_operator': operadores[self.rng.integers(0, len(operadores), n)],
+            'revalidation_operator': np.where(revalidado, operadores[self.rng.integers(0, len(operadores), n)], ''),
+            'revalidated_count': np.where(revalidado, self.rng.integers(1, 10, n), 0),
+            'at_to_validation_status': status,
+            'remark': '',
+            'data_registro': fim,
+        })
+        tabela['_data'] = self.datas[dia]  # Só para separar os arquivos por dia
+        return tabela, None
+
+    def conferencia(self, n):
+        """Listas A e B (metade cada); a sobreposição entre elas vem do universo comum."""
+        tamanho_a = n // 2
+        codigos = np.concatenate([
+            self.rastreios('conferencia', tamanho_a, unicos=True),
+            self.rastreios('conferencia', n - tamanho_a, unicos=True, faixa=1),
+        ])
+        return pd.DataFrame({
+            'codigo_item': codigos,
+            'lista_origem': np.repeat(np.array(['A', 'B'], dtype=object), [tamanho_a, n - tamanho_a]),
+            'status_conferencia': 'PENDENTE',
+        }), None
+
+    def acoes_manuais(self, n):
+        dia = self.dias(n)
+        return pd.DataFrame({
+            'parcel_id': self.rastreios('acoes_manuais', n, unicos=True),
+            'action_type': self.escolher('acoes_manuais.action_type', n),
+            'created_at': self.instantes(dia, 8, 20),
+            'user_id': self.id_usuario,
+        }), None
+
+
+# --- Banco ---
+
+def preparar_banco(gerador):
+    """Cria (se preciso) os HUBs e o usuário dos uploads sintéticos e guarda os ids no gerador."""
+    for i, nome in enumerate(gerador.hubs):
+        HUB.objects.get_or_create(nome=nome, defaults={'estado': gerador.ufs[i]})
+    ids = dict(HUB.objects.filter(nome__in=list(gerador.hubs)).values_list('nome', 'id'))
+    gerador.ids_hubs = np.array([ids[nome] for nome in gerador.hubs], dtype=object)
+    usuario, _ = Usuario.objects.get_or_create(username=USUARIO_SINTETICO, defaults={'is_active': False})
+    gerador.id_usuario = usuario.pk
+
+
+def criar_arquivos_expedicao(gerador):
+    """Um ExpedicaoArquivo por dia do período; retorna os ids na ordem de gerador.datas."""
+    arquivos = ExpedicaoArquivo.objects.bulk_create([
+        ExpedicaoArquivo(
+            arquivo=f'expedicoes/sintetico_{dia}.csv',
+            data_referencia=dia.item(),
+            enviado_por_id=gerador.id_usuario,
+        )
+        for dia in gerador.datas
+    ])
+    return np.array([arquivo.pk for arquivo in arquivos], dtype=object)
+
+
+def _valores_banco(campo, serie):
+    """Coluna do DataFrame -> valores Python prontos para o executemany (None nos nulos)."""
+    valores = serie.to_numpy()
+    if isinstance(campo, models.DateTimeField) and np.issubdtype(valores.dtype, np.datetime64):
+        # Hora local -> UTC, no formato que o Django grava (aware no PostgreSQL)
+        utc = (
+            pd.Series(valores).dt.tz_localize(timezone.get_current_timezone(), ambiguous='NaT', nonexistent='NaT')
+            .dt.tz_convert('UTC').dt.tz_localize(None)
+        )
+        valores = _texto_datahora(utc.to_numpy(), FORMATO_ISO)
+        if connection.vendor != 'sqlite':
+            valores = np.where(valores != '', valores + '+00:00', '').astype(object)
+        valores[valores == ''] = None
+        return valores
+    if isinstance(campo, models.DateField) and np.issubdtype(valores.dtype, np.datetime64):
+        datas = valores.astype('datetime64[D]')
+        valores = np.datetime_as_string(datas).astype(object)
+        valores[np.isnat(datas)] = None
+        return valores
+    valores = valores.astype(object)
+    valores[pd.isna(valores)] = None
+    return valores
+
+
+def inserir(modelo, tabela, lote=TAMANHO_LOTE):
+    """INSERT em lote das colunas do DataFrame (nomes = campos/attname do modelo)."""
+    colunas = [c for c in tabela.columns if not c.startswith('_')]
+    campos = [modelo._meta.get_field(c) for c in colunas]
+    valores = [_valores_banco(campo, tabela[coluna]) for campo, coluna in zip(campos, colunas)]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(modelo._meta.db_table),
+        ', '.join(connection.ops.quote_name(campo.column) for campo in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        for inicio in range(0, len(tabela), lote):
+            cursor.executemany(sql, list(zip(*(coluna[inicio:inicio + lote] for coluna in valores))))
+    return len(tabela)
+
+
+# --- Arquivos de upload ---
+
+def _por_dia(tabela, coluna_data):
+    for dia, grupo in tabela.groupby(coluna_data, sort=True):
+        yield pd.Timestamp(dia).date(), grupo
+
+
+def _csv(df, caminho, encoding='utf-8', **kwargs):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    df.to_csv(caminho, index=False, encoding=encoding, **kwargs)
+    return caminho
+
+
+def _xlsx(df, caminho, **kwargs):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    df.to_excel(caminho, index=False, **kwargs)  # Requer openpyxl (o mesmo do upload da Pool)
+    return caminho
+
+
+def _planilha_posicional(tabela, colunas):
+    """DataFrame com as colunas na ordem do leiaute (campo None = coluna vazia)."""
+    return pd.DataFrame({
+        cabecalho: tabela[campo].to_numpy() if campo else '' for cabecalho, campo in colunas
+    })
+
+
+def _planilha_mapeada(tabela, mapa, formatos=None):
+    """DataFrame com os cabeçalhos de um COLUNA_MODELO_MAP (coluna do CSV -> campo)."""
+    formatos = formatos or {}
+    dados = {}
+    for cabecalho, campo in mapa.items():
+        valores = tabela[campo]
+        if campo in formatos:
+            valores = _texto_datahora(valores.to_numpy(), formatos[campo])
+        dados[cabecalho] = valores.to_numpy() if hasattr(valores, 'to_numpy') else valores
+    return pd.DataFrame(dados)
+
+
+def gravar_arquivos(fonte, tabela, planilha, pasta, xlsx=False):
+    """Grava os arquivos de upload da fonte em 'pasta/<fonte>/'. Retorna os caminhos."""
+    destino = os.path.join(pasta, fonte)
+    caminhos = []
+    if fonte in ('onhold', 'onhold_inicial'):
+        for dia, grupo in _por_dia(planilha, 'data_envio'):
+            caminhos.append(_csv(_planilha_posicional(grupo, COLUNAS_ONHOLD), os.path.join(destino, f'{fonte}_{dia}.csv')))
+    elif fonte == 'rastreio':
+        for dia, grupo in _por_dia(tabela, 'data_envio_arquivo'):
+            caminhos.append(_csv(_planilha_mapeada(grupo, COLUNA_MODELO_MAP_RASTREIO), os.path.join(destino, f'rastreio_{dia}.csv')))
+    elif fonte == 'pool':
+        for dia, grupo in _por_dia(tabela, 'data_envio_arquivo'):
+            df = _planilha_mapeada(grupo, COLUNA_MODELO_MAP_POOL)
+            # O upload da Pool lê CSV em latin-1
+            caminhos.append(_csv(df, os.path.join(destino, f'pool_{dia}.csv'), encoding='latin-1'))
+            if xlsx:
+                caminhos.append(_xlsx(df, os.path.join(destino, f'pool_{dia}.xlsx')))
+    elif fonte == 'parcel':
+        for dia, grupo in _por_dia(tabela, 'data_referencia'):
+            df = _planilha_mapeada(grupo, COLUNA_MODELO_MAP_PARCEL, {'scanned_time': FORMATO_ISO})
+            caminhos.append(_csv(df, os.path.join(destino, f'parcel_{dia}.csv')))
+    elif fonte == 'expedicao':
+        for dia, grupo in _por_dia(tabela, '_data'):
+            grupo = grupo.copy()
+            for campo in ('validation_start_time', 'validation_end_time'):
+                grupo[campo] = _texto_datahora(grupo[campo].to_numpy(), FORMATO_ISO)
+            caminhos.append(_csv(_planilha_posicional(grupo, COLUNAS_EXPEDICAO), os.path.join(destino, f'expedicao_{dia}.csv')))
+    elif fonte == 'conferencia':
+        for lista, grupo in tabela.groupby('lista_origem', sort=True):
+            df = grupo[['codigo_item']]
+            # Uma coluna, sem cabeçalho (a leitura pega a 1ª coluna de cada linha)
+            caminhos.append(_csv(df, os.path.join(destino, f'lista_{lista.lower()}.csv'), header=False))
+            if xlsx:
+                caminhos.append(_xlsx(df, os.path.join(destino, f'lista_{lista.lower()}.xlsx'), header=False))
+    # parcel_lost e acoes_manuais não têm upload de arquivo (cadastro pela tela)
+    return caminhos
+
+
+def periodo(dias, inicio=None):
+    """Lista de datas: 'dias' dias a partir de 'inicio' (padrão: terminando hoje)."""
+    inicio = inicio or (date.today() - timedelta(days=dias - 1))
+    return [inicio + timedelta(days=i) for i in range(dias)]
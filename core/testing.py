@@ -0,0 +1,182 @@
+# core/testing.py
+#
+# Orçamento de consultas para os testes das views.
+# orcamento_consultas() (context manager ou decorator) conta as consultas e o tempo
+# de SQL de todas as conexões e bloqueia as conexões de rede para fora da máquina
+# (HTTP para APIs externas etc.); ao sair, falha se algum limite foi ultrapassado,
+# listando as consultas executadas.
+# CasoOrcamento é a base dos testes de cada app: monta um banco com
+# core.sinteticos (comando gerar_dados_sinteticos) e renderiza cada view da tabela
+# ORCAMENTOS da app dentro do seu orçamento. Assim, um .count() novo por KPI ou
+# um N+1 no template quebra o teste em vez de aparecer só em produção.
+
+import socket
+import time
+from contextlib import ContextDecorator, ExitStack
+from datetime import date
+from io import StringIO
+from pkgutil import resolve_name
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+from django.urls import reverse
+
+# Conexões locais continuam liberadas (banco, cache, servidor de teste)
+HOSTS_LOCAIS = {'localhost', '127.0.0.1', '::1'}
+
+# Funções do login e da sessão, chamadas em toda requisição: as consultas feitas
+# dentro delas não são custo da view. Só elas saem da conta: uma consulta da própria
+# view à tabela de usuários (ex.: um N+1 em usuario_upload) continua contando.
+FUNCOES_AUTENTICACAO = [
+    ('django.contrib.auth', 'get_user'),
+    ('django.contrib.sessions.backends.db.SessionStore', 'load'),
+    ('django.contrib.sessions.backends.db.SessionStore', 'save'),
+    ('django.contrib.sessions.backends.db.SessionStore', 'exists'),
+]
+
+
+class HttpExternoBloqueado(OSError):
+    """Conexão de rede para fora da máquina durante um orçamento de consultas."""
+
+
+class orcamento_consultas(ContextDecorator):
+    """
+    Falha (AssertionError) se o bloco executar mais que 'consultas' consultas, gastar
+    mais que 'tempo_sql_s' segundos em SQL ou tentar mais que 'http_externo'
+    conexões para fora da máquina. As conexões externas são sempre bloqueadas
+    (HttpExternoBloqueado) e contadas, mesmo que a view engula o erro.
+    Consultas que citam alguma das 'ignorar_tabelas' não entram na conta; com
+    'ignorar_autenticacao', nem as feitas pelo login e pela sessão (FUNCOES_AUTENTICACAO).
+    Depois do bloco, .consultas, .tempo_sql e .conexoes_externas ficam disponíveis.
+    """
+
+    def __init__(self, consultas, tempo_sql_s=None, http_externo=0, ignorar_tabelas=(), ignorar_autenticacao=False):
+        self.limite_consultas = consultas
+        self.limite_tempo_sql = tempo_sql_s
+        self.limite_http = http_externo
+        self.ignorar_tabelas = tuple(ignorar_tabelas)
+        self.ignorar_autenticacao = ignorar_autenticacao
+
+    def _contar(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not self._fora_da_conta and not any(
+                f'"{tabela}"' in sql or f' {tabela} ' in sql for tabela in self.ignorar_tabelas
+            ):
+                self.consultas.append(sql)
+                self.tempo_sql += time.perf_counter() - inicio
+
+    def _sem_contar(self, original):
+        def chamar(*args, **kwargs):
+            self._fora_da_conta += 1
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._fora_da_conta -= 1
+        return chamar
+
+    def _externo(self, host, porta):
+        self.conexoes_externas.append((host, porta))
+        raise HttpExternoBloqueado(f"Conexão externa bloqueada no teste: {host}:{porta}")
+
+    def _bloquear_conexao(self, original):
+        def conectar(sock, endereco, *args, **kwargs):
+            if sock.family in (socket.AF_INET, socket.AF_INET6) and endereco[0] not in HOSTS_LOCAIS:
+                self._externo(*endereco[:2])
+            return original(sock, endereco, *args, **kwargs)
+        return conectar
+
+    def _bloquear_resolucao(self, original):
+        # Bloqueia já no DNS: sem rede, a resolução falharia (ou demoraria) antes do connect
+        def resolver(host, porta, *args, **kwargs):
+            if host not in HOSTS_LOCAIS and host is not None:
+                self._externo(host, porta)
+            return original(host, porta, *args, **kwargs)
+        return resolver
+
+    def __enter__(self):
+        self.consultas = []
+        self.tempo_sql = 0.0
+        self.conexoes_externas = []
+        self._fora_da_conta = 0
+        self._pilha = ExitStack()
+        for conexao in connections.all():
+            self._pilha.enter_context(conexao.execute_wrapper(self._contar))
+        if self.ignorar_autenticacao:
+            for caminho, nome in FUNCOES_AUTENTICACAO:
+                alvo = resolve_name(caminho)
+                self._pilha.enter_context(mock.patch.object(alvo, nome, self._sem_contar(getattr(alvo, nome))))
+        self._pilha.enter_context(mock.patch.object(socket.socket, 'connect', self._bloquear_conexao(socket.socket.connect)))
+        self._pilha.enter_context(mock.patch.object(socket, 'getaddrinfo', self._bloquear_resolucao(socket.getaddrinfo)))
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        self._pilha.close()
+        if tipo is not None:
+            return False
+
+        problemas = []
+        if len(self.consultas) > self.limite_consultas:
+            problemas.append(f"{len(self.consultas)} consultas (limite: {self.limite_consultas})")
+        if self.limite_tempo_sql is not None and self.tempo_sql > self.limite_tempo_sql:
+            problemas.append(f"{self.tempo_sql:.3f}s de SQL (limite: {self.limite_tempo_sql}s)")
+        if len(self.conexoes_externas) > self.limite_http:
+            problemas.append(
+                f"{len(self.conexoes_externas)} conexões externas (limite: {self.limite_http}): "
+                + ', '.join(str(endereco) for endereco in self.conexoes_externas[:5])
+            )
+        if problemas:
+            executadas = '\n'.join(f"  {i}. {sql[:300]}" for i, sql in enumerate(self.consultas, 1))
+            raise AssertionError("Orçamento estourado: " + '; '.join(problemas) + f"\nConsultas:\n{executadas}")
+        return False
+
+
+class CasoOrcamento(TestCase):
+    """
+    Base dos testes de orçamento. Cada app define ORCAMENTOS:
+        nome -> {'url': nome da rota, 'args': [...], 'parametros': {...} (GET),
+                 'consultas': limite, 'tempo_sql_s': limite (opcional),
+                 'http_externo': limite (padrão 0), 'status': esperado (padrão 200)}
+    O banco de teste recebe DADOS (opções do gerar_dados_sinteticos) uma vez por
+    classe; o cache dos dashboards é limpo antes de cada view (mede-se o cálculo,
+    não o acerto de cache). O login e a sessão ficam fora da conta.
+    """
+
+    ORCAMENTOS = {}
+    DADOS = {'linhas': 2000, 'dias': 3, 'inicio': date(2031, 1, 1)}
+    # Período passado às views que filtram por data (mesmo intervalo dos dados)
+    PERIODO = {'data_inicio': '2031-01-01', 'data_fim': '2031-01-03'}
+
+    @classmethod
+    def setUpTestData(cls):
+        if cls.ORCAMENTOS:
+            call_command('gerar_dados_sinteticos', stdout=StringIO(), **cls.DADOS)
+
+    def setUp(self):
+        usuario = get_user_model().objects.create_superuser('orcamento', 'orcamento@example.com', 'orcamento')
+        self.client.force_login(usuario)
+
+    def renderizar(self, url, args=(), parametros=None):
+        return self.client.get(reverse(url, args=args), parametros or {}, HTTP_HOST='localhost')
+
+    def test_orcamentos(self):
+        for nome, orcamento in self.ORCAMENTOS.items():
+            with self.subTest(view=nome):
+                for cache in caches.all():
+                    cache.clear()
+                with orcamento_consultas(
+                    orcamento['consultas'],
+                    tempo_sql_s=orcamento.get('tempo_sql_s'),
+                    http_externo=orcamento.get('http_externo', 0),
+                    ignorar_autenticacao=True,
+                ):
+                    resposta = self.renderizar(orcamento['url'], orcamento.get('args', ()), orcamento.get('parametros'))
+                    if resposta.streaming:
+                        b''.join(resposta.streaming_content)
+                self.assertEqual(resposta.status_code, orcamento.get('status', 200))
@@ -1,3 +1,550 @@
-from django.test import TestCase
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from io import StringIO
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from onhold.models import OnHold
+from rastreio.models import Rastreio
+
+from . import arquivamento, cache, consultas_lentas, datas, desempenho, dicionario, inicializacao, particoes, roteamento
+from .models import HUB, DiaArquivado, ValorCategorico
+from .testing import HttpExternoBloqueado, orcamento_consultas
+
+
+class OrcamentoConsultasTest(TestCase):
+    """O próprio orcamento_consultas (base dos testes de orçamento das apps)."""
+
+    def test_dentro_do_orcamento(self):
+        with orcamento_consultas(2) as orcamento:
+            HUB.objects.count()
+            HUB.objects.exists()
+        self.assertEqual(len(orcamento.consultas), 2)
+
+    def test_consultas_acima_do_limite(self):
+        with self.assertRaisesMessage(AssertionError, '2 consultas (limite: 1)'):
+            with orcamento_consultas(1):
+                HUB.objects.count()
+                HUB.objects.count()
+
+    def test_tempo_sql_acima_do_limite(self):
+        with self.assertRaisesMessage(AssertionError, 'de SQL (limite: 0s)'):
+            with orcamento_consultas(1, tempo_sql_s=0):
+                HUB.objects.count()
+
+    def test_tabelas_ignoradas(self):
+        with orcamento_consultas(0, ignorar_tabelas=[HUB._meta.db_table]) as orcamento:
+            list(HUB.objects.all())
+        self.assertEqual(orcamento.consultas, [])
+
+    def test_autenticacao_fora_da_conta(self):
+        usuario = get_user_model().objects.create_user('orcamento')
+        self.client.force_login(usuario)
+        requisicao = mock.Mock(session=self.client.session)
+        with orcamento_consultas(1, ignorar_autenticacao=True) as orcamento:
+            self.assertEqual(auth.get_user(requisicao), usuario)  # O que o AuthenticationMiddleware faz
+            # A view lendo a tabela de usuários (ex.: um N+1 no template) continua contando
+            get_user_model().objects.get(pk=usuario.pk)
+        self.assertEqual(len(orcamento.consultas), 1)
+
+    def test_decorator(self):
+        @orcamento_consultas(0)
+        def consultar():
+            HUB.objects.count()
+
+        with self.assertRaises(AssertionError):
+            consultar()
+
+    def test_http_externo_bloqueado_e_contado(self):
+        # Mesmo engolindo o erro (como as views que tratam falha de API), o orçamento acusa
+        with self.assertRaisesMessage(AssertionError, '1 conexões externas (limite: 0)'):
+            with orcamento_consultas(0):
+                with self.assertRaises(HttpExternoBloqueado):
+                    socket.create_connection(('viacep.com.br', 443), timeout=1)
+
+
+class VersaoPorSinalTest(TestCase):
+    """Gravações avulsas (admin, formulários) nas tabelas de cadastro invalidam o cache."""
+
+    def test_hub_sobe_a_versao(self):
+        versao = dict(cache.versoes_tabelas([HUB]))['core.HUB']
+        hub = HUB.objects.create(nome='HUB Teste', estado='MG')
+        hub.estado = 'RJ'
+        hub.save()
+        hub.delete()
+        self.assertEqual(dict(cache.versoes_tabelas([HUB]))['core.HUB'], versao + 3)
+
+
+class ResultadoEmCacheTest(TestCase):
+    """Acerto sem consulta aos dados, invalidação só das chaves da tabela alterada, tamanho limitado."""
+
+    def setUp(self):
+        caches[cache.ALIAS_CACHE].clear()
+        self.addCleanup(caches[cache.ALIAS_CACHE].clear)
+        self.calculos = []
+
+    def _calcular(self, nome, modelo):
+        def calcular():
+            self.calculos.append(nome)
+            return modelo.objects.count()
+        return cache.resultado_em_cache(nome, {'filtro': 'a'}, [modelo], calcular)
+
+    def test_acerto_so_le_a_versao(self):
+        HUB.objects.create(nome='HUB Cache', estado='MG')
+        self.assertEqual(self._calcular('hubs', HUB), 1)
+        with orcamento_consultas(1) as orcamento:
+            self.assertEqual(self._calcular('hubs', HUB), 1)
+        self.assertIn('core_versaotabela', orcamento.consultas[0])
+        self.assertEqual(self.calculos, ['hubs'])
+
+    def test_alteracao_invalida_so_as_chaves_da_tabela(self):
+        self._calcular('hubs', HUB)
+        self._calcular('onhold', OnHold)
+        OnHold.objects.create(data_envio=date(2031, 1, 1))
+        cache.registrar_alteracao(OnHold)
+
+        self.assertEqual(self._calcular('onhold', OnHold), 1)
+        self.assertEqual(self._calcular('hubs', HUB), 0)
+        self.assertEqual(self.calculos, ['hubs', 'onhold', 'onhold'])
+
+    def test_max_entries_limita_o_cache(self):
+        configuracao = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'dashboards-teste',
+            'TIMEOUT': None,
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2},
+        }
+        with override_settings(CACHES={'default': configuracao, cache.ALIAS_CACHE: configuracao}):
+            for i in range(30):
+                cache.resultado_em_cache('limite', {'pagina_filtro': i}, [HUB], lambda: i)
+            self.assertLessEqual(len(caches[cache.ALIAS_CACHE]._cache), 10)
+            # As primeiras chaves foram descartadas (LRU) e voltam a ser calculadas
+            self.assertEqual(cache.resultado_em_cache('limite', {'pagina_filtro': 0}, [HUB], lambda: 'recalculado'), 'recalculado')
+            self.assertEqual(cache.resultado_em_cache('limite', {'pagina_filtro': 29}, [HUB], lambda: 'recalculado'), 29)
+
+
+class MetricasAcessoTest(TestCase):
+    """O /metrics exige staff ou token; IP local só entra se estiver em 'metricas_ips'."""
+
+    def test_localhost_sem_login_e_recusado(self):
+        # Atrás de um proxy reverso local todo cliente chega como 127.0.0.1
+        resposta = self.client.get(reverse('metricas'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(resposta.status_code, 403)
+
+    @override_settings(INSTRUMENTACAO={'metricas_token': 'segredo'})
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer outro').status_code, 403)
+
+    @override_settings(INSTRUMENTACAO={'metricas_ips': ['10.0.0.5']})
+    def test_ip_liberado_por_opt_in(self):
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+
+class ConsultasLentasTest(SimpleTestCase):
+    """O registro de consultas lentas roda dentro da consulta do usuário: nunca pode falhar."""
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = os.path.join(pasta.name, 'consultas_lentas')
+        ajuste = override_settings(INSTRUMENTACAO={'pasta_consultas_lentas': self.pasta, 'gravar_a_cada_s': 0})
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        estado = mock.patch.dict(consultas_lentas._estado, {'arquivo': None})
+        estado.start()
+        self.addCleanup(estado.stop)
+        consultas_lentas.zerar()
+        self.addCleanup(consultas_lentas.zerar)
+
+    def test_erro_de_disco_nao_propaga(self):
+        with mock.patch('core.consultas_lentas.os.replace', side_effect=OSError('disco cheio')):
+            with self.assertLogs('core.consultas_lentas', 'WARNING'):
+                consultas_lentas.registrar('SELECT 1', 0.5)
+        self.assertEqual(os.listdir(self.pasta), [])  # O temporário não fica para trás
+
+    def test_gravacoes_simultaneas(self):
+        threads = [
+            threading.Thread(target=consultas_lentas.registrar, args=(f'SELECT {i}', 0.5)) for i in range(20)
+        ]
+        with self.assertNoLogs('core.consultas_lentas', 'WARNING'):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(consultas_lentas.resumo()[0]['execucoes'], 20)
+
+    def test_arquivo_de_processo_encerrado_sai_do_resumo(self):
+        os.makedirs(self.pasta)
+        antigo = os.path.join(self.pasta, 'outro-1-1.json')
+        with open(antigo, 'w', encoding='utf-8') as saida:
+            json.dump({'abc': {'sql': 'SELECT ?', 'execucoes': 3, 'tempo_total': 3.0, 'tempo_max': 1.0,
+                               'duracoes': [1.0, 1.0, 1.0], 'exemplo': None}}, saida)
+        dois_dias = time.time() - 2 * 24 * 3600
+        os.utime(antigo, (dois_dias, dois_dias))
+
+        self.assertEqual(consultas_lentas.resumo(), [])
+        self.assertFalse(os.path.exists(antigo))
+
+
+class InicializacaoTest(SimpleTestCase):
+    """Subir o projeto (apps + URLConf) não pode carregar as dependências de ingestão."""
+
+    def test_subida_sem_dependencias_pesadas(self):
+        perfil = inicializacao.medir(repeticoes=1)
+        self.assertEqual([item['modulo'] for item in perfil['pesadas']], [])
+        self.assertGreater(perfil['fases']['urls'], 0)
+
+
+class RoteamentoLeituraTest(TestCase):
+    """Leituras das views analíticas vão para a conexão 'leitura'; gravações e transações ficam no 'default'."""
+
+    def test_views_somente_leitura(self):
+        self.assertTrue(roteamento.view_somente_leitura('dashboard_onhold', 'GET'))
+        self.assertTrue(roteamento.view_somente_leitura('parcel_sweeper:export_csv', 'GET'))
+        self.assertTrue(roteamento.view_somente_leitura('inventory_analysis:detail_list', 'HEAD'))
+        self.assertFalse(roteamento.view_somente_leitura('dashboard_onhold', 'POST'))
+        self.assertFalse(roteamento.view_somente_leitura('upload_onhold', 'GET'))
+
+    def test_leitura_marcada_fora_de_transacao(self):
+        with roteamento.somente_leitura(), mock.patch.object(connections['default'], 'in_atomic_block', False):
+            self.assertEqual(router.db_for_read(HUB), roteamento.ALIAS_LEITURA)
+            self.assertEqual(router.db_for_write(HUB), 'default')
+        self.assertEqual(router.db_for_read(HUB), 'default')
+
+    def test_dentro_de_transacao_le_do_default(self):
+        # TestCase roda dentro de um atomic(): a leitura precisa ver o que a transação gravou
+        with roteamento.somente_leitura():
+            self.assertEqual(router.db_for_read(HUB), 'default')
+
+
+class DicionarioTest(TestCase):
+    """Dicionário de valores categóricos (core.dicionario)."""
+
+    def setUp(self):
+        dicionario.limpar_cache()
+        self.addCleanup(dicionario.limpar_cache)
+
+    def _internar(self, valor):
+        # Os códigos só entram no cache no COMMIT; aqui o TestCase nunca confirma a transação
+        with self.captureOnCommitCallbacks(execute=True):
+            return dicionario.internar_valores(OnHold, [{'status': valor}])['status'][valor]
+
+    def test_valor_conhecido_sai_do_cache(self):
+        codigo = self._internar('Delivered')
+        with orcamento_consultas(1):  # Só a leitura da versão do dicionário
+            self.assertEqual(dicionario.internar_valores(OnHold, [{'status': 'Delivered'}]), {
+                campo: ({'Delivered': codigo} if campo == 'status' else {})
+                for campo in dicionario.CAMPOS_CATEGORICOS['onhold.OnHold']
+            })
+
+    def test_reinterna_valor_podado_por_outro_processo(self):
+        codigo = self._internar('Delivered')
+        # Outro worker poda o valor, que naquele momento nenhuma linha usava
+        self.assertEqual(dicionario.podar_codigos(OnHold, {'status': {codigo}}), 1)
+
+        novo = self._internar('Delivered')
+        self.assertNotEqual(novo, codigo)
+        self.assertEqual(ValorCategorico.objects.get(pk=novo).valor, 'Delivered')
+
+    def test_rollback_nao_deixa_codigo_no_cache(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            dicionario.internar_valores(OnHold, [{'status': 'Delivered'}])
+        ValorCategorico.objects.filter(tabela='onhold.OnHold').delete()  # A transação do upload voltou
+
+        with orcamento_consultas(10) as orcamento:
+            codigo = dicionario.internar_valores(OnHold, [{'status': 'Delivered'}])['status']['Delivered']
+        self.assertGreater(len(orcamento.consultas), 1)
+        self.assertEqual(ValorCategorico.objects.get(pk=codigo).valor, 'Delivered')
+
+    def test_carga_grava_codigos_e_agrupa_por_eles(self):
+        objetos = [OnHold(data_envio=date(2031, 1, 1), onhold_reason=motivo) for motivo in ['Recusado', 'Ausente', 'Ausente', None]]
+        particoes.copiar(OnHold, dicionario.aplicar_codigos(OnHold, objetos))
+
+        codigos = dict(ValorCategorico.objects.filter(tabela='onhold.OnHold', campo='onhold_reason').values_list('valor', 'id'))
+        self.assertEqual(
+            set(OnHold.objects.exclude(onhold_reason__isnull=True).values_list('onhold_reason', 'onhold_reason_cod')),
+            set(codigos.items()),
+        )
+        self.assertEqual(
+            dicionario.agrupar(OnHold.objects.all(), 'onhold_reason'),
+            [{'onhold_reason': 'Ausente', 'total': 2}, {'onhold_reason': 'Recusado', 'total': 1}, {'onhold_reason': None, 'total': 0}],
+        )
+
+    def test_reconstruir_mantem_codigos_em_uso(self):
+        OnHold.objects.create(data_envio=date(2031, 1, 1), status='OnHold')  # pre_save grava o código
+        antigo = OnHold.objects.create(data_envio=date(2031, 1, 1), status='Antigo')
+        codigo = OnHold.objects.get(status='OnHold').status_cod_id
+        self.assertIsNotNone(codigo)
+
+        antigo.delete()
+        OnHold.objects.update(status='OnHold')  # UPDATE em massa: o código não acompanha
+        dicionario.reconstruir_dicionario(OnHold)
+
+        self.assertEqual(dicionario.valores_distintos(OnHold, 'status'), ['OnHold'])
+        self.assertEqual(OnHold.objects.get().status_cod_id, codigo)
+
+
+class ParticoesTest(TestCase):
+    """
+    Carga (copiar) e recarga do dia (descartar_dia). Roda no SQLite (caminho do ORM) e,
+    com BANCO=postgresql, contra o PostgreSQL local (COPY e partições por dia).
+    """
+
+    def _carregar(self, dia, quantidade):
+        objetos = [
+            OnHold(data_envio=dia, order_id=f'{dia}-{i}', buyer_name='Loja "Centro", 2', driver_name=None)
+            for i in range(quantidade)
+        ]
+        return particoes.copiar(OnHold, objetos, ignore_conflicts=True)
+
+    def test_copiar_e_descartar_dia(self):
+        self._carregar(date(2031, 1, 1), 3)
+        self._carregar(date(2031, 1, 2), 2)
+        gravado = OnHold.objects.filter(data_envio=date(2031, 1, 1)).first()
+        self.assertEqual(gravado.buyer_name, 'Loja "Centro", 2')
+        self.assertIsNone(gravado.driver_name)
+
+        self.assertEqual(particoes.descartar_dia(OnHold, date(2031, 1, 1)), 3)
+        self.assertFalse(OnHold.objects.filter(data_envio=date(2031, 1, 1)).exists())
+        self.assertEqual(OnHold.objects.filter(data_envio=date(2031, 1, 2)).count(), 2)
+        self.assertEqual(particoes.descartar_dia(OnHold, date(2031, 1, 5)), 0)
+
+    def test_recarregar_dia(self):
+        self._carregar(date(2031, 1, 1), 3)
+        self._carregar(date(2031, 1, 2), 2)
+        novos = [OnHold(data_envio=date(2031, 1, 1), order_id=f'novo-{i}') for i in range(4)]
+        self.assertEqual(
+            particoes.recarregar_dia(OnHold, date(2031, 1, 1), novos), {'removidas': 3, 'carregadas': 4}
+        )
+        self.assertEqual(OnHold.objects.filter(data_envio=date(2031, 1, 1), order_id__startswith='novo-').count(), 4)
+        self.assertEqual(OnHold.objects.filter(data_envio=date(2031, 1, 1)).count(), 4)
+        self.assertEqual(OnHold.objects.filter(data_envio=date(2031, 1, 2)).count(), 2)
+
+        # Linha de outro dia (ou carga vazia): a staging é rejeitada e o dia fica como estava
+        errados = [OnHold(data_envio=date(2031, 1, 2), order_id='errado')]
+        with self.assertRaises(particoes.CargaInvalida):
+            particoes.recarregar_dia(OnHold, date(2031, 1, 1), errados)
+        with self.assertRaises(particoes.CargaInvalida):
+            particoes.recarregar_dia(OnHold, date(2031, 1, 1), [])
+        self.assertEqual(OnHold.objects.filter(data_envio=date(2031, 1, 1)).count(), 4)
+
+    def test_particoes_do_dia(self):
+        self._carregar(date(2031, 1, 2), 1)
+        nome = particoes.nome_particao(OnHold, date(2031, 1, 2))
+        if connection.vendor != 'postgresql':
+            self.assertFalse(particoes.particionada(OnHold))
+            self.assertEqual(particoes.particoes(OnHold), [])
+            return
+        self.assertTrue(particoes.particionada(OnHold))
+        self.assertIn(nome, particoes.particoes(OnHold))
+        particoes.descartar_dia(OnHold, date(2031, 1, 2))
+        self.assertNotIn(nome, particoes.particoes(OnHold))
+
+
+class ArquivamentoTest(TestCase):
+    """Dias antigos saem para o arquivo, com resumo; historico() lê tabela e arquivo; restaurar_dia() desfaz."""
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        configuracao = override_settings(ARQUIVAMENTO={'pasta': pasta.name})
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        for dia, status in [(date(2031, 1, 1), 'Delivered'), (date(2031, 1, 1), 'OnHold'),
+                            (date(2031, 1, 2), 'Delivered'), (date(2031, 3, 1), 'delivered')]:
+            Rastreio.objects.create(data_envio_arquivo=dia, status=status, order_id=f'{dia}-{status}', zipcode_name='')
+
+    def _arquivar(self, **opcoes):
+        with self.captureOnCommitCallbacks(execute=True):  # A troca do arquivo roda no on_commit
+            return arquivamento.arquivar(['rastreio.Rastreio'], hoje=date(2031, 3, 1), dias=30, **opcoes)
+
+    def _arquivo(self, dia, sufixo=''):
+        return os.path.join(arquivamento._pasta(), arquivamento.caminho(Rastreio, dia)) + sufixo
+
+    def test_arquiva_dias_antigos_com_resumo(self):
+        simulado = self._arquivar(simular=True)
+        self.assertEqual([item['linhas'] for item in simulado], [2, 1])
+        self.assertEqual(Rastreio.objects.count(), 4)
+
+        self._arquivar()
+        self.assertEqual(list(Rastreio.objects.values_list('data_envio_arquivo', flat=True)), [date(2031, 3, 1)])
+        resumo = DiaArquivado.objects.get(tabela='rastreio.Rastreio', dia=date(2031, 1, 1))
+        self.assertEqual(resumo.linhas, 2)
+        self.assertEqual(resumo.contagens['status'], {'Delivered': 1, 'OnHold': 1})
+        # Os status que só existiam nos dias arquivados saem dos filtros
+        self.assertEqual(dicionario.valores_distintos(Rastreio, 'status'), ['delivered'])
+
+        # Vazio e nulo continuam distintos no arquivo
+        linha = next(arquivamento.ler_dia(Rastreio, date(2031, 1, 2)))
+        self.assertEqual(linha['zipcode_name'], '')
+        self.assertIsNone(linha['driver_name'])
+        self.assertEqual(linha['data_envio_arquivo'], date(2031, 1, 2))
+
+    def test_texto_barra_n_nao_vira_nulo(self):
+        Rastreio.objects.create(
+            data_envio_arquivo=date(2031, 1, 3), order_id='\\N', reject_remark='linha 1\n"aspas", e vírgula', driver_name=None,
+        )
+        self._arquivar()
+        # Segundo arquivamento do mesmo dia: as linhas já arquivadas são copiadas para o arquivo novo
+        Rastreio.objects.create(data_envio_arquivo=date(2031, 1, 3), order_id='outra')
+        self._arquivar()
+
+        linhas = sorted(arquivamento.ler_dia(Rastreio, date(2031, 1, 3)), key=lambda linha: linha['order_id'])
+        self.assertEqual([linha['order_id'] for linha in linhas], ['\\N', 'outra'])
+        self.assertEqual(linhas[0]['reject_remark'], 'linha 1\n"aspas", e vírgula')
+        self.assertIsNone(linhas[0]['driver_name'])
+
+    def test_arquivo_so_troca_depois_do_commit(self):
+        self._arquivar()
+        Rastreio.objects.create(data_envio_arquivo=date(2031, 1, 1), order_id='nova')
+
+        # Transação desfeita: o arquivo anterior continua valendo e a linha continua na tabela
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                arquivamento.arquivar_dia(Rastreio, date(2031, 1, 1))
+                raise RuntimeError('falha antes do COMMIT')
+        self.assertEqual(len(list(arquivamento.ler_dia(Rastreio, date(2031, 1, 1)))), 2)
+        self.assertEqual(Rastreio.objects.filter(order_id='nova').count(), 1)
+        self.assertEqual(DiaArquivado.objects.get(dia=date(2031, 1, 1)).linhas, 2)
+
+        # Nova tentativa: a linha entra uma vez só, no arquivo e no resumo
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(arquivamento.arquivar_dia(Rastreio, date(2031, 1, 1)), 1)
+        self.assertEqual(len(list(arquivamento.ler_dia(Rastreio, date(2031, 1, 1)))), 3)
+        self.assertEqual(DiaArquivado.objects.get(dia=date(2031, 1, 1)).linhas, 3)
+        self.assertFalse(os.path.exists(self._arquivo(date(2031, 1, 1), '.parcial')))
+
+    def test_troca_interrompida_depois_do_commit(self):
+        # COMMIT feito, mas o processo parou antes do on_commit: o arquivo novo ficou no .parcial
+        with self.captureOnCommitCallbacks(execute=False):
+            arquivamento.arquivar_dia(Rastreio, date(2031, 1, 1))
+        self.assertFalse(os.path.exists(self._arquivo(date(2031, 1, 1))))
+        self.assertTrue(os.path.exists(self._arquivo(date(2031, 1, 1), '.parcial')))
+
+        Rastreio.objects.create(data_envio_arquivo=date(2031, 1, 1), order_id='nova')
+        self._arquivar()
+        pedidos = sorted(linha['order_id'] for linha in arquivamento.ler_dia(Rastreio, date(2031, 1, 1)))
+        self.assertEqual(pedidos, ['2031-01-01-Delivered', '2031-01-01-OnHold', 'nova'])
+
+    def test_corte_usa_a_data_local(self):
+        # O 'hoje' padrão é a data no fuso do projeto, não a do relógio do servidor
+        with mock.patch('core.arquivamento.timezone.localdate', return_value=date(2031, 3, 1)):
+            self.assertEqual(arquivamento.dias_a_arquivar(Rastreio, dias=30), [date(2031, 1, 1), date(2031, 1, 2)])
+
+    def test_historico_inclui_o_arquivo(self):
+        self._arquivar()
+        entregues = arquivamento.historico(Rastreio, Q(status__iexact='delivered'), ['order_id'])
+        self.assertEqual(
+            sorted(linha['order_id'] for linha in entregues),
+            ['2031-01-01-Delivered', '2031-01-02-Delivered', '2031-03-01-delivered'],
+        )
+        no_periodo = arquivamento.historico(
+            Rastreio, ~Q(status='OnHold'), ['order_id'], inicio=date(2031, 1, 1), fim=date(2031, 1, 1)
+        )
+        self.assertEqual([linha['order_id'] for linha in no_periodo], ['2031-01-01-Delivered'])
+        with self.assertRaises(ValueError):
+            list(arquivamento.historico(Rastreio, Q(usuario_upload__username='x')))
+
+    def test_restaurar_dia(self):
+        self._arquivar()
+        self.assertEqual(arquivamento.restaurar_dia(Rastreio, date(2031, 1, 1)), 2)
+        self.assertEqual(Rastreio.objects.filter(data_envio_arquivo=date(2031, 1, 1)).count(), 2)
+        self.assertFalse(DiaArquivado.objects.filter(dia=date(2031, 1, 1)).exists())
+
+
+class DesempenhoTest(TestCase):
+    """Cenários que falham não passam por medição válida, e a comparação acusa a mudança de status."""
+
+    def test_upload_sem_linhas_gravadas_falha(self):
+        self.client.force_login(get_user_model().objects.create_superuser('medir', 'medir@example.com', 'medir'))
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'vazio.csv')
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                arquivo.write('coluna_desconhecida\n')
+            medicao = desempenho.medir_upload(self.client, 'upload_rastreio', [caminho], date(2031, 1, 1), repeticoes=1)
+        self.assertLess(medicao['status'], 400)  # A view responde com redirect e mensagem de erro
+        self.assertEqual(medicao['linhas_gravadas'], 0)
+        self.assertFalse(medicao['ok'])
+
+    def test_comparar_acusa_mudanca_de_status(self):
+        base = {'10': {'dashboard_onhold': {'status': 200, 'ok': True, 'consultas': 10, 'tempo_s': 1.0}}}
+        atual = {'10': {'dashboard_onhold': {'status': 500, 'ok': False, 'consultas': 3, 'tempo_s': 0.1}}}
+        regressoes = desempenho.comparar(atual, base)
+        self.assertEqual({r['metrica'] for r in regressoes}, {'status', 'ok'})
+        self.assertEqual(desempenho.comparar(base, base), [])
+
+
+class DatasTipadasTest(TestCase):
+    """Texto de data/hora dos CSVs -> DateTimeField aware; o que não converte vira None."""
+
+    FUSO = ZoneInfo('America/Sao_Paulo')  # Teve horário de verão até 2019
+
+    def setUp(self):
+        fuso = timezone.override(self.FUSO)
+        fuso.__enter__()
+        self.addCleanup(fuso.__exit__, None, None, None)
+
+    def _local(self, *partes):
+        return datetime(*partes, tzinfo=self.FUSO)
+
+    def test_cada_formato_aceito(self):
+        textos = [
+            '05-03-2031 14:30', '05-03-2031 14:30:15', '2031-03-05 14:30:15', '2031-03-05 14:30',
+            '05/03/2031 14:30:15', '05/03/2031 14:30', '2031-03-05', '05-03-2031', '05/03/2031',
+        ]
+        self.assertEqual(len(textos), len(datas.FORMATOS_DATAHORA))
+        self.assertEqual(datas.converter_datahoras(textos), [
+            self._local(2031, 3, 5, 14, 30), self._local(2031, 3, 5, 14, 30, 15), self._local(2031, 3, 5, 14, 30, 15),
+            self._local(2031, 3, 5, 14, 30), self._local(2031, 3, 5, 14, 30, 15), self._local(2031, 3, 5, 14, 30),
+            self._local(2031, 3, 5), self._local(2031, 3, 5), self._local(2031, 3, 5),
+        ])
+        self.assertEqual(datas.converter_datahoras(['  05-03-2031 14:30 ']), [self._local(2031, 3, 5, 14, 30)])
+
+    def test_vazios_e_lixo_viram_none(self):
+        textos = [None, '', '   ', 'lixo', '31-02-2031 10:00', '2031-13-01', '05-03-2031 25:00', '05.03.2031']
+        self.assertEqual(datas.converter_datahoras(textos), [None] * len(textos))
+        self.assertEqual(datas.converter_datahoras([]), [])
+
+    def test_hora_local_ambigua_ou_inexistente_vira_none(self):
+        convertidos = datas.converter_datahoras([
+            '17-02-2018 23:30',  # Fim do horário de verão: 23h-24h acontece duas vezes
+            '04-11-2018 00:30',  # Início do horário de verão: 0h-1h não existe
+            '04-11-2018 01:30',
+        ])
+        self.assertEqual(convertidos, [None, None, self._local(2018, 11, 4, 1, 30)])
+
+    def test_comando_preenche_em_lotes(self):
+        textos = ['05-03-2031 14:30', '2031-03-05', 'lixo', None, '04-11-2018 00:30', '05/03/2031 08:00:01', '']
+        # bulk_create não passa pelo upload: os campos tipados nascem vazios
+        Rastreio.objects.bulk_create([
+            Rastreio(data_envio_arquivo=date(2031, 3, 5), order_id=str(i), delivered_time=texto, onhold_time=textos[-1 - i])
+            for i, texto in enumerate(textos)
+        ])
+        self.assertFalse(Rastreio.objects.filter(delivered_at__isnull=False).exists())
+
+        saida = StringIO()
+        call_command('preencher_datas_tipadas', 'rastreio.Rastreio', tamanho_lote=2, stdout=saida)
+        self.assertIn('registros processados', saida.getvalue())
+
+        linhas = list(Rastreio.objects.order_by('pk').values_list('delivered_time', 'delivered_at', 'onhold_time', 'onhold_at'))
+        textos_gravados = [texto for linha in linhas for texto in linha[::2]]
+        tipados = [valor for linha in linhas for valor in linha[1::2]]
+        self.assertEqual(tipados, datas.converter_datahoras(textos_gravados))
+        self.assertEqual(linhas[0][1], self._local(2031, 3, 5, 14, 30))
+        self.assertEqual(sum(valor is not None for valor in tipados), 6)
@@ -6,4 +6,6 @@ from . import views
 urlpatterns = [
     # Rota raiz (/) direcionada para a view 'dashboard'
     path('', views.dashboard, name='dashboard'),
-]
\ No newline at end of file
+    path('instrumentacao/', views.painel_instrumentacao, name='painel_instrumentacao'),
+    path('metrics', views.metricas, name='metricas'),
+]
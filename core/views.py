@@ -1,8 +1,13 @@
 # core/views.py
 
-from django.shortcuts import render
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
 
+from . import consultas_lentas, instrumentacao
+
 # View protegida - só acessa se estiver logado
 @login_required 
 def dashboard(request):
@@ -12,4 +17,31 @@ def dashboard(request):
         'usuario_hub': request.user.hub.nome if request.user.hub else 'Não Vinculado',
         'usuario': request.user,
     }
-    return render(request, 'core/dashboard.html', context)
\ No newline at end of file
+    return render(request, 'core/dashboard.html', context)
+
+@staff_member_required
+def painel_instrumentacao(request):
+    """Totais por view, requisições lentas, padrões N+1 e consultas lentas medidos pelo InstrumentacaoMiddleware."""
+    if request.method == 'POST' and 'zerar' in request.POST:
+        instrumentacao.zerar()
+        consultas_lentas.zerar()
+        messages.success(request, "Números da instrumentação zerados.")
+        return redirect('painel_instrumentacao')
+
+    context = {
+        'titulo': 'Instrumentação',
+        'config': instrumentacao.configuracao(),
+        'desde': instrumentacao.desde(),
+        'views': instrumentacao.resumo_views(),
+        'lentas': instrumentacao.requisicoes_lentas(),
+        'n_mais_um': instrumentacao.padroes_n_mais_um(),
+        'consultas_lentas': consultas_lentas.resumo(),
+    }
+    return render(request, 'core/instrumentacao.html', context)
+
+
+def metricas(request):
+    """Métricas no formato Prometheus. Acesso: ver instrumentacao.acesso_metricas()."""
+    if not instrumentacao.acesso_metricas(request):
+        return HttpResponseForbidden()
+    return HttpResponse(instrumentacao.metricas_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,70 @@
+# expedicao/leitura.py
+#
+# Leitura do CSV de expedição numa única passada sobre o upload.
+# Cada bloco recebido é gravado no storage (FileField) e, em seguida, decodificado
+# e entregue linha a linha ao csv.reader: o arquivo não é relido do disco depois
+# de salvo, e a memória fica limitada a um bloco (não ao arquivo inteiro).
+
+import codecs
+import os
+
+# Tentativas de nome livre antes de desistir (cada colisão gera outro sufixo)
+TENTATIVAS_NOME = 100
+
+
+def _criar_exclusivo(storage, nome):
+    """
+    Cria o arquivo no storage local com O_EXCL (como o FileSystemStorage._save):
+    se outro upload criou o mesmo nome entre get_available_name() e a abertura,
+    levanta FileExistsError em vez de sobrescrever.
+    """
+    caminho = storage.path(nome)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    descritor = os.open(caminho, flags, 0o666)
+    if storage.file_permissions_mode is not None:
+        os.chmod(caminho, storage.file_permissions_mode)
+    return os.fdopen(descritor, 'wb')
+
+
+def criar_destino(instancia, campo, nome_original):
+    """
+    Reserva o nome final do arquivo no storage do campo (upload_to + nome livre) e
+    já o cria vazio, aberto para escrita binária. Retorna (nome, arquivo).
+    No storage local a criação é exclusiva: dois uploads simultâneos do mesmo nome
+    nunca gravam no mesmo arquivo (o segundo tenta o próximo nome livre).
+    """
+    field = instancia._meta.get_field(campo)
+    storage = field.storage
+    nome = field.generate_filename(instancia, nome_original)
+
+    for _ in range(TENTATIVAS_NOME):
+        livre = storage.get_available_name(nome, max_length=field.max_length)
+        try:
+            return livre, _criar_exclusivo(storage, livre)
+        except NotImplementedError:
+            # Storage remoto (sem caminho local): o nome livre vem do próprio storage
+            return livre, storage.open(livre, 'wb')
+        except FileExistsError:
+            continue  # Outro upload levou o nome: tenta o próximo
+    raise FileExistsError(f"Não foi possível reservar um nome livre para {nome}.")
+
+
+def linhas_com_copia(upload, destino, encoding='utf-8'):
+    """
+    Gera as linhas de texto do upload enquanto grava os bytes em 'destino' (tee).
+    Decodificação incremental: um caractere multibyte partido entre dois blocos
+    é completado no bloco seguinte. As linhas mantêm o '\\n' (exigido pelo csv.reader
+    para campos entre aspas com quebra de linha).
+    """
+    decodificador = codecs.getincrementaldecoder(encoding)()
+    pendente = ''
+    for bloco in upload.chunks():
+        destino.write(bloco)
+        partes = (pendente + decodificador.decode(bloco)).split('\n')
+        pendente = partes.pop()  # Última linha pode continuar no próximo bloco
+        for parte in partes:
+            yield parte + '\n'
+    resto = pendente + decodificador.decode(b'', final=True)
+    if resto:
+        yield resto
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expedicao', '0002_alter_expedicaoarquivo_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoExpedicao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_referencia', models.DateField(verbose_name='Data de Referência')),
+                ('validation_operator', models.CharField(blank=True, default='', max_length=255, verbose_name='Operador Validação')),
+                ('corridor_cage', models.CharField(blank=True, default='', max_length=50, verbose_name='Corredor/Cage')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Registros')),
+                ('total_rotas', models.IntegerField(default=0, verbose_name='Rotas (AT/TO distintas)')),
+                ('total_initial_orders', models.IntegerField(default=0, verbose_name='Iniciais')),
+                ('total_final_orders', models.IntegerField(default=0, verbose_name='Finais')),
+                ('total_scanned_orders', models.IntegerField(default=0, verbose_name='Escaneados')),
+                ('missorted_orders', models.IntegerField(default=0, verbose_name='Missorted')),
+                ('missing_orders', models.IntegerField(default=0, verbose_name='Missing')),
+                ('revalidated_count', models.IntegerField(default=0, verbose_name='Revalidados')),
+                ('arquivo_origem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='expedicao.expedicaoarquivo', verbose_name='Arquivo de Origem')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Expedição',
+                'verbose_name_plural': 'Resumos de Expedição',
+                'indexes': [models.Index(fields=['data_referencia', 'validation_operator'], name='resumo_exp_data_operador_idx')],
+                'constraints': [models.UniqueConstraint(fields=('arquivo_origem', 'validation_operator', 'corridor_cage'), name='unique_resumo_expedicao')],
+            },
+        ),
+    ]
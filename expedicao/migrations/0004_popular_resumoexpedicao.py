@@ -0,0 +1,52 @@
+# Gera os resumos (ResumoExpedicao) dos arquivos enviados antes da tabela existir.
+
+from django.db import migrations
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+CAMPOS_SOMA = [
+    'total_initial_orders', 'total_final_orders', 'total_scanned_orders',
+    'missorted_orders', 'missing_orders', 'revalidated_count',
+]
+
+
+def popular_resumos(apps, schema_editor):
+    ExpedicaoArquivo = apps.get_model('expedicao', 'ExpedicaoArquivo')
+    RegistroExpedicao = apps.get_model('expedicao', 'RegistroExpedicao')
+    ResumoExpedicao = apps.get_model('expedicao', 'ResumoExpedicao')
+
+    datas = dict(ExpedicaoArquivo.objects.values_list('id', 'data_referencia'))
+    grupos = (
+        RegistroExpedicao.objects
+        .annotate(operador=Coalesce('validation_operator', Value('')))
+        .order_by()
+        .values('arquivo_origem_id', 'operador', 'corridor_cage')
+        .annotate(
+            registros=Count('id'),
+            rotas=Count('at_to', distinct=True),
+            **{campo: Sum(campo) for campo in CAMPOS_SOMA},
+        )
+    )
+    ResumoExpedicao.objects.bulk_create([
+        ResumoExpedicao(
+            arquivo_origem_id=grupo['arquivo_origem_id'],
+            data_referencia=datas[grupo['arquivo_origem_id']],
+            validation_operator=grupo['operador'],
+            corridor_cage=grupo['corridor_cage'] or '',
+            total_registros=grupo['registros'],
+            total_rotas=grupo['rotas'],
+            **{campo: grupo[campo] or 0 for campo in CAMPOS_SOMA},
+        )
+        for grupo in grupos
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expedicao', '0003_resumoexpedicao'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
@@ -58,4 +58,44 @@ class RegistroExpedicao(models.Model):
 
     class Meta:
         verbose_name = "Registro de Expedição"
-        verbose_name_plural = "Registros de Expedição"
\ No newline at end of file
+        verbose_name_plural = "Registros de Expedição"
+
+# 3. Resumo por arquivo: uma linha por (arquivo, operador, corredor/cage), gravada no upload.
+#    A análise entre arquivos (AnaliseExpedicaoView) soma estas linhas em vez de varrer
+#    RegistroExpedicao, então rankings de vários meses leem poucas linhas.
+class ResumoExpedicao(models.Model):
+    arquivo_origem = models.ForeignKey(
+        ExpedicaoArquivo,
+        on_delete=models.CASCADE,
+        related_name='resumos',
+        verbose_name='Arquivo de Origem'
+    )
+    # Copiado do arquivo para filtrar o período sem JOIN
+    data_referencia = models.DateField(verbose_name='Data de Referência')
+    validation_operator = models.CharField(max_length=255, blank=True, default='', verbose_name="Operador Validação")
+    corridor_cage = models.CharField(max_length=50, blank=True, default='', verbose_name="Corredor/Cage")
+
+    total_registros = models.IntegerField(default=0, verbose_name="Registros")
+    total_rotas = models.IntegerField(default=0, verbose_name="Rotas (AT/TO distintas)")
+    total_initial_orders = models.IntegerField(default=0, verbose_name="Iniciais")
+    total_final_orders = models.IntegerField(default=0, verbose_name="Finais")
+    total_scanned_orders = models.IntegerField(default=0, verbose_name="Escaneados")
+    missorted_orders = models.IntegerField(default=0, verbose_name="Missorted")
+    missing_orders = models.IntegerField(default=0, verbose_name="Missing")
+    revalidated_count = models.IntegerField(default=0, verbose_name="Revalidados")
+
+    class Meta:
+        verbose_name = "Resumo de Expedição"
+        verbose_name_plural = "Resumos de Expedição"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['arquivo_origem', 'validation_operator', 'corridor_cage'],
+                name='unique_resumo_expedicao'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['data_referencia', 'validation_operator'], name='resumo_exp_data_operador_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.data_referencia} - {self.validation_operator or 'Sem operador'} - {self.corridor_cage}"
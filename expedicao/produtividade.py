@@ -0,0 +1,181 @@
+# expedicao/produtividade.py
+#
+# Produtividade da validação a partir dos horários de cada AT/TO
+# (validation_start_time / validation_end_time de RegistroExpedicao).
+# Os registros do arquivo viram vetores NumPy (início, fim, pedidos, operador)
+# e todas as contas são feitas sobre os intervalos de uma vez:
+# - pedidos validados por hora de cada operador (pedidos / horas em validação, com
+#   as validações simultâneas do mesmo operador contadas uma vez só);
+# - distribuição das durações (P50/P90/P99), geral e por operador;
+# - pedidos por faixa de hora do turno (cada validação é rateada pelas horas que ocupa);
+# - concorrência: quantas validações estavam em andamento ao longo do turno.
+# Registros sem início/fim, com fim antes do início, com duração maior que um turno
+# ou fora do turno do arquivo (início a mais de um turno da mediana) ficam de fora:
+# um horário digitado errado (ano trocado, 1970) esticaria as matrizes por anos.
+
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import RegistroExpedicao
+
+PERCENTIS_DURACAO = (50, 90, 99)
+PASSO_CONCORRENCIA = 5 * 60  # Amostra da linha do tempo: a cada 5 minutos (segundos)
+SEGUNDOS_HORA = 3600
+DURACAO_MAXIMA = 24 * SEGUNDOS_HORA  # Um turno: validações mais longas são erro de horário
+
+
+def _hora_local(segundos, formato='%H:%M'):
+    return datetime.fromtimestamp(segundos, tz=timezone.get_current_timezone()).strftime(formato)
+
+
+def _percentis(valores):
+    import numpy as np
+
+    if not len(valores):
+        return dict.fromkeys((f'p{p}' for p in PERCENTIS_DURACAO), None)
+    return {f'p{p}': round(float(v), 1) for p, v in zip(PERCENTIS_DURACAO, np.percentile(valores, PERCENTIS_DURACAO))}
+
+
+def _carregar(arquivo_id):
+    """Vetores do arquivo: operador (índice), nomes, início e fim (segundos epoch) e pedidos escaneados."""
+    import numpy as np
+
+    linhas = list(
+        RegistroExpedicao.objects
+        .filter(arquivo_origem_id=arquivo_id, validation_start_time__isnull=False, validation_end_time__isnull=False)
+        .values_list('validation_operator', 'validation_start_time', 'validation_end_time', 'total_scanned_orders')
+    )
+    if not linhas:
+        return None
+
+    operadores, inicios, fins, pedidos = zip(*linhas)
+    inicio = np.array([dt.timestamp() for dt in inicios])
+    fim = np.array([dt.timestamp() for dt in fins])
+    pedidos = np.array(pedidos, dtype=float)
+    nomes, indice = np.unique(np.array([op or 'Sem operador' for op in operadores]), return_inverse=True)
+
+    # Válidos: fim depois do início, até um turno de duração e dentro do turno do arquivo
+    # (as matrizes por hora e a linha do tempo cobrem no máximo ~3 turnos)
+    validos = (fim > inicio) & (fim - inicio <= DURACAO_MAXIMA)
+    if validos.any():
+        validos &= np.abs(inicio - np.median(inicio[validos])) <= DURACAO_MAXIMA
+    return nomes, indice[validos], inicio[validos], fim[validos], pedidos[validos]
+
+
+def _horas_em_validacao(indice, inicio, fim, total_operadores):
+    """
+    Horas de cada operador com pelo menos uma validação em andamento: a união dos
+    seus intervalos (ordenados pelo início, cada um só conta o que passa do maior fim
+    anterior), e não a soma das durações, que conta duas vezes as validações simultâneas.
+    """
+    import numpy as np
+
+    # Cada operador ganha uma faixa própria da reta (deslocamento maior que o turno
+    # inteiro): um único máximo acumulado serve para todos sem misturar operadores
+    extensao = fim.max() - inicio.min() + 1
+    deslocamento = indice * extensao - inicio.min()
+    ordem = np.lexsort((inicio, indice))
+    inicio_ord = inicio[ordem] + deslocamento[ordem]
+    fim_ord = fim[ordem] + deslocamento[ordem]
+
+    fim_anterior = np.concatenate(([-np.inf], np.maximum.accumulate(fim_ord)[:-1]))
+    coberto = np.clip(fim_ord - np.maximum(inicio_ord, fim_anterior), 0, None)
+    return np.bincount(indice[ordem], weights=coberto, minlength=total_operadores) / SEGUNDOS_HORA
+
+
+def _pedidos_por_faixa_horaria(indice, inicio, fim, pedidos, total_operadores):
+    """
+    Matriz (operadores x horas do turno): pedidos de cada validação rateados
+    pela fração do intervalo que cai em cada hora.
+    """
+    import numpy as np
+
+    primeira_hora = np.floor(inicio.min() / SEGUNDOS_HORA) * SEGUNDOS_HORA
+    ultima_hora = np.ceil(fim.max() / SEGUNDOS_HORA) * SEGUNDOS_HORA
+    bordas = np.arange(primeira_hora, ultima_hora + SEGUNDOS_HORA, SEGUNDOS_HORA)
+
+    # Sobreposição (registros x horas) de cada intervalo com cada hora
+    sobreposicao = np.clip(
+        np.minimum(fim[:, None], bordas[None, 1:]) - np.maximum(inicio[:, None], bordas[None, :-1]),
+        0, None,
+    )
+    rateio = sobreposicao / (fim - inicio)[:, None] * pedidos[:, None]
+
+    matriz = np.zeros((total_operadores, len(bordas) - 1))
+    np.add.at(matriz, indice, rateio)
+    return bordas[:-1], matriz
+
+
+def _concorrencia(inicio, fim):
+    """Validações em andamento a cada PASSO_CONCORRENCIA segundos (varredura por busca binária)."""
+    import numpy as np
+
+    instantes = np.arange(inicio.min(), fim.max() + PASSO_CONCORRENCIA, PASSO_CONCORRENCIA)
+    iniciadas = np.searchsorted(np.sort(inicio), instantes, side='right')
+    encerradas = np.searchsorted(np.sort(fim), instantes, side='right')
+    return instantes, iniciadas - encerradas
+
+
+def calcular_produtividade(arquivo_id):
+    """
+    Métricas de produtividade da validação de um arquivo de expedição.
+    Retorna None se o arquivo não tiver horários de validação; senão, dados simples para o cache.
+    """
+    import numpy as np
+
+    dados = _carregar(arquivo_id)
+    if dados is None or not len(dados[2]):
+        return None
+    nomes, indice, inicio, fim, pedidos = dados
+
+    duracao_min = (fim - inicio) / 60
+    total_operadores = len(nomes)
+
+    # Somas por operador (bincount pelo índice do operador)
+    validacoes = np.bincount(indice, minlength=total_operadores)
+    pedidos_operador = np.bincount(indice, weights=pedidos, minlength=total_operadores)
+    horas_operador = _horas_em_validacao(indice, inicio, fim, total_operadores)
+
+    # Durações agrupadas por operador (ordena pelo índice e corta nas fronteiras)
+    ordem = np.argsort(indice, kind='stable')
+    duracoes_por_operador = np.split(duracao_min[ordem], np.cumsum(validacoes)[:-1])
+
+    horas, pedidos_hora = _pedidos_por_faixa_horaria(indice, inicio, fim, pedidos, total_operadores)
+    instantes, em_andamento = _concorrencia(inicio, fim)
+
+    operadores = []
+    for i, nome in enumerate(nomes):
+        if not validacoes[i]:
+            continue
+        operadores.append({
+            'operador': str(nome),
+            'validacoes': int(validacoes[i]),
+            'pedidos': int(pedidos_operador[i]),
+            'horas': round(float(horas_operador[i]), 2),
+            'pedidos_por_hora': round(float(pedidos_operador[i] / horas_operador[i]), 1) if horas_operador[i] else 0,
+            'duracao': _percentis(duracoes_por_operador[i]),
+            'pedidos_por_faixa': np.round(pedidos_hora[i], 1).tolist(),
+        })
+    operadores.sort(key=lambda item: -item['pedidos_por_hora'])
+
+    pico = int(em_andamento.argmax())
+    horas_totais = float(horas_operador.sum())
+    return {
+        'validacoes': int(len(inicio)),
+        'pedidos': int(pedidos.sum()),
+        'inicio_turno': _hora_local(inicio.min(), '%d/%m/%Y %H:%M'),
+        'fim_turno': _hora_local(fim.max(), '%d/%m/%Y %H:%M'),
+        'pedidos_por_hora': round(float(pedidos.sum()) / horas_totais, 1) if horas_totais else 0,
+        'duracao': _percentis(duracao_min),
+        'operadores': operadores,
+        'faixas_horarias': [_hora_local(hora) for hora in horas],
+        'pedidos_por_faixa': np.round(pedidos_hora.sum(axis=0), 1).tolist(),
+        'concorrencia': {
+            'labels': [_hora_local(instante) for instante in instantes],
+            'valores': em_andamento.tolist(),
+            'pico': int(em_andamento[pico]),
+            'pico_em': _hora_local(instantes[pico]),
+            'media': round(float(em_andamento.mean()), 2),
+        },
+    }
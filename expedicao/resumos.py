@@ -0,0 +1,104 @@
+# expedicao/resumos.py
+#
+# Resumos por arquivo de expedição (ResumoExpedicao) e a análise entre arquivos.
+# No upload, os registros do arquivo são agrupados UMA vez por (operador, corredor/cage);
+# a análise de qualquer período soma só essas linhas de resumo.
+
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.cache import registrar_alteracao
+from .models import RegistroExpedicao, ResumoExpedicao
+
+# Totais somáveis do resumo (mesmos nomes em RegistroExpedicao)
+CAMPOS_SOMA = [
+    'total_initial_orders', 'total_final_orders', 'total_scanned_orders',
+    'missorted_orders', 'missing_orders', 'revalidated_count',
+]
+
+# Agrupamentos da análise: chave do GET -> (campos do resumo, rótulo)
+AGRUPAMENTOS = {
+    'operador': (['validation_operator'], 'Operador'),
+    'corredor': (['corridor_cage'], 'Corredor/Cage'),
+    'data': (['data_referencia'], 'Data de Referência'),
+    'data_operador': (['data_referencia', 'validation_operator'], 'Data e Operador'),
+}
+
+# Ordenações do ranking: chave do GET -> (ordem, rótulo)
+ORDENACOES = {
+    'erros': (['-total_erros', '-total_registros'], 'Mais Erros'),
+    'produtividade': (['-total_registros', 'total_erros'], 'Mais Produtivos'),
+    'escaneados': (['-total_scanned_orders'], 'Mais Escaneados'),
+}
+
+
+def gerar_resumos(arquivo):
+    """(Re)grava os resumos de um arquivo numa consulta agrupada + um bulk_create."""
+    grupos = (
+        RegistroExpedicao.objects
+        .filter(arquivo_origem=arquivo)
+        .annotate(operador=Coalesce('validation_operator', Value('')))
+        .order_by()
+        .values('operador', 'corridor_cage')
+        .annotate(
+            registros=Count('id'),
+            rotas=Count('at_to', distinct=True),
+            **{campo: Sum(campo) for campo in CAMPOS_SOMA},
+        )
+    )
+    resumos = [
+        ResumoExpedicao(
+            arquivo_origem=arquivo,
+            data_referencia=arquivo.data_referencia,
+            validation_operator=grupo['operador'],
+            corridor_cage=grupo['corridor_cage'] or '',
+            total_registros=grupo['registros'],
+            total_rotas=grupo['rotas'],
+            **{campo: grupo[campo] or 0 for campo in CAMPOS_SOMA},
+        )
+        for grupo in grupos
+    ]
+    ResumoExpedicao.objects.filter(arquivo_origem=arquivo).delete()
+    ResumoExpedicao.objects.bulk_create(resumos)
+    registrar_alteracao(ResumoExpedicao) # Invalida o cache da análise de expedição
+    return len(resumos)
+
+
+def analisar_periodo(data_inicio=None, data_fim=None, agrupamento='operador', ordenacao='erros'):
+    """
+    Soma os resumos do período pelo agrupamento escolhido.
+    Rotas são AT/TO distintas dentro de cada arquivo/operador/corredor, somadas entre eles.
+    Retorna (totais gerais, lista de linhas do ranking) em dados simples para o cache.
+    """
+    resumos = ResumoExpedicao.objects.all()
+    if data_inicio:
+        resumos = resumos.filter(data_referencia__gte=data_inicio)
+    if data_fim:
+        resumos = resumos.filter(data_referencia__lte=data_fim)
+
+    somas = {campo: Sum(campo) for campo in CAMPOS_SOMA}
+    somas.update(
+        total_registros=Sum('total_registros'),
+        total_rotas=Sum('total_rotas'),
+        arquivos=Count('arquivo_origem', distinct=True),
+    )
+
+    totais = resumos.aggregate(**somas)
+    totais = {campo: valor or 0 for campo, valor in totais.items()}
+
+    campos_grupo, _ = AGRUPAMENTOS[agrupamento]
+    ordem, _ = ORDENACOES[ordenacao]
+    linhas = list(
+        resumos.order_by()
+        .values(*campos_grupo)
+        .annotate(**somas)
+        .annotate(total_erros=F('missorted_orders') + F('missing_orders'))
+        .order_by(*ordem, *campos_grupo)
+    )
+
+    for linha in linhas:
+        iniciais = linha['total_initial_orders'] or 0
+        linha['percentual_escaneado'] = round(linha['total_scanned_orders'] * 100 / iniciais, 2) if iniciais else 0
+        linha['percentual_missorted'] = round(linha['missorted_orders'] * 100 / iniciais, 4) if iniciais else 0
+
+    return totais, linhas
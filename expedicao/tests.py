@@ -0,0 +1,187 @@
+import os
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .leitura import criar_destino
+from .models import ExpedicaoArquivo, RegistroExpedicao, ResumoExpedicao
+from .produtividade import calcular_produtividade
+from .resumos import CAMPOS_SOMA, analisar_periodo, gerar_resumos
+
+
+class CriarDestinoTest(TestCase):
+    """O arquivo do upload é criado com nome exclusivo no storage do campo."""
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=pasta.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.storage = ExpedicaoArquivo._meta.get_field('arquivo').storage
+
+    def test_colisao_tenta_o_proximo_nome(self):
+        # Outro upload criou 'expedicoes/exp.csv' depois do get_available_name() deste
+        self.storage.save('expedicoes/exp.csv', ContentFile(b'primeiro'))
+        nomes = iter(['expedicoes/exp.csv', 'expedicoes/exp_2.csv'])
+        with mock.patch.object(self.storage, 'get_available_name', side_effect=lambda *a, **k: next(nomes)):
+            nome, destino = criar_destino(ExpedicaoArquivo(), 'arquivo', 'exp.csv')
+        with destino:
+            destino.write(b'segundo')
+
+        self.assertEqual(nome, 'expedicoes/exp_2.csv')
+        with self.storage.open('expedicoes/exp.csv', 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), b'primeiro')
+        self.assertTrue(os.path.exists(self.storage.path(nome)))
+
+
+class ProdutividadeTest(TestCase):
+    """Página e cálculo de produtividade da validação."""
+
+    def setUp(self):
+        self.arquivo = ExpedicaoArquivo.objects.create(arquivo='expedicoes/teste.csv', data_referencia=date(2031, 1, 1))
+        self.inicio = timezone.make_aware(datetime(2031, 1, 1, 8))
+
+    def _registro(self, operador, inicio, fim, pedidos=10):
+        return RegistroExpedicao(
+            arquivo_origem=self.arquivo, at_to='AT1', corridor_cage='C1',
+            total_initial_orders=pedidos, total_final_orders=pedidos, total_scanned_orders=pedidos,
+            missorted_orders=0, missing_orders=0, at_to_validation_status='OK',
+            validation_operator=operador, validation_start_time=inicio, validation_end_time=fim,
+        )
+
+    def test_nome_do_operador_nao_sai_do_script(self):
+        operador = '</script><script>alert(1)</script>'
+        RegistroExpedicao.objects.bulk_create([self._registro(operador, self.inicio, self.inicio + timedelta(minutes=30))])
+        self.client.force_login(get_user_model().objects.create_user('prod', password='prod'))
+
+        resposta = self.client.get(reverse('expedicao:produtividade', args=[self.arquivo.pk]))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotContains(resposta, '<script>alert(1)')
+        self.assertContains(resposta, 'id="dados-produtividade"')
+
+    def test_horarios_absurdos_ficam_de_fora(self):
+        hora = timedelta(hours=1)
+        RegistroExpedicao.objects.bulk_create([
+            self._registro('Ana', self.inicio, self.inicio + hora),
+            self._registro('Ana', self.inicio + hora, self.inicio + 2 * hora),
+            # Ano digitado errado no fim e horário "zerado" (1970)
+            self._registro('Bia', self.inicio, self.inicio.replace(year=2033)),
+            self._registro('Bia', timezone.make_aware(datetime(1970, 1, 1, 8)), timezone.make_aware(datetime(1970, 1, 1, 9))),
+        ])
+
+        produtividade = calcular_produtividade(self.arquivo.pk)
+        self.assertEqual(produtividade['validacoes'], 2)
+        self.assertEqual(len(produtividade['faixas_horarias']), 2)
+        self.assertLess(len(produtividade['concorrencia']['labels']), 30)
+
+    def test_horas_do_operador_sao_a_uniao_dos_intervalos(self):
+        minuto = timedelta(minutes=1)
+        RegistroExpedicao.objects.bulk_create([
+            # Ana: 08:00-09:00 e 08:30-09:30 simultâneas (1,5h), mais 10:00-10:30 separada
+            self._registro('Ana', self.inicio, self.inicio + 60 * minuto),
+            self._registro('Ana', self.inicio + 30 * minuto, self.inicio + 90 * minuto),
+            self._registro('Ana', self.inicio + 120 * minuto, self.inicio + 150 * minuto),
+            # Bia: intervalo contido em outro (conta só o maior) no mesmo horário da Ana
+            self._registro('Bia', self.inicio, self.inicio + 60 * minuto),
+            self._registro('Bia', self.inicio + 10 * minuto, self.inicio + 20 * minuto),
+        ])
+
+        produtividade = calcular_produtividade(self.arquivo.pk)
+        horas = {item['operador']: item['horas'] for item in produtividade['operadores']}
+        self.assertEqual(horas, {'Ana': 2.0, 'Bia': 1.0})
+        self.assertEqual(produtividade['pedidos_por_hora'], round(50 / 3, 1))
+
+
+class ResumosExpedicaoTest(TestCase):
+    """Os resumos por arquivo batem com os registros, e a análise do período soma os arquivos certos."""
+
+    DIAS = [date(2031, 1, 1), date(2031, 1, 2), date(2031, 1, 3)]
+
+    def setUp(self):
+        self.arquivos = [
+            ExpedicaoArquivo.objects.create(arquivo=f'expedicoes/dia{i}.csv', data_referencia=dia)
+            for i, dia in enumerate(self.DIAS)
+        ]
+        registros = []
+        for i, arquivo in enumerate(self.arquivos):
+            for n, (operador, corredor, at_to) in enumerate([
+                ('Ana', 'C1', 'AT1'), ('Ana', 'C1', 'AT1'), ('Ana', 'C2', 'AT2'),
+                ('Bia', 'C1', 'AT3'), ('Bia', 'C1', f'AT{4 + i}'), (None, 'C2', 'AT9'),
+            ]):
+                registros.append(RegistroExpedicao(
+                    arquivo_origem=arquivo, at_to=at_to, corridor_cage=corredor, validation_operator=operador,
+                    total_initial_orders=10 + n + i, total_final_orders=9 + n, total_scanned_orders=8 + n + i,
+                    missorted_orders=n % 2, missing_orders=(n + i) % 3, revalidated_count=i,
+                    at_to_validation_status='OK',
+                ))
+        RegistroExpedicao.objects.bulk_create(registros)
+        for arquivo in self.arquivos:
+            gerar_resumos(arquivo)
+
+    def _agregar(self, arquivos, chave):
+        """Agregado direto sobre RegistroExpedicao, por chave(registro) -> totais."""
+        totais = defaultdict(lambda: dict.fromkeys(CAMPOS_SOMA + ['total_registros'], 0))
+        rotas = defaultdict(set)
+        for registro in RegistroExpedicao.objects.filter(arquivo_origem__in=arquivos):
+            linha = totais[chave(registro)]
+            linha['total_registros'] += 1
+            for campo in CAMPOS_SOMA:
+                linha[campo] += getattr(registro, campo)
+            # Rotas: AT/TO distintas por arquivo, operador e corredor
+            operador = registro.validation_operator or ''
+            rotas[chave(registro)].add((registro.arquivo_origem_id, operador, registro.corridor_cage, registro.at_to))
+        for grupo, linha in totais.items():
+            linha['total_rotas'] = len(rotas[grupo])
+        return dict(totais)
+
+    def test_resumo_do_arquivo_bate_com_os_registros(self):
+        campos = CAMPOS_SOMA + ['total_registros', 'total_rotas']
+        for arquivo in self.arquivos:
+            resumos = {
+                (resumo['validation_operator'], resumo['corridor_cage']): {campo: resumo[campo] for campo in campos}
+                for resumo in ResumoExpedicao.objects.filter(arquivo_origem=arquivo).values()
+            }
+            esperado = self._agregar([arquivo], lambda r: (r.validation_operator or '', r.corridor_cage))
+            self.assertEqual(resumos, esperado)
+            datas = ResumoExpedicao.objects.filter(arquivo_origem=arquivo).values_list('data_referencia', flat=True)
+            self.assertEqual(set(datas), {arquivo.data_referencia})
+
+    def test_regerar_nao_duplica(self):
+        antes = ResumoExpedicao.objects.count()
+        gerar_resumos(self.arquivos[0])
+        self.assertEqual(ResumoExpedicao.objects.count(), antes)
+
+    def test_periodo_soma_os_arquivos(self):
+        no_periodo = self.arquivos[:2]
+        campos = CAMPOS_SOMA + ['total_registros', 'total_rotas']
+        for agrupamento, chave in [
+            ('operador', lambda r: r.validation_operator or ''),
+            ('corredor', lambda r: r.corridor_cage),
+        ]:
+            totais, linhas = analisar_periodo(self.DIAS[0], self.DIAS[1], agrupamento)
+            campo_grupo = {'operador': 'validation_operator', 'corredor': 'corridor_cage'}[agrupamento]
+            obtido = {linha[campo_grupo]: {campo: linha[campo] for campo in campos} for linha in linhas}
+            self.assertEqual(obtido, self._agregar(no_periodo, chave))
+
+            geral = self._agregar(no_periodo, lambda r: 'todos')['todos']
+            self.assertEqual({campo: totais[campo] for campo in campos}, geral)
+            self.assertEqual(totais['arquivos'], 2)
+
+        # Ranking por erros (missorted + missing), do maior para o menor
+        _, linhas = analisar_periodo(self.DIAS[0], self.DIAS[1], 'operador', 'erros')
+        erros = [linha['total_erros'] for linha in linhas]
+        self.assertEqual(erros, sorted(erros, reverse=True))
+        for linha in linhas:
+            self.assertEqual(linha['total_erros'], linha['missorted_orders'] + linha['missing_orders'])
+            self.assertEqual(
+                linha['percentual_escaneado'],
+                round(linha['total_scanned_orders'] * 100 / linha['total_initial_orders'], 2),
+            )
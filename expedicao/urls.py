@@ -15,5 +15,11 @@ urlpatterns = [
     # NOVO: Rota para Detalhes: /expedicao/detalhes/1/
     path('detalhes/<int:pk>/', views.DetalhesExpedicaoView.as_view(), name='detalhes'),
 
+    # Análise entre arquivos (resumos por operador/corredor/data): /expedicao/analise/
+    path('analise/', views.AnaliseExpedicaoView.as_view(), name='analise'),
+
+    # Produtividade da validação de um arquivo: /expedicao/produtividade/1/
+    path('produtividade/<int:pk>/', views.ProdutividadeExpedicaoView.as_view(), name='produtividade'),
+
     # NOTA: A rota 'sucesso/' foi removida.
 ]
\ No newline at end of file
@@ -9,11 +9,18 @@ from django.utils.dateparse import parse_datetime, parse_date
 from django.utils.timezone import make_aware 
 from datetime import timedelta 
 import csv
-import io
 
 
 from .forms import ExpedicaoArquivoForm 
-from .models import ExpedicaoArquivo, RegistroExpedicao
+from .models import ExpedicaoArquivo, RegistroExpedicao, ResumoExpedicao
+from .leitura import criar_destino, linhas_com_copia
+from .resumos import gerar_resumos, analisar_periodo, AGRUPAMENTOS, ORDENACOES
+from .produtividade import calcular_produtividade
+from core.cache import resultado_em_cache, registrar_alteracao
+from logistica.consolidacao import consolidar_dia
+
+# Registros por bulk_create durante a leitura do CSV
+TAMANHO_LOTE = 1000
 
 class UploadExpedicaoView(LoginRequiredMixin, View):
     template_name = 'expedicao/upload.html'
@@ -26,73 +33,94 @@ class UploadExpedicaoView(LoginRequiredMixin, View):
         form = ExpedicaoArquivoForm(request.POST, request.FILES)
         
         if form.is_valid():
+            nome_destino, destino = None, None
+            storage = ExpedicaoArquivo._meta.get_field('arquivo').storage
             try:
                 with transaction.atomic():
                     # 1. Salvar Metadados do Arquivo (ExpedicaoArquivo)
+                    #    O arquivo é criado agora (vazio, com nome exclusivo no storage do campo);
+                    #    o conteúdo é gravado no passo 2, na mesma passada da leitura.
+                    upload = form.cleaned_data['arquivo']
                     expedicao_arquivo = form.save(commit=False)
                     expedicao_arquivo.enviado_por = request.user
-                    expedicao_arquivo.save() 
-
-                    # 2. Ler e processar o CSV a partir do FileField
-                    arquivo_obj = expedicao_arquivo.arquivo.open('rb') 
-                    decoded_file = arquivo_obj.read().decode('utf-8') 
-                    arquivo_obj.close() 
-
-                    io_string = io.StringIO(decoded_file)
-                    reader = csv.reader(io_string, delimiter=',')
-                    header = next(reader) # Pula o cabeçalho
+                    nome_destino, destino = criar_destino(expedicao_arquivo, 'arquivo', upload.name)
+                    expedicao_arquivo.arquivo = nome_destino # str: o save() não grava o upload de novo
+                    expedicao_arquivo.save()
 
+                    # 2. Gravar e processar o CSV numa única passada (tee: bloco -> storage e -> csv.reader)
                     registros_para_criar = []
                     contador_registros = 0
+                    total_importados = 0
+
+                    with destino:
+                        reader = csv.reader(linhas_com_copia(upload, destino), delimiter=',')
+                        header = next(reader) # Pula o cabeçalho
+
+                        # Itera sobre as linhas
+                        for row in reader:
+                            if any(field.strip() for field in row):
+                                contador_registros += 1
+                                
+                                try:
+                                    # --- TRATAMENTO DOS DATETIMES ---
+                                    start_time_naive = parse_datetime(row[7]) if row[7] else None
+                                    end_time_naive = parse_datetime(row[8]) if row[8] else None
+
+                                    validation_start_time = make_aware(start_time_naive) if start_time_naive else None
+                                    validation_end_time = make_aware(end_time_naive) if end_time_naive else None
+                                    # --------------------------------------------------------
+
+                                    registro = RegistroExpedicao(
+                                        arquivo_origem=expedicao_arquivo,
+                                        at_to=row[0],
+                                        corridor_cage=row[1],
+                                        total_initial_orders=int(row[2]) if row[2] else 0,
+                                        total_final_orders=int(row[3]) if row[3] else 0,
+                                        total_scanned_orders=int(row[4]) if row[4] else 0,
+                                        missorted_orders=int(row[5]) if row[5] else 0,
+                                        missing_orders=int(row[6]) if row[6] else 0,
+                                        
+                                        validation_start_time=validation_start_time, 
+                                        validation_end_time=validation_end_time, 
+                                        
+                                        validation_operator=row[9],
+                                        revalidation_operator=row[10],
+                                        revalidated_count=int(row[11]) if row[11] else 0,
+                                        at_to_validation_status=row[12],
+                                        remark=row[13] if len(row) > 13 else None,
+                                    )
+                                    registros_para_criar.append(registro)
+                                except (ValueError, IndexError) as e:
+                                    messages.error(request, f"Erro ao processar a linha {contador_registros} (Erro: {e}). O registro foi ignorado.")
+                                    continue
+
+                                # 💡 Grava em lotes: a memória fica limitada a TAMANHO_LOTE registros
+                                if len(registros_para_criar) >= TAMANHO_LOTE:
+                                    RegistroExpedicao.objects.bulk_create(registros_para_criar, batch_size=TAMANHO_LOTE)
+                                    total_importados += len(registros_para_criar)
+                                    registros_para_criar = []
+
+                    RegistroExpedicao.objects.bulk_create(registros_para_criar, batch_size=TAMANHO_LOTE)
+                    total_importados += len(registros_para_criar)
                     
-                    # Itera sobre as linhas
-                    for row in reader:
-                        if any(field.strip() for field in row):
-                            contador_registros += 1
-                            
-                            try:
-                                # --- TRATAMENTO DOS DATETIMES ---
-                                start_time_naive = parse_datetime(row[7]) if row[7] else None
-                                end_time_naive = parse_datetime(row[8]) if row[8] else None
-
-                                validation_start_time = make_aware(start_time_naive) if start_time_naive else None
-                                validation_end_time = make_aware(end_time_naive) if end_time_naive else None
-                                # --------------------------------------------------------
-
-                                registro = RegistroExpedicao(
-                                    arquivo_origem=expedicao_arquivo,
-                                    at_to=row[0],
-                                    corridor_cage=row[1],
-                                    total_initial_orders=int(row[2]) if row[2] else 0,
-                                    total_final_orders=int(row[3]) if row[3] else 0,
-                                    total_scanned_orders=int(row[4]) if row[4] else 0,
-                                    missorted_orders=int(row[5]) if row[5] else 0,
-                                    missing_orders=int(row[6]) if row[6] else 0,
-                                    
-                                    validation_start_time=validation_start_time, 
-                                    validation_end_time=validation_end_time, 
-                                    
-                                    validation_operator=row[9],
-                                    revalidation_operator=row[10],
-                                    revalidated_count=int(row[11]) if row[11] else 0,
-                                    at_to_validation_status=row[12],
-                                    remark=row[13] if len(row) > 13 else None,
-                                )
-                                registros_para_criar.append(registro)
-                            except (ValueError, IndexError) as e:
-                                messages.error(request, f"Erro ao processar a linha {contador_registros} (Erro: {e}). O registro foi ignorado.")
-                                continue
-
-                    RegistroExpedicao.objects.bulk_create(registros_para_criar)
-                    
-                    expedicao_arquivo.num_registros = len(registros_para_criar)
+                    expedicao_arquivo.num_registros = total_importados
                     expedicao_arquivo.save()
+                    registrar_alteracao(RegistroExpedicao) # Invalida o cache de produtividade
+                    # Resumo por operador/corredor para a análise entre arquivos
+                    gerar_resumos(expedicao_arquivo)
+                    # Atualiza os Dados Diários de Logística da data de referência
+                    consolidar_dia(expedicao_arquivo.data_referencia)
                     
                     messages.success(request, f"Upload e processamento concluído! {expedicao_arquivo.num_registros} registros importados e o arquivo salvo em {expedicao_arquivo.arquivo.name.split('/')[-1]}.")
                     
                     return redirect('expedicao:dashboard')
 
             except Exception as e:
+                # O banco voltou atrás (atomic); remove também o arquivo já gravado no storage
+                if destino is not None:
+                    destino.close()
+                if nome_destino and storage.exists(nome_destino):
+                    storage.delete(nome_destino)
                 messages.error(request, f"Ocorreu um erro crítico durante o processamento do arquivo: {e}")
         else:
             messages.error(request, "O formulário possui erros. Verifique os campos e tente novamente.")
@@ -235,4 +263,77 @@ class DetalhesExpedicaoView(LoginRequiredMixin, View):
 
         except ExpedicaoArquivo.DoesNotExist:
             messages.error(request, "Arquivo de Expedição não encontrado.")
-            return redirect('expedicao:dashboard')
\ No newline at end of file
+            return redirect('expedicao:dashboard')
+
+
+## Análise entre Arquivos (Resumos por Operador / Corredor / Data)
+class AnaliseExpedicaoView(LoginRequiredMixin, View):
+    """
+    Ranking de operadores, corredores/cages ou datas somando os resumos gravados
+    no upload (ResumoExpedicao) de todos os arquivos do período.
+    """
+    template_name = 'expedicao/analise.html'
+
+    def get(self, request):
+        data_inicio_str = request.GET.get('data_inicio')
+        data_fim_str = request.GET.get('data_fim')
+        data_inicio = parse_date(data_inicio_str) if data_inicio_str else None
+        data_fim = parse_date(data_fim_str) if data_fim_str else None
+
+        agrupamento = request.GET.get('agrupar', 'operador')
+        if agrupamento not in AGRUPAMENTOS:
+            agrupamento = 'operador'
+        ordenacao = request.GET.get('ordenar', 'erros')
+        if ordenacao not in ORDENACOES:
+            ordenacao = 'erros'
+
+        # 💡 Em cache: a chave leva os filtros e a versão dos resumos (incrementada no upload)
+        totais, linhas = resultado_em_cache(
+            'analise_expedicao',
+            {'data_inicio': data_inicio, 'data_fim': data_fim, 'agrupar': agrupamento, 'ordenar': ordenacao},
+            [ResumoExpedicao],
+            lambda: analisar_periodo(data_inicio, data_fim, agrupamento, ordenacao),
+        )
+
+        campos_grupo, _ = AGRUPAMENTOS[agrupamento]
+        context = {
+            'titulo': 'Análise de Expedição entre Arquivos',
+            'totais': totais,
+            'linhas': linhas,
+            'campos_grupo': campos_grupo,
+            'agrupamento': agrupamento,
+            'ordenacao': ordenacao,
+            'agrupamentos': [(chave, rotulo) for chave, (_, rotulo) in AGRUPAMENTOS.items()],
+            'ordenacoes': [(chave, rotulo) for chave, (_, rotulo) in ORDENACOES.items()],
+            'data_inicio_selecionada': data_inicio_str or '',
+            'data_fim_selecionada': data_fim_str or '',
+        }
+        return render(request, self.template_name, context)
+
+
+## Produtividade da Validação (horários de início/fim por AT/TO)
+class ProdutividadeExpedicaoView(LoginRequiredMixin, View):
+    """Pedidos por hora por operador, durações (P50/P90/P99) e concorrência ao longo do turno de um arquivo."""
+    template_name = 'expedicao/produtividade.html'
+
+    def get(self, request, pk):
+        try:
+            arquivo = ExpedicaoArquivo.objects.get(pk=pk)
+        except ExpedicaoArquivo.DoesNotExist:
+            messages.error(request, "Arquivo de Expedição não encontrado.")
+            return redirect('expedicao:dashboard')
+
+        # 💡 Em cache por arquivo (os registros só mudam num novo upload)
+        produtividade = resultado_em_cache(
+            'produtividade_expedicao',
+            {'arquivo': arquivo.pk},
+            [RegistroExpedicao],
+            lambda: calcular_produtividade(arquivo.pk),
+        )
+
+        context = {
+            'titulo': f"Produtividade da Validação: {arquivo.data_referencia.strftime('%d/%m/%Y')}",
+            'arquivo': arquivo,
+            'produtividade': produtividade, # No template, os gráficos leem via json_script
+        }
+        return render(request, self.template_name, context)
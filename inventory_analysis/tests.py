@@ -0,0 +1,18 @@
+from core.testing import CasoOrcamento
+
+PERIODO = CasoOrcamento.PERIODO
+
+
+class OrcamentoViewsInventarioTest(CasoOrcamento):
+    """Consultas por view da Análise de Inventário (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        'analysis_dashboard': {
+            'url': 'inventory_analysis:analysis_dashboard', 'parametros': PERIODO, 'consultas': 10, 'tempo_sql_s': 0.5,
+        },
+        'detail_list_divergencia': {'url': 'inventory_analysis:detail_list', 'args': [1], 'parametros': PERIODO, 'consultas': 3},
+        'detail_list_nao_roteirizados': {
+            'url': 'inventory_analysis:detail_list', 'args': [2], 'parametros': PERIODO, 'consultas': 3,
+        },
+        'detail_list_somente_pool': {'url': 'inventory_analysis:detail_list', 'args': [3], 'parametros': PERIODO, 'consultas': 1},
+    }
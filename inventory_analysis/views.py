@@ -31,6 +31,16 @@ except ImportError:
 
 # --- Import do Formulário ---
 from .forms import DateRangeForm
+from core.cache import resultado_em_cache, registrar_alteracao
+
+# Tabelas lidas pelo dashboard (rótulos, pois os modelos podem ser os mocks acima).
+# Qualquer gravação numa delas invalida o cache do dashboard.
+TABELAS_DASHBOARD = [
+    'collection_pool.Pool',
+    'parcel_sweeper.Parcel',
+    'rastreio.Rastreio',
+    'inventory_analysis.ManualActionLog',
+]
 
 # --- AÇÕES E STATUS DE CONFRONTO ---
 # Novo Status
@@ -318,49 +328,59 @@ def analysis_dashboard(request):
 
         # Executa as consultas APENAS se houver datas válidas
         if data_inicio and data_fim:
-            # CHAMADAS DOS KPIS DE CONTAGEM TOTAL
-            total_collection_pool = get_total_collection_pool_count(data_inicio, data_fim)
-            total_parcel_sweeper = get_total_parcel_sweeper_count(data_inicio, data_fim) 
-            
-            # Chamadas de relatórios existentes
-            report_1_results = get_collection_pool_divergence(data_inicio, data_fim)
-            report_2_results = get_non_routed_orders(data_inicio, data_fim)
-            report_3_results = get_collection_pool_only(data_inicio, data_fim)
-
-            # Cálculo de KPIs
-            # KPI 4: A Adicionar (Status 'danger')
-            # AGORA INCLUI AÇÃO MANUAL 'REMOVE' NO CÁLCULO
-            to_be_added_to_pool = len([r for r in report_1_results if r['status_color'] == 'danger'])
-            
-            # NOVO KPI 6: Já Adicionado (Status 'success')
-            # AGORA INCLUI AÇÃO MANUAL 'ADD' NO CÁLCULO
-            already_in_pool = len([r for r in report_1_results if r['status_color'] == 'success'])
-            
-            # Outros KPIs
-            collection_pool_only_total = len(report_3_results)
-            
-            # CORREÇÃO APLICADA AQUI: O KPI Total Aptos p/ Roteirização agora exclui os itens 'warning' (Ignorar)
-            total_aptos_roteirizacao = len([
-                r for r in report_1_results if r['status_color'] != 'warning'
-            ])
-
-            kpis = {
-                # NOVOS KPIS DE CONTAGEM TOTAL
-                'total_collection_pool': total_collection_pool,
-                'total_parcel_sweeper': total_parcel_sweeper, # <-- Agora é o Backlog Total
-                
-                # KPIs de Divergência e Relatórios (existentes)
-                'total_divergence_1': len(report_1_results), # Total da Tarefa 1 (Encontrados no Sweeper)
-                'to_be_added_to_pool': to_be_added_to_pool, # KPI 4: Total de Registros a Adicionar na Pool
-                'already_in_pool': already_in_pool, # KPI 6: Total de Registros Já Adicionados na Pool
-                'non_routed_total': len(report_2_results), # KPI: Total da Tarefa 2 (Não Roteirizados)
-                'collection_pool_only_total': collection_pool_only_total, # KPI: Exclusivos Pool
-                'total_aptos_roteirizacao': total_aptos_roteirizacao, # KPI 5 - CORRIGIDO
-                
-                # Dados de filtro
-                'data_inicio': data_inicio,
-                'data_fim': data_fim,
-            }
+            # 💡 Em cache: os confrontos varrem Pool, Sweeper e Rastreio; a chave leva o período
+            #    e a versão dessas tabelas (e das ações manuais), incrementada a cada gravação.
+            def calcular():
+                # CHAMADAS DOS KPIS DE CONTAGEM TOTAL
+                total_collection_pool = get_total_collection_pool_count(data_inicio, data_fim)
+                total_parcel_sweeper = get_total_parcel_sweeper_count(data_inicio, data_fim) 
+
+                # Chamadas de relatórios existentes
+                report_1_results = get_collection_pool_divergence(data_inicio, data_fim)
+                report_2_results = get_non_routed_orders(data_inicio, data_fim)
+                report_3_results = get_collection_pool_only(data_inicio, data_fim)
+
+                # Cálculo de KPIs
+                # KPI 4: A Adicionar (Status 'danger')
+                # AGORA INCLUI AÇÃO MANUAL 'REMOVE' NO CÁLCULO
+                to_be_added_to_pool = len([r for r in report_1_results if r['status_color'] == 'danger'])
+
+                # NOVO KPI 6: Já Adicionado (Status 'success')
+                # AGORA INCLUI AÇÃO MANUAL 'ADD' NO CÁLCULO
+                already_in_pool = len([r for r in report_1_results if r['status_color'] == 'success'])
+
+                # Outros KPIs
+                collection_pool_only_total = len(report_3_results)
+
+                # CORREÇÃO APLICADA AQUI: O KPI Total Aptos p/ Roteirização agora exclui os itens 'warning' (Ignorar)
+                total_aptos_roteirizacao = len([
+                    r for r in report_1_results if r['status_color'] != 'warning'
+                ])
+
+                return {
+                    # NOVOS KPIS DE CONTAGEM TOTAL
+                    'total_collection_pool': total_collection_pool,
+                    'total_parcel_sweeper': total_parcel_sweeper, # <-- Agora é o Backlog Total
+
+                    # KPIs de Divergência e Relatórios (existentes)
+                    'total_divergence_1': len(report_1_results), # Total da Tarefa 1 (Encontrados no Sweeper)
+                    'to_be_added_to_pool': to_be_added_to_pool, # KPI 4: Total de Registros a Adicionar na Pool
+                    'already_in_pool': already_in_pool, # KPI 6: Total de Registros Já Adicionados na Pool
+                    'non_routed_total': len(report_2_results), # KPI: Total da Tarefa 2 (Não Roteirizados)
+                    'collection_pool_only_total': collection_pool_only_total, # KPI: Exclusivos Pool
+                    'total_aptos_roteirizacao': total_aptos_roteirizacao, # KPI 5 - CORRIGIDO
+
+                    # Dados de filtro
+                    'data_inicio': data_inicio,
+                    'data_fim': data_fim,
+                }
+
+            kpis = resultado_em_cache(
+                'analysis_dashboard',
+                {'data_inicio': data_inicio, 'data_fim': data_fim},
+                TABELAS_DASHBOARD,
+                calcular,
+            )
 
     context = {
         'form': form,
@@ -547,6 +567,7 @@ def mark_as_added(request, parcel_id):
                     'user': request.user if hasattr(request, 'user') and request.user.is_authenticated else None
                 }
             )
+            registrar_alteracao('inventory_analysis.ManualActionLog')
             messages.success(request, f'Rastreio **{parcel_id}** marcado manualmente para **{STATUS_JA_ADICIONADO}**.')
         except Exception as e:
             messages.error(request, f'Erro ao salvar a ação para {parcel_id}: {e}')
@@ -567,6 +588,7 @@ def remove_from_pool(request, parcel_id):
             try:
                 # O comando delete é executado aqui, e agora deve funcionar com a importação correta
                 deleted_count, _ = ManualActionLog.objects.filter(parcel_id=parcel_id).delete()
+                registrar_alteracao('inventory_analysis.ManualActionLog')
                 if deleted_count > 0:
                     messages.info(request, f'Registro de ação manual para **{parcel_id}** foi **EXCLUÍDO** com sucesso. O status voltará ao cálculo automático.')
                 else:
@@ -583,6 +605,7 @@ def remove_from_pool(request, parcel_id):
                         'user': request.user if hasattr(request, 'user') and request.user.is_authenticated else None
                     }
                 )
+                registrar_alteracao('inventory_analysis.ManualActionLog')
                 messages.warning(request, f'Rastreio **{parcel_id}** marcado manualmente para **{STATUS_NAO_ADICIONAR}** (Ignorar).')
             except Exception as e:
                 messages.error(request, f'Erro ao salvar a ação para {parcel_id}: {e}')
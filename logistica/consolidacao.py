@@ -0,0 +1,170 @@
+# logistica/consolidacao.py
+#
+# Consolidação automática dos Dados Diários de Logística.
+# Os contadores de DadosDiariosLogistica são derivados dos apps de origem
+# (Expedição, OnHold, Parcel Sweeper, Lost/Damage e Collection Pool):
+# - cada fonte é UMA consulta agrupada pela data, com um agregado por contador;
+# - o resultado é gravado num único upsert por data_envio (bulk_create com update_conflicts);
+# - o tempo (ms) de cada consulta fica em tempos_consolidacao.
+# Os uploads chamam consolidar_dia() com a data enviada; o comando
+# consolidar_logistica reprocessa um período inteiro.
+# Campos sem fonte no sistema (ex.: total_reversa) continuam manuais e não são tocados;
+# os de uma fonte sem linhas na data também (o valor digitado à mão é mantido), a não
+# ser que a fonte tivesse linhas na consolidação anterior (fontes_consolidadas): aí as
+# linhas saíram da data (upsert que muda a data, exclusão) e os contadores vão a 0.
+
+import time
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.cache import registrar_alteracao
+from collection_pool.models import Pool
+from expedicao.models import RegistroExpedicao
+from onhold.models import OnHold
+from parcel_lost.models import ParcelLost
+from parcel_sweeper.kpis import Q_BACKLOG, Q_BACKLOG_AGARRADO, Q_MISSING
+from parcel_sweeper.models import Parcel
+from .models import DadosDiariosLogistica
+
+
+# fonte -> modelo, campo de data (equivalente à data_envio) e contadores (campo do modelo -> agregado)
+FONTES = {
+    'expedicao': {
+        'modelo': RegistroExpedicao,
+        'campo_data': 'arquivo_origem__data_referencia',
+        'metricas': {
+            'total_rotas': Count('id'), # Cada linha do arquivo é uma AT/TO (rota)
+            'total_pacotes_iniciados': Sum('total_initial_orders'),
+            'total_pacotes_finalizados': Sum('total_final_orders'),
+            'total_pacotes_escaneados': Sum('total_scanned_orders'),
+            'total_missorted': Sum('missorted_orders'),
+            'total_missing_expedicao': Sum('missing_orders'),
+        },
+    },
+    'onhold': {
+        'modelo': OnHold,
+        'campo_data': 'data_envio',
+        # Mesmas regras dos cards do dashboard de OnHold
+        'metricas': {
+            'total_onhold': Count('id'),
+            'onhold_devolvidos': Count('id', filter=Q(status='LMHub_Received')),
+            'onhold_devolver': Count('id', filter=Q(status='OnHold')),
+            'volumosos_no_hub': Count('id', filter=Q(onhold_reason='Insufficient Vehicle Capacity', status='LMHub_Received')),
+            'pnr': Count('id', filter=Q(onhold_reason='Parcel lost', status='OnHold')),
+        },
+    },
+    'parcel_sweeper': {
+        'modelo': Parcel,
+        'campo_data': 'data_referencia',
+        # Mesmos filtros dos cards do Parcel Sweeper (parcel_sweeper/kpis.py)
+        'metricas': {
+            'backlog_parcel': Count('id', filter=Q_BACKLOG),
+            'missing_parcel': Count('id', filter=Q_MISSING),
+            'backlog_agarrado_varios_dias': Count('id', filter=Q_BACKLOG_AGARRADO),
+        },
+    },
+    'parcel_lost': {
+        'modelo': ParcelLost,
+        'campo_data': 'data_registro',
+        'metricas': {
+            'avaria_soc': Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
+            'avaria_hub': Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
+        },
+    },
+    'collection_pool': {
+        'modelo': Pool,
+        'campo_data': 'data_envio_arquivo',
+        'metricas': {
+            'pedidos_roteirizar_pool': Count('id'),
+        },
+    },
+}
+
+# Campos de DadosDiariosLogistica preenchidos pela consolidação
+CAMPOS_CONSOLIDADOS = [campo for fonte in FONTES.values() for campo in fonte['metricas']]
+
+
+def consolidar_datas(datas):
+    """
+    Recalcula e grava (upsert) os contadores das datas informadas.
+    Uma consulta agrupada por fonte, qualquer que seja o número de datas.
+    Só os contadores das fontes com linhas na data são gravados: os das fontes sem
+    dados (dia anterior ao sistema, digitado à mão) ficam como estão, menos os das
+    fontes que tinham linhas na consolidação anterior, que vão a 0.
+    Retorna a lista de DadosDiariosLogistica gravados.
+    """
+    datas = sorted({data for data in datas if data})
+    if not datas:
+        return []
+
+    valores = {data: {} for data in datas}
+    fontes_com_dados = {data: [] for data in datas}
+    tempos = {}
+
+    for nome, fonte in FONTES.items():
+        campo_data = fonte['campo_data']
+        inicio = time.perf_counter()
+        grupos = list(
+            fonte['modelo'].objects
+            .filter(**{f'{campo_data}__in': datas})
+            .order_by()
+            .values(campo_data)
+            .annotate(**fonte['metricas'])
+        )
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 2)
+
+        for grupo in grupos:
+            data = grupo.pop(campo_data)
+            valores[data].update({campo: total or 0 for campo, total in grupo.items()})
+            fontes_com_dados[data].append(nome)
+
+    # Fontes que tinham linhas na data e não têm mais: contadores zerados
+    anteriores = DadosDiariosLogistica.objects.filter(data_envio__in=datas).values_list('data_envio', 'fontes_consolidadas')
+    for data, fontes in anteriores:
+        for nome in set(fontes or []) - set(fontes_com_dados[data]):
+            if nome in FONTES:
+                valores[data].update(dict.fromkeys(FONTES[nome]['metricas'], 0))
+
+    agora = timezone.now()
+    registros = [
+        DadosDiariosLogistica(
+            data_envio=data, consolidado_em=agora, tempos_consolidacao=tempos,
+            fontes_consolidadas=fontes_com_dados[data], **valores[data]
+        )
+        for data in datas
+    ]
+    # Um upsert por combinação de fontes com dados (normalmente uma só para o lote)
+    por_campos = {}
+    for registro in registros:
+        campos = tuple(campo for campo in CAMPOS_CONSOLIDADOS if campo in valores[registro.data_envio])
+        por_campos.setdefault(campos, []).append(registro)
+    for campos, lote in por_campos.items():
+        # 🔑 Upsert pela data: cria o dia se não existir, senão atualiza só os campos com fonte
+        DadosDiariosLogistica.objects.bulk_create(
+            lote,
+            update_conflicts=True,
+            unique_fields=['data_envio'],
+            update_fields=list(campos) + ['consolidado_em', 'tempos_consolidacao', 'fontes_consolidadas'],
+        )
+    registrar_alteracao(DadosDiariosLogistica) # Invalida o cache do dashboard de logística
+    return registros
+
+
+def consolidar_dia(data):
+    """Evento: upload (ou registro) com esta data de referência."""
+    return consolidar_datas([data])
+
+
+def datas_com_dados(data_inicio=None, data_fim=None):
+    """Todas as datas que aparecem em alguma fonte (opcionalmente dentro do período)."""
+    datas = set()
+    for fonte in FONTES.values():
+        campo_data = fonte['campo_data']
+        consulta = fonte['modelo'].objects.exclude(**{f'{campo_data}__isnull': True})
+        if data_inicio:
+            consulta = consulta.filter(**{f'{campo_data}__gte': data_inicio})
+        if data_fim:
+            consulta = consulta.filter(**{f'{campo_data}__lte': data_fim})
+        datas.update(consulta.order_by().values_list(campo_data, flat=True).distinct())
+    return sorted(datas)
@@ -1,13 +1,15 @@
 # logistica/forms.py
 
+from datetime import date
+
 from django import forms
 from .models import DadosDiariosLogistica # Altere para o nome correto do seu app.models
 
 class DadosDiariosLogisticaForm(forms.ModelForm):
     class Meta:
         model = DadosDiariosLogistica
-        # Inclui todos os campos do modelo
-        fields = '__all__' 
+        # Todos os campos, menos os de controle da consolidação automática
+        exclude = ['consolidado_em', 'tempos_consolidacao', 'fontes_consolidadas']
         
         # Opcional: Adiciona widgets para melhor UX (Bootstrap style)
         widgets = {
@@ -37,6 +39,10 @@ class DadosDiariosLogisticaForm(forms.ModelForm):
 
 
 class PeriodoFiltroForm(forms.Form):
+    # Datas fora deste intervalo são erro de digitação (e estouram as contas de data das séries)
+    DATA_MINIMA = date(2000, 1, 1)
+    DATA_MAXIMA = date(2100, 12, 31)
+
     data_inicio = forms.DateField(
         label='Data de Início',
         widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -54,6 +60,11 @@ class PeriodoFiltroForm(forms.Form):
         data_inicio = cleaned_data.get("data_inicio")
         data_fim = cleaned_data.get("data_fim")
 
+        for campo in ('data_inicio', 'data_fim'):
+            valor = cleaned_data.get(campo)
+            if valor and not (self.DATA_MINIMA <= valor <= self.DATA_MAXIMA):
+                self.add_error(campo, f"Informe uma data entre {self.DATA_MINIMA:%d/%m/%Y} e {self.DATA_MAXIMA:%d/%m/%Y}.")
+
         if data_inicio and data_fim and data_inicio > data_fim:
             raise forms.ValidationError(
                 "A Data de Início não pode ser posterior à Data de Fim."
@@ -0,0 +1,49 @@
+# logistica/management/commands/consolidar_logistica.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from logistica.consolidacao import consolidar_datas, datas_com_dados
+
+# Datas por lote (cada lote = uma consulta agrupada por fonte + um upsert)
+TAMANHO_LOTE = 100
+
+
+def _data(texto):
+    """AAAA-MM-DD -> date (None se vazio); formato ou data inválida vira CommandError."""
+    if not texto:
+        return None
+    try:
+        data = parse_date(texto)
+    except ValueError as e:
+        raise CommandError(f"Data inválida: {texto} ({e})")
+    if data is None:
+        raise CommandError(f"Data inválida: {texto} (use AAAA-MM-DD)")
+    return data
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os Dados Diários de Logística a partir dos apps de origem "
+        "(Expedição, OnHold, Parcel Sweeper, Lost/Damage e Collection Pool)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help="Data inicial (AAAA-MM-DD). Padrão: a primeira com dados.")
+        parser.add_argument('--fim', help="Data final (AAAA-MM-DD). Padrão: a última com dados.")
+
+    def handle(self, *args, **options):
+        data_inicio = _data(options['inicio'])
+        data_fim = _data(options['fim'])
+
+        datas = datas_com_dados(data_inicio, data_fim)
+        for i in range(0, len(datas), TAMANHO_LOTE):
+            lote = datas[i:i + TAMANHO_LOTE]
+            registros = consolidar_datas(lote)
+            tempos = registros[0].tempos_consolidacao
+            self.stdout.write(
+                f"  {lote[0]:%d/%m/%Y} a {lote[-1]:%d/%m/%Y}: {len(registros)} dias "
+                f"({', '.join(f'{fonte} {ms} ms' for fonte, ms in tempos.items())})."
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Dados de logística consolidados para {len(datas)} datas."))
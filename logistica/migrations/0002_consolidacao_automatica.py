@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistica', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dadosdiarioslogistica',
+            name='consolidado_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Consolidado em'),
+        ),
+        migrations.AddField(
+            model_name='dadosdiarioslogistica',
+            name='tempos_consolidacao',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Tempos da Consolidação (ms por fonte)'),
+        ),
+    ]
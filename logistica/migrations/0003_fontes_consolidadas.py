@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:45
+#
+# Preenche fontes_consolidadas dos dias já consolidados com as fontes que hoje têm
+# linhas na data (= logistica.consolidacao.FONTES, copiado: a migração não muda junto
+# com o código da aplicação). Uma consulta por fonte.
+
+from django.db import migrations, models
+
+# fonte -> (modelo, campo de data equivalente à data_envio)
+FONTES = {
+    'expedicao': ('expedicao.RegistroExpedicao', 'arquivo_origem__data_referencia'),
+    'onhold': ('onhold.OnHold', 'data_envio'),
+    'parcel_sweeper': ('parcel_sweeper.Parcel', 'data_referencia'),
+    'parcel_lost': ('parcel_lost.ParcelLost', 'data_registro'),
+    'collection_pool': ('collection_pool.Pool', 'data_envio_arquivo'),
+}
+
+
+def preencher_fontes(apps, schema_editor):
+    DadosDiariosLogistica = apps.get_model('logistica', 'DadosDiariosLogistica')
+    dias = list(DadosDiariosLogistica.objects.exclude(consolidado_em__isnull=True))
+    if not dias:
+        return
+    datas = [dia.data_envio for dia in dias]
+    com_dados = {}
+    for nome, (label, campo_data) in FONTES.items():
+        presentes = (
+            apps.get_model(label).objects.filter(**{f'{campo_data}__in': datas})
+            .order_by().values_list(campo_data, flat=True).distinct()
+        )
+        for data in presentes:
+            com_dados.setdefault(data, []).append(nome)
+    for dia in dias:
+        dia.fontes_consolidadas = com_dados.get(dia.data_envio, [])
+    DadosDiariosLogistica.objects.bulk_update(dias, ['fontes_consolidadas'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistica', '0002_consolidacao_automatica'),
+        ('collection_pool', '0005_popular_cidadecep'),
+        ('expedicao', '0004_popular_resumoexpedicao'),
+        ('onhold', '0011_popular_desempenhomotoristadiario'),
+        ('parcel_lost', '0002_indice_ultimo_status'),
+        ('parcel_sweeper', '0004_parcel_count_type_cod_parcel_final_status_cod_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dadosdiarioslogistica',
+            name='fontes_consolidadas',
+            field=models.JSONField(blank=True, default=list, verbose_name='Fontes Consolidadas'),
+        ),
+        migrations.RunPython(preencher_fontes, migrations.RunPython.noop),
+    ]
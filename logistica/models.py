@@ -30,6 +30,13 @@ class DadosDiariosLogistica(models.Model):
     avaria_hub = models.IntegerField(default=0, verbose_name="Avaria HUB")
     backlog_agarrado_varios_dias = models.IntegerField(default=0, verbose_name="Backlog Agarrado no HUB - Vários dias")
 
+    # Controle da consolidação automática (logistica/consolidacao.py)
+    consolidado_em = models.DateTimeField(null=True, blank=True, verbose_name="Consolidado em")
+    tempos_consolidacao = models.JSONField(default=dict, blank=True, verbose_name="Tempos da Consolidação (ms por fonte)")
+    # Fontes que tinham linhas na data na última consolidação: se uma delas ficar sem
+    # linhas, os contadores vão a 0 (os de fontes que nunca tiveram dados são manuais)
+    fontes_consolidadas = models.JSONField(default=list, blank=True, verbose_name="Fontes Consolidadas")
+
     class Meta:
         verbose_name = "Dado Diário de Logística"
         verbose_name_plural = "Dados Diários de Logística"
@@ -0,0 +1,193 @@
+# logistica/series.py
+#
+# Séries temporais dos Dados Diários de Logística (comparação de períodos).
+# Os dias do período viram uma matriz NumPy (dias x métricas), num calendário
+# contínuo: dia sem registro = NaN (não é zero, é "sem informação").
+# Sobre essa matriz, tudo é vetorizado (sem laço por dia):
+# - médias móveis de 7 e 28 dias (somas acumuladas);
+# - faixa de percentis P10-P90 numa janela móvel de 28 dias;
+# - variação semana a semana (7 dias x 7 anteriores) e mês a mês (28 x 28).
+# As janelas precisam de histórico anterior ao início do período: a consulta
+# já traz HISTORICO_DIAS a mais, que não aparecem no gráfico.
+
+from datetime import timedelta
+
+from .models import DadosDiariosLogistica
+
+JANELA_SEMANA = 7
+JANELA_MES = 28
+HISTORICO_DIAS = 2 * JANELA_MES  # cobre a janela de 28 dias e o mês anterior da comparação
+PERIODO_PADRAO_DIAS = 365
+# Teto do período da série (a matriz é dias x métricas, com janelas de 28 dias):
+# um período maior é cortado, mantendo os dias mais recentes
+PERIODO_MAXIMO_DIAS = 3 * 365
+PERCENTIS = (10, 90)
+
+# Campos de DadosDiariosLogistica que não são métricas
+CAMPOS_CONTROLE = {'id', 'data_envio', 'consolidado_em', 'tempos_consolidacao', 'fontes_consolidadas'}
+
+# Métricas (campo -> rótulo), na ordem do modelo
+METRICAS = {
+    campo.name: str(campo.verbose_name)
+    for campo in DadosDiariosLogistica._meta.concrete_fields
+    if campo.name not in CAMPOS_CONTROLE
+}
+
+
+def periodo_da_serie(data_inicio=None, data_fim=None):
+    """
+    Período padrão: os últimos 365 dias até o último dia com dados.
+    Períodos maiores que PERIODO_MAXIMO_DIAS ficam com os dias mais recentes.
+    """
+    if not data_fim:
+        ultimo = DadosDiariosLogistica.objects.order_by('-data_envio').values_list('data_envio', flat=True).first()
+        if ultimo is None:
+            return None, None
+        data_fim = ultimo
+    if not data_inicio:
+        data_inicio = data_fim - timedelta(days=PERIODO_PADRAO_DIAS - 1)
+    if (data_fim - data_inicio).days >= PERIODO_MAXIMO_DIAS:
+        data_inicio = data_fim - timedelta(days=PERIODO_MAXIMO_DIAS - 1)
+    return data_inicio, data_fim
+
+
+def _matriz_diaria(data_inicio, data_fim):
+    """Matriz (dias x métricas) do calendário contínuo de data_inicio a data_fim, NaN nos dias sem registro."""
+    import numpy as np
+
+    total_dias = (data_fim - data_inicio).days + 1
+    matriz = np.full((total_dias, len(METRICAS)), np.nan)
+
+    linhas = (
+        DadosDiariosLogistica.objects
+        .filter(data_envio__range=[data_inicio, data_fim])
+        .order_by()
+        .values_list('data_envio', *METRICAS)
+    )
+    for data_envio, *valores in linhas:
+        matriz[(data_envio - data_inicio).days] = valores
+    return matriz
+
+
+def _soma_movel(matriz, janela):
+    """Soma e nº de dias com dado em cada janela móvel (vetorizado por soma acumulada)."""
+    import numpy as np
+
+    zeros = np.zeros((1, matriz.shape[1]))
+    soma = np.vstack([zeros, np.nancumsum(matriz, axis=0)])
+    dias = np.vstack([zeros, np.cumsum(~np.isnan(matriz), axis=0)])
+    # Janelas truncadas no início da série (menos de 'janela' dias disponíveis)
+    inicio = np.maximum(np.arange(1, matriz.shape[0] + 1) - janela, 0)
+    fim = np.arange(1, matriz.shape[0] + 1)
+    return soma[fim] - soma[inicio], dias[fim] - dias[inicio]
+
+
+def _media_movel(matriz, janela):
+    import numpy as np
+
+    soma, dias = _soma_movel(matriz, janela)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(dias > 0, soma / dias, np.nan)
+
+
+def _percentis_janelas(janelas, percentis):
+    """
+    Percentis (interpolação linear, como np.nanpercentile) ignorando NaN, no último eixo.
+    O np.nanpercentile cai num laço Python por janela quando há NaN; aqui a
+    ordenação (NaN vai para o fim) e a interpolação são feitas de uma vez só.
+    """
+    import numpy as np
+
+    ordenadas = np.sort(janelas, axis=-1)
+    validos = (~np.isnan(janelas)).sum(axis=-1)
+    resultado = []
+    for percentil in percentis:
+        posicao = np.maximum(validos - 1, 0) * (percentil / 100)
+        abaixo = np.floor(posicao).astype(int)
+        acima = np.ceil(posicao).astype(int)
+        valor_abaixo = np.take_along_axis(ordenadas, abaixo[..., None], axis=-1)[..., 0]
+        valor_acima = np.take_along_axis(ordenadas, acima[..., None], axis=-1)[..., 0]
+        valor = valor_abaixo + (valor_acima - valor_abaixo) * (posicao - abaixo)
+        resultado.append(np.where(validos > 0, valor, np.nan))
+    return resultado
+
+
+def _faixa_percentis(matriz, janela):
+    """P10 e P90 de cada janela móvel (as primeiras linhas ficam NaN até completar a janela)."""
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    if matriz.shape[0] < janela:
+        vazio = np.full(matriz.shape, np.nan)
+        return vazio, vazio
+    janelas = sliding_window_view(matriz, janela, axis=0)  # (dias - janela + 1, métricas, janela)
+    baixo, alto = _percentis_janelas(janelas, PERCENTIS)
+    preenchimento = np.full((janela - 1, matriz.shape[1]), np.nan)
+    return np.vstack([preenchimento, baixo]), np.vstack([preenchimento, alto])
+
+
+def _variacao(soma, dias, deslocamento):
+    """Variação % entre a janela que termina no último dia e a janela 'deslocamento' dias antes."""
+    import numpy as np
+
+    if soma.shape[0] <= deslocamento:
+        return [None] * soma.shape[1]
+    atual, anterior = soma[-1], soma[-1 - deslocamento]
+    validos = (dias[-1] > 0) & (dias[-1 - deslocamento] > 0) & (anterior != 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variacao = np.where(validos, (atual - anterior) * 100 / anterior, np.nan)
+    return _lista(variacao)
+
+
+def _lista(valores):
+    """Array -> lista JSON (NaN vira None, que o Chart.js trata como lacuna)."""
+    import numpy as np
+
+    lista = np.round(valores, 2).astype(object)
+    lista[np.isnan(valores)] = None
+    return lista.tolist()
+
+
+def calcular_series(data_inicio, data_fim):
+    """
+    Séries diárias, médias móveis, faixa P10-P90 e variações de todas as métricas.
+    Retorna só dados simples (listas e dicts), prontos para o cache e para json.dumps.
+    """
+    import numpy as np
+
+    inicio_historico = data_inicio - timedelta(days=HISTORICO_DIAS)
+    matriz = _matriz_diaria(inicio_historico, data_fim)
+
+    media_7 = _media_movel(matriz, JANELA_SEMANA)
+    media_28 = _media_movel(matriz, JANELA_MES)
+    p_baixo, p_alto = _faixa_percentis(matriz, JANELA_MES)
+    soma_7, dias_7 = _soma_movel(matriz, JANELA_SEMANA)
+    soma_28, dias_28 = _soma_movel(matriz, JANELA_MES)
+    variacao_semana = _variacao(soma_7, dias_7, JANELA_SEMANA)
+    variacao_mes = _variacao(soma_28, dias_28, JANELA_MES)
+
+    # Recorta o histórico extra: o gráfico mostra só o período pedido
+    corte = slice(HISTORICO_DIAS, None)
+    periodo = matriz[corte]
+    datas = [data_inicio + timedelta(days=i) for i in range(periodo.shape[0])]
+    total_periodo = np.nansum(periodo, axis=0)
+
+    series = {}
+    for i, (campo, rotulo) in enumerate(METRICAS.items()):
+        series[campo] = {
+            'rotulo': rotulo,
+            'valores': _lista(periodo[:, i]),
+            'media_7': _lista(media_7[corte, i]),
+            'media_28': _lista(media_28[corte, i]),
+            'p_baixo': _lista(p_baixo[corte, i]),
+            'p_alto': _lista(p_alto[corte, i]),
+            'total': int(total_periodo[i]),
+            'variacao_semana': variacao_semana[i],
+            'variacao_mes': variacao_mes[i],
+        }
+
+    return {
+        'labels': [data.strftime('%d/%m/%Y') for data in datas],
+        'dias_com_dados': int((~np.isnan(periodo).all(axis=1)).sum()),
+        'series': series,
+    }
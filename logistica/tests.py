@@ -1,3 +1,173 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.urls import reverse
+
+from collection_pool.models import Pool
+from core.testing import CasoOrcamento
+from onhold.models import OnHold
+
+from .consolidacao import consolidar_dia
+from .forms import PeriodoFiltroForm
+from .models import DadosDiariosLogistica
+from .series import HISTORICO_DIAS, PERIODO_MAXIMO_DIAS, _faixa_percentis, _variacao, calcular_series, periodo_da_serie
+
+
+class OrcamentoViewsLogisticaTest(CasoOrcamento):
+    """Consultas por view da Logística (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        'dashboard': {'url': 'logistica:dashboard', 'consultas': 5, 'tempo_sql_s': 0.5},
+        'listar_dados': {'url': 'logistica:listar_dados', 'consultas': 1},
+    }
+
+
+class PeriodoSerieTest(TestCase):
+    """O período das tendências é validado no formulário e limitado antes de montar a matriz."""
+
+    def test_data_fora_do_intervalo_invalida(self):
+        form = PeriodoFiltroForm({'data_inicio': '0001-01-01', 'data_fim': '2031-01-01'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('data_inicio', form.errors)
+
+    def test_periodo_longo_e_cortado(self):
+        inicio, fim = periodo_da_serie(date(2000, 1, 1), date(2031, 1, 1))
+        self.assertEqual(fim, date(2031, 1, 1))
+        self.assertEqual((fim - inicio).days + 1, PERIODO_MAXIMO_DIAS)
+
+    def test_dashboard_com_data_invalida_responde(self):
+        usuario = get_user_model().objects.create_user('periodo', password='periodo')
+        self.client.force_login(usuario)
+        DadosDiariosLogistica.objects.create(data_envio=date(2031, 1, 1))
+        resposta = self.client.get(reverse('logistica:dashboard'), {'data_inicio': '0001-01-01'})
+        self.assertEqual(resposta.status_code, 200)
+
+
+class CalculoSeriesTest(TestCase):
+    """Médias móveis, faixa P10-P90 e variações de uma série diária conhecida (total_rotas = 1, 2, 3, ...)."""
+
+    INICIO = date(2031, 3, 1)
+    FIM = date(2031, 3, 30)
+
+    def _serie(self, faltando=(), inicio=None, fim=None):
+        """Grava total_rotas = nº do dia (1 no primeiro dia do histórico) e devolve {data: valor}."""
+        inicio = inicio or self.INICIO - timedelta(days=HISTORICO_DIAS)
+        fim = fim or self.FIM
+        valores = {
+            inicio + timedelta(days=i): i + 1 for i in range((fim - inicio).days + 1)
+            if inicio + timedelta(days=i) not in faltando
+        }
+        DadosDiariosLogistica.objects.bulk_create(
+            [DadosDiariosLogistica(data_envio=data, total_rotas=valor) for data, valor in valores.items()]
+        )
+        return valores
+
+    def _janela(self, valores, fim, dias):
+        return [valores[fim - timedelta(days=i)] for i in range(dias) if fim - timedelta(days=i) in valores]
+
+    def test_serie_continua(self):
+        self._serie()
+        rotas = calcular_series(self.INICIO, self.FIM)['series']['total_rotas']
+        ultimo = HISTORICO_DIAS + 30  # Valor do último dia
+
+        self.assertEqual(len(rotas['valores']), 30)
+        self.assertEqual(rotas['valores'][-1], ultimo)
+        self.assertEqual(rotas['total'], sum(range(HISTORICO_DIAS + 1, ultimo + 1)))
+        # Janela de n inteiros consecutivos terminando em v: média v - (n - 1) / 2
+        self.assertEqual(rotas['media_7'][-1], ultimo - 3)
+        self.assertEqual(rotas['media_28'][-1], ultimo - 13.5)
+        # P10/P90 de 28 consecutivos a..a+27 (interpolação linear): a + 2,7 e a + 24,3
+        self.assertEqual(rotas['p_baixo'][-1], ultimo - 27 + 2.7)
+        self.assertEqual(rotas['p_alto'][-1], ultimo - 27 + 24.3)
+        # Semana: 7 dias x 7 anteriores (média v - 3 x v - 10); mês: 28 x 28 (v - 13,5 x v - 41,5)
+        self.assertEqual(rotas['variacao_semana'], round(7 * 100 / (ultimo - 10), 2))
+        self.assertEqual(rotas['variacao_mes'], round(28 * 100 / (ultimo - 41.5), 2))
+
+    def test_lacunas_nao_contam_como_zero(self):
+        lacunas = {self.FIM, self.FIM - timedelta(days=3), self.INICIO + timedelta(days=10)}
+        valores = self._serie(faltando=lacunas)
+        resultado = calcular_series(self.INICIO, self.FIM)
+        rotas = resultado['series']['total_rotas']
+
+        self.assertEqual(resultado['dias_com_dados'], 27)
+        self.assertIsNone(rotas['valores'][-1])
+        self.assertIsNone(rotas['valores'][10])
+        for i in range(30):
+            dia = self.INICIO + timedelta(days=i)
+            semana, mes = self._janela(valores, dia, 7), self._janela(valores, dia, 28)
+            self.assertEqual(rotas['media_7'][i], round(sum(semana) / len(semana), 2))
+            self.assertEqual(rotas['media_28'][i], round(sum(mes) / len(mes), 2))
+            self.assertEqual(rotas['p_baixo'][i], round(float(np.percentile(mes, 10)), 2))
+            self.assertEqual(rotas['p_alto'][i], round(float(np.percentile(mes, 90)), 2))
+
+        semana = sum(self._janela(valores, self.FIM, 7))
+        anterior = sum(self._janela(valores, self.FIM - timedelta(days=7), 7))
+        self.assertEqual(rotas['variacao_semana'], round((semana - anterior) * 100 / anterior, 2))
+
+    def test_serie_mais_curta_que_a_janela(self):
+        # Só 3 dias com dados: as médias usam os dias disponíveis e as variações ficam vazias
+        self._serie(inicio=self.FIM - timedelta(days=2))
+        rotas = calcular_series(self.INICIO, self.FIM)['series']['total_rotas']
+
+        self.assertEqual(rotas['valores'][-3:], [1, 2, 3])
+        self.assertEqual(rotas['media_7'][-3:], [1, 1.5, 2])
+        self.assertEqual(rotas['media_28'][-1], 2)
+        self.assertIsNone(rotas['media_7'][-4])
+        self.assertEqual((rotas['p_baixo'][-1], rotas['p_alto'][-1]), (1.2, 2.8))
+        self.assertIsNone(rotas['variacao_semana'])
+        self.assertIsNone(rotas['variacao_mes'])
+
+    def test_matriz_menor_que_a_janela(self):
+        matriz = np.arange(10, dtype=float).reshape(5, 2)
+        baixo, alto = _faixa_percentis(matriz, 28)
+        self.assertTrue(np.isnan(baixo).all() and np.isnan(alto).all())
+        self.assertEqual(_variacao(matriz, np.ones_like(matriz), 7), [None, None])
+
+
+class ConsolidacaoTest(TestCase):
+    """A consolidação só grava os contadores das fontes que têm (ou tinham) linhas na data."""
+
+    DIA = date(2031, 1, 1)
+
+    def test_mantem_valores_manuais_de_fontes_sem_dados(self):
+        DadosDiariosLogistica.objects.create(data_envio=self.DIA, total_rotas=42, total_onhold=7)
+        OnHold.objects.create(data_envio=self.DIA, status='OnHold')
+
+        consolidar_dia(self.DIA)
+        dados = DadosDiariosLogistica.objects.get(data_envio=self.DIA)
+        self.assertEqual(dados.total_onhold, 1)
+        self.assertEqual(dados.onhold_devolver, 1)
+        self.assertEqual(dados.total_rotas, 42) # Sem expedição na data: fica o digitado
+
+    def test_fonte_que_ficou_sem_linhas_vai_a_zero(self):
+        OnHold.objects.create(data_envio=self.DIA, status='OnHold')
+        consolidar_dia(self.DIA)
+        OnHold.objects.filter(data_envio=self.DIA).delete()
+
+        consolidar_dia(self.DIA)
+        dados = DadosDiariosLogistica.objects.get(data_envio=self.DIA)
+        self.assertEqual((dados.total_onhold, dados.onhold_devolver), (0, 0))
+        self.assertEqual(dados.fontes_consolidadas, [])
+
+    def test_upload_do_pool_reconsolida_a_data_anterior(self):
+        outro_dia = date(2031, 1, 2)
+        Pool.objects.bulk_create([Pool(shipment_id=f'BR{i}', data_envio_arquivo=self.DIA) for i in range(2)])
+        consolidar_dia(self.DIA)
+        self.client.force_login(get_user_model().objects.create_user('pool', password='pool'))
+
+        # O upsert move os dois shipment_ids para o outro dia: o dia anterior fica sem linhas
+        arquivo = SimpleUploadedFile('pool.csv', b'Shipment Id,City\nBR0,Muriae\nBR1,Muriae\n', content_type='text/csv')
+        self.client.post(reverse('upload_pool_csv'), {'arquivo_csv': arquivo, 'data_envio_arquivo': '2031-01-02'})
+        self.assertEqual(Pool.objects.filter(data_envio_arquivo=outro_dia).count(), 2)
+        pool = dict(DadosDiariosLogistica.objects.values_list('data_envio', 'pedidos_roteirizar_pool'))
+        self.assertEqual(pool, {self.DIA: 0, outro_dia: 2})
 
-# Create your tests here.
+    def test_comando_rejeita_data_invalida(self):
+        with self.assertRaises(CommandError):
+            call_command('consolidar_logistica', inicio='01/01/2031')
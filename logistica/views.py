@@ -8,6 +8,9 @@ from django.contrib import messages
 from django.db.models import Q, Sum 
 from datetime import date, datetime 
 from .forms import PeriodoFiltroForm 
+from core.cache import resultado_em_cache # As gravações sobem a versão da tabela pelos sinais (core.cache)
+from .series import PERIODO_MAXIMO_DIAS, calcular_series, periodo_da_serie
+import json
 
 @login_required
 def inserir_dados_logistica(request):
@@ -113,91 +116,117 @@ def dashboard_logistica(request):
         if data_fim:
             dados_filtrados = dados_filtrados.filter(data_envio__lte=data_fim)
 
-    # 2. Calcular Agregações (Somas para os KPIs)
-    totais = dados_filtrados.aggregate(
-        total_rotas=Sum('total_rotas'),
-        total_pacotes_iniciados=Sum('total_pacotes_iniciados'),
-        total_pacotes_finalizados=Sum('total_pacotes_finalizados'),
-        total_pacotes_escaneados=Sum('total_pacotes_escaneados'),
-        total_missorted=Sum('total_missorted'),
-        total_missing_expedicao=Sum('total_missing_expedicao'),
-        total_missing_parcel=Sum('missing_parcel'),
-        total_reversa=Sum('total_reversa'),
-        total_avaria_soc=Sum('avaria_soc'),
-        total_avaria_hub=Sum('avaria_hub'),
-        total_onhold=Sum('total_onhold'),
-        total_onhold_devolvidos=Sum('onhold_devolvidos'),
-        total_onhold_devolver=Sum('onhold_devolver'),
-        total_backlog_agarrado=Sum('backlog_agarrado_varios_dias'),
-        total_volumosos_hub=Sum('volumosos_no_hub'),
-        total_pnr=Sum('pnr'),
-        total_backlog_parcel=Sum('backlog_parcel'),
-        total_pedidos_roteirizar_pool=Sum('pedidos_roteirizar_pool'),
-    )
+    # 💡 Agregações em cache: a chave leva o período e a versão da tabela
+    #    (incrementada ao inserir/editar um dia), então o resultado nunca fica velho.
+    def calcular():
+        # 2. Calcular Agregações (Somas para os KPIs)
+        totais = dados_filtrados.aggregate(
+            total_rotas=Sum('total_rotas'),
+            total_pacotes_iniciados=Sum('total_pacotes_iniciados'),
+            total_pacotes_finalizados=Sum('total_pacotes_finalizados'),
+            total_pacotes_escaneados=Sum('total_pacotes_escaneados'),
+            total_missorted=Sum('total_missorted'),
+            total_missing_expedicao=Sum('total_missing_expedicao'),
+            total_missing_parcel=Sum('missing_parcel'),
+            total_reversa=Sum('total_reversa'),
+            total_avaria_soc=Sum('avaria_soc'),
+            total_avaria_hub=Sum('avaria_hub'),
+            total_onhold=Sum('total_onhold'),
+            total_onhold_devolvidos=Sum('onhold_devolvidos'),
+            total_onhold_devolver=Sum('onhold_devolver'),
+            total_backlog_agarrado=Sum('backlog_agarrado_varios_dias'),
+            total_volumosos_hub=Sum('volumosos_no_hub'),
+            total_pnr=Sum('pnr'),
+            total_backlog_parcel=Sum('backlog_parcel'),
+            total_pedidos_roteirizar_pool=Sum('pedidos_roteirizar_pool'),
+        )
 
-    # 3. Lógica do Gráfico de Velocímetro (KPI Missorted / Pacotes Iniciados)
-    pacotes_iniciados = totais.get('total_pacotes_iniciados') or 0
-    total_missorted = totais.get('total_missorted') or 0
-    LIMITE_PERCENTUAL = 0.0067 # 0.67%
+        # 3. Lógica do Gráfico de Velocímetro (KPI Missorted / Pacotes Iniciados)
+        pacotes_iniciados = totais.get('total_pacotes_iniciados') or 0
+        total_missorted = totais.get('total_missorted') or 0
+        LIMITE_PERCENTUAL = 0.0067 # 0.67%
     
-    performance = {
-        'percentual': 0,
-        'status': 'success', 
-        'mensagem': 'Nenhum dado para calcular.',
-    }
+        performance = {
+            'percentual': 0,
+            'status': 'success', 
+            'mensagem': 'Nenhum dado para calcular.',
+        }
     
-    if pacotes_iniciados > 0:
-        percentual_missorted = total_missorted / pacotes_iniciados
-        performance['percentual'] = round(percentual_missorted * 100, 4)
+        if pacotes_iniciados > 0:
+            percentual_missorted = total_missorted / pacotes_iniciados
+            performance['percentual'] = round(percentual_missorted * 100, 4)
 
-        if percentual_missorted > LIMITE_PERCENTUAL:
-            performance['status'] = 'danger' # Vermelho
-            performance['mensagem'] = f'Acima do limite de {LIMITE_PERCENTUAL*100:.2f}% (Meta não atingida!)'
-        else:
-            performance['status'] = 'success' # Verde
-            performance['mensagem'] = f'Dentro do limite de {LIMITE_PERCENTUAL*100:.2f}%'
+            if percentual_missorted > LIMITE_PERCENTUAL:
+                performance['status'] = 'danger' # Vermelho
+                performance['mensagem'] = f'Acima do limite de {LIMITE_PERCENTUAL*100:.2f}% (Meta não atingida!)'
+            else:
+                performance['status'] = 'success' # Verde
+                performance['mensagem'] = f'Dentro do limite de {LIMITE_PERCENTUAL*100:.2f}%'
             
-    # 4. Organização dos KPIs por Tema
-    temas_kpis = {}
-
-    # TEMA 1: Expedição - Carregamento
-    temas_kpis['Expedição - Carregamento'] = {
-        'kpis': [
-            {'titulo': 'Total de Rotas', 'valor': totais.get('total_rotas') or 0, 'icone': 'fa-route', 'cor': 'primary'},
-            {'titulo': 'Total Pacotes Iniciados', 'valor': totais.get('total_pacotes_iniciados') or 0, 'icone': 'fa-play', 'cor': 'info'},
-            {'titulo': 'Total Pacotes Finalizados', 'valor': totais.get('total_pacotes_finalizados') or 0, 'icone': 'fa-check-circle', 'cor': 'success'},
-            {'titulo': 'Total Escaneados', 'valor': totais.get('total_pacotes_escaneados') or 0, 'icone': 'fa-qrcode', 'cor': 'secondary'},
-            {'titulo': 'Total Missing Expedição', 'valor': totais.get('total_missing_expedicao') or 0, 'icone': 'fa-minus-circle', 'cor': 'danger'},
-            {'titulo': 'Total Missorted', 'valor': totais.get('total_missorted') or 0, 'icone': 'fa-times', 'cor': 'danger'},
-        ],
-        'performance_chart': performance
-    }
+        # 4. Organização dos KPIs por Tema
+        temas_kpis = {}
 
-    # TEMA 2: Inventário
-    temas_kpis['Resultado Inventário'] = {
-        'kpis': [
-            {'titulo': 'Pedidos a Roteirizar Collection Pool', 'valor': totais.get('total_pedidos_roteirizar_pool') or 0, 'icone': 'fa-list-ol', 'cor': 'primary'},
-            # COR ALTERADA: De 'warning' para 'info' (Azul Claro)
-            {'titulo': 'Backlog Parcel Sweeper', 'valor': totais.get('total_backlog_parcel') or 0, 'icone': 'fa-box-open', 'cor': 'info'},
-            # COR ALTERADA: De 'danger' para 'warning' (Amarelo)
-            {'titulo': 'Missing Parcel Sweeper', 'valor': totais.get('total_missing_parcel') or 0, 'icone': 'fa-search-minus', 'cor': 'warning'},
-            {'titulo': 'Total Aguardando Reversa', 'valor': totais.get('total_reversa') or 0, 'icone': 'fa-undo', 'cor': 'secondary'},
-            {'titulo': 'Total Avaria SOC', 'valor': totais.get('total_avaria_soc') or 0, 'icone': 'fa-car-crash', 'cor': 'danger'},
-            {'titulo': 'Total Avaria HUB', 'valor': totais.get('total_avaria_hub') or 0, 'icone': 'fa-warehouse', 'cor': 'danger'},
-        ]
-    }
+        # TEMA 1: Expedição - Carregamento
+        temas_kpis['Expedição - Carregamento'] = {
+            'kpis': [
+                {'titulo': 'Total de Rotas', 'valor': totais.get('total_rotas') or 0, 'icone': 'fa-route', 'cor': 'primary'},
+                {'titulo': 'Total Pacotes Iniciados', 'valor': totais.get('total_pacotes_iniciados') or 0, 'icone': 'fa-play', 'cor': 'info'},
+                {'titulo': 'Total Pacotes Finalizados', 'valor': totais.get('total_pacotes_finalizados') or 0, 'icone': 'fa-check-circle', 'cor': 'success'},
+                {'titulo': 'Total Escaneados', 'valor': totais.get('total_pacotes_escaneados') or 0, 'icone': 'fa-qrcode', 'cor': 'secondary'},
+                {'titulo': 'Total Missing Expedição', 'valor': totais.get('total_missing_expedicao') or 0, 'icone': 'fa-minus-circle', 'cor': 'danger'},
+                {'titulo': 'Total Missorted', 'valor': totais.get('total_missorted') or 0, 'icone': 'fa-times', 'cor': 'danger'},
+            ],
+            'performance_chart': performance
+        }
 
-    # TEMA 3: On Hold
-    temas_kpis['Resultado On Hold'] = {
-        'kpis': [
-            {'titulo': 'Total Onhold', 'valor': totais.get('total_onhold') or 0, 'icone': 'fa-pause-circle', 'cor': 'warning'},
-            {'titulo': 'Onhold Pacotes Devolvidos', 'valor': totais.get('total_onhold_devolvidos') or 0, 'icone': 'fa-reply', 'cor': 'success'},
-            {'titulo': 'Onhold Pacotes a Devolver', 'valor': totais.get('total_onhold_devolver') or 0, 'icone': 'fa-arrow-circle-left', 'cor': 'danger'},
-            {'titulo': 'Backlog Pacotes Agarrado no HUB', 'valor': totais.get('total_backlog_agarrado') or 0, 'icone': 'fa-lock', 'cor': 'dark'},
-            {'titulo': 'Volumosos no HUB', 'valor': totais.get('total_volumosos_hub') or 0, 'icone': 'fa-weight-hanging', 'cor': 'info'},
-            {'titulo': 'Total PNR - Perda declarada', 'valor': totais.get('total_pnr') or 0, 'icone': 'fa-exclamation-triangle', 'cor': 'warning'},
-        ]
-    }
+        # TEMA 2: Inventário
+        temas_kpis['Resultado Inventário'] = {
+            'kpis': [
+                {'titulo': 'Pedidos a Roteirizar Collection Pool', 'valor': totais.get('total_pedidos_roteirizar_pool') or 0, 'icone': 'fa-list-ol', 'cor': 'primary'},
+                # COR ALTERADA: De 'warning' para 'info' (Azul Claro)
+                {'titulo': 'Backlog Parcel Sweeper', 'valor': totais.get('total_backlog_parcel') or 0, 'icone': 'fa-box-open', 'cor': 'info'},
+                # COR ALTERADA: De 'danger' para 'warning' (Amarelo)
+                {'titulo': 'Missing Parcel Sweeper', 'valor': totais.get('total_missing_parcel') or 0, 'icone': 'fa-search-minus', 'cor': 'warning'},
+                {'titulo': 'Total Aguardando Reversa', 'valor': totais.get('total_reversa') or 0, 'icone': 'fa-undo', 'cor': 'secondary'},
+                {'titulo': 'Total Avaria SOC', 'valor': totais.get('total_avaria_soc') or 0, 'icone': 'fa-car-crash', 'cor': 'danger'},
+                {'titulo': 'Total Avaria HUB', 'valor': totais.get('total_avaria_hub') or 0, 'icone': 'fa-warehouse', 'cor': 'danger'},
+            ]
+        }
+
+        # TEMA 3: On Hold
+        temas_kpis['Resultado On Hold'] = {
+            'kpis': [
+                {'titulo': 'Total Onhold', 'valor': totais.get('total_onhold') or 0, 'icone': 'fa-pause-circle', 'cor': 'warning'},
+                {'titulo': 'Onhold Pacotes Devolvidos', 'valor': totais.get('total_onhold_devolvidos') or 0, 'icone': 'fa-reply', 'cor': 'success'},
+                {'titulo': 'Onhold Pacotes a Devolver', 'valor': totais.get('total_onhold_devolver') or 0, 'icone': 'fa-arrow-circle-left', 'cor': 'danger'},
+                {'titulo': 'Backlog Pacotes Agarrado no HUB', 'valor': totais.get('total_backlog_agarrado') or 0, 'icone': 'fa-lock', 'cor': 'dark'},
+                {'titulo': 'Volumosos no HUB', 'valor': totais.get('total_volumosos_hub') or 0, 'icone': 'fa-weight-hanging', 'cor': 'info'},
+                {'titulo': 'Total PNR - Perda declarada', 'valor': totais.get('total_pnr') or 0, 'icone': 'fa-exclamation-triangle', 'cor': 'warning'},
+            ]
+        }
+
+        return temas_kpis
+
+    temas_kpis = resultado_em_cache(
+        'dashboard_logistica',
+        {'data_inicio': data_inicio, 'data_fim': data_fim},
+        [DadosDiariosLogistica],
+        calcular,
+    )
+
+    # 5. Tendências: séries diárias com médias móveis, faixa P10-P90 e variações
+    #    (sem filtro de período, mostra os últimos 365 dias com dados)
+    serie_inicio, serie_fim = periodo_da_serie(data_inicio, data_fim)
+    if data_inicio and serie_inicio and serie_inicio > data_inicio:
+        messages.info(request, f"As tendências mostram só a partir de {serie_inicio:%d/%m/%Y} (máximo de {PERIODO_MAXIMO_DIAS} dias).")
+    series = None
+    if serie_inicio and serie_fim and serie_inicio <= serie_fim:
+        series = resultado_em_cache(
+            'series_logistica',
+            {'data_inicio': serie_inicio, 'data_fim': serie_fim},
+            [DadosDiariosLogistica],
+            lambda: calcular_series(serie_inicio, serie_fim),
+        )
     
     context = {
         'titulo': 'Dashboard de Agregação de Logística',
@@ -205,5 +234,10 @@ def dashboard_logistica(request):
         'temas_kpis': temas_kpis, 
         'data_inicio': data_inicio,
         'data_fim': data_fim,
+        # Tendências
+        'serie_inicio': serie_inicio,
+        'serie_fim': serie_fim,
+        'series': series['series'] if series else {},
+        'series_json': json.dumps(series) if series else 'null',
     }
     return render(request, 'logistica/dashboard.html', context)
\ No newline at end of file
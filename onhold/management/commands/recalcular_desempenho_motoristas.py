@@ -0,0 +1,48 @@
+# onhold/management/commands/recalcular_desempenho_motoristas.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.cache import registrar_alteracao
+from core.dicionario import reconstruir_dicionario
+from onhold.models import OnHold, OnholdInicial
+from onhold.motoristas import atualizar_desempenho_motoristas, normalizar_nome_motorista
+from rastreio.models import Rastreio
+from sla_analysis.calculo import garantir_resumos
+
+
+class Command(BaseCommand):
+    help = (
+        "Normaliza os nomes de motoristas já gravados (a mesma regra do upload: espaços "
+        "das pontas e repetidos, tamanho da coluna) e recalcula o scorecard diário "
+        "(DesempenhoMotoristaDiario) de todas as datas."
+    )
+
+    def handle(self, *args, **options):
+        # 1. Normaliza os nomes antigos com normalizar_nome_motorista() (os novos já chegam
+        #    limpos do upload). Um UPDATE por grafia distinta que muda, não por linha.
+        fontes_sla = {OnholdInicial: 'onhold_inicial', Rastreio: 'rastreio'}
+        for modelo in (OnHold, OnholdInicial, Rastreio):
+            grafias = modelo.objects.exclude(driver_name__isnull=True).values_list('driver_name', flat=True).distinct()
+            trocas = {nome: normalizar_nome_motorista(nome) for nome in grafias}
+            atualizados = 0
+            with transaction.atomic():
+                for original, normalizado in trocas.items():
+                    if original != normalizado:
+                        atualizados += modelo.objects.filter(driver_name=original).update(driver_name=normalizado)
+            self.stdout.write(f"{modelo._meta.label}: {atualizados} nomes de motorista ajustados.")
+            if atualizados:
+                registrar_alteracao(modelo)
+                reconstruir_dicionario(modelo) # As grafias antigas saem dos filtros
+                if modelo in fontes_sla:
+                    garantir_resumos(fontes_sla[modelo], forcar=True) # O resumo de SLA agrupa por motorista
+
+        # 2. Recalcula o scorecard data a data
+        datas = set(OnHold.objects.exclude(data_envio__isnull=True).values_list('data_envio', flat=True).distinct())
+        datas |= set(OnholdInicial.objects.exclude(data_envio__isnull=True).values_list('data_envio', flat=True).distinct())
+
+        for data_envio in sorted(datas):
+            total = atualizar_desempenho_motoristas(data_envio)
+            self.stdout.write(f"  {data_envio:%d/%m/%Y}: {total} motoristas.")
+
+        self.stdout.write(self.style.SUCCESS(f"Scorecards recalculados para {len(datas)} datas."))
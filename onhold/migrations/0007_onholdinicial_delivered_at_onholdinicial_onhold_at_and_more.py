@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onhold', '0006_onholdinicial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Delivered (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='onhold_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='OnHold (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='pick_up_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Pick Up (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='reschedule_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reschedule (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='sla_target_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='SLA Target (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='soc_received_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='SOC Received (data/hora)'),
+        ),
+    ]
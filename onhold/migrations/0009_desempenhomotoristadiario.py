@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onhold', '0008_alter_onholdinicial_data_envio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesempenhoMotoristaDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_envio', models.DateField(db_index=True, verbose_name='Data de Envio/Referência')),
+                ('driver_name', models.CharField(blank=True, default='', max_length=100, verbose_name='Motorista')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Total de Registros OnHold')),
+                ('total_onhold', models.IntegerField(default=0, verbose_name='A Devolver (OnHold)')),
+                ('total_devolvidos', models.IntegerField(default=0, verbose_name='Devolvidos (LMHub_Received)')),
+                ('motivos', models.JSONField(blank=True, default=dict, verbose_name='Contagem por Motivo')),
+                ('total_inicial', models.IntegerField(default=0, verbose_name='Total OnHold Inicial')),
+                ('tentativas_entrega', models.IntegerField(default=0, verbose_name='Tentativas de Entrega')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Desempenho Diário de Motorista',
+                'verbose_name_plural': 'Desempenho Diário de Motoristas',
+                'ordering': ['-data_envio', 'driver_name'],
+                'constraints': [models.UniqueConstraint(fields=('data_envio', 'driver_name'), name='unique_desempenho_motorista_dia')],
+            },
+        ),
+    ]
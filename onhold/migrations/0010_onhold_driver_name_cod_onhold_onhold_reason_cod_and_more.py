@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_diaarquivado'),
+        ('onhold', '0009_desempenhomotoristadiario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onhold',
+            name='driver_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Driver Name)'),
+        ),
+        migrations.AddField(
+            model_name='onhold',
+            name='onhold_reason_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Motivo OnHold)'),
+        ),
+        migrations.AddField(
+            model_name='onhold',
+            name='sort_code_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Sort Code Name)'),
+        ),
+        migrations.AddField(
+            model_name='onhold',
+            name='status_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Status)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='current_station_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Current Station)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='driver_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Driver Name)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='onhold_reason_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Motivo OnHold)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='sort_code_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Sort Code Name)'),
+        ),
+        migrations.AddField(
+            model_name='onholdinicial',
+            name='status_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Status)'),
+        ),
+    ]
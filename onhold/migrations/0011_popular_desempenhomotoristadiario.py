@@ -0,0 +1,120 @@
+# Normaliza os nomes de motorista já gravados em OnHold e OnHold Inicial (a regra do
+# upload, onhold.motoristas.normalizar_nome_motorista) e gera o scorecard diário
+# (DesempenhoMotoristaDiario) de todas as datas: os rankings e exports só leem o scorecard.
+# Mesma lógica do comando recalcular_desempenho_motoristas, copiada aqui porque a
+# migração não pode mudar junto com o código da aplicação.
+
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count, F, Sum
+from django.utils.text import slugify
+
+TAMANHO_NOME = 100  # DesempenhoMotoristaDiario.driver_name.max_length
+
+MODELOS = ['onhold.OnHold', 'onhold.OnholdInicial']
+
+
+def normalizar_nome_motorista(nome):
+    if nome is None:
+        return None
+    nome = ' '.join(str(nome).split())[:TAMANHO_NOME].rstrip()
+    return nome or None
+
+
+def _registrar_alteracao(VersaoTabela, tabela):
+    if not VersaoTabela.objects.filter(tabela=tabela).update(versao=F('versao') + 1):
+        VersaoTabela.objects.create(tabela=tabela, versao=1)
+
+
+def normalizar_motoristas(apps, VersaoTabela):
+    """Um UPDATE por grafia que muda (texto e código); as grafias antigas saem do dicionário."""
+    ValorCategorico = apps.get_model('core', 'ValorCategorico')
+    ProcessamentoSLA = apps.get_model('sla_analysis', 'ProcessamentoSLA')
+    podados = 0
+    for tabela in MODELOS:
+        modelo = apps.get_model(tabela)
+        grafias = modelo.objects.exclude(driver_name__isnull=True).values_list('driver_name', flat=True).distinct()
+        trocas = {nome: normalizar_nome_motorista(nome) for nome in grafias}
+        trocas = {original: normalizado for original, normalizado in trocas.items() if original != normalizado}
+        if not trocas:
+            continue
+
+        datas = set()
+        for original, normalizado in trocas.items():
+            codigo = None
+            if normalizado is not None:
+                codigo = ValorCategorico.objects.get_or_create(
+                    tabela=tabela, campo='driver_name', valor=normalizado,
+                    defaults={'slug': slugify(normalizado)[:255]},
+                )[0].pk
+            linhas = modelo.objects.filter(driver_name=original)
+            datas |= set(linhas.order_by().values_list('data_envio', flat=True).distinct())
+            linhas.update(driver_name=normalizado, driver_name_cod=codigo)
+        podados += ValorCategorico.objects.filter(tabela=tabela, campo='driver_name', valor__in=list(trocas)).delete()[0]
+        _registrar_alteracao(VersaoTabela, tabela)
+
+        if tabela == 'onhold.OnholdInicial':
+            # O resumo de SLA agrupa por motorista: recalculado pelo recalcular_sla
+            ProcessamentoSLA.objects.filter(fonte='onhold_inicial', data_referencia__in=datas).delete()
+    if podados:
+        _registrar_alteracao(VersaoTabela, 'core.ValorCategorico')
+
+
+def popular_desempenho(apps, schema_editor):
+    OnHold = apps.get_model('onhold', 'OnHold')
+    OnholdInicial = apps.get_model('onhold', 'OnholdInicial')
+    DesempenhoMotoristaDiario = apps.get_model('onhold', 'DesempenhoMotoristaDiario')
+    VersaoTabela = apps.get_model('core', 'VersaoTabela')
+
+    normalizar_motoristas(apps, VersaoTabela)
+
+    # Três consultas agrupadas por data e motorista, como atualizar_desempenho_motoristas
+    linhas = defaultdict(lambda: {
+        'total_registros': 0, 'total_onhold': 0, 'total_devolvidos': 0,
+        'motivos': Counter(), 'total_inicial': 0, 'tentativas_entrega': 0,
+    })
+    onhold = OnHold.objects.exclude(data_envio__isnull=True).order_by()
+    for item in onhold.values('data_envio', 'driver_name', 'status').annotate(total=Count('id')):
+        linha = linhas[item['data_envio'], item['driver_name'] or '']
+        linha['total_registros'] += item['total']
+        if item['status'] == 'OnHold':
+            linha['total_onhold'] += item['total']
+        elif item['status'] == 'LMHub_Received':
+            linha['total_devolvidos'] += item['total']
+    for item in onhold.values('data_envio', 'driver_name', 'onhold_reason').annotate(total=Count('id')):
+        motivo = item['onhold_reason'] or '(Motivo Não Informado)'
+        linhas[item['data_envio'], item['driver_name'] or '']['motivos'][motivo] += item['total']
+    inicial = OnholdInicial.objects.exclude(data_envio__isnull=True).order_by()
+    for item in inicial.values('data_envio', 'driver_name').annotate(total=Count('id'), tentativas=Sum('delivery_attempts')):
+        linha = linhas[item['data_envio'], item['driver_name'] or '']
+        linha['total_inicial'] += item['total']
+        linha['tentativas_entrega'] += item['tentativas'] or 0
+
+    DesempenhoMotoristaDiario.objects.all().delete()
+    DesempenhoMotoristaDiario.objects.bulk_create([
+        DesempenhoMotoristaDiario(
+            data_envio=data_envio,
+            driver_name=driver_name,
+            total_registros=valores['total_registros'],
+            total_onhold=valores['total_onhold'],
+            total_devolvidos=valores['total_devolvidos'],
+            motivos=dict(valores['motivos']),
+            total_inicial=valores['total_inicial'],
+            tentativas_entrega=valores['tentativas_entrega'],
+        )
+        for (data_envio, driver_name), valores in linhas.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_popular_codigos_categoricos'),
+        ('onhold', '0010_onhold_driver_name_cod_onhold_onhold_reason_cod_and_more'),
+        ('sla_analysis', '0002_processamentosla_ultimo_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_desempenho, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# data_envio passa a ser obrigatória em OnHold e OnHold Inicial: todo upload grava a
+# data escolhida no formulário, e uma linha sem data não aparece em nenhum filtro por
+# período nem cabe numa partição por dia (core/migrations/0007).
+# As linhas antigas sem data não são adivinhadas: a migração para e pede a correção.
+
+from django.db import migrations, models
+
+MODELOS = ['onhold.OnHold', 'onhold.OnholdInicial']
+
+
+def conferir_datas(apps, schema_editor):
+    sem_data = {
+        label: apps.get_model(label).objects.filter(data_envio__isnull=True).count()
+        for label in MODELOS
+    }
+    sem_data = {label: total for label, total in sem_data.items() if total}
+    if sem_data:
+        detalhe = ', '.join(f"{label}: {total}" for label, total in sem_data.items())
+        raise RuntimeError(
+            f"Linhas sem data_envio ({detalhe}). Preencha ou remova essas linhas antes de migrar."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onhold', '0011_popular_desempenhomotoristadiario'),
+    ]
+
+    operations = [
+        migrations.RunPython(conferir_datas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='onhold',
+            name='data_envio',
+            field=models.DateField(verbose_name='Data de Envio/Referência'),
+        ),
+        migrations.AlterField(
+            model_name='onholdinicial',
+            name='data_envio',
+            field=models.DateField(db_index=True, verbose_name='Data de Envio/Referência'),
+        ),
+    ]
@@ -1,12 +1,12 @@
 from django.db import models
-from core.models import HUB, Usuario # Importa modelos já existentes
+from core.models import HUB, Usuario, ValorCategorico # Importa modelos já existentes
 
 class OnHold(models.Model):
     # ==================================
     # CAMPOS DE AUDITORIA E VINCULAÇÃO
     # ==================================
     # 🔑 AJUSTE CRÍTICO: Removida a redefinição redundante do campo no final do arquivo.
-    data_envio = models.DateField(null=True, blank=True, verbose_name="Data de Envio/Referência")
+    data_envio = models.DateField(verbose_name="Data de Envio/Referência")
     
     hub_upload = models.ForeignKey(HUB, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="HUB do Upload")
     usuario_upload = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Usuário do Upload")
@@ -45,6 +45,25 @@ class OnHold(models.Model):
     height = models.FloatField(null=True, blank=True, verbose_name="Altura (cm)") # Coluna 27
 
 
+    # --- Códigos inteiros das colunas categóricas (core.dicionario: gravados no upload,
+    #     usados nos GROUP BY dos dashboards) ---
+    status_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Status)"
+    )
+    onhold_reason_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Motivo OnHold)"
+    )
+    driver_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Driver Name)"
+    )
+    sort_code_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Sort Code Name)"
+    )
+
     def __str__(self):
         return f"{self.sls_tracking_number} - {self.onhold_reason} ({self.hub_upload.nome if self.hub_upload else 'N/A'})"
     
@@ -61,7 +80,7 @@ class OnholdInicial(models.Model):
     # CAMPOS DE AUDITORIA E VINCULAÇÃO
     # (Exatamente como em OnHold)
     # ==================================
-    data_envio = models.DateField(null=True, blank=True, verbose_name="Data de Envio/Referência")
+    data_envio = models.DateField(db_index=True, verbose_name="Data de Envio/Referência")
     hub_upload = models.ForeignKey(HUB, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="HUB do Upload")
     usuario_upload = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Usuário do Upload")
 
@@ -117,10 +136,79 @@ class OnholdInicial(models.Model):
     inbound_3pl = models.CharField(max_length=50, null=True, blank=True, verbose_name="Inbound 3PL") # Coluna 45
     outbound_3pl = models.CharField(max_length=50, null=True, blank=True, verbose_name="Outbound 3PL") # Coluna 46
 
+    # --- Datas tipadas (convertidas no upload a partir das colunas texto 13-18 e 33) ---
+    pick_up_at = models.DateTimeField(null=True, blank=True, verbose_name="Pick Up (data/hora)")
+    soc_received_at = models.DateTimeField(null=True, blank=True, verbose_name="SOC Received (data/hora)")
+    delivered_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Delivered (data/hora)")
+    onhold_at = models.DateTimeField(null=True, blank=True, verbose_name="OnHold (data/hora)")
+    reschedule_at = models.DateTimeField(null=True, blank=True, verbose_name="Reschedule (data/hora)")
+    sla_target_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="SLA Target (data/hora)")
+
+    # --- Códigos inteiros das colunas categóricas (core.dicionario: gravados no upload,
+    #     usados nos GROUP BY dos dashboards) ---
+    status_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Status)"
+    )
+    onhold_reason_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Motivo OnHold)"
+    )
+    driver_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Driver Name)"
+    )
+    sort_code_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Sort Code Name)"
+    )
+    current_station_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Current Station)"
+    )
+
     def __str__(self):
         return f"Inicial: {self.sls_tracking_number} ({self.data_envio})"
     
     class Meta:
         verbose_name = "Registro OnHold Inicial (Completo)"
         verbose_name_plural = "Registros OnHold Inicial (Completos)"
-        ordering = ['-data_envio']        
\ No newline at end of file
+        ordering = ['-data_envio']        
+
+class DesempenhoMotoristaDiario(models.Model):
+    """
+    Scorecard diário por motorista, mantido a cada upload de OnHold / OnHold Inicial
+    (só a data do upload é recalculada). Rankings e exports leem esta tabela.
+    """
+    data_envio = models.DateField(db_index=True, verbose_name="Data de Envio/Referência")
+    driver_name = models.CharField(max_length=100, blank=True, default='', verbose_name="Motorista")
+
+    # Vindos da tabela OnHold
+    total_registros = models.IntegerField(default=0, verbose_name="Total de Registros OnHold")
+    total_onhold = models.IntegerField(default=0, verbose_name="A Devolver (OnHold)")
+    total_devolvidos = models.IntegerField(default=0, verbose_name="Devolvidos (LMHub_Received)")
+    motivos = models.JSONField(default=dict, blank=True, verbose_name="Contagem por Motivo")
+
+    # Vindos da tabela OnholdInicial
+    total_inicial = models.IntegerField(default=0, verbose_name="Total OnHold Inicial")
+    tentativas_entrega = models.IntegerField(default=0, verbose_name="Tentativas de Entrega")
+
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Desempenho Diário de Motorista"
+        verbose_name_plural = "Desempenho Diário de Motoristas"
+        ordering = ['-data_envio', 'driver_name']
+        constraints = [
+            models.UniqueConstraint(fields=['data_envio', 'driver_name'], name='unique_desempenho_motorista_dia')
+        ]
+
+    @property
+    def taxa_devolucao(self):
+        """Percentual de registros OnHold do motorista que já foram devolvidos ao hub."""
+        if not self.total_registros:
+            return 0.0
+        return round(self.total_devolvidos * 100 / self.total_registros, 2)
+
+    def __str__(self):
+        return f"{self.driver_name or '(sem motorista)'} - {self.data_envio}"
@@ -0,0 +1,98 @@
+# onhold/motoristas.py
+#
+# Normalização do nome do motorista no upload e manutenção incremental
+# do scorecard diário (DesempenhoMotoristaDiario).
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import DesempenhoMotoristaDiario, OnHold, OnholdInicial
+
+# Mesmo limite das colunas driver_name (tabelas brutas e scorecard): o nome já é
+# cortado na ingestão, então o scorecard guarda exatamente o valor da tabela bruta
+TAMANHO_NOME = DesempenhoMotoristaDiario._meta.get_field('driver_name').max_length
+
+
+def normalizar_nome_motorista(nome):
+    """
+    Remove espaços das pontas e espaços repetidos internos e corta no tamanho da
+    coluna (TAMANHO_NOME). Vazio vira None.
+    """
+    if nome is None:
+        return None
+    nome = ' '.join(str(nome).split())[:TAMANHO_NOME].rstrip()
+    return nome or None
+
+
+def normalizar_motoristas(objetos):
+    """Aplica a normalização no campo driver_name de uma lista de instâncias (antes do bulk_create)."""
+    for obj in objetos:
+        obj.driver_name = normalizar_nome_motorista(obj.driver_name)
+    return objetos
+
+
+def atualizar_desempenho_motoristas(data_envio):
+    """
+    Recalcula o scorecard de todos os motoristas de UMA data (a do upload).
+    Custa três consultas agrupadas sobre a data, não sobre a tabela inteira.
+    """
+    linhas = defaultdict(lambda: {
+        'total_registros': 0, 'total_onhold': 0, 'total_devolvidos': 0,
+        'motivos': Counter(), 'total_inicial': 0, 'tentativas_entrega': 0,
+    })
+
+    # 1. OnHold: totais por status e por motivo
+    por_status = (
+        OnHold.objects.filter(data_envio=data_envio)
+        .values('driver_name', 'status')
+        .annotate(total=Count('id'))
+    )
+    for item in por_status:
+        linha = linhas[normalizar_nome_motorista(item['driver_name']) or '']
+        linha['total_registros'] += item['total']
+        if item['status'] == 'OnHold':
+            linha['total_onhold'] += item['total']
+        elif item['status'] == 'LMHub_Received':
+            linha['total_devolvidos'] += item['total']
+
+    por_motivo = (
+        OnHold.objects.filter(data_envio=data_envio)
+        .values('driver_name', 'onhold_reason')
+        .annotate(total=Count('id'))
+    )
+    for item in por_motivo:
+        motivo = item['onhold_reason'] or '(Motivo Não Informado)'
+        linhas[normalizar_nome_motorista(item['driver_name']) or '']['motivos'][motivo] += item['total']
+
+    # 2. OnHold Inicial: volume e tentativas de entrega
+    por_motorista_inicial = (
+        OnholdInicial.objects.filter(data_envio=data_envio)
+        .values('driver_name')
+        .annotate(total=Count('id'), tentativas=Sum('delivery_attempts'))
+    )
+    for item in por_motorista_inicial:
+        linha = linhas[normalizar_nome_motorista(item['driver_name']) or '']
+        linha['total_inicial'] += item['total']
+        linha['tentativas_entrega'] += item['tentativas'] or 0
+
+    # 3. Substitui as linhas da data
+    novos = [
+        DesempenhoMotoristaDiario(
+            data_envio=data_envio,
+            driver_name=driver_name,
+            total_registros=valores['total_registros'],
+            total_onhold=valores['total_onhold'],
+            total_devolvidos=valores['total_devolvidos'],
+            motivos=dict(valores['motivos']),
+            total_inicial=valores['total_inicial'],
+            tentativas_entrega=valores['tentativas_entrega'],
+        )
+        for driver_name, valores in linhas.items()
+    ]
+    with transaction.atomic():
+        DesempenhoMotoristaDiario.objects.filter(data_envio=data_envio).delete()
+        DesempenhoMotoristaDiario.objects.bulk_create(novos)
+
+    return len(novos)
@@ -1,3 +1,108 @@
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from core.dicionario import reconstruir_dicionario, valores_distintos
+from core.testing import CasoOrcamento
+
+from .models import DesempenhoMotoristaDiario, OnHold
+from .motoristas import TAMANHO_NOME, normalizar_nome_motorista
+
+PERIODO = CasoOrcamento.PERIODO
+
+
+class OrcamentoViewsOnHoldTest(CasoOrcamento):
+    """Consultas por view do OnHold (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        # Versão (1) + cards num agregado (1) + motivos e motoristas (2 cada: GROUP BY + rótulos) + série diária + hubs
+        'dashboard_onhold': {'url': 'dashboard_onhold', 'parametros': PERIODO, 'consultas': 8, 'tempo_sql_s': 0.5},
+        'consulta_onhold': {'url': 'consulta_onhold', 'consultas': 4},
+        'consulta_por_motivo': {'url': 'consulta_por_motivo', 'args': ['Buyer not at home'], 'consultas': 3},
+        'dashboard_onhold_inicial_dia': {'url': 'dashboard_onhold_inicial_dia', 'parametros': PERIODO, 'consultas': 7},
+        'detalhe_pacotes_inicial': {'url': 'detalhe_pacotes_inicial', 'parametros': PERIODO, 'consultas': 2},
+        # Cidade pelo CEP: tabela CidadeCEP (só os CEPs do resultado), nenhuma chamada HTTP
+        'detalhe_volumosos': {'url': 'detalhe_volumosos', 'parametros': PERIODO, 'consultas': 3},
+        'detalhe_volumosos_cidade': {
+            'url': 'detalhe_volumosos', 'parametros': {**PERIODO, 'cidade': 'Muriaé'}, 'consultas': 3,
+        },
+        'ranking_motoristas': {'url': 'ranking_motoristas', 'consultas': 4},
+    }
+
+    def test_volumosos_filtra_pela_cidade_do_pool(self):
+        resposta = self.renderizar('detalhe_volumosos', parametros={**PERIODO, 'cidade': 'Muriaé'})
+        pacotes = resposta.context['page_obj'].object_list
+        self.assertTrue(pacotes)
+        self.assertEqual({pacote['cidade'] for pacote in pacotes}, {'Muriaé'})
+        self.assertIn('Muriaé', resposta.context['cidades_options'])
+
+
+class RecargaOnHoldTest(TestCase):
+    """Recarga completa do dia: o arquivo troca as linhas da data; arquivo inválido não muda nada."""
+
+    def setUp(self):
+        usuario = get_user_model().objects.create_superuser('recarga', 'recarga@example.com', 'recarga')
+        self.client.force_login(usuario)
+        OnHold.objects.bulk_create(
+            [OnHold(data_envio=date(2031, 1, 1), order_id=f'antigo-{i}') for i in range(3)]
+            + [OnHold(data_envio=date(2031, 1, 2), order_id='outro-dia')]
+        )
+
+    def _enviar(self, *pedidos):
+        linhas = ['cabecalho']
+        for pedido in pedidos:
+            colunas = [''] * 36
+            colunas[0], colunas[16], colunas[17] = pedido, '01-01-2031 10:00', 'Buyer not at home'
+            linhas.append(','.join(colunas))
+        arquivo = SimpleUploadedFile('onhold.csv', '\n'.join(linhas).encode('utf-8'), content_type='text/csv')
+        return self.client.post(reverse('recarregar_onhold'), {'data_referencia': '2031-01-01', 'csv_file': arquivo})
+
+    def _pedidos(self, dia):
+        return sorted(OnHold.objects.filter(data_envio=dia).values_list('order_id', flat=True))
+
+    def test_troca_o_dia(self):
+        resposta = self._enviar('novo-1', 'novo-2')
+        self.assertRedirects(resposta, reverse('dashboard_onhold'), fetch_redirect_response=False)
+        self.assertEqual(self._pedidos(date(2031, 1, 1)), ['novo-1', 'novo-2'])
+        self.assertEqual(self._pedidos(date(2031, 1, 2)), ['outro-dia'])
+
+    def test_arquivo_vazio_mantem_o_dia(self):
+        resposta = self._enviar()
+        self.assertRedirects(resposta, reverse('recarregar_onhold'), fetch_redirect_response=False)
+        self.assertEqual(self._pedidos(date(2031, 1, 1)), ['antigo-0', 'antigo-1', 'antigo-2'])
+
+    def test_poda_valores_que_sairam_do_dia(self):
+        OnHold.objects.filter(order_id='antigo-0').update(onhold_reason='Endereço incompleto')
+        OnHold.objects.filter(order_id='outro-dia').update(onhold_reason='Recusado')
+        reconstruir_dicionario(OnHold)
+
+        self._enviar('novo-1')
+        self.assertEqual(valores_distintos(OnHold, 'onhold_reason'), ['Buyer not at home', 'Recusado'])
+
+
+class NomeMotoristaTest(TestCase):
+    """Nome do motorista: a mesma normalização no upload, no scorecard e no comando de backfill."""
+
+    def test_backfill_normaliza_como_o_upload(self):
+        OnHold.objects.bulk_create([
+            OnHold(data_envio=date(2031, 1, 1), driver_name='  João   da  Silva '),
+            OnHold(data_envio=date(2031, 1, 1), driver_name='Maria'),
+        ])
+
+        call_command('recalcular_desempenho_motoristas', stdout=io.StringIO())
+
+        self.assertEqual(set(OnHold.objects.values_list('driver_name', flat=True)), {'João da Silva', 'Maria'})
+        # Cada linha do scorecard encontra as linhas brutas do motorista
+        for nome in DesempenhoMotoristaDiario.objects.values_list('driver_name', flat=True):
+            self.assertTrue(OnHold.objects.filter(driver_name__iexact=nome).exists(), nome)
 
-# Create your tests here.
+    def test_nome_longo_cabe_na_coluna(self):
+        # Cortado no tamanho da coluna já na ingestão (o PostgreSQL recusaria; o SQLite gravaria inteiro)
+        nome = normalizar_nome_motorista('Motorista ' + 'x' * 89 + '  y' + 'z' * 30)
+        self.assertEqual(len(nome), TAMANHO_NOME - 1)  # O espaço do corte sai
+        self.assertFalse(nome.endswith(' '))
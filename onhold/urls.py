@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('onhold/', views.dashboard_onhold, name='dashboard_onhold'), 
     path('onhold/upload/', views.upload_csv_onhold, name='upload_onhold'),
+    path('onhold/recarregar/', views.processar_upload_onhold, name='recarregar_onhold'), # Troca o dia inteiro
     path('onhold/consulta/', views.consulta_onhold, name='consulta_onhold'),
     path('onhold/consulta/<path:motivo>/', views.consulta_por_motivo, name='consulta_por_motivo'),
 
@@ -19,6 +20,8 @@ urlpatterns = [
     path('onhold/dashboard_inicial/', views.dashboard_onhold_inicial_dia, name='dashboard_onhold_inicial_dia'),
     path('onhold/detalhe_inicial/', views.detalhe_pacotes_inicial, name='detalhe_pacotes_inicial'),
     path('onhold/volumosos/', views.detalhe_volumosos, name='detalhe_volumosos'),
+    # ✅ NOVA ROTA: Ranking de Motoristas (scorecard diário)
+    path('onhold/ranking_motoristas/', views.ranking_motoristas, name='ranking_motoristas'),
     
 
 ]
\ No newline at end of file
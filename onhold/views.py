@@ -1,19 +1,28 @@
 import csv
 from django.http import HttpResponse 
 import io
-import requests
 from datetime import datetime, date, timedelta 
 # Mantido TruncDate no import, embora não seja mais usado em dashboard_onhold para evitar erro do SQLite
 from django.db.models.functions import TruncDate 
-from .models import OnHold, HUB, OnholdInicial
+from django.db.models.functions import NullIf
+from .models import OnHold, HUB, OnholdInicial, DesempenhoMotoristaDiario
+from collection_pool.ceps import cidade_do_cep, cidades_dos_ceps
 import json 
 
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Count, Q, Avg, Func, Value 
+from django.db.models import Count, Value, Sum, F
+from django.db.models import ExpressionWrapper, FloatField
 from django.core.paginator import Paginator 
+from core.dicionario import agrupar, aplicar_codigos, podando, valores_distintos
+from core.datas import preencher_datahoras
+from core.cache import resultado_em_cache, registrar_alteracao
+from core.particoes import CargaInvalida, copiar, recarregar_dia
+from sla_analysis.calculo import recalcular_resumo
+from .motoristas import normalizar_motoristas, atualizar_desempenho_motoristas
+from logistica.consolidacao import consolidar_dia
 
 
 # --- Funções Auxiliares ---
@@ -46,25 +55,31 @@ def parse_onhold_time(time_str):
     
 # --- Funções de Upload (Corrigidas para UNIQUE constraint failed) ---
 
-@transaction.atomic 
+@login_required
 def processar_upload_onhold(request):
+    """
+    Recarga completa de um dia: as linhas do OnHold da data de referência são
+    trocadas pelas do arquivo. O arquivo é carregado e validado numa tabela de
+    staging e só a troca final é transacional (core.particoes.recarregar_dia), por
+    isso a view não roda inteira dentro de um transaction.atomic.
+    """
     if request.method == 'POST':
         # 1. VALIDAÇÃO E CONVERSÃO DA DATA
         data_referencia_str = request.POST.get('data_referencia')
         if not data_referencia_str:
             messages.error(request, "A Data de Referência é obrigatória para a sobrescrita.")
-            return redirect('upload_onhold')
+            return redirect('recarregar_onhold')
             
         try:
             # data_referencia é a data selecionada no formulário (objeto date)
             data_referencia = datetime.strptime(data_referencia_str, '%Y-%m-%d').date()
         except ValueError:
             messages.error(request, "Formato de data inválido. Use AAAA-MM-DD.")
-            return redirect('upload_onhold')
+            return redirect('recarregar_onhold')
 
         if 'csv_file' not in request.FILES:
             messages.error(request, "Nenhum arquivo CSV enviado.")
-            return redirect('upload_onhold')
+            return redirect('recarregar_onhold')
 
         csv_file = request.FILES['csv_file']
         
@@ -74,20 +89,19 @@ def processar_upload_onhold(request):
             hub_do_upload = HUB.objects.first() # AJUSTE ISTO para refletir seu modelo
         except Exception as e:
             messages.error(request, f"Erro ao obter informações do usuário/HUB: {e}")
-            return redirect('upload_onhold')
+            return redirect('recarregar_onhold')
 
 
         # ----------------------------------------------------
         # --- LÓGICA DE SOBRESCRITA (A CHAVE É data_envio) ---
         # ----------------------------------------------------
         
-        # PASSO 1: Limpeza de dados antigos com data de envio nula ou vazia (Ação de emergência)
-        OnHold.objects.filter(Q(data_envio__isnull=True) | Q(data_envio__exact='')).delete()
+        # PASSO 1: Limpeza de dados antigos sem data de envio (Ação de emergência)
+        with podando(OnHold.objects.filter(data_envio__isnull=True)):
+            OnHold.objects.filter(data_envio__isnull=True).delete()
         
-        # PASSO 2: FILTRO E EXCLUSÃO (Usa a data selecionada para filtrar o campo data_envio)
-        registros_para_excluir = OnHold.objects.filter(data_envio=data_referencia)
-        total_excluidos = registros_para_excluir.count()
-        registros_para_excluir.delete() # EXCLUSÃO EFETIVA
+        # PASSO 2: a exclusão do dia só acontece na troca, depois do arquivo inteiro
+        # carregado e validado (PASSO 4)
         
         # ----------------------------------------------------
         
@@ -158,18 +172,31 @@ def processar_upload_onhold(request):
                 
                 novos_registros.append(OnHold(**data))
 
-            # Criação em massa para performance
-            # ✅ CORREÇÃO: Adicionado ignore_conflicts=True para lidar com a chave única
-            OnHold.objects.bulk_create(novos_registros, ignore_conflicts=True)
+            normalizar_motoristas(novos_registros)
+            aplicar_codigos(OnHold, novos_registros) # Códigos inteiros das colunas categóricas
 
-            messages.success(request, f"Sucesso! {total_excluidos} registros antigos da data {data_referencia.strftime('%d/%m/%Y')} foram excluídos e {len(novos_registros)} novos registros foram carregados (duplicatas ignoradas).")
+            # PASSO 4: staging -> validação -> troca curta do dia (os leitores só veem a troca).
+            # Os valores do dia antigo que sumirem da tabela saem do dicionário
+            with podando(OnHold.objects.filter(data_envio=data_referencia)):
+                resultado = recarregar_dia(OnHold, data_referencia, novos_registros)
+            registrar_alteracao(OnHold) # Invalida o cache dos dashboards de OnHold
+
+            with transaction.atomic():
+                atualizar_desempenho_motoristas(data_referencia) # Scorecard só da data enviada
+                consolidar_dia(data_referencia) # Atualiza os Dados Diários de Logística da data
+
+            messages.success(request, f"Sucesso! {resultado['removidas']} registros antigos da data {data_referencia.strftime('%d/%m/%Y')} foram substituídos por {resultado['carregadas']} novos registros.")
             
+        except CargaInvalida as e:
+            messages.error(request, f"Arquivo rejeitado, nenhum dado foi alterado: {e}")
+            return redirect('recarregar_onhold')
         except Exception as e:
             messages.error(request, f"Erro fatal ao processar o arquivo: {e}")
+            return redirect('recarregar_onhold')
             
-        return redirect('pagina_de_visualizacao')
+        return redirect('dashboard_onhold')
 
-    return render(request, 'seu_template_de_upload.html')
+    return render(request, 'onhold/upload_onhold.html', {'titulo': 'Recarga Completa do Dia (OnHold)'})
     
 
 # onhold/views.py
@@ -286,7 +313,12 @@ def upload_csv_onhold(request):
 
             # Criação em massa com ignore_conflicts=True
             total_tentativas_insercao = len(registros_a_criar)
-            OnHold.objects.bulk_create(registros_a_criar, ignore_conflicts=True)
+            normalizar_motoristas(registros_a_criar)
+            aplicar_codigos(OnHold, registros_a_criar)
+            copiar(OnHold, registros_a_criar, ignore_conflicts=True)
+            atualizar_desempenho_motoristas(data_referencia) # Scorecard só da data enviada
+            registrar_alteracao(OnHold) # Invalida o cache dos dashboards de OnHold
+            consolidar_dia(data_referencia) # Atualiza os Dados Diários de Logística da data
             
             # Contar depois
             total_registros_depois = OnHold.objects.count()
@@ -381,7 +413,8 @@ def consulta_onhold(request):
     page_obj = paginator.get_page(page_number)
 
     # Obtém motivos únicos (para o filtro dinâmico)
-    motivos_unicos = OnHold.objects.values_list('onhold_reason', flat=True).distinct().exclude(onhold_reason__isnull=True).exclude(onhold_reason__exact='').order_by('onhold_reason')
+    # 💡 Lidos do dicionário de valores (sem DISTINCT na tabela OnHold)
+    motivos_unicos = valores_distintos(OnHold, 'onhold_reason')
 
     context = {
         'page_obj': page_obj,
@@ -426,183 +459,152 @@ def dashboard_onhold(request):
         data_inicio = data_fim
 
 
-    # --- 2. Consulta de Dados Filtrada (USANDO data_envio) ---
-    registros_filtrados = OnHold.objects.filter(
-        data_envio__range=[data_inicio, data_fim]
-    )
+    # 💡 Agregações em cache: a chave leva o período e a versão das tabelas lidas
+    #    (cada upload de OnHold incrementa a versão, então não há resultado velho).
+    def calcular():
+        # --- 2. Consulta de Dados Filtrada (USANDO data_envio) ---
+        registros_filtrados = OnHold.objects.filter(
+            data_envio__range=[data_inicio, data_fim]
+        )
 
-    # 3. Agregações para os Cards 
-    total_onhold_periodo = registros_filtrados.count()
+        # 3. Agregações para os Cards
+        # 💡 Todos os cards numa única varredura do período (COUNT ... FILTER)
+        cards = registros_filtrados.aggregate(
+            total_onhold_periodo=Count('id'),
+            # 💥 KPI 1: VOLUMOSOS
+            total_volumosos=Count('id', filter=Q(onhold_reason='Insufficient Vehicle Capacity', status='LMHub_Received')),
+            # 💥 KPI 2: PERDIDOS (no status OnHold)
+            total_perdidos=Count('id', filter=Q(onhold_reason='Parcel lost', status='OnHold')),
+            # 💥 KPI 3: ATRIBUIÇÃO ERRADA (no status OnHold)
+            total_wrongly_assigned=Count('id', filter=Q(onhold_reason='Wrongly assigned', status='OnHold')),
+            # 4.1. Rastreios Únicos (o DISTINCT não conta o nulo: ele entra à parte)
+            rastreios_distintos=Count('sls_tracking_number', distinct=True),
+            rastreios_nulos=Count('id', filter=Q(sls_tracking_number__isnull=True)),
+            # 4.2. Pacotes a Devolver / 4.3. Pacotes Devolvidos / Outros (gráfico de pizza)
+            total_a_devolver=Count('id', filter=Q(status='OnHold')),
+            total_devolvidos=Count('id', filter=Q(status='LMHub_Received')),
+            total_outros=Count('id', filter=~Q(status='OnHold') & ~Q(status='LMHub_Received')),
+            # 4.6. Média de Peso
+            media_peso=Avg('parcel_weight'),
+            # 4.7. Contagem de Motivos Chave (Ausente/Recusa)
+            total_ausente=Count('id', filter=(
+                Q(onhold_reason__icontains='recipient unavailable') |
+                Q(onhold_reason__icontains='destinatário ausente') |
+                Q(onhold_reason__icontains='recusa de recebimento') |
+                Q(onhold_reason__icontains='refused to accept')
+            )),
+        )
+        total_onhold_periodo = cards['total_onhold_periodo']
     
-    # Se não houver registros, inicializa as variáveis dos gráficos como vazias e sai
-    if total_onhold_periodo == 0:
-        context = {
-            'data_inicio_value': data_inicio.strftime('%Y-%m-%d'),
-            'data_fim_value': data_fim.strftime('%Y-%m-%d'),
-            'total_onhold_periodo': 0,
-            'rastreios_unicos': 0, 'total_a_devolver': 0, 'total_devolvidos': 0,
-            'motivos_contagem': [], 'hubs_contagem': [], 'media_peso': 0.0,
-            'total_ausente': 0, 
-            'registros_por_motorista': [],
-            'grafico_linha_datas': [], 
-            'grafico_linha_totais': [], 'grafico_pizza_labels': [], 
-            'grafico_pizza_valores': [],
-            # Adiciona os novos KPIs
-            'total_volumosos': 0,
-            'total_perdidos': 0, # NOVO
-            'total_wrongly_assigned': 0, # NOVO
-        }
-        return render(request, 'onhold/dashboard_onhold.html', context)
+        # Se não houver registros, inicializa as variáveis dos gráficos como vazias e sai
+        if total_onhold_periodo == 0:
+            return {
+                'total_onhold_periodo': 0,
+                'rastreios_unicos': 0, 'total_a_devolver': 0, 'total_devolvidos': 0,
+                'motivos_contagem': [], 'hubs_contagem': [], 'media_peso': 0.0,
+                'total_ausente': 0, 
+                'registros_por_motorista': [],
+                'grafico_linha_datas': [], 
+                'grafico_linha_totais': [], 'grafico_pizza_labels': [], 
+                'grafico_pizza_valores': [],
+                # Adiciona os novos KPIs
+                'total_volumosos': 0,
+                'total_perdidos': 0, # NOVO
+                'total_wrongly_assigned': 0, # NOVO
+            }
     
+        rastreios_unicos = cards['rastreios_distintos'] + (1 if cards['rastreios_nulos'] else 0)
 
-    # --- 4. Continua com as agregações se houver dados ---
-    
-    # CÁLCULO DOS KPIS
-    # ----------------------------------------------------
+        # 4.4. Contagem de Motivos (AGORA TODOS)
+        motivos_contagem = agrupar(registros_filtrados, 'onhold_reason')
     
-    # 💥 KPI 1: VOLUMOSOS (Já existente)
-    total_volumosos = registros_filtrados.filter(
-        onhold_reason='Insufficient Vehicle Capacity',
-        status='LMHub_Received'
-    ).count()
+        # 4.5. Contagem de HUBs
+        hubs_contagem = registros_filtrados.values('hub_upload__nome').annotate(
+            total=Count('hub_upload__nome')
+        ).order_by('-total')
 
-    # 💥 KPI 2: PERDIDOS (NOVO)
-    total_perdidos = registros_filtrados.filter(
-        onhold_reason='Parcel lost',
-        status='OnHold' # No status OnHold
-    ).count()
-    
-    # 💥 KPI 3: ATRIBUIÇÃO ERRADA (NOVO)
-    total_wrongly_assigned = registros_filtrados.filter(
-        onhold_reason='Wrongly assigned',
-        status='OnHold' # No status OnHold
-    ).count()
-    
-    # ----------------------------------------------------
-    
-    # 4.1. Totais e Rastreios Únicos no Período (restante do código...)
-    rastreios_unicos = registros_filtrados.values('sls_tracking_number').distinct().count()
+        # 4.8. Contagem de Registros OnHold por Motorista
+        registros_por_motorista = agrupar(registros_filtrados.filter(status__iexact='OnHold'), 'driver_name')
 
-    # 4.2. Pacotes a Devolver
-    total_a_devolver = registros_filtrados.filter(status='OnHold').count()
-    
-    # 4.3. Pacotes Devolvidos
-    total_devolvidos = registros_filtrados.filter(status='LMHub_Received').count()
-    
-    # 4.4. Contagem de Motivos (AGORA TODOS)
-    motivos_contagem = registros_filtrados.values('onhold_reason').annotate(
-        total=Count('onhold_reason')
-    ).order_by('-total')
-    
-    # 4.5. Contagem de HUBs
-    hubs_contagem = registros_filtrados.values('hub_upload__nome').annotate(
-        total=Count('hub_upload__nome')
-    ).order_by('-total')
 
-    # 4.6. Média de Peso
-    metricas_dimensoes = registros_filtrados.aggregate(
-        media_peso=Avg('parcel_weight'),
-        media_comprimento=Avg('length'),
-    )
+        # --- 5. Agregações para Gráficos (USANDO data_envio) ---
+
+        # 5.1. GRÁFICO DE LINHA (Total de Registros por Dia)
+        MIN_DATE_FILTER = date(2000, 1, 1) 
     
-    # 4.7. Contagem de Motivos Chave (Ausente/Recusa)
-    total_ausente = registros_filtrados.filter(
-        Q(onhold_reason__icontains='recipient unavailable') | 
-        Q(onhold_reason__icontains='destinatário ausente') | 
-        Q(onhold_reason__icontains='recusa de recebimento') | 
-        Q(onhold_reason__icontains='refused to accept')
-    ).count()
-
-    # 4.8. Contagem de Registros OnHold por Motorista
-    registros_por_motorista = registros_filtrados.filter(
-        status__iexact='OnHold' 
-    ).values('driver_name').annotate(
-        total=Count('driver_name')
-    ).order_by('-total')
+        dados_linha_queryset = registros_filtrados.filter(
+            data_envio__isnull=False,
+            data_envio__gte=MIN_DATE_FILTER
+        ).values('data_envio').annotate(
+            total=Count('id')
+        ).order_by('data_envio')
 
+        grafico_linha_datas = [item['data_envio'].strftime('%d/%m') for item in dados_linha_queryset]
+        grafico_linha_totais = [item['total'] for item in dados_linha_queryset]
 
-    # --- 5. Agregações para Gráficos (USANDO data_envio) ---
 
-    # 5.1. GRÁFICO DE LINHA (Total de Registros por Dia)
-    MIN_DATE_FILTER = date(2000, 1, 1) 
-    
-    dados_linha_queryset = registros_filtrados.filter(
-        data_envio__isnull=False,
-        data_envio__gte=MIN_DATE_FILTER
-    ).values('data_envio').annotate(
-        total=Count('id')
-    ).order_by('data_envio')
-
-    grafico_linha_datas = [item['data_envio'].strftime('%d/%m') for item in dados_linha_queryset]
-    grafico_linha_totais = [item['total'] for item in dados_linha_queryset]
-
-
-    # 5.2. GRÁFICO DE PIZZA (Distribuição de Status)
-    contagem_status = registros_filtrados.aggregate(
-        total_onhold=Count('id', filter=Q(status='OnHold')),
-        total_devolvido=Count('id', filter=Q(status='LMHub_Received')),
-        total_outros=Count('id', filter=~Q(status='OnHold') & ~Q(status='LMHub_Received'))
-    )
-
-    grafico_pizza_labels = ['A Devolver (OnHold)', 'Devolvidos (LMHub_Received)', 'Outros Status']
-    grafico_pizza_valores = [
-        contagem_status['total_onhold'],
-        contagem_status['total_devolvido'],
-        contagem_status['total_outros'],
-    ]
+        # 5.2. GRÁFICO DE PIZZA (Distribuição de Status)
+        grafico_pizza_labels = ['A Devolver (OnHold)', 'Devolvidos (LMHub_Received)', 'Outros Status']
+        grafico_pizza_valores = [cards['total_a_devolver'], cards['total_devolvidos'], cards['total_outros']]
 
     
-    # --- 6. Contexto Final ---
+        # --- 6. Resultado (só dados simples: vai para o cache) ---
+        return {
+            # Dados para Cards
+            'total_onhold_periodo': total_onhold_periodo,
+            'rastreios_unicos': rastreios_unicos,
+            'total_a_devolver': cards['total_a_devolver'],
+            'total_devolvidos': cards['total_devolvidos'],
+            'motivos_contagem': list(motivos_contagem),
+            'hubs_contagem': list(hubs_contagem),
+            'media_peso': round(cards['media_peso'] or 0.0, 2), 
+            'total_ausente': cards['total_ausente'],
+        
+            # ✅ KPIs Adicionados
+            'total_volumosos': cards['total_volumosos'], 
+            'total_perdidos': cards['total_perdidos'], # NOVO KPI
+            'total_wrongly_assigned': cards['total_wrongly_assigned'], # NOVO KPI
+
+            # Dados para a lista de motoristas
+            'registros_por_motorista': list(registros_por_motorista),
+
+            # DADOS PARA GRÁFICOS
+            'grafico_linha_datas': grafico_linha_datas,
+            'grafico_linha_totais': grafico_linha_totais,
+            'grafico_pizza_labels': grafico_pizza_labels,
+            'grafico_pizza_valores': grafico_pizza_valores,
+        }
+
     context = {
         # Dados para Filtros e Visualização
         'data_inicio_value': data_inicio.strftime('%Y-%m-%d'),
         'data_fim_value': data_fim.strftime('%Y-%m-%d'),
-        
-        # Dados para Cards
-        'total_onhold_periodo': total_onhold_periodo,
-        'rastreios_unicos': rastreios_unicos,
-        'total_a_devolver': total_a_devolver,
-        'total_devolvidos': total_devolvidos,
-        'motivos_contagem': motivos_contagem,
-        'hubs_contagem': hubs_contagem,
-        'media_peso': round(metricas_dimensoes['media_peso'] or 0.0, 2), 
-        'total_ausente': total_ausente,
-        
-        # ✅ KPIs Adicionados
-        'total_volumosos': total_volumosos, 
-        'total_perdidos': total_perdidos, # NOVO KPI
-        'total_wrongly_assigned': total_wrongly_assigned, # NOVO KPI
-
-        # Dados para a lista de motoristas
-        'registros_por_motorista': registros_por_motorista,
-
-        # DADOS PARA GRÁFICOS
-        'grafico_linha_datas': grafico_linha_datas,
-        'grafico_linha_totais': grafico_linha_totais,
-        'grafico_pizza_labels': grafico_pizza_labels,
-        'grafico_pizza_valores': grafico_pizza_valores,
     }
+    context.update(resultado_em_cache(
+        'dashboard_onhold',
+        {'data_inicio': data_inicio, 'data_fim': data_fim},
+        [OnHold, HUB],
+        calcular,
+    ))
 
     return render(request, 'onhold/dashboard_onhold.html', context)
 
 @login_required
 def consulta_onhold_por_motorista(request):
     
-    # 1. Filtra apenas os pacotes com status 'OnHold' e que possuem Driver Name
-    pacotes_onhold = OnHold.objects.filter(
-        status='OnHold'
-    ).exclude(
-        # Exclui pacotes onde o Driver Name é vazio ou nulo (ajustado para campo charfield)
-        Q(driver_name__exact='') | Q(driver_name__isnull=True)
-    )
+    # 1. Scorecards com pacotes 'OnHold' e Driver Name preenchido
+    #    (💡 lidos do DesempenhoMotoristaDiario, sem varrer a tabela OnHold)
+    desempenho = DesempenhoMotoristaDiario.objects.filter(
+        total_onhold__gt=0
+    ).exclude(driver_name='')
     
-    # 2. Agrega os pacotes pelo Driver Name e conta
-    contagem_por_motorista = pacotes_onhold.values('driver_name').annotate(
-        total_onhold=Count('driver_name') 
+    # 2. Agrega pelo Driver Name
+    contagem_por_motorista = desempenho.values('driver_name').annotate(
+        total_onhold=Sum('total_onhold') 
     ).order_by('-total_onhold')
 
     # 3. Calcula o total geral de pacotes 'OnHold' com motorista
-    total_onhold_com_motorista = pacotes_onhold.count() 
+    total_onhold_com_motorista = desempenho.aggregate(total=Sum('total_onhold'))['total'] or 0
 
     context = {
         'titulo': f'Pacotes OnHold por Motorista ({total_onhold_com_motorista} no Total)',
@@ -744,13 +746,14 @@ def exportar_onhold_motorista_csv(request):
     data_fim = request.GET.get('data_fim')
 
     # Filtro por data_envio
-    dados_motorista = OnHold.objects \
+    # 💡 Lido do scorecard diário por motorista (sem varrer a tabela OnHold)
+    dados_motorista = DesempenhoMotoristaDiario.objects \
         .filter(
             data_envio__range=[data_inicio, data_fim], # Usando data_envio
-            status='OnHold'
+            total_onhold__gt=0
         ) \
         .values('driver_name') \
-        .annotate(total_registros=Count('id')) \
+        .annotate(total_registros=Sum('total_onhold')) \
         .order_by('-total_registros')
 
     response = HttpResponse(content_type='text/csv')
@@ -772,18 +775,8 @@ def consulta_por_motorista(request):
     data_fim_str = request.GET.get('data_fim')
     
     # 1. Obter nomes de motoristas Limpos (para o dropdown)
-    all_drivers = (
-        OnHold.objects
-        .annotate(
-            # Cria um campo temporário 'driver_name_clean' com o TRIM aplicado
-            driver_name_clean=Func('driver_name', function='TRIM') 
-        )
-        .values_list('driver_name_clean', flat=True)
-        .exclude(driver_name_clean__isnull=True)
-        .exclude(driver_name_clean='')
-        .distinct()
-        .order_by('driver_name_clean')
-    )
+    # 💡 Lidos do dicionário de valores; o TRIM é feito aqui, sobre a lista pequena
+    all_drivers = sorted({nome.strip() for nome in valores_distintos(OnHold, 'driver_name')})
     
     # 2. QuerySet Inicial: Todos os pacotes
     pacotes_detalhe = OnHold.objects.all()
@@ -792,10 +785,8 @@ def consulta_por_motorista(request):
     
     # Filtro por Nome do Motorista
     if selected_driver and selected_driver != 'all':
-        # Filtra usando o nome limpo
-        pacotes_detalhe = pacotes_detalhe.annotate(
-            driver_name_clean=Func('driver_name', function='TRIM') 
-        ).filter(driver_name_clean__iexact=selected_driver)
+        # Nomes já chegam normalizados do upload: filtro direto na coluna (usa índice)
+        pacotes_detalhe = pacotes_detalhe.filter(driver_name__iexact=selected_driver)
         
     # Filtro por Intervalo de Data 
     data_inicio_formatada = "N/A"
@@ -942,7 +933,13 @@ def upload_csv_onhold_inicial(request):
 
             # Execução e Auditoria
             total_tentativas_insercao = len(registros_a_criar)
-            OnholdInicial.objects.bulk_create(registros_a_criar, ignore_conflicts=False) # Mantemos False para permitir duplicatas
+            preencher_datahoras(OnholdInicial, registros_a_criar) # Datas texto -> DateTimeField (vetorizado)
+            normalizar_motoristas(registros_a_criar)
+            aplicar_codigos(OnholdInicial, registros_a_criar)
+            copiar(OnholdInicial, registros_a_criar) # Sem ignore_conflicts, para permitir duplicatas
+            recalcular_resumo('onhold_inicial', data_referencia) # Resumo de SLA da data já fica pronto
+            atualizar_desempenho_motoristas(data_referencia)
+            registrar_alteracao(OnholdInicial)
             
             total_registros_depois = OnholdInicial.objects.count()
             registros_criados_novos = total_registros_depois - total_registros_antes
@@ -970,6 +967,7 @@ def dashboard_onhold_inicial_dia(request):
 
     # Queryset Base: Assume que o modelo OnholdInicial existe
     pacotes = OnholdInicial.objects.all()
+    desempenho = DesempenhoMotoristaDiario.objects.filter(total_inicial__gt=0)
 
     # 2. Aplicar Filtro de Data
     if data_inicio_str and data_fim_str:
@@ -980,6 +978,7 @@ def dashboard_onhold_inicial_dia(request):
             
             # Filtra o queryset
             pacotes = pacotes.filter(data_envio__range=[data_inicio, data_fim])
+            desempenho = desempenho.filter(data_envio__range=[data_inicio, data_fim])
         except ValueError:
             # Caso de erro de formato, ignora o filtro e usa todos os dados
             data_inicio_str = None
@@ -988,17 +987,15 @@ def dashboard_onhold_inicial_dia(request):
     # 3. Cálculos e Agregações
     total_registros = pacotes.count()
 
-    # Contagem por Motorista (TRIM para limpar espaços)
-    motoristas_contagem = pacotes.annotate(
-        driver_name_clean=Func('driver_name', function='TRIM') 
-    ).values('driver_name_clean').annotate(
-        total=Count('driver_name_clean')
+    # Contagem por Motorista: lida do scorecard diário (nomes já normalizados no upload)
+    motoristas_contagem = desempenho.values(
+        driver_name_clean=F('driver_name')
+    ).annotate(
+        total=Sum('total_inicial')
     ).order_by('-total')
     
     # Contagem por Motivo de Retenção
-    motivos_contagem = pacotes.values('onhold_reason').annotate(
-        total=Count('onhold_reason')
-    ).order_by('-total')
+    motivos_contagem = agrupar(pacotes, 'onhold_reason')
 
     # 4. Preparar Dados para Gráfico (Chart.js)
     # Pegamos apenas o Top 10 para o gráfico, mas a lista completa para o template
@@ -1043,9 +1040,7 @@ def detalhe_pacotes_inicial(request):
     
     # Filtro de Driver: Limpa espaços em branco e compara (case-insensitive)
     if selected_driver:
-        pacotes_detalhe = pacotes_detalhe.annotate(
-            driver_name_clean=Func('driver_name', function='TRIM') 
-        ).filter(driver_name_clean__iexact=selected_driver)
+        pacotes_detalhe = pacotes_detalhe.filter(driver_name__iexact=selected_driver)
         
     # Filtro de Motivo
     if selected_reason:
@@ -1069,13 +1064,14 @@ def detalhe_pacotes_inicial(request):
             pass # Ignora filtros de data inválidos
 
     # 3. Ordenação e Contagem
-    pacotes_detalhe = pacotes_detalhe.order_by('-data_envio')
-    total_pacotes = pacotes_detalhe.count()
+    # select_related: o template mostra o HUB de cada pacote (sem uma consulta por linha)
+    pacotes_detalhe = pacotes_detalhe.select_related('hub_upload').order_by('-data_envio')
     
-    # 4. Paginação (50 por página é um bom padrão)
+    # 4. Paginação (50 por página é um bom padrão); o total é a contagem do paginator
     paginator = Paginator(pacotes_detalhe, 50) 
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    total_pacotes = paginator.count
 
     # 5. Contexto
     context = {
@@ -1096,36 +1092,6 @@ def detalhe_pacotes_inicial(request):
     # Se esta view for a correta, um erro 'TemplateDoesNotExist' deve ocorrer.
     return render(request, 'onhold/TESTE_NAO_EXISTE.html', context)
 
-def get_city_from_cep(cep):
-    """
-    Consulta a API do ViaCEP para obter a cidade a partir do CEP.
-    """
-    if not cep:
-        return "CEP Não Informado"
-        
-    # Remove caracteres não numéricos
-    cep_limpo = ''.join(filter(str.isdigit, cep))
-    if len(cep_limpo) != 8:
-        return "CEP Inválido"
-
-    # API ViaCEP (retorna JSON com o campo 'localidade')
-    url = f"https://viacep.com.br/ws/{cep_limpo}/json/"
-    
-    try:
-        response = requests.get(url, timeout=3)
-        if response.status_code == 200:
-            data = response.json()
-            # Se não houver erro no retorno da API
-            if not data.get('erro'):
-                return data.get('localidade', 'Cidade Não Encontrada')
-        return "Cidade Não Encontrada"
-    except requests.exceptions.RequestException:
-        # Lidar com erros de conexão/timeout
-        return "Erro de Conexão/API"
-    except Exception:
-        # Erros diversos
-        return "Erro Desconhecido"
-    
 @login_required
 def detalhe_volumosos(request):
     """
@@ -1161,91 +1127,67 @@ def detalhe_volumosos(request):
     if data_inicio and data_fim:
          pacotes_volumosos_base_qs = pacotes_volumosos_base_qs.filter(data_envio__range=[data_inicio, data_fim])
          
-    # 4. PRÉ-CÁLCULO DOS VALORES ÚNICOS PARA OS DROPDOWNS
-    
-    # 4.1. LISTA DE BAIRROS (Sort Code Name)
-    sort_code_options = pacotes_volumosos_base_qs.values_list(
-        'sort_code_name', flat=True
-    ).distinct().exclude(sort_code_name__isnull=True).order_by('sort_code_name')
-    
-    
-    # 4.2. LISTA DE CIDADES
-    cep_options_qs = pacotes_volumosos_base_qs.values_list(
-        'postal_code', flat=True
-    ).distinct().exclude(postal_code__isnull=True)
-    
-    cidades_unicas = set()
-    for cep in cep_options_qs:
-        cidade = get_city_from_cep(cep)
-        if cidade and cidade != 'Não Encontrada':
-            cidades_unicas.add(cidade)
-            
-    cidades_options = sorted(list(cidades_unicas)) 
+    # 3. UMA CONSULTA AGRUPADA (bairro, CEP) alimenta os dropdowns, o total e a
+    #    contagem da paginação; a cidade vem da tabela CEP -> cidade (CidadeCEP),
+    #    só dos CEPs do resultado e sem chamada HTTP
+    pares = list(
+        pacotes_volumosos_base_qs.order_by()
+        .values_list('sort_code_name', 'postal_code')
+        .annotate(quantidade=Count('id'))
+    )
+    cidades = cidades_dos_ceps(postal_code for _, postal_code, _ in pares)
+    grupos = [
+        (sort_code_name, postal_code, cidade_do_cep(postal_code, cidades), quantidade)
+        for sort_code_name, postal_code, quantidade in pares
+    ]
 
-    # 5. Aplicação do filtro nativo (Sort Code Name / Bairro)
+    # 4. VALORES ÚNICOS PARA OS DROPDOWNS
+    sort_code_options = sorted({sort_code for sort_code, _, _, _ in grupos if sort_code is not None})
+    cidades_options = sorted({cidade for _, postal_code, cidade, _ in grupos if postal_code is not None})
+    total_pacotes = sum(quantidade for _, _, _, quantidade in grupos)
+
+    # 5. Filtros de Sort Code Name (bairro) e Cidade, aplicados no banco
+    #    (a cidade vira a lista dos CEPs que pertencem a ela)
+    selecionados = [
+        (postal_code, quantidade) for sort_code, postal_code, cidade, quantidade in grupos
+        if (not filtro_sort_code_name or sort_code == filtro_sort_code_name)
+        and (not filtro_cidade or cidade == filtro_cidade)
+    ]
     pacotes_volumosos_final_qs = pacotes_volumosos_base_qs
-    
     if filtro_sort_code_name:
          pacotes_volumosos_final_qs = pacotes_volumosos_final_qs.filter(
              sort_code_name=filtro_sort_code_name
          )
+    if filtro_cidade:
+        pacotes_volumosos_final_qs = pacotes_volumosos_final_qs.filter(
+            postal_code__in={postal_code for postal_code, _ in selecionados}
+        )
 
-
-    # 6. Paginação
-    # 💥 REMOVIDA A ORDENAÇÃO POR DATA_ENVIO AQUI, POIS SERÁ FEITA EM MEMÓRIA POR CIDADE
-    paginator = Paginator(pacotes_volumosos_final_qs, 100) 
+    # 6. Paginação (a contagem já saiu da consulta agrupada)
+    paginator = Paginator(pacotes_volumosos_final_qs.order_by('postal_code', 'id'), 100)
+    paginator.count = sum(quantidade for _, quantidade in selecionados)
     page_number = request.GET.get('page')
-    page_obj_queryset = paginator.get_page(page_number)
-    
-    # 7. Adicionar a Cidade e Ordenar
-    page_pacotes_resolved = []
-    
-    # Constrói a lista com o campo 'cidade' resolvido pela API
-    for pacote in page_obj_queryset:
-        cidade_resolvida = get_city_from_cep(pacote.postal_code) # CHAMA A FUNÇÃO DE CEP/CIDADE
-        
-        page_pacotes_resolved.append({
-            'sls_tracking_number': pacote.sls_tracking_number,
-            'onhold_reason': pacote.onhold_reason,
-            'sort_code_name': pacote.sort_code_name,
-            'postal_code': pacote.postal_code,
-            'cidade': cidade_resolvida, 
-        })
-        
-    # 💥 NOVA ORDENAÇÃO: Ordenar em memória por Cidade (ordem alfabética)
-    # A ordenação é feita na lista de objetos da página atual
-    page_pacotes_resolved.sort(key=lambda item: item['cidade'])
-
-
-    # 8. Aplicação do filtro de CIDADE (Feito na memória)
-    pacotes_com_cidade = []
-    
-    if filtro_cidade:
-        # Se houver filtro, filtra a lista já resolvida e ordenada
-        pacotes_com_cidade = [
-            item for item in page_pacotes_resolved
-            if item['cidade'] == filtro_cidade # Usamos igualdade, pois é um valor selecionado do dropdown
-        ]
-    else:
-        # Se não houver filtro, usa a lista resolvida e ordenada completa da página atual
-        pacotes_com_cidade = page_pacotes_resolved
-        
-    # 9. Estrutura o Contexto
+    page_obj = paginator.get_page(page_number)
     
-    class CustomPageObject:
-        def __init__(self, page_obj, items):
-            self.__dict__ = page_obj.__dict__.copy()
-            self.object_list = items
-            # Se a lista foi filtrada na memória (filtro_cidade ativo), a paginação padrão é "desligada"
-            self.has_previous = lambda: self.__dict__.get('has_previous') and not filtro_cidade
-            self.has_next = lambda: self.__dict__.get('has_next') and not filtro_cidade
-
-    page_obj_final = CustomPageObject(page_obj_queryset, pacotes_com_cidade)
-
+    # 7. Adicionar a Cidade e Ordenar (ordem alfabética da cidade dentro da página)
+    page_obj.object_list = sorted(
+        (
+            {
+                'sls_tracking_number': pacote.sls_tracking_number,
+                'onhold_reason': pacote.onhold_reason,
+                'sort_code_name': pacote.sort_code_name,
+                'postal_code': pacote.postal_code,
+                'cidade': cidade_do_cep(pacote.postal_code, cidades),
+            }
+            for pacote in page_obj.object_list
+        ),
+        key=lambda item: item['cidade'],
+    )
 
+    # 8. Estrutura o Contexto
     context = {
-        'page_obj': page_obj_final,
-        'total_pacotes': pacotes_volumosos_base_qs.count(),
+        'page_obj': page_obj,
+        'total_pacotes': total_pacotes,
         'data_inicio_str': data_inicio_str,
         'data_fim_str': data_fim_str,
         'titulo': "Pacotes Retidos por Insufficient Vehicle Capacity",
@@ -1260,4 +1202,81 @@ def detalhe_volumosos(request):
         'colunas_selecionadas': ['SLS Tracking Number', 'OnHoldReason', 'Sort Code Name', 'Postal Code', 'Cidade'] 
     }
 
-    return render(request, 'onhold/detalhe_volumosos.html', context)
\ No newline at end of file
+    return render(request, 'onhold/detalhe_volumosos.html', context)
+
+@login_required
+def ranking_motoristas(request):
+    """Ranking de motoristas lido do scorecard diário (DesempenhoMotoristaDiario), sem varrer as tabelas brutas."""
+    # 1. Período (padrão: 30 dias até a última data com scorecard)
+    ultima_data = DesempenhoMotoristaDiario.objects.order_by('-data_envio').values_list('data_envio', flat=True).first()
+    data_fim_padrao = ultima_data or date.today()
+    try:
+        data_fim = datetime.strptime(request.GET.get('data_fim', ''), '%Y-%m-%d').date()
+    except ValueError:
+        data_fim = data_fim_padrao
+    try:
+        data_inicio = datetime.strptime(request.GET.get('data_inicio', ''), '%Y-%m-%d').date()
+    except ValueError:
+        data_inicio = data_fim - timedelta(days=29)
+    if data_inicio > data_fim:
+        data_inicio = data_fim
+
+    # 2. Ordenação escolhida
+    ORDENACOES = {
+        'onhold': ('-soma_onhold', 'Mais OnHold a Devolver'),
+        'devolucao': ('-taxa_devolucao', 'Maior Taxa de Devolução'),
+        'tentativas': ('-soma_tentativas', 'Mais Tentativas de Entrega'),
+        'inicial': ('-soma_inicial', 'Mais Registros OnHold Inicial'),
+    }
+    ordenar = request.GET.get('ordenar', 'onhold')
+    if ordenar not in ORDENACOES:
+        ordenar = 'onhold'
+
+    # 3. Agregação sobre o scorecard (uma linha por motorista/dia)
+    ranking = (
+        DesempenhoMotoristaDiario.objects
+        .filter(data_envio__range=[data_inicio, data_fim])
+        .exclude(driver_name='')
+        .values('driver_name')
+        .annotate(
+            dias_ativos=Count('id'),
+            soma_registros=Sum('total_registros'),
+            soma_onhold=Sum('total_onhold'),
+            soma_devolvidos=Sum('total_devolvidos'),
+            soma_inicial=Sum('total_inicial'),
+            soma_tentativas=Sum('tentativas_entrega'),
+            taxa_devolucao=ExpressionWrapper(
+                Sum('total_devolvidos') * 100.0 / NullIf(Sum('total_registros'), 0),
+                output_field=FloatField()
+            ),
+        )
+        .order_by(ORDENACOES[ordenar][0], 'driver_name')
+    )
+
+    paginator = Paginator(ranking, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # 4. Principal motivo de cada motorista da página (junta os dicts diários)
+    motoristas_pagina = [item['driver_name'] for item in page_obj]
+    motivos_por_motorista = {}
+    for driver_name, motivos in (
+        DesempenhoMotoristaDiario.objects
+        .filter(data_envio__range=[data_inicio, data_fim], driver_name__in=motoristas_pagina)
+        .values_list('driver_name', 'motivos')
+    ):
+        contagem = motivos_por_motorista.setdefault(driver_name, {})
+        for motivo, total in (motivos or {}).items():
+            contagem[motivo] = contagem.get(motivo, 0) + total
+
+    for item in page_obj:
+        contagem = motivos_por_motorista.get(item['driver_name'], {})
+        item['principal_motivo'] = max(contagem, key=contagem.get) if contagem else ''
+
+    context = {
+        'page_obj': page_obj,
+        'data_inicio_value': data_inicio.strftime('%Y-%m-%d'),
+        'data_fim_value': data_fim.strftime('%Y-%m-%d'),
+        'ordenar': ordenar,
+        'ordenacoes': [(chave, rotulo) for chave, (_, rotulo) in ORDENACOES.items()],
+    }
+    return render(request, 'onhold/ranking_motoristas.html', context)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parcel_lost', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parcellost',
+            index=models.Index(fields=['spx_tracking_number', '-data_registro_sistema'], name='lost_rastreio_recente_idx'),
+        ),
+    ]
@@ -57,6 +57,10 @@ class ParcelLost(models.Model):
                 name='unique_lost_parcel_day'
             )
         ]
+        indexes = [
+            # Último status por rastreio (sincronização com o Parcel Sweeper)
+            models.Index(fields=['spx_tracking_number', '-data_registro_sistema'], name='lost_rastreio_recente_idx'),
+        ]
 
     def __str__(self):
         return f"{self.spx_tracking_number} - {self.get_final_status_avaria_display()}"
\ No newline at end of file
@@ -1,3 +1,37 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from core.testing import CasoOrcamento
+from logistica.consolidacao import consolidar_dia
+from logistica.models import DadosDiariosLogistica
+from parcel_sweeper.models import Parcel
+
+
+class OrcamentoViewsParcelLostTest(CasoOrcamento):
+    """Consultas por view do Parcel Lost (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        'dashboard_lost': {'url': 'parcel_lost:dashboard_lost', 'consultas': 7, 'tempo_sql_s': 0.5},
+        'detail_list': {'url': 'parcel_lost:detail_list', 'args': ['total-lost'], 'consultas': 2},
+    }
+
+
+class RegistroLostTest(TestCase):
+    """O registro de perda/avaria reconsolida as datas das parcelas cujo status mudou."""
+
+    def test_reconsolida_data_da_parcela(self):
+        dia_parcela, dia_registro = date(2031, 1, 1), date(2031, 1, 5)
+        Parcel.objects.create(data_referencia=dia_parcela, spx_tracking_number='BR1', count_type='Backlog')
+        consolidar_dia(dia_parcela)
+        self.assertEqual(DadosDiariosLogistica.objects.get(data_envio=dia_parcela).backlog_parcel, 1)
 
-# Create your tests here.
+        self.client.force_login(get_user_model().objects.create_user('lost', password='lost'))
+        self.client.post(reverse('parcel_lost:register'), {
+            'data_registro': dia_registro, 'spx_tracking_number': 'BR1', 'final_status_avaria': 'HUB_LOST',
+        })
+        self.assertEqual(Parcel.objects.get().count_type, 'HUB_LOST')
+        self.assertEqual(DadosDiariosLogistica.objects.get(data_envio=dia_parcela).backlog_parcel, 0)
+        self.assertTrue(DadosDiariosLogistica.objects.filter(data_envio=dia_registro).exists())
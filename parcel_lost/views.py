@@ -13,6 +13,9 @@ from django.core.paginator import Paginator
 
 from .forms import ParcelLostForm, LostFilterForm
 from .models import ParcelLost
+from core.cache import resultado_em_cache, registrar_alteracao
+from parcel_sweeper.sincronizacao import sincronizar_rastreio
+from logistica.consolidacao import consolidar_dia
 
 # ----------------------------------------------------
 # VIEWS DE NAVEGAÇÃO E REGISTRO 
@@ -31,6 +34,11 @@ def register_lost(request):
             new_record = form.save(commit=False)
             new_record.usuario_registro = request.user
             new_record.save()
+            registrar_alteracao(ParcelLost) # Invalida o cache do dashboard de Lost/Damage
+            # Propaga o status só para as parcelas deste rastreio no Parcel Sweeper
+            # (e reconsolida na Logística as datas dessas parcelas)
+            sincronizar_rastreio(new_record.spx_tracking_number)
+            consolidar_dia(new_record.data_registro) # Avarias SOC/HUB do dia na Logística
             messages.success(request, "Registro de Perda/Avaria criado com sucesso!")
             
             # 🔑 CORREÇÃO AQUI: Mudando o nome da URL para 'dashboard_lost' 🔑
@@ -64,95 +72,97 @@ def dashboard_lost(request):
         if tipo_avaria:
             queryset = queryset.filter(final_status_avaria__icontains=tipo_avaria)
 
-    # --- Cálculo dos KPIs (Para as Cartas Clicáveis) ---
-    kpis = queryset.aggregate(
-        total_lost=Count('id', filter=Q(final_status_avaria__icontains='LOST')),
-        total_damage=Count('id', filter=Q(final_status_avaria__icontains='DAMAGE')),
-        soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
-        hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
-        soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
-        hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
-    )
+    # 💡 KPIs e gráficos em cache: a chave leva os filtros e a versão da tabela ParcelLost
+    #    (incrementada a cada novo registro), então o resultado nunca fica velho.
+    def calcular():
+        # --- Cálculo dos KPIs (Para as Cartas Clicáveis) ---
+        kpis = queryset.aggregate(
+            total_lost=Count('id', filter=Q(final_status_avaria__icontains='LOST')),
+            total_damage=Count('id', filter=Q(final_status_avaria__icontains='DAMAGE')),
+            soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
+            hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
+            soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
+            hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
+        )
 
-    # --- Gráfico 1: Quantidade por Dia (Coluna) ---
-    daily_chart_data = queryset.annotate(
-        day=ExtractDay('data_registro'),
-        month=ExtractMonth('data_registro'),
-        year=ExtractYear('data_registro')
-    ).values('year', 'month', 'day').annotate(
-        # ✅ ALTERAÇÃO: Contagem separada por SOC/HUB
-        soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
-        hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
-        soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
-        hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
-    ).order_by('year', 'month', 'day')
+        # --- Gráfico 1: Quantidade por Dia (Coluna) ---
+        daily_chart_data = queryset.annotate(
+            day=ExtractDay('data_registro'),
+            month=ExtractMonth('data_registro'),
+            year=ExtractYear('data_registro')
+        ).values('year', 'month', 'day').annotate(
+            # ✅ ALTERAÇÃO: Contagem separada por SOC/HUB
+            soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
+            hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
+            soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
+            hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
+        ).order_by('year', 'month', 'day')
     
-    # Gerando labels no formato DD/MM
-    chart1_labels = [f"{item['day']:02d}/{item['month']:02d}" for item in daily_chart_data]
-    # ✅ NOVOS DADOS PARA O CONTEXTO
-    chart1_soc_lost_data = [item['soc_lost'] for item in daily_chart_data]
-    chart1_hub_lost_data = [item['hub_lost'] for item in daily_chart_data]
-    chart1_soc_damage_data = [item['soc_damage'] for item in daily_chart_data]
-    chart1_hub_damage_data = [item['hub_damage'] for item in daily_chart_data]
+        # Gerando labels no formato DD/MM
+        chart1_labels = [f"{item['day']:02d}/{item['month']:02d}" for item in daily_chart_data]
+        # ✅ NOVOS DADOS PARA O CONTEXTO
+        chart1_soc_lost_data = [item['soc_lost'] for item in daily_chart_data]
+        chart1_hub_lost_data = [item['hub_lost'] for item in daily_chart_data]
+        chart1_soc_damage_data = [item['soc_damage'] for item in daily_chart_data]
+        chart1_hub_damage_data = [item['hub_damage'] for item in daily_chart_data]
     
-    # Serializando para JSON Strings
-    chart1_labels = json.dumps(chart1_labels)
-    chart1_soc_lost_data = json.dumps(chart1_soc_lost_data)
-    chart1_hub_lost_data = json.dumps(chart1_hub_lost_data)
-    chart1_soc_damage_data = json.dumps(chart1_soc_damage_data)
-    chart1_hub_damage_data = json.dumps(chart1_hub_damage_data)
+        # Serializando para JSON Strings
+        chart1_labels = json.dumps(chart1_labels)
+        chart1_soc_lost_data = json.dumps(chart1_soc_lost_data)
+        chart1_hub_lost_data = json.dumps(chart1_hub_lost_data)
+        chart1_soc_damage_data = json.dumps(chart1_soc_damage_data)
+        chart1_hub_damage_data = json.dumps(chart1_hub_damage_data)
     
     
-    # --- Gráfico 2: Evolução Mês a Mês (Linha) ---
-    monthly_data = queryset.annotate(
-        year_month=Concat(ExtractYear('data_registro'), V('-'), ExtractMonth('data_registro'), output_field=CharField())
-    ).values('year_month').annotate(
-        total=Count('id'),
-        # ✅ ALTERAÇÃO: Contagem separada por SOC/HUB
-        soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
-        hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
-        soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
-        hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
-    ).order_by('year_month')
+        # --- Gráfico 2: Evolução Mês a Mês (Linha) ---
+        monthly_data = queryset.annotate(
+            year_month=Concat(ExtractYear('data_registro'), V('-'), ExtractMonth('data_registro'), output_field=CharField())
+        ).values('year_month').annotate(
+            total=Count('id'),
+            # ✅ ALTERAÇÃO: Contagem separada por SOC/HUB
+            soc_lost=Count('id', filter=Q(final_status_avaria='SOC_LOST')),
+            hub_lost=Count('id', filter=Q(final_status_avaria='HUB_LOST')),
+            soc_damage=Count('id', filter=Q(final_status_avaria='SOC_DAMAGE')),
+            hub_damage=Count('id', filter=Q(final_status_avaria='HUB_DAMAGE')),
+        ).order_by('year_month')
     
-    chart2_labels = [item['year_month'] for item in monthly_data]
-    # ✅ NOVOS DADOS PARA O CONTEXTO
-    chart2_soc_lost_data = [item['soc_lost'] for item in monthly_data]
-    chart2_hub_lost_data = [item['hub_lost'] for item in monthly_data]
-    chart2_soc_damage_data = [item['soc_damage'] for item in monthly_data]
-    chart2_hub_damage_data = [item['hub_damage'] for item in monthly_data]
+        chart2_labels = [item['year_month'] for item in monthly_data]
+        # ✅ NOVOS DADOS PARA O CONTEXTO
+        chart2_soc_lost_data = [item['soc_lost'] for item in monthly_data]
+        chart2_hub_lost_data = [item['hub_lost'] for item in monthly_data]
+        chart2_soc_damage_data = [item['soc_damage'] for item in monthly_data]
+        chart2_hub_damage_data = [item['hub_damage'] for item in monthly_data]
     
-    # Serializando para JSON Strings
-    chart2_labels = json.dumps(chart2_labels)
-    chart2_soc_lost_data = json.dumps(chart2_soc_lost_data)
-    chart2_hub_lost_data = json.dumps(chart2_hub_lost_data)
-    chart2_soc_damage_data = json.dumps(chart2_soc_damage_data)
-    chart2_hub_damage_data = json.dumps(chart2_hub_damage_data)
+        # Serializando para JSON Strings
+        chart2_labels = json.dumps(chart2_labels)
+        chart2_soc_lost_data = json.dumps(chart2_soc_lost_data)
+        chart2_hub_lost_data = json.dumps(chart2_hub_lost_data)
+        chart2_soc_damage_data = json.dumps(chart2_soc_damage_data)
+        chart2_hub_damage_data = json.dumps(chart2_hub_damage_data)
+
+        return {
+            'total_registros': queryset.count(),
+            'kpis': kpis,
+            'chart1_labels': chart1_labels,
+            'chart1_soc_lost_data': chart1_soc_lost_data,
+            'chart1_hub_lost_data': chart1_hub_lost_data,
+            'chart1_soc_damage_data': chart1_soc_damage_data,
+            'chart1_hub_damage_data': chart1_hub_damage_data,
+            'chart2_labels': chart2_labels,
+            'chart2_soc_lost_data': chart2_soc_lost_data,
+            'chart2_hub_lost_data': chart2_hub_lost_data,
+            'chart2_soc_damage_data': chart2_soc_damage_data,
+            'chart2_hub_damage_data': chart2_hub_damage_data,
+        }
 
-    print("\n--- DEBUG: DADOS DO DASHBOARD ---")
-    print(f"Total de Registros Após Filtros: {queryset.count()}")
-    print("Daily Chart Labels (JSON):", chart1_labels)
-    print("Monthly Chart Labels (JSON):", chart2_labels)
-    print("--- FIM DEBUG ---\n")
+    filtros_cache = form.cleaned_data if form.is_valid() else {}
+    resultado = resultado_em_cache('dashboard_lost', filtros_cache, [ParcelLost], calcular)
     
     context = {
         'form': form,
-        'total_registros': queryset.count(),
-        'kpis': kpis,
-        
-        # Dados para Gráfico 1 (4 conjuntos de dados)
-        'chart1_labels': chart1_labels,
-        'chart1_soc_lost_data': chart1_soc_lost_data,
-        'chart1_hub_lost_data': chart1_hub_lost_data,
-        'chart1_soc_damage_data': chart1_soc_damage_data,
-        'chart1_hub_damage_data': chart1_hub_damage_data,
-        
-        # Dados para Gráfico 2 (4 conjuntos de dados)
-        'chart2_labels': chart2_labels,
-        'chart2_soc_lost_data': chart2_soc_lost_data,
-        'chart2_hub_lost_data': chart2_hub_lost_data,
-        'chart2_soc_damage_data': chart2_soc_damage_data,
-        'chart2_hub_damage_data': chart2_hub_damage_data,
+
+        # KPIs e dados dos Gráficos 1 e 2 (4 conjuntos de dados cada)
+        **resultado,
     }
     return render(request, 'parcel_lost/dashboard_lost.html', context)
 
@@ -192,15 +202,17 @@ def lost_detail_list(request, type_slug):
         queryset = queryset.filter(final_status_avaria=status_name)
         detail_name = status_name.replace('_', ' - ')
 
-    # 4. Paginação
-    paginator = Paginator(queryset.order_by('-data_registro', '-data_registro_sistema'), 50)
+    # 4. Paginação (o usuário de cada linha vem no mesmo SELECT: o template mostra o username)
+    paginator = Paginator(
+        queryset.select_related('usuario_registro').order_by('-data_registro', '-data_registro_sistema'), 50
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     context = {
         'titulo': f'Detalhes: {detail_name}',
         'page_obj': page_obj,
-        'total_registros': queryset.count(),
+        'total_registros': paginator.count, # O COUNT(*) da paginação
         'filter_params': filter_params,
         'count_type_name': detail_name,
         'export_url': '', 
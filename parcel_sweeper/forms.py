@@ -4,6 +4,7 @@ from .models import Parcel
 from django.utils import timezone 
 from datetime import timedelta
 from django.db.models import Count 
+from core.dicionario import valores_dos_campos
 
 
 class UploadParcelForm(forms.Form):
@@ -67,22 +68,11 @@ class ParcelFilterForm(forms.Form):
         # --- 2. Lógica de População de Choices ---
         
         # Final Status: 🔑 REMOVIDO ('', 'Todos') e ordenado.
-        status_choices = [
-            (s, s) 
-            for s in Parcel.objects.values_list('final_status', flat=True)
-                        .distinct()
-                        .exclude(final_status__isnull=True)
-                        .exclude(final_status='')
-                        .order_by('final_status') # 🔑 Adicionado para melhor UX
-        ]
+        # 💡 Lidos do dicionário de valores (sem DISTINCT na tabela Parcel), numa consulta só
+        opcoes = valores_dos_campos(Parcel, ['final_status', 'sort_code'])
+        status_choices = [(s, s) for s in opcoes['final_status']]
         self.fields['final_status'].choices = status_choices
         
         # Sort Code: Mantido
-        sort_code_choices = [('', 'Todos')] + [
-            (sc, sc) 
-            for sc in Parcel.objects.values_list('sort_code', flat=True)
-                        .distinct()
-                        .exclude(sort_code__isnull=True)
-                        .exclude(sort_code='')
-        ]
+        sort_code_choices = [('', 'Todos')] + [(sc, sc) for sc in opcoes['sort_code']]
         self.fields['sort_code'].choices = sort_code_choices
\ No newline at end of file
@@ -0,0 +1,210 @@
+# parcel_sweeper/kpis.py
+#
+# Registro declarativo dos KPIs (cards) do Parcel Sweeper.
+# Cada card é definido UMA vez, como um Q nomeado pelo slug da URL de detalhe:
+# - dashboard_parcel conta todos os cards numa única consulta (Count(..., filter=Q));
+# - parcel_detail_list e export_parcel_csv filtram pelo mesmo Q do slug.
+# Assim o número do card e a lista/CSV do detalhe não podem divergir.
+
+from collections import Counter
+
+from django.db.models import Count, Q, Sum
+from django.template.defaultfilters import slugify
+
+from core.dicionario import rotulos, valores_distintos
+from .models import Parcel
+
+
+# Valores de Count Type gravados pela sincronização Lost/Damage (ParcelLost.STATUS_CHOICES)
+LOST_DAMAGE_VALUES = ['SOC_LOST', 'SOC_DAMAGE', 'HUB_LOST', 'HUB_DAMAGE']
+
+# Blocos reutilizados pelos cards
+Q_BACKLOG = Q(count_type__iexact='Backlog')
+Q_MISSING = Q(count_type__iexact='Missing')
+Q_LOST_DAMAGE = Q(count_type__in=LOST_DAMAGE_VALUES)
+Q_PROCESS_FOR_DELIVERY = Q(next_step_action__iexact='Process for delivery')
+Q_RECEBIDO_HUB = Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
+
+# Backlog pronto para entrega (card verde)
+Q_BACKLOG_PRONTO = Q_BACKLOG & Q_PROCESS_FOR_DELIVERY & Q_RECEBIDO_HUB
+# Backlog agarrado no HUB (card vermelho)
+Q_BACKLOG_AGARRADO = Q_BACKLOG & Q(on_hold_times__gt=3)
+# Roteirizados mais de uma vez
+Q_ONHOLD_MAIOR_ZERO = Q(on_hold_times__gt=0)
+
+
+# slug -> nome de exibição, filtro (Q ou função dos parâmetros GET) e,
+# se o card aparece no dashboard, o nome da variável no contexto.
+# Slugs diferentes com o mesmo Q são os nomes antigos mantidos por compatibilidade.
+KPIS = {
+    'total-registros': {
+        'nome': 'Total de Registros',
+        'filtro': Q(),
+    },
+    'lost-damage': {
+        'nome': 'Perdas e Avarias (Lost/Damage)',
+        'filtro': Q_LOST_DAMAGE,
+        'contexto': 'lost_parcels_count',
+    },
+    'missing-no-hub': {
+        'nome': 'Missing no HUB',
+        'filtro': Q_MISSING & Q(final_status__iexact='LMHub_Received'),
+        'contexto': 'kpi_missing_hub',
+    },
+    'missing-nao-recebidos-no-hub': {
+        'nome': 'Missing Não Recebidos no HUB',
+        'filtro': Q_MISSING & ~Q(final_status__iexact='LMHub_Received'),
+        'contexto': 'missing_nao_hub_count',
+    },
+    'backlog-total': {
+        'nome': 'Backlog Total Registrado',
+        'filtro': Q_BACKLOG,
+        'contexto': 'backlog_total',
+    },
+    'backlog-process-for-delivery': {
+        'nome': 'Backlog - Status Process for delivery',
+        'filtro': Q_BACKLOG_PRONTO,
+        'contexto': 'backlog_green_count',
+    },
+    'backlog-green': {
+        'nome': 'Backlog (Pronto para entrega)',
+        'filtro': Q_BACKLOG_PRONTO,
+    },
+    'backlog-onhold-sum': {
+        'nome': 'Backlog (Itens com On Hold Times para Somatório)',
+        'filtro': Q_BACKLOG_PRONTO,
+    },
+    'backlog-stuck-hub': {
+        'nome': 'Backlog Agarrado no HUB - Vários dias',
+        'filtro': Q_BACKLOG_AGARRADO,
+        'contexto': 'backlog_red_count',
+    },
+    'backlog-red': {
+        'nome': 'Backlog (On Hold Times > 3)',
+        'filtro': Q_BACKLOG_AGARRADO,
+    },
+    'backlog-not-process': {
+        'nome': "Backlog (Ação não é 'Process for delivery')",
+        'filtro': Q_BACKLOG & ~Q_PROCESS_FOR_DELIVERY,
+        'contexto': 'kpi_not_process_for_delivery',
+    },
+    'backlog-onhold-times-0': {
+        'nome': 'Pacotes Roteirizados mais de uma Vez',
+        'filtro': Q_ONHOLD_MAIOR_ZERO,
+        'contexto': 'backlog_onhold_nonzero_count',
+    },
+    'onhold-gt-zero': {
+        'nome': 'Encomendas com On Hold Times > 0',
+        'filtro': Q_ONHOLD_MAIOR_ZERO,
+        'contexto': 'kpi_onhold_gt_zero',
+    },
+    'expedite-tag-total': {
+        'nome': 'Expedite Tag Total',
+        'filtro': Q(expedite_tag__isnull=False) & ~Q(expedite_tag=''),
+    },
+    'expedite-tag-sim': {
+        'nome': 'Expedite Tag (SIM)',
+        'filtro': Q(expedite_tag__iexact='SIM'),
+    },
+    'expedite-tag-nao': {
+        'nome': 'Expedite Tag (NÃO)',
+        'filtro': ~Q(expedite_tag__iexact='SIM'),
+    },
+    # Cards dinâmicos por Expedite Tag: o valor vem em ?expedite_tag_name=
+    'expedite-tag-detail': {
+        'nome': 'Expedite Tag',
+        'filtro': lambda parametros: Q(expedite_tag=parametros.get('expedite_tag_name', '')),
+    },
+}
+
+
+def filtrar_parcelas(queryset, data_inicio=None, data_fim=None, final_status=None, sort_code=None):
+    """Filtros comuns (período, final status, sort code) do dashboard, detalhe e exportação."""
+    if data_inicio and data_fim:
+        queryset = queryset.filter(data_referencia__range=[data_inicio, data_fim])
+    if final_status:
+        queryset = queryset.filter(final_status__in=final_status)
+    if sort_code:
+        queryset = queryset.filter(sort_code__iexact=sort_code)
+    return queryset
+
+
+def _count_type_do_slug(slug, nome=None):
+    """
+    Cards dinâmicos de Count Type: o slug vem de slugify(count_type).
+    O valor original é procurado no dicionário de valores (sem varrer a tabela);
+    se dois valores têm o mesmo slug ('Backlog' e 'backlog'), vale o ?name= do card.
+    """
+    valores = [valor for valor in valores_distintos(Parcel, 'count_type') if slugify(valor) == slug]
+    if valores:
+        valor = nome if nome in valores else valores[0]
+        return Q(count_type=valor), valor
+    # Valor fora do dicionário: mantém a conversão antiga (ex.: 'soc-lost' -> 'SOC_LOST')
+    return Q(count_type__iexact=slug.replace('-', '_').upper()), slug.replace('-', ' ').title()
+
+
+def filtro_do_slug(slug, parametros=None):
+    """Devolve (Q, nome de exibição) do card identificado pelo slug da URL."""
+    kpi = KPIS.get(slug)
+    if kpi is None:
+        return _count_type_do_slug(slug, (parametros or {}).get('name'))
+    filtro = kpi['filtro']
+    if callable(filtro):
+        filtro = filtro(parametros or {})
+    return filtro, kpi['nome']
+
+
+def calcular_kpis(queryset):
+    """
+    Calcula todos os cards do dashboard numa única consulta:
+    agrupa por (final_status, count_type, expedite_tag) com um Count condicional
+    por card, e soma os grupos em Python (poucas linhas) para os totais e as listas.
+    """
+    cards = {
+        kpi['contexto']: Count('id', filter=kpi['filtro'])
+        for kpi in KPIS.values() if kpi.get('contexto')
+    }
+    # Agrupa pelos códigos inteiros de final_status e count_type (core.dicionario)
+    grupos = list(
+        queryset.order_by()
+        .values('final_status_cod', 'count_type_cod', 'expedite_tag')
+        .annotate(
+            linhas=Count('id'),
+            soma_onhold_backlog=Sum('on_hold_times', filter=Q_BACKLOG_PRONTO),
+            **cards,
+        )
+    )
+
+    resultado = dict.fromkeys(cards, 0)
+    resultado['total_registros'] = 0
+    resultado['backlog_onhold_sum'] = 0
+    por_final_status = Counter()
+    por_count_type = Counter()
+    por_expedite_tag = Counter()
+
+    nomes = rotulos(codigo for grupo in grupos for codigo in (grupo['final_status_cod'], grupo['count_type_cod']))
+    for grupo in grupos:
+        linhas = grupo['linhas']
+        resultado['total_registros'] += linhas
+        resultado['backlog_onhold_sum'] += grupo['soma_onhold_backlog'] or 0
+        for campo in cards:
+            resultado[campo] += grupo[campo]
+
+        # Como Count('campo') no SQL: o grupo nulo aparece, mas com total 0
+        final_status = nomes.get(grupo['final_status_cod'])
+        count_type = nomes.get(grupo['count_type_cod'])
+        expedite_tag = grupo['expedite_tag']
+        por_final_status[final_status] += linhas if final_status is not None else 0
+        por_expedite_tag[expedite_tag] += linhas if expedite_tag is not None else 0
+
+        # Lista de Count Types sem Missing e Lost/Damage (eles têm cards próprios)
+        if (count_type or '').lower() != 'missing' and count_type not in LOST_DAMAGE_VALUES:
+            por_count_type[count_type] += linhas if count_type is not None else 0
+
+    def _lista(contagem, campo):
+        return [{campo: valor, 'total': total} for valor, total in contagem.most_common()]
+
+    resultado['kpis_final_status'] = _lista(por_final_status, 'final_status')
+    resultado['kpis_count_type'] = _lista(por_count_type, 'count_type')
+    resultado['kpis_expedite_tag'] = _lista(por_expedite_tag, 'expedite_tag')
+    return resultado
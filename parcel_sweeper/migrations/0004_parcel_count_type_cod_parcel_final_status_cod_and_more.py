@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_diaarquivado'),
+        ('parcel_sweeper', '0003_alter_parcel_spx_tracking_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parcel',
+            name='count_type_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Count Type)'),
+        ),
+        migrations.AddField(
+            model_name='parcel',
+            name='final_status_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Final Status)'),
+        ),
+        migrations.AddField(
+            model_name='parcel',
+            name='sort_code_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Sort Code)'),
+        ),
+    ]
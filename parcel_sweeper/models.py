@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.conf import settings # Para importar o User
+from core.models import ValorCategorico
 # 🔑 IMPORTAÇÃO NECESSÁRIA
 from django.db.models import UniqueConstraint 
 
@@ -47,6 +48,21 @@ class Parcel(models.Model):
     aging_time = models.CharField(max_length=255, verbose_name="Aging Time", null=True, blank=True)
     scanned_time = models.DateTimeField(verbose_name="Scanned Time", null=True, blank=True)
 
+    # --- Códigos inteiros das colunas categóricas (core.dicionario: gravados no upload,
+    #     usados nos GROUP BY dos dashboards) ---
+    final_status_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Final Status)"
+    )
+    count_type_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Count Type)"
+    )
+    sort_code_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Sort Code)"
+    )
+
     class Meta:
         verbose_name = "Item Parcel"
         verbose_name_plural = "Itens Parcel"
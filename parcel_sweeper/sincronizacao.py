@@ -0,0 +1,64 @@
+# parcel_sweeper/sincronizacao.py
+#
+# Sincronização Lost/Damage -> Parcel Sweeper.
+# O count_type da Parcel recebe o status de perda/avaria MAIS RECENTE registrado
+# em ParcelLost para o mesmo rastreio. Tudo é feito no banco (Subquery por rastreio),
+# e só sobre as parcelas afetadas pelo evento:
+# - novo registro de perda/avaria -> parcelas daquele rastreio;
+# - novo upload do sweeper        -> parcelas da data enviada (o upload sobrescreve o count_type).
+# O count_type entra nos contadores da Logística: as datas (data_referencia) das
+# parcelas alteradas são reconsolidadas em seguida.
+
+from django.db.models import Exists, OuterRef, Subquery
+
+from core.cache import registrar_alteracao
+from core.dicionario import atualizar_codigos, podando
+from logistica.consolidacao import consolidar_datas
+from parcel_lost.models import ParcelLost
+from .models import Parcel
+
+
+def _ultimo_status_lost():
+    """Subquery: status do registro de perda/avaria mais recente do rastreio da linha externa."""
+    return Subquery(
+        ParcelLost.objects
+        .filter(spx_tracking_number=OuterRef('spx_tracking_number'))
+        .order_by('-data_registro_sistema', '-id')
+        .values('final_status_avaria')[:1]
+    )
+
+
+def sincronizar_lost_damage(parcelas=None, consolidar=True):
+    """
+    Aplica o último status Lost/Damage no count_type das parcelas informadas
+    (QuerySet de Parcel; None = tabela inteira). Um único UPDATE; retorna o nº de linhas alteradas.
+    Com consolidar, as datas das parcelas alteradas são reconsolidadas na Logística
+    (sem ele, quem chama consolida as datas por conta própria).
+    """
+    if parcelas is None:
+        parcelas = Parcel.objects.all()
+
+    tem_registro = Exists(ParcelLost.objects.filter(spx_tracking_number=OuterRef('spx_tracking_number')))
+    desatualizadas = parcelas.filter(tem_registro).exclude(count_type=_ultimo_status_lost())
+    datas = set(desatualizadas.order_by().values_list('data_referencia', flat=True).distinct()) if consolidar else set()
+    atualizados = desatualizadas.update(count_type=_ultimo_status_lost())
+    if atualizados:
+        # Os count_type sobrescritos que sumiram da tabela saem do dicionário
+        with podando(parcelas.filter(tem_registro)):
+            atualizar_codigos(parcelas.filter(tem_registro), ['count_type'])
+        registrar_alteracao(Parcel) # Invalida o cache dos dashboards que leem a Parcel
+        consolidar_datas(datas)
+    return atualizados
+
+
+def sincronizar_rastreio(spx_tracking_number):
+    """Evento: novo registro de perda/avaria."""
+    return sincronizar_lost_damage(Parcel.objects.filter(spx_tracking_number=spx_tracking_number))
+
+
+def sincronizar_upload(data_referencia):
+    """
+    Evento: upload do sweeper (as linhas da data voltaram com o count_type do arquivo).
+    O upload consolida a data logo depois.
+    """
+    return sincronizar_lost_damage(Parcel.objects.filter(data_referencia=data_referencia), consolidar=False)
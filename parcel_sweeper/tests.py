@@ -1,3 +1,91 @@
+import csv
+import io
+from datetime import date
+from itertools import product
+
+from django.contrib.auth import get_user_model
+from django.template.defaultfilters import slugify
 from django.test import TestCase
+from django.urls import reverse
+
+from core.dicionario import aplicar_codigos
+from core.testing import CasoOrcamento
+
+from .kpis import KPIS
+from .models import Parcel
+
+
+class OrcamentoViewsParcelTest(CasoOrcamento):
+    """Consultas por view do Parcel Sweeper (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        # Todos os cards saem de uma consulta agrupada (parcel_sweeper.kpis.calcular_kpis)
+        'dashboard_parcel': {'url': 'parcel_sweeper:dashboard', 'consultas': 5, 'tempo_sql_s': 0.5},
+        'parcel_detail_list': {'url': 'parcel_sweeper:detail_list', 'args': ['backlog-total'], 'consultas': 4},
+        'parcel_status_detail_list': {
+            'url': 'parcel_sweeper:status_detail_list', 'args': ['onhold'], 'consultas': 3,
+        },
+    }
+
+
+class CardsDetalheTest(TestCase):
+    """Cada card do dashboard tem o mesmo número de linhas da lista de detalhe e do CSV exportado."""
+
+    DIA = date(2031, 1, 1)
+    FILTROS = {'data_inicio': '2031-01-01', 'data_fim': '2031-01-01'}
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('cards', password='cards'))
+        combinacoes = product(
+            ['Backlog', 'backlog', 'Missing', 'SOC_LOST', 'HUB_DAMAGE', 'Found', None],
+            ['LMHub_Received', 'Return_LMHub_Received', 'Delivered', None],
+            ['Process for delivery', 'Return to seller', None],
+            [0, 2, 5, None],
+            ['SIM', 'NAO', '', None],
+        )
+        parcelas = [
+            Parcel(
+                data_referencia=self.DIA, spx_tracking_number=f'BR{i}', count_type=count_type,
+                final_status=final_status, next_step_action=acao, on_hold_times=vezes, expedite_tag=tag,
+                sort_code='SC1' if i % 2 else 'SC2',
+            )
+            for i, (count_type, final_status, acao, vezes, tag) in enumerate(combinacoes)
+        ]
+        # Mesmo slug de 'Backlog', com outro total: o card leva o valor em ?name=
+        parcelas += [Parcel(data_referencia=self.DIA, spx_tracking_number=f'BR-b{i}', count_type='backlog') for i in range(3)]
+        # Fora do período: não pode aparecer em nenhum dos três
+        parcelas.append(Parcel(data_referencia=date(2030, 12, 31), spx_tracking_number='BR-fora', count_type='Backlog'))
+        aplicar_codigos(Parcel, parcelas)
+        Parcel.objects.bulk_create(parcelas)
+
+    def _linhas(self, slug, parametros):
+        detalhe = self.client.get(reverse('parcel_sweeper:detail_list', args=[slug]), parametros)
+        exportado = self.client.get(reverse('parcel_sweeper:export_csv'), {**parametros, 'count_type_slug': slug})
+        linhas_csv = list(csv.reader(io.StringIO(exportado.content.decode())))[1:]  # Sem o cabeçalho
+        return detalhe.context['total_registros'], len(linhas_csv)
+
+    def _conferir(self, filtros):
+        contexto = self.client.get(reverse('parcel_sweeper:dashboard'), filtros).context
+        # (slug, total do card, parâmetros do link do card)
+        cards = [('total-registros', contexto['total_registros'], {})]
+        cards += [(slug, contexto[kpi['contexto']], {}) for slug, kpi in KPIS.items() if kpi.get('contexto')]
+        # Cards dinâmicos de Count Type e Expedite Tag (só os que o template exibe)
+        cards += [
+            (slugify(kpi['count_type']), kpi['total'], {'name': kpi['count_type']})
+            for kpi in contexto['kpis_count_type'] if kpi['count_type']
+        ]
+        cards += [
+            ('expedite-tag-detail', kpi['total'], {'expedite_tag_name': kpi['expedite_tag']})
+            for kpi in contexto['kpis_expedite_tag'] if kpi['expedite_tag']
+        ]
+
+        self.assertGreater(contexto['total_registros'], 0)
+        for slug, total, extras in cards:
+            with self.subTest(card=slug, extras=extras, filtros=filtros):
+                self.assertEqual(self._linhas(slug, {**filtros, **extras}), (total, total))
+
+    def test_cards_batem_com_detalhe_e_csv(self):
+        self._conferir(self.FILTROS)
 
-# Create your tests here.
+    def test_com_filtros_de_status_e_sort_code(self):
+        self._conferir({**self.FILTROS, 'final_status': ['LMHub_Received', 'Delivered'], 'sort_code': 'SC1'})
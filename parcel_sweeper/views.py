@@ -7,7 +7,6 @@ from django.urls import reverse
 from datetime import datetime, timedelta, date
 from django.utils import timezone 
 from django.db import IntegrityError 
-from django.db.models import Count, Q, Sum 
 from django.core.paginator import Paginator
 from django.template.defaultfilters import slugify
 from django.http import HttpResponse 
@@ -17,9 +16,13 @@ from django.db import transaction
 
 from .forms import UploadParcelForm, ParcelFilterForm 
 from .models import Parcel
+from .kpis import calcular_kpis, filtrar_parcelas, filtro_do_slug
+from .sincronizacao import sincronizar_lost_damage, sincronizar_upload
+from logistica.consolidacao import consolidar_dia
+from core.dicionario import atualizar_codigos, codigos_adiados, podando
+from core.cache import resultado_em_cache, registrar_alteracao
+from core.particoes import garantir_particao
 
-# 🔑 IMPORTAÇÃO NECESSÁRIA: Importa o modelo de outro app
-from parcel_lost.models import ParcelLost 
 
 
 # Mapeamento das colunas do CSV para os campos do modelo
@@ -63,79 +66,90 @@ def upload_parcel(request):
             registros_criados = 0
             registros_atualizados = 0
             registros_ignorados = 0 
+            garantir_particao(Parcel, data_referencia) # PostgreSQL: as linhas do dia vão direto para a partição dele
             
-            for row in reader:
+            # Linha a linha (update_or_create): os códigos das colunas categóricas são
+            # gravados de uma vez no final, para as linhas do dia
+            with codigos_adiados():
+                for row in reader:
                 
-                # Obtém o valor limpo para o campo chave
-                spx_tracking_number_value = row.get('SPX Tracking Number', '').strip()
+                    # Obtém o valor limpo para o campo chave
+                    spx_tracking_number_value = row.get('SPX Tracking Number', '').strip()
                 
-                # Ignora linhas sem o campo chave
-                if not spx_tracking_number_value:
-                    registros_ignorados += 1
-                    continue
+                    # Ignora linhas sem o campo chave
+                    if not spx_tracking_number_value:
+                        registros_ignorados += 1
+                        continue
                 
-                try:
-                    row_data = {}
-                    for csv_field, model_field in COLUNA_MODELO_MAP.items():
+                    try:
+                        row_data = {}
+                        for csv_field, model_field in COLUNA_MODELO_MAP.items():
                         
-                        # OBTÉM O VALOR, GARANTE STRING E REMOVE ESPAÇOS EXTERNOS
-                        value = str(row.get(csv_field, '')).strip() 
+                            # OBTÉM O VALOR, GARANTE STRING E REMOVE ESPAÇOS EXTERNOS
+                            value = str(row.get(csv_field, '')).strip() 
                         
-                        if model_field == 'scanned_time':
-                            # CORREÇÃO DO ERRO DE DATETIME: Limpeza agressiva de aspas vazias
-                            if value:
-                                cleaned_datetime_str = value.replace('"', '').replace('“', '').replace('”', '').strip()
-
-                                if cleaned_datetime_str:
-                                    try:
-                                        naive_datetime = datetime.strptime(cleaned_datetime_str, '%Y-%m-%d %H:%M:%S')
-                                        row_data[model_field] = timezone.make_aware(naive_datetime)
-                                    except ValueError:
-                                        row_data[model_field] = None
+                            if model_field == 'scanned_time':
+                                # CORREÇÃO DO ERRO DE DATETIME: Limpeza agressiva de aspas vazias
+                                if value:
+                                    cleaned_datetime_str = value.replace('"', '').replace('“', '').replace('”', '').strip()
+
+                                    if cleaned_datetime_str:
+                                        try:
+                                            naive_datetime = datetime.strptime(cleaned_datetime_str, '%Y-%m-%d %H:%M:%S')
+                                            row_data[model_field] = timezone.make_aware(naive_datetime)
+                                        except ValueError:
+                                            row_data[model_field] = None
+                                    else:
+                                        row_data[model_field] = None 
                                 else:
                                     row_data[model_field] = None 
-                            else:
-                                row_data[model_field] = None 
                         
-                        elif model_field == 'on_hold_times':
-                            try:
-                                row_data[model_field] = int(value) if value else 0
-                            except ValueError:
-                                row_data[model_field] = 0
+                            elif model_field == 'on_hold_times':
+                                try:
+                                    row_data[model_field] = int(value) if value else 0
+                                except ValueError:
+                                    row_data[model_field] = 0
                         
-                        else:
-                            # Atribui os demais campos
-                            row_data[model_field] = value
+                            else:
+                                # Atribui os demais campos
+                                row_data[model_field] = value
                     
-                    # Define os campos de controle antes de chamar update_or_create
-                    # O campo 'data_referencia' é crucial para a chave composta.
-                    row_data['data_referencia'] = data_referencia
-                    row_data['usuario_upload'] = request.user
+                        # Define os campos de controle antes de chamar update_or_create
+                        # O campo 'data_referencia' é crucial para a chave composta.
+                        row_data['data_referencia'] = data_referencia
+                        row_data['usuario_upload'] = request.user
                     
-                    # 🔑 CHAVE COMPOSTA: Usa spx_tracking_number e data_referencia para buscar/atualizar
-                    obj, created = Parcel.objects.update_or_create(
-                        spx_tracking_number=spx_tracking_number_value, # Chave 1
-                        data_referencia=data_referencia,               # Chave 2 (Data do Formulário)
+                        # 🔑 CHAVE COMPOSTA: Usa spx_tracking_number e data_referencia para buscar/atualizar
+                        obj, created = Parcel.objects.update_or_create(
+                            spx_tracking_number=spx_tracking_number_value, # Chave 1
+                            data_referencia=data_referencia,               # Chave 2 (Data do Formulário)
                         
-                        # O defaults precisa receber TODOS os campos, exceto os usados acima
-                        defaults={
-                            k: v for k, v in row_data.items() 
-                            if k not in ['spx_tracking_number', 'data_referencia']
-                        }
-                    )
+                            # O defaults precisa receber TODOS os campos, exceto os usados acima
+                            defaults={
+                                k: v for k, v in row_data.items() 
+                                if k not in ['spx_tracking_number', 'data_referencia']
+                            }
+                        )
                     
-                    if created:
-                        registros_criados += 1
-                    else:
-                        registros_atualizados += 1
+                        if created:
+                            registros_criados += 1
+                        else:
+                            registros_atualizados += 1
                         
-                except IntegrityError as e:
-                    # Este erro agora só deve ocorrer se os dados forem inseridos
-                    # fora do upload e violarem a nova restrição.
-                    messages.error(request, f"Erro de Integridade ao processar {spx_tracking_number_value}: {e}")
-                except Exception as e:
-                    messages.error(request, f"Erro inesperado ao processar a encomenda {spx_tracking_number_value}: {e}")
+                    except IntegrityError as e:
+                        # Este erro agora só deve ocorrer se os dados forem inseridos
+                        # fora do upload e violarem a nova restrição.
+                        messages.error(request, f"Erro de Integridade ao processar {spx_tracking_number_value}: {e}")
+                    except Exception as e:
+                        messages.error(request, f"Erro inesperado ao processar a encomenda {spx_tracking_number_value}: {e}")
             
+            with podando(Parcel.objects.filter(data_referencia=data_referencia)): # Valores sobrescritos saem do dicionário
+                atualizar_codigos(Parcel.objects.filter(data_referencia=data_referencia))
+            registrar_alteracao(Parcel) # Invalida o cache dos dashboards que leem a Parcel
+            # O arquivo sobrescreve o count_type: reaplica Lost/Damage só nas linhas desta data
+            sincronizar_upload(data_referencia)
+            consolidar_dia(data_referencia) # Atualiza os Dados Diários de Logística da data
+
             messages.success(request, 
                 f"Upload concluído! "
                 f"Criados: {registros_criados}, "
@@ -158,51 +172,13 @@ def upload_parcel(request):
 
 def update_parcel_statuses_from_lost():
     """
-    Sincroniza o campo 'count_type' da tabela Parcel com o status de perda/avaria 
-    (final_status_avaria) da tabela ParcelLost, para os rastreios encontrados 
-    em ParcelLost.
+    Sincronização COMPLETA do 'count_type' da tabela Parcel com o status de perda/avaria
+    mais recente (final_status_avaria) da tabela ParcelLost.
+    No dia a dia ela não é necessária: o registro de perda/avaria e o upload do sweeper
+    já sincronizam só os rastreios afetados (ver parcel_sweeper/sincronizacao.py).
+    Fica como reparo manual (botão 'run_status_update').
     """
-    updated_count = 0
-    
-    # 1. Obtém todos os registros de perda/avaria e mapeia rastreio -> status mais recente
-    lost_records = ParcelLost.objects.all().order_by('spx_tracking_number', '-data_registro_sistema')
-    
-    lost_map = {}
-    for record in lost_records:
-        # Garante que, para cada rastreio, o último registro (mais recente) seja usado
-        if record.spx_tracking_number not in lost_map:
-             lost_map[record.spx_tracking_number] = record.final_status_avaria
-    
-    tracking_numbers_to_update = lost_map.keys()
-    
-    if not tracking_numbers_to_update:
-        return 0
-
-    # 2. Lista dos valores que indicam perda/avaria
-    lost_damage_values = [choice[0] for choice in ParcelLost.STATUS_CHOICES]
-    
-    # 3. Filtra os registros em Parcel que precisam ser atualizados
-    parcels_to_update = list(Parcel.objects.filter(
-        spx_tracking_number__in=tracking_numbers_to_update,
-    ).exclude(
-        count_type__in=lost_damage_values # Exclui registros já atualizados
-    ))
-    
-    updates = []
-    for parcel in parcels_to_update:
-        new_count_type = lost_map.get(parcel.spx_tracking_number)
-        
-        # A atualização só ocorre se o novo valor for diferente do existente
-        if new_count_type and parcel.count_type != new_count_type:
-            parcel.count_type = new_count_type
-            updates.append(parcel)
-    
-    if updates:
-        # Executa a atualização em lote dos objetos modificados
-        Parcel.objects.bulk_update(updates, ['count_type'])
-        updated_count = len(updates)
-            
-    return updated_count
+    return sincronizar_lost_damage()
 
 
 @login_required
@@ -254,23 +230,10 @@ def dashboard_parcel(request):
         data_fim_obj = form.fields['data_fim'].initial
 
 
-    # Queryset base
-    queryset = Parcel.objects.all()
-    
-    # 1b. Aplicar filtros de Seleção
-    
-    # Filtra apenas se as duas datas existirem
-    if data_inicio_obj and data_fim_obj: 
-        queryset = queryset.filter(
-            data_referencia__range=[data_inicio_obj, data_fim_obj]
-        )
-        
-    if final_status_list:
-        # Usa __in para filtrar por múltiplos status
-        queryset = queryset.filter(final_status__in=final_status_list)
-        
-    if sort_code:
-        queryset = queryset.filter(sort_code__iexact=sort_code)
+    # Queryset base + filtros de Seleção (os mesmos do detalhe e da exportação)
+    queryset = filtrar_parcelas(
+        Parcel.objects.all(), data_inicio_obj, data_fim_obj, final_status_list, sort_code
+    )
         
     base_queryset = queryset # Renomeado para clareza no cálculo dos KPIs
         
@@ -299,112 +262,25 @@ def dashboard_parcel(request):
 
     
     # 2. Cálculo dos KPIs
-    
-    # KPI 1: Total de Registros
-    total_registros = base_queryset.count()
-
-    # KPI 2: Total por Final Status (Estático)
-    kpis_final_status = base_queryset.values('final_status').annotate(total=Count('final_status')).order_by('-total')
-
-    # NOVO KPI: Total de Perdas e Avarias (Lost/Damage) sincronizadas 🔑
-    # Valores de Count Type usados pela função de sincronização (ParcelLost.STATUS_CHOICES)
-    lost_damage_kpi_values = [
-        'SOC_LOST', 'SOC_DAMAGE', 'HUB_LOST', 'HUB_DAMAGE'
-    ]
-    lost_parcels_count = base_queryset.filter(
-        count_type__in=lost_damage_kpi_values
-    ).count()
-
-
-    # NOVO KPI: Missing no HUB (Count Type = Missing E Final Status = LMHub_Received) -> Amarelo
-    kpi_missing_hub = base_queryset.filter(
-        Q(count_type__iexact='Missing') & Q(final_status__iexact='LMHub_Received')
-    ).count()
-
-    # KPI Modificado: Missing (Não recebidos no HUB) - Count Type = Missing E Final Status != LMHub_Received
-    missing_nao_hub_count = base_queryset.filter(
-        Q(count_type__iexact='Missing') & ~Q(final_status__iexact='LMHub_Received')
-    ).count()
-    
-    # 🔑 NOVO KPI 1: Backlog diferente de "Process for delivery" (em count_type)
-    # CORREÇÃO LÓGICA: Conta registros em BACKLOG onde a ação NÃO é 'Process for delivery'.
-    kpi_not_process_for_delivery = base_queryset.filter(
-        count_type__iexact='Backlog'
-    ).exclude(
-        next_step_action__iexact='Process for delivery'
-    ).count()
-
-    # 🔑 NOVO KPI 2: Quantidade de registros onde OnHold Times > 0 (KPI GERAL, usa base_queryset)
-    kpi_onhold_gt_zero = base_queryset.filter(
-        on_hold_times__gt=0
-    ).count()
-
-    # Queryset principal para Count Type, EXCLUINDO 'Missing' E Lost/Damage para não duplicar os novos cards 🔑
-    # O Count Type deve conter tudo que não é 'Missing' E não é um status de Lost/Damage
-    kpis_count_type = base_queryset.exclude(
-        Q(count_type__iexact='Missing') | Q(count_type__in=lost_damage_kpi_values)
-    ).values('count_type').annotate(total=Count('count_type')).order_by('-total')
-
-
-    # KPI 4: KPI Específico de Backlog (Lógica de cor condicional)
-    backlog_queryset = base_queryset.filter(count_type__iexact='Backlog')
-    
-    # Backlog Total
-    backlog_total = backlog_queryset.count()
-    
-    # Cor de Fundo VERDE: Backlog: Process for delivery (CORRIGIDO)
-    # Lógica: Count Type = 'Backlog' E Next Step Action = 'Process for delivery' E 
-    #         (Final Status = 'LMHub_Received' OU Final Status = 'Return_LMHub_Received')
-    backlog_green_count = backlog_queryset.filter(
-        Q(next_step_action__iexact='Process for delivery'),
-        Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-    ).count()
-
-    # Cor de Fundo VERMELHO: On Hold Times > 3
-    backlog_red_count = backlog_queryset.filter(
-        on_hold_times__gt=3
-    ).count()
-
-    # Soma de On Hold Times (útil para métricas) - Usa a mesma lógica do KPI 'verde'
-    backlog_onhold_sum_queryset = backlog_queryset.filter(
-        Q(next_step_action__iexact='Process for delivery'),
-        Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-    )
-    backlog_onhold_sum = backlog_onhold_sum_queryset.aggregate(total_onhold=Sum('on_hold_times'))['total_onhold'] or 0
-    
-    # Pacotes Roteirizados mais de uma Vez (On Hold Times > 0)
-    backlog_onhold_nonzero_count = base_queryset.filter(on_hold_times__gt=0).count()
-
-
-    # KPI 5: Total por Expedite Tag
-    kpis_expedite_tag = base_queryset.values('expedite_tag').annotate(total=Count('expedite_tag')).order_by('-total')
+    # 💡 Em cache: a chave leva os filtros resolvidos (inclusive o período padrão)
+    #    e a versão da tabela Parcel, incrementada no upload e na sincronização Lost/Damage.
+    #    Todos os cards saem de uma única consulta (ver parcel_sweeper/kpis.py).
+    def calcular():
+        return calcular_kpis(base_queryset)
+
+    filtros_cache = {
+        'data_inicio': data_inicio_obj,
+        'data_fim': data_fim_obj,
+        'final_status': list(final_status_list or []),
+        'sort_code': sort_code,
+    }
+    kpis = resultado_em_cache('dashboard_parcel', filtros_cache, [Parcel], calcular)
 
     context = {
         'form': form,
-        'total_registros': total_registros,
-        'kpis_final_status': kpis_final_status,
-        
-        # Lista dos Count Types (sem o Missing e Lost/Damage)
-        'kpis_count_type': kpis_count_type,
-        
-        # Novo KPI: Total de Perdas/Avarias 🔑
-        'lost_parcels_count': lost_parcels_count, 
 
-        # Novos KPIs de Missing adicionados
-        'kpi_missing_hub': kpi_missing_hub,
-        'missing_nao_hub_count': missing_nao_hub_count,
-        
-        # INCLUSÃO DOS NOVOS KPIS
-        'kpi_not_process_for_delivery': kpi_not_process_for_delivery,
-        'kpi_onhold_gt_zero': kpi_onhold_gt_zero,
-        
-        'backlog_total': backlog_total,
-        'backlog_onhold_sum': backlog_onhold_sum,
-        'backlog_green_count': backlog_green_count, # AGORA CORRETO
-        'backlog_red_count': backlog_red_count,
-        'backlog_onhold_nonzero_count': backlog_onhold_nonzero_count, # Adicionado
-        
-        'kpis_expedite_tag': kpis_expedite_tag,
+        # KPIs (total, final status, count type, missing, backlog, expedite tag)
+        **kpis,
         
         # Parâmetros de filtro para persistência no template
         'filter_params': filter_params,
@@ -430,115 +306,28 @@ def export_parcel_csv(request):
     count_type_slug = request.GET.get('count_type_slug') # Parâmetro do KPI de detalhe
     status_detail_slug = request.GET.get('status_detail_slug') # Parâmetro do Final Status de detalhe
     
-    queryset = Parcel.objects.all()
-
-    # 2. Aplicar Filtros de Data
-    if data_inicio_str and data_fim_str:
-        try:
-            # Converte a data de início para um objeto date (inclusivo)
-            data_inicio_date = datetime.strptime(data_inicio_str, '%Y-%m-%d').date() 
-            # Converte a data de fim para um objeto date e adiciona 1 dia para incluir o último dia
-            data_fim_date = datetime.strptime(data_fim_str, '%Y-%m-%d').date() 
-            
-            queryset = queryset.filter(
-                data_referencia__range=[data_inicio_date, data_fim_date]
-            )
-        except ValueError:
-            # Ignora o filtro de data se a conversão falhar
-            pass
-            
-    # 3. Aplicar filtro de Final Status (AJUSTE NO FILTRO)
-    if final_status_list:
-        # Usa __in para filtrar por múltiplos status
-        queryset = queryset.filter(final_status__in=final_status_list)
-        
-    # 4. Aplicar filtro de Sort Code
-    if sort_code:
-        queryset = queryset.filter(sort_code__iexact=sort_code)
-
-    # 5. Aplicar Filtro de Detalhe por Count Type
+    # 2. Filtros comuns (período, final status, sort code), os mesmos do dashboard
+    try:
+        data_inicio_date = datetime.strptime(data_inicio_str, '%Y-%m-%d').date() if data_inicio_str else None
+        data_fim_date = datetime.strptime(data_fim_str, '%Y-%m-%d').date() if data_fim_str else None
+    except ValueError:
+        # Ignora o filtro de data se a conversão falhar
+        data_inicio_date = data_fim_date = None
+    queryset = filtrar_parcelas(Parcel.objects.all(), data_inicio_date, data_fim_date, final_status_list, sort_code)
+
+    # 3. Aplicar Filtro de Detalhe por Count Type
+    # 🔑 Mesmo Q do card/detalhe (registro em parcel_sweeper/kpis.py)
     if count_type_slug:
-        # A lógica detalhada (que está em views.py) deve ser copiada aqui para garantir que 
-        # o queryset de exportação seja o mesmo do detalhe da lista.
-        
-        # NOVO: Filtro para o KPI Total de Registros (Nenhum filtro adicional)
-        if count_type_slug == 'total-registros':
-            pass # Já está filtrado por data/sort_code
-            
-        # NOVO: Filtro para o KPI Backlog Total
-        elif count_type_slug == 'backlog-total':
-            queryset = queryset.filter(count_type__iexact='Backlog')
-            
-        # NOVO: Filtro para Backlog (Process for Delivery) - CORRIGIDO
-        elif count_type_slug == 'backlog-process-for-delivery' or count_type_slug == 'backlog-green':
-            queryset = queryset.filter(
-                Q(count_type__iexact='Backlog'),
-                Q(next_step_action__iexact='Process for delivery'),
-                # Filtro OU (OR) para LMHub_Received e Return_LMHub_Received
-                Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-            )
-            
-        # NOVO: Filtro para Backlog Agarrado no HUB (Red Count)
-        elif count_type_slug == 'backlog-stuck-hub' or count_type_slug == 'backlog-red':
-            queryset = queryset.filter(
-                count_type__iexact='Backlog',
-                on_hold_times__gt=3
-            )
-        
-        # NOVO: Filtro para Pacotes Roteirizados mais de uma Vez
-        elif count_type_slug == 'backlog-onhold-times-0':
-             queryset = queryset.filter(on_hold_times__gt=0)
+        filtro_kpi, _ = filtro_do_slug(count_type_slug, request.GET)
+        queryset = queryset.filter(filtro_kpi)
             
-        # Filtro para o KPI de Perdas/Avarias (Lost/Damage)
-        elif count_type_slug == 'lost-damage':
-            lost_damage_kpi_values = ['SOC_LOST', 'SOC_DAMAGE', 'HUB_LOST', 'HUB_DAMAGE']
-            queryset = queryset.filter(count_type__in=lost_damage_kpi_values)
-
-        # Filtro para Missing no HUB
-        elif count_type_slug == 'missing-no-hub':
-            queryset = queryset.filter(
-                Q(count_type__iexact='Missing') & Q(final_status__iexact='LMHub_Received')
-            )
-
-        # Filtro para Missing Não Recebido no HUB
-        elif count_type_slug == 'missing-nao-recebidos-no-hub':
-            queryset = queryset.filter(
-                Q(count_type__iexact='Missing') & ~Q(final_status__iexact='LMHub_Received')
-            )
-
-        # Filtro para Backlog (Not Process for Delivery)
-        elif count_type_slug == 'backlog-not-process':
-            queryset = queryset.filter(
-                count_type__iexact='Backlog'
-            ).exclude(
-                next_step_action__iexact='Process for delivery'
-            )
-
-        # Filtro para On Hold Times > 0
-        elif count_type_slug == 'onhold-gt-zero':
-            queryset = queryset.filter(on_hold_times__gt=0)
-
-        # Filtro para Backlog (Soma OnHold times > 0)
-        elif count_type_slug == 'backlog-onhold-sum':
-            queryset = queryset.filter(
-                Q(count_type__iexact='Backlog'),
-                Q(next_step_action__iexact='Process for delivery'),
-                Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-            )
-            
-        # Filtro padrão para outros Count Types
-        else: 
-            # Tenta filtrar pelo Count Type exato
-            count_type_name = count_type_slug.replace('-', ' ').title().replace(' ', '')
-            queryset = queryset.filter(count_type__iexact=count_type_name)
-            
-    # 6. Aplicar Filtro de Detalhe por Final Status (se houver um slug de final status)
+    # 4. Aplicar Filtro de Detalhe por Final Status (se houver um slug de final status)
     if status_detail_slug:
         # Final Status
         final_status_name = status_detail_slug.replace('-', ' ').title()
         queryset = queryset.filter(final_status__iexact=final_status_name)
             
-    # 7. Prepara o arquivo CSV
+    # 5. Prepara o arquivo CSV
     # Cria o objeto HttpResponse do tipo csv
     nome_arquivo = f"parcel_sweeper_export_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
     response = HttpResponse(content_type='text/csv')
@@ -593,177 +382,26 @@ def parcel_detail_list(request, count_type_slug):
         # Fallback para o caso de erro de validação (ex: data inválida)
         final_status_list = request.GET.getlist('final_status')
     
-    # Queryset base
-    queryset = Parcel.objects.all()
-    count_type_name = ''
+    # 2. Filtros comuns (período, final status, sort code), os mesmos do dashboard
+    try:
+        data_inicio_date = datetime.strptime(data_inicio_str, '%Y-%m-%d').date() if data_inicio_str else None
+        data_fim_date = datetime.strptime(data_fim_str, '%Y-%m-%d').date() if data_fim_str else None
+    except ValueError:
+        data_inicio_date = data_fim_date = None
+    queryset = filtrar_parcelas(Parcel.objects.all(), data_inicio_date, data_fim_date, final_status_list, sort_code)
 
-    # 2. Aplicar filtros de data (Se forem válidos)
-    if data_inicio_str and data_fim_str:
-        try:
-            data_inicio_date = datetime.strptime(data_inicio_str, '%Y-%m-%d').date()
-            data_fim_date = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
-            queryset = queryset.filter(
-                data_referencia__range=[data_inicio_date, data_fim_date]
-            )
-        except ValueError:
-            pass
-            
-    # 3. Aplicar filtro adicional de Sort Code
-    if sort_code:
-        queryset = queryset.filter(sort_code__iexact=sort_code)
-
-    # Aplicar filtro adicional de Final Status
-    if final_status_list:
-        # Usa __in para filtrar por múltiplos status
-        queryset = queryset.filter(final_status__in=final_status_list)
-
-
-    # 4. Aplicar Filtro do Slug (Count Type / KPI)
-
-    # Lista de Count Types que representam Lost/Damage (Valores do DB)
-    lost_damage_kpi_values = ['SOC_LOST', 'SOC_DAMAGE', 'HUB_LOST', 'HUB_DAMAGE']
-    
-    # --- FILTROS DE KPIS GERAIS E BACKLOG AJUSTADOS ---
-    
-    # NOVO: Total de Registros (SLUG: total-registros)
-    if count_type_slug == 'total-registros':
-        # Não aplica filtro adicional, retorna o queryset base filtrado por data/sort_code
-        count_type_name = request.GET.get('name', "Total de Registros")
-        
-    # Corrigido/Ajustado: Backlog Total (SLUG: backlog-total)
-    elif count_type_slug == 'backlog-total': 
-        # Filtra por todos os itens classificados como 'Backlog'
-        queryset = queryset.filter(count_type__iexact='Backlog')
-        count_type_name = request.GET.get('name', "Backlog Total Registrado")
-        
-    # **CORRIGIDO** Filtro: Backlog - Status Process for delivery (SLUG: backlog-process-for-delivery)
-    elif count_type_slug == 'backlog-process-for-delivery':
-        # AJUSTADO: Inclui a condição de Final Status para LMHub_Received OU Return_LMHub_Received
-        queryset = queryset.filter(
-            Q(count_type__iexact='Backlog'),
-            Q(next_step_action__iexact='Process for delivery'),
-            Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-        )
-        count_type_name = request.GET.get('name', "Backlog - Status Process for delivery")
-
-    # **CORRIGIDO** Filtro: Backlog Agarrado no HUB - Vários dias (SLUG: backlog-stuck-hub)
-    elif count_type_slug == 'backlog-stuck-hub':
-        queryset = queryset.filter(
-            count_type__iexact='Backlog',
-            on_hold_times__gt=3
-        )
-        count_type_name = request.GET.get('name', "Backlog Agarrado no HUB - Vários dias")
-        
-    # **NOVO/CORRIGIDO** Filtro: Pacotes Roteirizados mais de uma Vez (SLUG: backlog-onhold-times-0)
-    elif count_type_slug == 'backlog-onhold-times-0':
-        # Lógica: Pacotes com OnHold Times > 0 (Roteirizados mais de uma vez)
-        queryset = queryset.filter(on_hold_times__gt=0)
-        count_type_name = request.GET.get('name', "Pacotes Roteirizados mais de uma Vez")
-        
-    # --- LOST/DAMAGE & MISSING (Mantidos no fluxo original) ---
-
-    # Filtro 4.1: Lost & Damage Total (SLUG: lost-damage)
-    elif count_type_slug == 'lost-damage': 
-        queryset = queryset.filter(count_type__in=lost_damage_kpi_values)
-        count_type_name = request.GET.get('name', "Perdas e Avarias (Lost/Damage)")
-            
-    # Filtro 4.2: Missing no HUB (SLUG: missing-no-hub)
-    elif count_type_slug == 'missing-no-hub':
-        queryset = queryset.filter(
-            Q(count_type__iexact='Missing') & Q(final_status__iexact='LMHub_Received')
-        )
-        count_type_name = request.GET.get('name', "Missing no HUB")
-        
-    # Filtro 4.3: Missing Não Recebido no HUB (SLUG: missing-nao-recebidos-no-hub)
-    elif count_type_slug == 'missing-nao-recebidos-no-hub':
-        queryset = queryset.filter(
-            Q(count_type__iexact='Missing') & 
-            ~Q(final_status__iexact='LMHub_Received') &
-            ~Q(count_type__in=lost_damage_kpi_values) 
-        )
-        count_type_name = request.GET.get('name', "Missing Não Recebidos no HUB")
-            
-    
-    # --- EXPEDITE TAG ---
-    # 🔑 NOVO FILTRO 4.4: Expedite Tag Total (SLUG: expedite-tag-total) 🔑
-    elif count_type_slug == 'expedite-tag-total': 
-        # Filtra por pacotes que possuem Expedite Tag (não nula e não vazia)
-        queryset = queryset.filter(expedite_tag__isnull=False).exclude(expedite_tag__exact='')
-        count_type_name = request.GET.get('name', "Expedite Tag Total")
-
-    # Filtro 4.5: Expedite Tag SIM (SLUG: expedite-tag-sim)
-    elif count_type_slug == 'expedite-tag-sim':
-        queryset = queryset.filter(expedite_tag__iexact='SIM')
-        count_type_name = request.GET.get('name', "Expedite Tag (SIM)")
-
-    # Filtro 4.6: Expedite Tag NÃO (SLUG: expedite-tag-nao)
-    elif count_type_slug == 'expedite-tag-nao':
-        # Exclui os que são 'SIM' (incluindo Nulo, vazio, ou outros valores)
-        queryset = queryset.exclude(expedite_tag__iexact='SIM')
-        count_type_name = request.GET.get('name', "Expedite Tag (NÃO)")
-
-    # --- BACKLOG (Slugs Antigos Mantidos por compatibilidade, apontam para a mesma lógica) ---
-    
-    # Filtro 4.8: Backlog (Not Process for Delivery) (SLUG: backlog-not-process)
-    elif count_type_slug == 'backlog-not-process':
-        queryset = queryset.filter(
-            count_type__iexact='Backlog'
-        ).exclude(
-            next_step_action__iexact='Process for delivery'
-        )
-        count_type_name = "Backlog (Ação não é 'Process for delivery')"
-            
-    # Filtro 4.9: On Hold Times > 0 (SLUG: onhold-gt-zero)
-    elif count_type_slug == 'onhold-gt-zero':
-        # Usa a mesma lógica que "Pacotes Roteirizados mais de uma Vez"
-        queryset = queryset.filter(on_hold_times__gt=0)
-        count_type_name = "Encomendas com On Hold Times > 0"
-        
-    # Filtro 4.10: Backlog (Green Count) (SLUG: backlog-green)
-    elif count_type_slug == 'backlog-green':
-        # Usa a mesma lógica que 'backlog-process-for-delivery' - AGORA CORRETO
-        queryset = queryset.filter(
-            Q(count_type__iexact='Backlog'),
-            Q(next_step_action__iexact='Process for delivery'),
-            Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-        )
-        count_type_name = "Backlog (Pronto para entrega)"
-        
-    # Filtro 4.11: Backlog (Red Count) (SLUG: backlog-red)
-    elif count_type_slug == 'backlog-red':
-        # Usa a mesma lógica que 'backlog-stuck-hub'
-        queryset = queryset.filter(
-            count_type__iexact='Backlog',
-            on_hold_times__gt=3
-        )
-        count_type_name = "Backlog (On Hold Times > 3)"
-        
-    # Filtro 4.12: Backlog (Soma OnHold times > 0) (SLUG: backlog-onhold-sum)
-    elif count_type_slug == 'backlog-onhold-sum':
-        queryset = queryset.filter(
-            Q(count_type__iexact='Backlog'),
-            Q(next_step_action__iexact='Process for delivery'),
-            Q(final_status__iexact='LMHub_Received') | Q(final_status__iexact='Return_LMHub_Received')
-        )
-        count_type_name = "Backlog (Itens com On Hold Times para Somatório)"
-
-    # Filtro padrão para outros Count Types (e.g., 'Backlog')
-    else:
-        # Converte o slug de volta para o nome do Count Type
-        db_name = count_type_slug.replace('-', '_').upper()
-        # Tenta pegar o nome de exibição da URL
-        if not count_type_name:
-             count_type_name = request.GET.get('name', count_type_slug.replace('-', ' ').title())
-        
-        queryset = queryset.filter(count_type__iexact=db_name)
-    
+    # 3. Aplicar Filtro do Slug (Count Type / KPI)
+    # 🔑 O Q de cada card está definido uma única vez em parcel_sweeper/kpis.py
+    filtro_kpi, nome_padrao = filtro_do_slug(count_type_slug, request.GET)
+    queryset = queryset.filter(filtro_kpi)
+    count_type_name = request.GET.get('name', nome_padrao)
     
-    # 5. Paginação
+    # 4. Paginação
     paginator = Paginator(queryset.order_by('-data_referencia'), 50)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # 6. Parâmetros de filtro para persistência na paginação e botão Voltar
+    # 5. Parâmetros de filtro para persistência na paginação e botão Voltar
     # 🔑 Adiciona o slug obrigatório para o botão Voltar e Paginação
     get_params_copy = request.GET.copy()
     get_params_copy['count_type_slug'] = count_type_slug
@@ -779,7 +417,7 @@ def parcel_detail_list(request, count_type_slug):
     context = {
         'titulo': f'Detalhes: {count_type_name}',
         'page_obj': page_obj,
-        'total_registros': queryset.count(),
+        'total_registros': paginator.count,
         'filter_params': filter_params,
         'count_type_name': count_type_name, 
         'export_url': export_url,
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rastreio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rastreio',
+            name='current_station_received_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Current Station Received (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Delivered (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='delivering_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Delivering (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='lm_hub_receive_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='LM Hub Receive (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='onhold_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='OnHold (data/hora)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='sla_target_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='SLA Target (data/hora)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rastreio', '0002_rastreio_current_station_received_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rastreio',
+            name='data_envio_arquivo',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Data de Envio do Arquivo'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_diaarquivado'),
+        ('rastreio', '0003_alter_rastreio_data_envio_arquivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rastreio',
+            name='current_station_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Current Station)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='destination_hub_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Destination Hub)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='driver_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Driver Name)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='onhold_reason_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (OnHoldReason)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='sort_code_name_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Sort Code Name)'),
+        ),
+        migrations.AddField(
+            model_name='rastreio',
+            name='status_cod',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.valorcategorico', verbose_name='Código (Status)'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# data_envio_arquivo passa a ser obrigatória: todo upload grava a data escolhida no
+# formulário, e uma linha sem data não aparece em nenhum filtro por período nem cabe
+# numa partição por dia (core/migrations/0007).
+# As linhas antigas sem data não são adivinhadas: a migração para e pede a correção.
+
+from django.db import migrations, models
+
+
+def conferir_datas(apps, schema_editor):
+    Rastreio = apps.get_model('rastreio', 'Rastreio')
+    sem_data = Rastreio.objects.filter(data_envio_arquivo__isnull=True).count()
+    if sem_data:
+        raise RuntimeError(
+            f"rastreio.Rastreio: {sem_data} linha(s) sem data_envio_arquivo. "
+            "Preencha ou remova essas linhas antes de migrar."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rastreio', '0004_rastreio_current_station_cod_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(conferir_datas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='rastreio',
+            name='data_envio_arquivo',
+            field=models.DateField(db_index=True, verbose_name='Data de Envio do Arquivo'),
+        ),
+    ]
@@ -2,11 +2,12 @@
 
 from django.db import models
 from django.conf import settings # NOVO: Importe settings
+from core.models import ValorCategorico
 # REMOVIDO: from django.contrib.auth.models import User 
 
 class Rastreio(models.Model):
     # Campos Administrativos
-    data_envio_arquivo = models.DateField(null=True, blank=True, verbose_name="Data de Envio do Arquivo")
+    data_envio_arquivo = models.DateField(db_index=True, verbose_name="Data de Envio do Arquivo")
     data_upload = models.DateTimeField(auto_now_add=True, verbose_name="Data de Upload")
     
     # CORRIGIDO: Referencia o modelo de usuário correto
@@ -69,6 +70,41 @@ class Rastreio(models.Model):
     specical_dg_type = models.CharField(max_length=50, null=True, blank=True, verbose_name="Specical Dg Type")
     damaged_tag = models.CharField(max_length=50, null=True, blank=True, verbose_name="Damaged Tag")
 
+    # --- Datas tipadas (convertidas no upload a partir dos campos texto acima) ---
+    lm_hub_receive_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="LM Hub Receive (data/hora)")
+    current_station_received_at = models.DateTimeField(null=True, blank=True, verbose_name="Current Station Received (data/hora)")
+    delivering_at = models.DateTimeField(null=True, blank=True, verbose_name="Delivering (data/hora)")
+    delivered_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Delivered (data/hora)")
+    onhold_at = models.DateTimeField(null=True, blank=True, verbose_name="OnHold (data/hora)")
+    sla_target_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="SLA Target (data/hora)")
+
+    # --- Códigos inteiros das colunas categóricas (core.dicionario: gravados no upload,
+    #     usados nos GROUP BY dos dashboards) ---
+    status_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Status)"
+    )
+    onhold_reason_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (OnHoldReason)"
+    )
+    driver_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Driver Name)"
+    )
+    sort_code_name_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Sort Code Name)"
+    )
+    destination_hub_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Destination Hub)"
+    )
+    current_station_cod = models.ForeignKey(
+        ValorCategorico, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        editable=False, related_name='+', verbose_name="Código (Current Station)"
+    )
+
     class Meta:
         verbose_name = "Rastreio"
         verbose_name_plural = "Rastreios"
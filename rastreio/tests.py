@@ -1,3 +1,10 @@
-from django.test import TestCase
+from core.testing import CasoOrcamento
 
-# Create your tests here.
+
+class OrcamentoViewsRastreioTest(CasoOrcamento):
+    """Consultas por view do Rastreio (dados de core.sinteticos; login e sessão fora da conta)."""
+
+    ORCAMENTOS = {
+        'dashboard_rastreio': {'url': 'dashboard_rastreio', 'consultas': 6, 'tempo_sql_s': 0.5},
+        'detalhe_rastreio_view': {'url': 'detalhe_rastreio_view', 'consultas': 3},
+    }
@@ -3,6 +3,7 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.http import HttpResponse # Importação necessária para exportação CSV
 import csv # Importação necessária para exportação CSV
 import io
@@ -10,12 +11,17 @@ from datetime import datetime
 from django.db import IntegrityError
 from django.db.models import Count, Q  # Importando Q para filtros complexos
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-import pandas as pd
-import numpy as np
 
 
 from .forms import UploadRastreioForm
 from .models import Rastreio
+from core.dicionario import agrupar, aplicar_codigos, valores_dos_campos
+from core.datas import preencher_datahoras
+from core.cache import resultado_em_cache, registrar_alteracao
+from core.arquivamento import historico
+from core.particoes import copiar
+from sla_analysis.calculo import recalcular_resumo
+from onhold.motoristas import normalizar_motoristas
 
 # Constante para o hub de Muriaé
 MURIAE_HUB = 'LM Hub_MG_Muriaé'
@@ -40,6 +46,11 @@ COLUNA_MODELO_MAP = {
     'Driver Phone': 'driver_phone',
     'LM Hub Receive time': 'lm_hub_receive_time',
     'Current Station Received Time': 'current_station_received_time',
+    'Delivering Time': 'delivering_time',
+    'Delivered Time': 'delivered_time',
+    'OnHold Time': 'onhold_time',
+    'SLA Target Date': 'sla_target_date',
+    'Time to SLA': 'time_to_sla',
     'Current Station': 'current_station',
     'Status': 'status',
     'Return Destination': 'return_destination',
@@ -57,6 +68,8 @@ COLUNA_MODELO_MAP = {
 
 def converter_data_para_db(valor):
     """Converte um valor de data/hora comum para o formato aceito pelo DateField."""
+    import pandas as pd
+
     if pd.isna(valor) or valor in ('', 'N/A'):
         return None
     
@@ -96,7 +109,9 @@ def menu_rastreio(request):
 @login_required
 def upload_csv_rastreio(request):
     """Permite o upload de um arquivo CSV de Rastreio e o processa."""
-    
+    import pandas as pd
+    import numpy as np
+
     # Colunas Mínimas Requeridas para garantir que o arquivo seja válido
     CRITICAL_COLUMNS = ['SLS Tracking Number', 'Order ID', 'Status']
     
@@ -150,8 +165,15 @@ def upload_csv_rastreio(request):
                     # Cria o objeto Rastreio
                     objetos_para_criar.append(Rastreio(**dados_rastreio))
                 
-                # Insere em lote no banco de dados para performance
-                Rastreio.objects.bulk_create(objetos_para_criar, ignore_conflicts=True)
+                # Converte as datas texto em DateTimeField (uma passada vetorizada por coluna)
+                preencher_datahoras(Rastreio, objetos_para_criar)
+                normalizar_motoristas(objetos_para_criar)
+                aplicar_codigos(Rastreio, objetos_para_criar) # Códigos inteiros das colunas categóricas
+
+                # Insere em lote no banco de dados para performance (COPY no PostgreSQL)
+                copiar(Rastreio, objetos_para_criar, ignore_conflicts=True)
+                recalcular_resumo('rastreio', data_envio_arquivo) # Resumo de SLA da data já fica pronto
+                registrar_alteracao(Rastreio) # Invalida o cache do dashboard de rastreio
                 
                 total_processado = len(df)
                 # Adiciona filtro por usuário para precisão, caso haja múltiplos uploads no mesmo dia
@@ -243,35 +265,60 @@ def dashboard_rastreio(request):
         )
     
     # 3. Cálculo de KPIs e Dados Agregados
-    total_registros = queryset.count()
-    
+    # 💡 Em cache: a chave leva os filtros e a versão da tabela Rastreio (incrementada no upload)
+    def calcular():
+        # Total e KPI por Destination Hub (LM Hub_MG_Muriaé vs Outros) numa única varredura
+        totais = queryset.aggregate(
+            total_registros=Count('id'),
+            total_hub_muriae=Count('id', filter=Q(destination_hub=MURIAE_HUB)),
+            total_hub_outros=Count('id', filter=~Q(destination_hub=MURIAE_HUB)),
+        )
+        total_registros = totais['total_registros']
+        total_hub_muriae = totais['total_hub_muriae']
+        total_hub_outros = totais['total_hub_outros']
+
+        # KPI: Total por Status (Top 10 para o card dinâmico)
+        kpis_por_status = agrupar(queryset.exclude(status_cod__isnull=True), 'status', total='count', limite=10)
+
+        # Cálculo de Percentuais
+        percentual_muriae = 0.0
+        percentual_outros = 0.0
+
+        if total_registros > 0:
+            percentual_muriae = round((total_hub_muriae / total_registros) * 100, 1)
+            percentual_outros = round((total_hub_outros / total_registros) * 100, 1)
+
+        return {
+            'total_registros': total_registros,
+            'kpis_por_status': kpis_por_status,
+            'total_hub_muriae': total_hub_muriae,
+            'total_hub_outros': total_hub_outros,
+            'total_hub_diferente_muriae': total_hub_outros,
+            'percentual_muriae': percentual_muriae,
+            'percentual_outros': percentual_outros,
+        }
+
+    filtros_cache = {
+        'q': search_query,
+        'data_inicio': data_inicio_str,
+        'data_fim': data_fim_str,
+        'status_filtro': status_filtro,
+        'hub_filtro': hub_filtro,
+        'somente_excecoes': somente_excecoes or None,
+    }
+    kpis = resultado_em_cache('dashboard_rastreio', filtros_cache, [Rastreio], calcular)
+
     # Lista de opções para os filtros (para popular os dropdowns no template)
-    status_opcoes = Rastreio.objects.values('status').annotate(count=Count('status')).exclude(Q(status__isnull=True) | Q(status='')).order_by('status')
-    destination_hub_opcoes = Rastreio.objects.values('destination_hub').annotate(count=Count('destination_hub')).exclude(Q(destination_hub__isnull=True) | Q(destination_hub='')).order_by('destination_hub')
-    
-    # KPI: Total por Status (Top 10 para o card dinâmico)
-    kpis_por_status = queryset.exclude(Q(status__isnull=True) | Q(status='')).values('status').annotate(
-        count=Count('status')
-    ).order_by('-count')[:10]
-    
-    
-    # KPI: Total por Destination Hub (LM Hub_MG_Muriaé vs Outros)
-    total_hub_muriae = queryset.filter(destination_hub=MURIAE_HUB).count()
-    total_hub_outros = queryset.exclude(destination_hub=MURIAE_HUB).count()
-    total_hub_diferente_muriae = total_hub_outros
-    
-    # Cálculo de Percentuais
-    percentual_muriae = 0.0
-    percentual_outros = 0.0
-    
-    if total_registros > 0:
-        percentual_muriae = round((total_hub_muriae / total_registros) * 100, 1)
-        percentual_outros = round((total_hub_outros / total_registros) * 100, 1)
+    # 💡 Lidas do dicionário de valores (sem GROUP BY na tabela inteira)
+    opcoes = valores_dos_campos(Rastreio, ['status', 'destination_hub'])
+    status_opcoes = [{'status': s} for s in opcoes['status']]
+    destination_hub_opcoes = [{'destination_hub': h} for h in opcoes['destination_hub']]
 
 
     # 4. Paginação dos Dados da Tabela
     page = request.GET.get('page', 1)
     paginator = Paginator(queryset.order_by('-data_upload'), REGISTROS_POR_PAGINA) # Ordena pelo mais recente
+    paginator.count = kpis['total_registros'] # 💡 Reaproveita o total em cache (evita outro COUNT)
     
     try:
         dados_paginados = paginator.page(page)
@@ -327,16 +374,8 @@ def dashboard_rastreio(request):
         'status_opcoes': status_opcoes,
         'destination_hub_opcoes': destination_hub_opcoes,
         
-        # KPIs
-        'total_registros': total_registros,
-        'kpis_por_status': kpis_por_status,
-        
-        # KPIs Muriaé vs Outros
-        'total_hub_muriae': total_hub_muriae,
-        'total_hub_outros': total_hub_outros,
-        'percentual_muriae': percentual_muriae,
-        'percentual_outros': percentual_outros,
-        'total_hub_diferente_muriae': total_hub_diferente_muriae,
+        # KPIs (total, status e Muriaé vs Outros)
+        **kpis,
         
         # Paginação
         'dados_tabela': dados_tabela,
@@ -454,9 +493,12 @@ def exportar_csv_rastreio(request):
     status_filtro = request.GET.get('status_filtro')
     hub_filtro = request.GET.get('hub_filtro')
     somente_excecoes = request.GET.get('somente_excecoes') == 'on'
+    # Consulta histórica: inclui os dias já arquivados (core/arquivamento.py)
+    incluir_arquivo = request.GET.get('incluir_arquivo') == 'on'
 
     queryset = Rastreio.objects.all()
     filtros_q = Q()
+    data_inicio = data_fim = None
     
     if data_inicio_str:
         try:
@@ -482,11 +524,19 @@ def exportar_csv_rastreio(request):
         filtros_q &= Q(status__iexact='LMHub_Received') & ~Q(destination_hub__iexact=MURIAE_HUB)
 
     # 2. Filtrar dados
-    dados_para_exportar = queryset.filter(filtros_q).values_list(
-        'order_id', 'sls_tracking_number', 'shopee_order_sn', 'status', 
-        'current_station', 'destination_hub', 'data_envio_arquivo', 
-        'data_upload', 'usuario_upload__username' 
-    )
+    campos = [
+        'order_id', 'sls_tracking_number', 'shopee_order_sn', 'status',
+        'current_station', 'destination_hub', 'data_envio_arquivo', 'data_upload',
+    ]
+    if incluir_arquivo:
+        # O mesmo filtro na tabela e nos arquivos do período; o usuário vem de um dicionário id -> username
+        usuarios = dict(get_user_model().objects.values_list('id', 'username'))
+        dados_para_exportar = (
+            [linha[campo] for campo in campos] + [usuarios.get(linha['usuario_upload_id'])]
+            for linha in historico(Rastreio, filtros_q, campos + ['usuario_upload_id'], data_inicio, data_fim)
+        )
+    else:
+        dados_para_exportar = queryset.filter(filtros_q).values_list(*campos, 'usuario_upload__username')
     
     # 3. Preparar a Resposta HTTP
     response = HttpResponse(
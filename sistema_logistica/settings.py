@@ -62,11 +62,13 @@ INSTALLED_APPS = [
     'conferencia',
     'apresentacao',
     'logistica',
+    'sla_analysis',
 
     # ------------------------------
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentacaoMiddleware',  # Primeiro: mede a requisição inteira
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,8 +76,31 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.LeituraSeparadaMiddleware',  # Dashboards/exportações leem pela conexão 'leitura'
 ]
 
+# Instrumentação por requisição (core/instrumentacao.py): painel em /instrumentacao/
+# e métricas Prometheus em /metrics. Os demais padrões estão em instrumentacao.PADRAO.
+INSTRUMENTACAO = {
+    'ativa': True,
+    # Fração das requisições medidas: todas em desenvolvimento, 5% em produção
+    'amostragem': 1.0 if DEBUG else 0.05,
+    'lenta_s': 1.0,
+    'limite_n_mais_um': 10,
+    # Consultas lentas por impressão digital (core/consultas_lentas.py), gravadas a cada minuto
+    'consulta_lenta_s': 0.1,
+    'pasta_consultas_lentas': BASE_DIR / 'logs' / 'consultas_lentas',
+    # /metrics: staff ou o coletor com 'Authorization: Bearer <METRICAS_TOKEN>'
+    'metricas_token': os.environ.get('METRICAS_TOKEN') or None,
+}
+
+# Retenção das tabelas de fatos (core/arquivamento.py, comando arquivar_historico): os dias
+# mais antigos que a política de cada modelo vão para CSVs compactados nesta pasta.
+# As políticas padrão estão em arquivamento.PADRAO.
+ARQUIVAMENTO = {
+    'pasta': BASE_DIR / 'arquivo',
+}
+
 ROOT_URLCONF = 'sistema_logistica.urls'
 
 TEMPLATES = [
@@ -103,11 +128,72 @@ WSGI_APPLICATION = 'sistema_logistica.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# 'leitura': conexão só de leitura dos dashboards, listas e exportações (core/roteamento.py).
+# No SQLite é o mesmo arquivo aberto com mode=ro, e o 'default' fica em WAL para que os
+# leitores não esperem pelo lock dos uploads. No PostgreSQL, aponte 'leitura' para a réplica.
+# Perfil PostgreSQL: BANCO=postgresql (+ POSTGRES_DB/USER/PASSWORD/HOST/PORT e, se houver
+# réplica, POSTGRES_HOST_LEITURA). As tabelas de fatos ficam particionadas por dia e os
+# uploads carregam com COPY (core/particoes.py). Sem BANCO, o projeto segue no SQLite.
+if os.environ.get('BANCO') == 'postgresql':
+    _POSTGRES = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'sistema_logistica'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
     }
+    DATABASES = {
+        'default': _POSTGRES,
+        'leitura': {
+            **_POSTGRES,
+            'HOST': os.environ.get('POSTGRES_HOST_LEITURA', _POSTGRES['HOST']),
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {'init_command': 'PRAGMA journal_mode=WAL'},
+        },
+        'leitura': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': (BASE_DIR / 'db.sqlite3').as_uri() + '?mode=ro',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+
+DATABASE_ROUTERS = ['core.roteamento.RoteadorLeitura']
+
+# Views cujas leituras vão para 'leitura' (nomes de rota; padrões em roteamento.PADRAO)
+BANCO_LEITURA = {
+    'ativa': True,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'dashboards': resultados agregados dos dashboards (ver core/cache.py).
+# Sem TTL: a chave inclui a versão das tabelas, então a invalidação é feita
+# pelos uploads. MAX_ENTRIES limita a memória; o LocMemCache descarta as
+# entradas menos usadas recentemente (LRU), CULL_FREQUENCY=10 -> 10% por vez.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'padrao',
+    },
+    'dashboards': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboards',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+            'CULL_FREQUENCY': 10,
+        },
+    },
 }
 
 
@@ -26,6 +26,7 @@ urlpatterns = [
     path('conferencia/', include('conferencia.urls', namespace='conferencia')),
     path('apresentacao/', include('apresentacao.urls')),
     path('logistica/', include('logistica.urls')),
+    path('sla/', include('sla_analysis.urls')),
    
     # Rota do painel de administração
     path('admin/', admin.site.urls),
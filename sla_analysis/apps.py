@@ -0,0 +1,9 @@
+# sla_analysis/apps.py
+
+from django.apps import AppConfig
+
+
+class SlaAnalysisConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sla_analysis'
+    verbose_name = 'Análise de SLA'
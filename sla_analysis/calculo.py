@@ -0,0 +1,195 @@
+# sla_analysis/calculo.py
+#
+# Cálculo das faixas de SLA (vencido, vence em <24h, vence em 24-48h, no prazo, sem SLA)
+# sobre os campos tipados sla_target_at / delivered_at de Rastreio e OnholdInicial.
+# O resultado é gravado em ResumoSLA por data de upload, motorista e sort code;
+# os dashboards só leem o resumo (são views só de leitura, roteadas para o alias
+# 'leitura'). Quem grava mantém o resumo em dia:
+# - o upload da data chama recalcular_resumo();
+# - o que muda linhas fora do upload (normalização de motoristas, restauração do
+#   arquivo, limpeza do benchmark) chama garantir_resumos(), ou o comando
+#   recalcular_sla roda depois. Ele compara contagem e maior id por data com a
+#   tabela de origem, então também pega uma recarga com o mesmo número de linhas;
+# - os dias arquivados (core.arquivamento) saem da tabela, mas o resumo fica: é o
+#   histórico que o arquivo deve preservar.
+
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from core.models import DiaArquivado
+
+from onhold.models import OnholdInicial
+from rastreio.models import Rastreio
+from .models import ProcessamentoSLA, ResumoSLA
+
+
+# Fontes de dados: modelo e campo com a data do upload
+FONTES = {
+    'rastreio': {'modelo': Rastreio, 'campo_data': 'data_envio_arquivo'},
+    'onhold_inicial': {'modelo': OnholdInicial, 'campo_data': 'data_envio'},
+}
+
+FAIXAS = ['vencidos', 'vence_24h', 'vence_48h', 'no_prazo', 'sem_sla']
+
+
+def instante_referencia(data):
+    """Fim do dia de referência: o resumo é a 'foto' do arquivo daquela data."""
+    return timezone.make_aware(datetime.combine(data + timedelta(days=1), dtime.min))
+
+
+def classificar_faixas(sla_target, delivered, referencia):
+    """
+    Classifica cada pacote numa faixa de SLA (tudo vetorizado, sem laço Python).
+    - Entregue: vencido se entregou depois do alvo, senão no prazo.
+    - Em aberto: pelo tempo que falta até o alvo no instante de referência.
+    Retorna um dict {faixa: array booleano}.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Tudo em UTC 'naive' (datetime64) para a aritmética do numpy
+    alvo = pd.to_datetime(pd.Series(sla_target, dtype='object'), utc=True).dt.tz_localize(None).to_numpy()
+    entregue = pd.to_datetime(pd.Series(delivered, dtype='object'), utc=True).dt.tz_localize(None).to_numpy()
+    ref = np.datetime64(pd.Timestamp(referencia).tz_convert('UTC').tz_localize(None))
+
+    sem_sla = np.isnat(alvo)
+    foi_entregue = ~np.isnat(entregue)
+    horas_restantes = (alvo - ref) / np.timedelta64(1, 'h')
+
+    # Comparações com NaT retornam False, então os 'sem SLA' nunca caem nas outras faixas
+    vencidos = ~sem_sla & np.where(foi_entregue, entregue > alvo, horas_restantes < 0)
+    aberto = ~sem_sla & ~foi_entregue & ~vencidos
+    vence_24h = aberto & (horas_restantes < 24)
+    vence_48h = aberto & (horas_restantes >= 24) & (horas_restantes < 48)
+    no_prazo = ~sem_sla & ~vencidos & ~vence_24h & ~vence_48h
+
+    return {
+        'vencidos': vencidos,
+        'vence_24h': vence_24h,
+        'vence_48h': vence_48h,
+        'no_prazo': no_prazo,
+        'sem_sla': sem_sla,
+    }
+
+
+def recalcular_resumo(fonte, data):
+    """(Re)calcula o resumo de SLA de uma fonte para uma data de upload."""
+    import numpy as np
+    import pandas as pd
+
+    config = FONTES[fonte]
+    inicio = time.perf_counter()
+
+    # 1. Uma única leitura com só as colunas necessárias (o id marca a versão da data)
+    linhas = list(
+        config['modelo'].objects
+        .filter(**{config['campo_data']: data})
+        .values_list('pk', 'driver_name', 'sort_code_name', 'sla_target_at', 'delivered_at')
+    )
+
+    resumos = []
+    if linhas:
+        df = pd.DataFrame.from_records(linhas, columns=['pk', 'driver_name', 'sort_code_name', 'sla_target_at', 'delivered_at'])
+        faixas = classificar_faixas(df['sla_target_at'], df['delivered_at'], instante_referencia(data))
+
+        # 2. Agrupa por motorista / sort code somando as faixas.
+        #    A limpeza dos nomes é feita depois do 1º agrupamento (sobre poucas linhas).
+        chaves = df[['driver_name', 'sort_code_name']].fillna('')
+        for faixa, valores in faixas.items():
+            chaves[faixa] = valores.astype(np.int64)
+        chaves['total'] = 1
+        agrupado = chaves.groupby(['driver_name', 'sort_code_name'], sort=False).sum().reset_index()
+        for coluna in ('driver_name', 'sort_code_name'):
+            agrupado[coluna] = agrupado[coluna].astype(str).str.strip().str[:100]
+        agrupado = agrupado.groupby(['driver_name', 'sort_code_name'], sort=False).sum()
+
+        resumos = [
+            ResumoSLA(
+                fonte=fonte,
+                data_referencia=data,
+                driver_name=driver_name,
+                sort_code_name=sort_code_name,
+                **{campo: int(valor) for campo, valor in contagens.items()},
+            )
+            for (driver_name, sort_code_name), contagens in agrupado.to_dict('index').items()
+        ]
+
+    # 3. Substitui o resumo da data de forma atômica
+    with transaction.atomic():
+        ResumoSLA.objects.filter(fonte=fonte, data_referencia=data).delete()
+        ResumoSLA.objects.bulk_create(resumos, batch_size=1000)
+        ProcessamentoSLA.objects.update_or_create(
+            fonte=fonte,
+            data_referencia=data,
+            defaults={
+                'total_registros': len(linhas),
+                'ultimo_id': int(df['pk'].max()) if linhas else None,
+                'duracao_ms': int((time.perf_counter() - inicio) * 1000),
+            },
+        )
+
+
+def invalidar_resumo(fonte, data=None):
+    """Descarta o resumo de uma data (ou de todas) para ser recalculado na próxima consulta."""
+    filtros = {'fonte': fonte}
+    if data is not None:
+        filtros['data_referencia'] = data
+    with transaction.atomic():
+        ResumoSLA.objects.filter(**filtros).delete()
+        ProcessamentoSLA.objects.filter(**filtros).delete()
+
+
+def garantir_resumos(fonte, data_inicio=None, data_fim=None, forcar=False):
+    """
+    Deixa o resumo do período (sem datas: todas) coerente com a tabela de origem.
+    Chamar depois de gravações, nunca numa view de leitura:
+    - calcula as datas com dados e sem resumo;
+    - recalcula as datas cuja contagem ou maior id mudou desde o cálculo (exclusão,
+      recarga, mesmo com o mesmo número de linhas); com forcar, todas as datas com dados;
+    - descarta o resumo das datas sem dados que foram excluídas. As arquivadas
+      (DiaArquivado) mantêm o resumo.
+    Devolve quantas datas foram recalculadas.
+    """
+    config = FONTES[fonte]
+    campo_data = config['campo_data']
+    processamentos = ProcessamentoSLA.objects.filter(fonte=fonte)
+    origem = config['modelo'].objects.all()
+    if data_inicio:
+        processamentos = processamentos.filter(data_referencia__gte=data_inicio)
+        origem = origem.filter(**{f'{campo_data}__gte': data_inicio})
+    if data_fim:
+        processamentos = processamentos.filter(data_referencia__lte=data_fim)
+        origem = origem.filter(**{f'{campo_data}__lte': data_fim})
+
+    calculadas = {
+        data: (total, ultimo_id)
+        for data, total, ultimo_id in processamentos.values_list('data_referencia', 'total_registros', 'ultimo_id')
+    }
+    com_dados = {
+        data: (total, ultimo_id)
+        for data, total, ultimo_id in origem.exclude(**{f'{campo_data}__isnull': True})
+        .values(campo_data)
+        .annotate(total=Count('id'), ultimo_id=Max('id'))
+        .order_by()
+        .values_list(campo_data, 'total', 'ultimo_id')
+    }
+
+    recalculadas = 0
+    for data in sorted(com_dados):
+        if forcar or calculadas.get(data) != com_dados[data]:
+            recalcular_resumo(fonte, data)
+            recalculadas += 1
+
+    sem_dados = set(calculadas) - set(com_dados)
+    arquivadas = set(
+        DiaArquivado.objects
+        .filter(tabela=config['modelo']._meta.label, dia__in=sem_dados)
+        .values_list('dia', flat=True)
+    ) if sem_dados else set()
+    for data in sorted(sem_dados - arquivadas):
+        invalidar_resumo(fonte, data)
+    return recalculadas
@@ -0,0 +1,45 @@
+# sla_analysis/forms.py
+
+from django import forms
+
+from .models import FONTE_CHOICES
+
+
+class FiltroSLAForm(forms.Form):
+    fonte = forms.ChoiceField(
+        label='Fonte',
+        choices=FONTE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    data_inicio = forms.DateField(
+        label='Data de Início',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+        required=False
+    )
+    data_fim = forms.DateField(
+        label='Data de Fim',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+        required=False
+    )
+    driver_name = forms.CharField(
+        label='Motorista',
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nome do motorista'})
+    )
+    sort_code_name = forms.CharField(
+        label='Sort Code',
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Sort code'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        data_inicio = cleaned_data.get("data_inicio")
+        data_fim = cleaned_data.get("data_fim")
+
+        if data_inicio and data_fim and data_inicio > data_fim:
+            raise forms.ValidationError(
+                "A Data de Início não pode ser posterior à Data de Fim."
+            )
+        return cleaned_data
@@ -0,0 +1,34 @@
+# sla_analysis/management/commands/recalcular_sla.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sla_analysis.calculo import FONTES, garantir_resumos
+
+
+def _data(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Data inválida: {texto} (use AAAA-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza o resumo de SLA (ResumoSLA) com a tabela de origem: calcula as datas sem resumo, "
+        "recalcula as que mudaram (contagem ou maior id) e descarta as excluídas. Os dias arquivados "
+        "mantêm o resumo. Rode depois de gravações fora do upload; os dashboards não recalculam."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fonte', action='append', choices=list(FONTES),
+                            help="Fonte a atualizar (pode repetir; padrão: todas).")
+        parser.add_argument('--inicio', type=_data, help="Primeira data, AAAA-MM-DD (padrão: sem limite).")
+        parser.add_argument('--fim', type=_data, help="Última data, AAAA-MM-DD (padrão: sem limite).")
+        parser.add_argument('--forcar', action='store_true', help="Recalcula todas as datas com dados.")
+
+    def handle(self, *args, **options):
+        for fonte in options['fonte'] or list(FONTES):
+            recalculadas = garantir_resumos(fonte, options['inicio'], options['fim'], forcar=options['forcar'])
+            self.stdout.write(self.style.SUCCESS(f"{fonte}: {recalculadas} data(s) recalculada(s)."))
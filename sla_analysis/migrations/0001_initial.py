@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessamentoSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fonte', models.CharField(choices=[('rastreio', 'Rastreio'), ('onhold_inicial', 'OnHold Inicial')], max_length=20, verbose_name='Fonte')),
+                ('data_referencia', models.DateField(verbose_name='Data de Referência (Upload)')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Total de Registros')),
+                ('duracao_ms', models.IntegerField(default=0, verbose_name='Duração do Cálculo (ms)')),
+                ('calculado_em', models.DateTimeField(auto_now=True, verbose_name='Calculado em')),
+            ],
+            options={
+                'verbose_name': 'Processamento de SLA',
+                'verbose_name_plural': 'Processamentos de SLA',
+                'constraints': [models.UniqueConstraint(fields=('fonte', 'data_referencia'), name='unique_processamento_sla')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fonte', models.CharField(choices=[('rastreio', 'Rastreio'), ('onhold_inicial', 'OnHold Inicial')], max_length=20, verbose_name='Fonte')),
+                ('data_referencia', models.DateField(verbose_name='Data de Referência (Upload)')),
+                ('driver_name', models.CharField(blank=True, default='', max_length=100, verbose_name='Motorista')),
+                ('sort_code_name', models.CharField(blank=True, default='', max_length=100, verbose_name='Sort Code')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('vencidos', models.IntegerField(default=0, verbose_name='SLA Vencido')),
+                ('vence_24h', models.IntegerField(default=0, verbose_name='Vence em < 24h')),
+                ('vence_48h', models.IntegerField(default=0, verbose_name='Vence em 24h-48h')),
+                ('no_prazo', models.IntegerField(default=0, verbose_name='No Prazo (> 48h ou entregue no prazo)')),
+                ('sem_sla', models.IntegerField(default=0, verbose_name='Sem SLA Informado')),
+            ],
+            options={
+                'verbose_name': 'Resumo de SLA',
+                'verbose_name_plural': 'Resumos de SLA',
+                'indexes': [models.Index(fields=['fonte', 'data_referencia'], name='sla_analysi_fonte_28a4fc_idx')],
+            },
+        ),
+    ]
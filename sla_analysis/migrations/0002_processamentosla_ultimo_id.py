@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sla_analysis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processamentosla',
+            name='ultimo_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Maior ID na Origem'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# sla_analysis/models.py
+
+from django.db import models
+
+
+FONTE_CHOICES = [
+    ('rastreio', 'Rastreio'),
+    ('onhold_inicial', 'OnHold Inicial'),
+]
+
+
+class ProcessamentoSLA(models.Model):
+    """
+    Marca que o resumo de SLA de uma fonte/data já foi calculado, com a contagem e o
+    maior id das linhas de origem naquele momento (garantir_resumos compara os dois).
+    """
+    fonte = models.CharField(max_length=20, choices=FONTE_CHOICES, verbose_name="Fonte")
+    data_referencia = models.DateField(verbose_name="Data de Referência (Upload)")
+    total_registros = models.IntegerField(default=0, verbose_name="Total de Registros")
+    ultimo_id = models.BigIntegerField(null=True, blank=True, verbose_name="Maior ID na Origem")
+    duracao_ms = models.IntegerField(default=0, verbose_name="Duração do Cálculo (ms)")
+    calculado_em = models.DateTimeField(auto_now=True, verbose_name="Calculado em")
+
+    class Meta:
+        verbose_name = "Processamento de SLA"
+        verbose_name_plural = "Processamentos de SLA"
+        constraints = [
+            models.UniqueConstraint(fields=['fonte', 'data_referencia'], name='unique_processamento_sla')
+        ]
+
+    def __str__(self):
+        return f"{self.get_fonte_display()} - {self.data_referencia}"
+
+
+class ResumoSLA(models.Model):
+    """Contagem por faixa de SLA, por data de upload, motorista e sort code."""
+    fonte = models.CharField(max_length=20, choices=FONTE_CHOICES, verbose_name="Fonte")
+    data_referencia = models.DateField(verbose_name="Data de Referência (Upload)")
+    driver_name = models.CharField(max_length=100, blank=True, default='', verbose_name="Motorista")
+    sort_code_name = models.CharField(max_length=100, blank=True, default='', verbose_name="Sort Code")
+
+    total = models.IntegerField(default=0, verbose_name="Total")
+    vencidos = models.IntegerField(default=0, verbose_name="SLA Vencido")
+    vence_24h = models.IntegerField(default=0, verbose_name="Vence em < 24h")
+    vence_48h = models.IntegerField(default=0, verbose_name="Vence em 24h-48h")
+    no_prazo = models.IntegerField(default=0, verbose_name="No Prazo (> 48h ou entregue no prazo)")
+    sem_sla = models.IntegerField(default=0, verbose_name="Sem SLA Informado")
+
+    class Meta:
+        verbose_name = "Resumo de SLA"
+        verbose_name_plural = "Resumos de SLA"
+        indexes = [
+            models.Index(fields=['fonte', 'data_referencia']),
+        ]
+
+    def __str__(self):
+        return f"{self.data_referencia} - {self.driver_name or '(sem motorista)'}: {self.vencidos} vencidos"
@@ -0,0 +1,97 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import DiaArquivado
+from rastreio.models import Rastreio
+
+from .calculo import classificar_faixas, garantir_resumos, instante_referencia
+from .models import ProcessamentoSLA, ResumoSLA
+
+DIA = date(2031, 1, 1)
+REFERENCIA = instante_referencia(DIA)
+
+
+class ClassificarFaixasTest(SimpleTestCase):
+    """Limites das faixas de SLA (cada pacote cai em exatamente uma faixa)."""
+
+    def _faixas(self, alvo, entregue=None):
+        faixas = classificar_faixas([alvo], [entregue], REFERENCIA)
+        marcadas = [faixa for faixa, valores in faixas.items() if valores[0]]
+        self.assertEqual(len(marcadas), 1, marcadas)
+        return marcadas[0]
+
+    def test_em_aberto_pelas_horas_restantes(self):
+        hora = timedelta(hours=1)
+        self.assertEqual(self._faixas(REFERENCIA - timedelta(seconds=1)), 'vencidos')
+        self.assertEqual(self._faixas(REFERENCIA), 'vence_24h')
+        self.assertEqual(self._faixas(REFERENCIA + 24 * hora - timedelta(seconds=1)), 'vence_24h')
+        self.assertEqual(self._faixas(REFERENCIA + 24 * hora), 'vence_48h')
+        self.assertEqual(self._faixas(REFERENCIA + 48 * hora - timedelta(seconds=1)), 'vence_48h')
+        self.assertEqual(self._faixas(REFERENCIA + 48 * hora), 'no_prazo')
+
+    def test_entregue_compara_com_o_alvo(self):
+        alvo = REFERENCIA - timedelta(days=2)
+        self.assertEqual(self._faixas(alvo, entregue=alvo), 'no_prazo')
+        self.assertEqual(self._faixas(alvo, entregue=alvo + timedelta(seconds=1)), 'vencidos')
+        # Entregue antes do alvo não entra nas faixas 'vence em', mesmo com o alvo próximo
+        self.assertEqual(self._faixas(REFERENCIA + timedelta(hours=1), entregue=REFERENCIA), 'no_prazo')
+
+    def test_sem_alvo(self):
+        self.assertEqual(self._faixas(None), 'sem_sla')
+        self.assertEqual(self._faixas(None, entregue=REFERENCIA), 'sem_sla')
+
+
+class GarantirResumosTest(TestCase):
+    """O resumo acompanha exclusões e novas linhas da tabela de origem."""
+
+    def setUp(self):
+        self.alvo = timezone.make_aware(datetime(2030, 12, 31, 12))
+        Rastreio.objects.bulk_create(
+            [Rastreio(data_envio_arquivo=DIA, driver_name='Ana', sla_target_at=self.alvo) for _ in range(3)]
+        )
+        garantir_resumos('rastreio', DIA, DIA)
+
+    def _vencidos(self):
+        return sum(ResumoSLA.objects.filter(fonte='rastreio', data_referencia=DIA).values_list('vencidos', flat=True))
+
+    def test_recalcula_quando_a_contagem_muda(self):
+        self.assertEqual(self._vencidos(), 3)
+        Rastreio.objects.filter(pk=Rastreio.objects.first().pk).delete()
+
+        garantir_resumos('rastreio', DIA, DIA)
+        self.assertEqual(self._vencidos(), 2)
+
+    def test_descarta_data_sem_dados(self):
+        Rastreio.objects.filter(data_envio_arquivo=DIA).delete()
+
+        garantir_resumos('rastreio', DIA, DIA)
+        self.assertFalse(ResumoSLA.objects.filter(data_referencia=DIA).exists())
+        self.assertFalse(ProcessamentoSLA.objects.filter(data_referencia=DIA).exists())
+
+    def test_recalcula_recarga_com_o_mesmo_tamanho(self):
+        # Troca uma linha vencida por uma sem SLA: a contagem não muda, o maior id sim
+        Rastreio.objects.filter(pk=Rastreio.objects.first().pk).delete()
+        Rastreio.objects.create(data_envio_arquivo=DIA, driver_name='Ana')
+
+        self.assertEqual(garantir_resumos('rastreio', DIA, DIA), 1)
+        self.assertEqual(self._vencidos(), 2)
+
+    def test_mantem_resumo_de_dia_arquivado(self):
+        Rastreio.objects.filter(data_envio_arquivo=DIA).delete()
+        DiaArquivado.objects.create(tabela='rastreio.Rastreio', dia=DIA, linhas=3)
+
+        garantir_resumos('rastreio', DIA, DIA)
+        self.assertEqual(self._vencidos(), 3)
+
+    def test_dashboard_nao_grava(self):
+        self.client.force_login(get_user_model().objects.create_user('sla', password='sla'))
+        Rastreio.objects.filter(data_envio_arquivo=DIA).delete()
+
+        resposta = self.client.get(reverse('sla_analysis:dashboard'), {'fonte': 'rastreio'})
+        self.assertEqual(resposta.status_code, 200)
+        # O GET só lê: o resumo velho fica até alguém gravar ou rodar recalcular_sla
+        self.assertEqual(self._vencidos(), 3)
@@ -0,0 +1,12 @@
+# sla_analysis/urls.py
+
+from django.urls import path
+from . import views
+
+app_name = 'sla_analysis'
+
+urlpatterns = [
+    path('', views.dashboard_sla, name='dashboard'),
+    path('exportar/', views.exportar_sla_csv, name='exportar_csv'),
+    path('recalcular/', views.recalcular_sla, name='recalcular'),
+]
@@ -0,0 +1,117 @@
+# sla_analysis/views.py
+
+import csv
+import json
+from datetime import timedelta
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db.models import Max, Sum
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from .calculo import FAIXAS, FONTES, garantir_resumos
+from .forms import FiltroSLAForm
+from .models import ResumoSLA
+
+DIAS_PADRAO = 30
+
+
+def _filtros_sla(request):
+    """
+    Lê o formulário de filtro e devolve (form, fonte, data_inicio, data_fim, queryset de ResumoSLA).
+    Período padrão: últimos 30 dias até a data mais recente com dados.
+    """
+    form = FiltroSLAForm(request.GET or None)
+    dados = form.cleaned_data if form.is_valid() else {}
+
+    fonte = dados.get('fonte') or 'rastreio'
+    config = FONTES[fonte]
+
+    data_fim = dados.get('data_fim')
+    if not data_fim:
+        data_fim = (
+            config['modelo'].objects.aggregate(ultima=Max(config['campo_data']))['ultima']
+            or timezone.localdate()
+        )
+    data_inicio = dados.get('data_inicio') or (data_fim - timedelta(days=DIAS_PADRAO - 1))
+
+    # Só leitura: o resumo é mantido por quem grava (upload, comando recalcular_sla)
+    resumos = ResumoSLA.objects.filter(fonte=fonte, data_referencia__range=(data_inicio, data_fim))
+    if dados.get('driver_name'):
+        resumos = resumos.filter(driver_name__icontains=dados['driver_name'].strip())
+    if dados.get('sort_code_name'):
+        resumos = resumos.filter(sort_code_name__icontains=dados['sort_code_name'].strip())
+
+    return form, fonte, data_inicio, data_fim, resumos
+
+
+@login_required
+def dashboard_sla(request):
+    """Dashboard de faixas de SLA por dia, motorista e sort code."""
+    form, fonte, data_inicio, data_fim, resumos = _filtros_sla(request)
+
+    somas = {faixa: Sum(faixa) for faixa in FAIXAS}
+    somas['total'] = Sum('total')
+
+    # 1. KPIs do período
+    totais = {chave: valor or 0 for chave, valor in resumos.aggregate(**somas).items()}
+
+    # 2. Série diária (gráfico empilhado)
+    por_dia = list(resumos.values('data_referencia').annotate(**somas).order_by('data_referencia'))
+    chart_labels = [linha['data_referencia'].strftime('%d/%m') for linha in por_dia]
+    chart_series = {faixa: [linha[faixa] or 0 for linha in por_dia] for faixa in FAIXAS}
+
+    # 3. Rankings (Top 20 por SLA vencido)
+    por_motorista = resumos.values('driver_name').annotate(**somas).order_by('-vencidos', '-vence_24h')[:20]
+    por_sort_code = resumos.values('sort_code_name').annotate(**somas).order_by('-vencidos', '-vence_24h')[:20]
+
+    context = {
+        'titulo': 'Análise de SLA',
+        'form': form,
+        'fonte': fonte,
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        'totais': totais,
+        'por_motorista': por_motorista,
+        'por_sort_code': por_sort_code,
+        'chart_labels': json.dumps(chart_labels),
+        'chart_series': json.dumps(chart_series),
+        'query_string': request.GET.urlencode(),
+    }
+    return render(request, 'sla_analysis/dashboard_sla.html', context)
+
+
+@login_required
+def exportar_sla_csv(request):
+    """Exporta o resumo de SLA (por dia, motorista e sort code) do filtro atual."""
+    form, fonte, data_inicio, data_fim, resumos = _filtros_sla(request)
+
+    response = HttpResponse(content_type='text/csv')
+    nome_arquivo = f"sla_{fonte}_{data_inicio.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+
+    writer = csv.writer(response)
+    writer.writerow([
+        'Data', 'Motorista', 'Sort Code', 'Total', 'SLA Vencido',
+        'Vence < 24h', 'Vence 24h-48h', 'No Prazo', 'Sem SLA',
+    ])
+    colunas = ['data_referencia', 'driver_name', 'sort_code_name', 'total', *FAIXAS]
+    for linha in resumos.order_by('data_referencia', '-vencidos').values_list(*colunas).iterator():
+        writer.writerow([linha[0].strftime('%d/%m/%Y'), *linha[1:]])
+
+    return response
+
+
+@login_required
+def recalcular_sla(request):
+    """Recalcula todo o resumo de SLA da fonte (ex.: após o backfill de datas)."""
+    if request.method == 'POST':
+        fonte = request.POST.get('fonte') or 'rastreio'
+        if fonte in FONTES:
+            recalculadas = garantir_resumos(fonte, forcar=True)
+            messages.success(request, f'Resumo de SLA recalculado ({recalculadas} datas).')
+        else:
+            messages.error(request, 'Fonte inválida.')
+    return redirect(request.META.get('HTTP_REFERER', 'sla_analysis:dashboard'))